@@ -1,13 +1,25 @@
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from tortoise import Tortoise
 from tortoise.contrib.fastapi import register_tortoise
 from src.interface_adapters.api.auth import router as auth_router
 from src.interface_adapters.api.chats import router as chats_router
-from src.interface_adapters.api.messages import router as messages_router
+from src.interface_adapters.api.messages import message_router, router as messages_router
 from src.infrastructure.db.config import TORTOISE_ORM
+from src.infrastructure.db.sharding import ensure_shard_schemas
 
-app = FastAPI(title="ChatBrancher API", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """register_tortoiseによる初期化の後に、シャードにもテーブルを作成する"""
+    if Tortoise._inited:
+        await ensure_shard_schemas()
+    yield
+
+
+app = FastAPI(title="ChatBrancher API", version="0.1.0", lifespan=lifespan)
 
 # CORS設定
 app.add_middleware(
@@ -19,12 +31,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # ルーターを登録
 app.include_router(auth_router)
 app.include_router(chats_router)
 app.include_router(messages_router)
+app.include_router(message_router)
 
 
 @app.get("/")
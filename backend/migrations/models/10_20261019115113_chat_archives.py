@@ -0,0 +1,98 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "chat_archives" (
+    "data" BLOB NOT NULL,
+    "message_count" INT NOT NULL,
+    "archived_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "chat_tree_id" CHAR(36) NOT NULL PRIMARY KEY REFERENCES "chat_tree_detail" ("uuid") ON DELETE CASCADE
+) /* アーカイブしたチャットのメッセージ（コールドストレージ） */;
+        ALTER TABLE "chat_tree_detail" ADD "archived_at" TIMESTAMP;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "chat_tree_detail" DROP COLUMN "archived_at";
+        DROP TABLE IF EXISTS "chat_archives";"""
+
+
+MODELS_STATE = (
+    "eJztXWtv2zgW/SuGP3WATiHrrWCxgJO4M97JY5A4uzPTDAxKohJvbcm15LbZQf/78pKUSD"
+    "0tJU5qT5wPhiPykpeHz3t4r/xXfxH5eB6/G8bxLE5QmJzjOEZ3+BQnaDbvH/X+6odogcmX"
+    "DTnf9vpouRT54EGC3DkVRanMdMGEpj6VormQGycr5CUkY4DmMSaPfBx7q9kymUUhiN+uNQ"
+    "Wp8Ola9NOhnwF8Bhp8ejZ84gH9Tp+4Lk316HeaauLbtY0skmr5mnK7NhXPuF0btkakgkCx"
+    "z87Ob9eOARU5isqKtaRCAprNAZX9yCM6z8K7ndPuNrwNhwnRzV0nOD66DXvkj4N+1CMFug"
+    "GpyAh8KmVQVW13s3pYFTVil6k0YMUNUr30wFNTLaDa5Sr6PPPx6qhHldcUn4n79LtCcdNp"
+    "sUpanaErPtcZRtEUxh6orQcWaaBlqFQZg5ZjBLzYom6iEKLBYplMk+gjDmMoJ68D6x32hP"
+    "UR+2QNR1kPmoalsAI9Ut4cw7iUCjVcmwjo2DbbFJFECZpL0pbvBa3k8GKJVyhZrxoQIQJY"
+    "JZ1qYGTCeFJ9UM9BHFP0VarYtBSCu+GoVn31xRKCWTiL76crjOIoLLbd0hX4NMiQpZnvcD"
+    "id+bz3LWMA2qkDZXzKkiP3v9hLpqxbsCemji91DnuCEH1uivGILKEoqG4hFca1qhq8o4iK"
+    "CfanyYwM/gQtltkgNK10uumB4TGVxIRlAxIr1RPZt2D2r8PZpzUmSN7h5B6vyBrw4U/yeB"
+    "b6+CuO03+XH6fBDM/9/BrKl7+ZDwXR9GnysKRpNzfj0/dUAlYYd+pF8/UiLEstH5J7GH9c"
+    "bL2e+e9AFtII5DBGsC8tpuF6PucLcfqItYA8SFZrnKnuiwc+DtB6DksySJdW5PShtAzyR1"
+    "4Uwmo+CxMA4q9vrCmiofRpH/Q++Xl49UYzf6BNiuLkbkUTKQz9b1QQJYiJUlAFiunCUsbw"
+    "5B6tqjGUZQoIEoVbYMeRyaBLswjsxO61HfD6MF/nOLxL7sm/A0VpQPPfwysKKMlFEY3Ijs"
+    "r23guepLI0QLawp9NVtguWeakDmtK4FNtNGdBxmNSOzbxcAVLShMdM7jaYKk8A9A4q+VEd"
+    "6JZua6ZukyxUkeyJ1QDx+GJSQK+0t3ZAsFL2VaIoHy86AFgUe53YiSNWGbr38wjVgZeXK2"
+    "AXgOBOLokN4Jxe3hyfjXq/Xo1OxtfjywvQf/EQf5qLRHhEHswS2sqr0fCsuLlkx80OAzEv"
+    "9Khh+B32li0PxNwxu8vOXBLcy83ZaLM3G/Vbs1HamZkp0gVJIbGXEKqG0QJDkqsWRJqWR5"
+    "FbbF1glET2EsftD8WSZdoFzkrhVwwsGNrBR8lIhAcu8j5+QSt/WkqJ1KjSoOQGdrknLkM8"
+    "icgH7Y1xCBymV7XHc26UU6Ln8N8Om+Piqahihb5kfEWBcCDtJO3BbJ8/GV6fDE9H/W85pP"
+    "PAQtJCXRSfoJCU6XPlQBWOGhnuyXDl3c8+434F4Swnv21imT2ScYpYzs7MMme+XEECMbpJ"
+    "MGua4lGKFGuCKPUy7raZQAW6lH7XxHNM83iOoJo4T+yVZJtI591WHPho4Ictqo0OFKAZ6M"
+    "BrupRjMwzKQFMZk+qt0zaYSHx/vPaa4qgp+x1TnlGnOWygSJ2BhJMyAD0JgrbgFXNspCfV"
+    "a1OOmTHodlq+TGNKYDGYTHxx+q/rywum0t3/ZktGRRLdbVtnraeaWTitQaMEO0NFD3xKwx"
+    "qM7JVYe0UFvU1LBSbTsGlbbNWdR67EdQYSokGjmpQ9V11RO6uFIW1ypLLSgXHVgPO3BpBG"
+    "uWpaP9DQgwxporFb0Lh8R0Enb7LCmPHBTx3bbe4ngF886th9UC7rPlFOulp60TpMuqrfNH"
+    "wF+c9XNX+KOlZgGtiAOaerT2Sus/7pyF0X5Q7sNSSUETyehWj1UI1hKlHAzn1I2D73HLTM"
+    "syF3fHZ5TNmEmLMJ5Eh3PL4YXv3+5nz42w85ouHs8uKnNL+M8vHvk9GwyDbIs7AL4VCUez"
+    "nqa7dIB2mNKcN3SpoORkc1hgXRAoI+l32XftlRPIlt5V+G8we+kDSANxmfj64nw/NfcwP5"
+    "dDgZQYqaJ8v40zdmwZbJCun9Zzz5uQf/9v64vBgVB3uWb/JHH3RC6ySahtGXKfKlNS99mg"
+    "KzLdMoW7+fbBzBOX5CChIOIzu63m80j4p72ksYSBJyNTZSHtsNZhLV3he5W1lKTQdx2XcF"
+    "zrjpodXUlIF8aK20ZLZRMJwqc2s5uCXA4UfHiiuOwdVVkTykeNsBtwLbhuO35WhI+FewA7"
+    "BLjRWfmR0oPYAZ6sCSj8fMkGg815kBLVUnzbADlz63grJpIYDAtJHcJcKUTBTmzWKJVHoQ"
+    "rzWxxBH8M17FpGt7m5AhpgXTFVrqKAzsQJTFTrEWq9tlPUKhMXVwX3KY3WenApaq28JSEJ"
+    "CNJuguA8DH1JcDvEkMDU60RgDlMFvUDgKwhVRUatzmAzV0ZC/Gn3ppVabr61CkovEDPTeC"
+    "mHcNUdxM8ZK2uF6Gx8Ck1Zus9ZL5yrCpHdYtFCWGq0R89FLFLCdwiyaE7KfCzv/5obhh2D"
+    "IcB2mjTNfOrDWGeN3kSBti+GKKWNlnBqEtleYwONvZIh/60ReyQUzBRqASS59uFm+Z2dAn"
+    "2T+UH9ZaMGkxbS2XNP/LWiz9fwTr0INVt0drgg/9n/1dM2LyPdMW0rzUNoH9ribNRhxL7H"
+    "/XA7Ykdjhc78DhWu5SaQXq0qWS2KFLv2uXcuX3mkrYIS8ad0XswPvO4BXFXiV2B++tx2M3"
+    "R7GIL+nOYVWIb2Fd3imnrl1ahtNmN26tuT5ZrvDnGf7SxV2iTv5RHhOPmh/9J5zcCx49rT"
+    "yW1QaPZbXsscxZgA5LjSTxKleZnWLJD6tL19WlAyteOg9W7MjHXPL9L1d4jpLqibEl56AX"
+    "69wS//2tfEHQQG6X5ko9bOkNwmbwCk5AuzovqqHrQPXzQXI8j9x+Bc8vJ79tIvnTTQ98NT"
+    "r4QjWy1pKTCSMGjYENMaqu6wgCkAczahI7baSUpDPwgPF2FOCoNaDyHdPUcyR+vbfTbqjG"
+    "/Jlkir6qbvDrcZQBkq4OpNBgj3K0LMawORzV1mlLfDl8MtWYs7KDQM/zwYYJTK/lGpIfle"
+    "lI9HYgOx1l5G/BxUgikGUXny4hw9DwlOh31N4KB8y466UtSBMFQ0yp9kKFXFHJe4m3SUtb"
+    "nDUGWq/qqKrvUk8pxzLgbgFrdsqopwGwup+WnfemMoPT4ywvJ/z5fQPiIGXNZxcuDBY59N"
+    "unUog+5xGmmQeVHkDNVsB9rCQ2HkZhesvF2lPjO3WP4nsW0ZsfijeT9z/aUs/j65+HP6qG"
+    "yd2jTBikWs4liqxfCWZOTBXj2gKkLKziwoizNZ3OiWzMbsKD3mTwFrMLk3I50JsWslCqAx"
+    "maVoWqUwj9IoeCGPs0HrlGx3JrHMOFkaCoOk2FerCtZAO3MAYuohDLtcf4blEBFOu0ctOa"
+    "AbEMGHaGFnDlxICrmpXF5jSoN42CIMbcZaxJA7ZcVjYdA1Q2nSiemxuuuZqYnVLGgyGRi/"
+    "bPebY1yckdLySyhYQ1y9CqFXdKKwmDr3xN13IZy8WVMz88OYJ8a552MJu7GLlp/u0Ytc/t"
+    "Y5E3ak29hU1r6rUmLSQ1X1TxZaIM6AR/rQ0mzURejih4PrNs9NskZ5Gl6FW726XZJbRPwA"
+    "OvGKtbXHy7eTRWyz/Sv3GnrODncm/k62wHpkaSeKVhlPldsGqE3m1CT5LdLxAdVdU0S1U0"
+    "0zZ0yzJsJUOznNQE6/H4J0A2tyTUQ81X9kdBLWQPUDdAXQdxLb5PxPVv4NqcHRk7oJaTeZ"
+    "VUtzjrPtJd5eAOvgvuDftGfO8Yedua934c08tQqad6M9Q2cr1bonnB4p1EqySaxcxjtOLN"
+    "fzSv5HTsZ6nMvzcIGPfJ6mElgOepjhWUsX/UsdikpIKjqGBB68DBMpv6UTTw7qheSdOBgy"
+    "N/291GxoGxu+ZAAX6T0j/03XZAhijCL1djkX9ZhKoggFbRHLety6Ecpk4jJW1FgVoCCyJk"
+    "VUst0YLNBcq0O1OySMqkwaOU2pbIuswduYH12ieCENpZxWqx9vMaai4dDJWT0WUsurq7l/"
+    "RaohWAko5F20GozSgBV1YxgbCUo+3LTYudV1RMDqphA605IIHfqyhFfWBCl2YMm38xXk3p"
+    "qPiaZJVgU1JW/q5JDKkpplka8C7gMDwIVDAtUzCoqq7Q92s66YSyXCD/0xdkqnaeq/1Ee2"
+    "JDXIOZhYxk91kNUTNynAWomQ8Qese9OCA3zH05N2kOTm86soHYItLeDJRcd7YgSnm3MEdY"
+    "nlOOXelKqX4oRWYVupyFDBQzSadVms6nSHViscSKLDDFaysjvX2IUXiZGAXYA6uJ9FG4Xp"
+    "SiFvPWH5f9zgRw/+Z6dHVEVy5yoLi+HpOT/8XkqJe9UPs2vP79ejI6P+rFD3GCF8UzUxsS"
+    "3mnBwTu1FLxTesHRgXE/MO5/A8a9YqVvvSyXRZ+wQu8U2h1inWCrK4HWwAJ/OjBtB6Zt/5"
+    "m2itiwR3RsXvLQsbsVIZYe8StPlzXxTUJkL1/YuC1Xjd1+pdS+7K05G7UtcDmhV3IgKd17"
+    "5CdxGb730QrP7sJf8EPL99oUfLJ3FbuNb7WRFqjcC22uyFp5NT6Z9CsG4Pbg27/boSJ+ud"
+    "mVQ/B6NOld3Jyd9auXvy2A+PR3K+0Ojo94u1LNBPfuZ3OfdMrh+rJb2E7dr7U13AO3j+Sp"
+    "//24/QK2w1XvTYxXtfe8IvFt0yUvUApdbngrrzXkH5Xr/JKupxf5BKfoAzG+RWIcxlLX33"
+    "ySZfbR03z7L/LHC75utYUwE9hH/J7lByWWZKv5EpGtqGvMQ0lwX64NXgDUWTwl20N13G0U"
+    "zTEKqzHNyRUvBojgcwGaDdutXwxcXp7l6KTjcfGi5eb8eHT1ZkDhFb9ldCBo/6Y8XmdXyO"
+    "d0ABzi1cy7rzoS8pTG8yASeTYdCOv7+QkHsqrjWO3dTuVZrOJqh/fYd931tnK1U3/2qn3j"
+    "Sv1mV//Klde8zcHU6AAiz76fAD7Lr5XW+mnAL1109dO4CUkDP/gzL3nbmxP7/s/dhLUBRW"
+    "h1btMqeW0UHTQKuxEUcPzU36R66vby7f/fFr3R"
+)
@@ -0,0 +1,104 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "chat_tree_snapshots" (
+    "version" INT NOT NULL,
+    "message_count" INT NOT NULL,
+    "data" BLOB NOT NULL,
+    "updated_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "chat_tree_id" CHAR(36) NOT NULL PRIMARY KEY REFERENCES "chat_tree_detail" ("uuid") ON DELETE CASCADE
+) /* チャット木のスナップショット（木の形と本文の参照） */;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "chat_tree_snapshots";"""
+
+
+MODELS_STATE = (
+    "eJztXWtz2zYW/SsafUpn0pTim56dnZFjpfXWj44t77aNOxqQBG1tZFIRqSTeTv774gIgAT"
+    "5F2rJDxfIHjUzgAhcHz3vuJfT38C7y8SJ+M47jeZygMDnFcYxu8BFO0HwxPBj8PQzRHSZf"
+    "NuR8PRii5VLkgwcJchdUFKUyszsmNPOpFM2F3DhZIS8hGQO0iDF55OPYW82XyTwKQfx6rS"
+    "lIhU/Xop8O/QzgM9Dg07PhE4/od/rEdWmqR7/TVBNfr21kkVTL15Trtal4xvXasDUiFQSK"
+    "fXJyer12DKjIUVRWrCUVEtBsDqjsRx7ReR7e9E676/A6HCdEN3ed4PjgOhyQPw76wYAU6A"
+    "akIiPwqZRBVbXdzephVdSIXabSiBU3SvXSA09NtYBql6vo09zHq4MBVV5TfCbu0+8KxU2n"
+    "xSppdYau+FxnGEUzGHugth5YpIGWoVJlDFqOEfBii7qJQogGd8tklkQfcBhDOXkdWO+wJ6"
+    "yP2CdrOMp60DQshRXokfIWGMalVKjh2kRAx7bZpogkStBCkrZ8L2glh++WeIWS9aoBESKA"
+    "VdKpBkYmjCfVB/UcxDFFX6SKTUshuBuOatVXXywhmIfz+Ha2wiiOwmLbLV2BT4MMWZr5Bo"
+    "ezuc973zJGoJ06Uo6PWHLk/hd7yYx1C/bE1PGlzmFPEKLPTTEekSUUBdUtpMK4VlWDdxRR"
+    "McH+LJmTwZ+gu2U2CE0rnW56YHhMJTFh2YDESvVE9i2Y/etw/nGNCZI3OLnFK7IGvP+LPJ"
+    "6HPv6C4/Tf5YdZMMcLP7+G8uVv7kNBNH2W3C9p2tXV8dE7KgErjDvzosX6LixLLe+TWxh/"
+    "XGy9nvtvQBbSCOQwRrAvLabherHgC3H6iLWAPEhWa5yp7osHPg7QegFLMkiXVuT0obQM8k"
+    "deFMJqPg8TAOLvr6wpoqH06RD0fvvL+OKVZv5AmxTFyc2KJlIYhl+pIEoQE6WgChTThaWM"
+    "4dtbtKrGUJYpIEgUboEdRyaDLs0isBO713bAG8J8XeDwJrkl/44UpQHNf48vKKAkF0U0Ij"
+    "sq23vPeJLK0gDZwp5OV9kuWOal9mhK41JsN2VAj8Okdmzm5QqQkiY8ZHK3wVR5BKA3UMmP"
+    "6ki3dFszdZtkoYpkT6wGiI/PpgX0SntrBwQrZV8kivLxogOARbGXiZ04YpWhe7eIUB14eb"
+    "kCdgEI9nJJbADn6Pzq8GQy+O1i8vb48vj8DPS/u48/LkQiPCIP5glt5cVkfFLcXLLjZoeB"
+    "mBd60DD8BnvLlgdi7pjdZWcuCe7k5my02ZuN+q3ZKO3MzBTpgqSQ2EkIVcNogSHJVQsiTc"
+    "ujyC22LjBKIjuJ4/aHYsky7QJnpfALBhYM7eCDZCTCAxd5Hz6jlT8rpURqVGlQcgO73BPn"
+    "IZ5G5IP2xnEIHKZXtcdzbpRToqfwX4/NcfFUVLFCnzO+okA4kHaS9mC2z78dX74dH02GX3"
+    "NI54GFpDv1rvgEhaRMnysHqnDUyHBPxivvdv4JDysIZzn5dRPL7JGMM8RydmaWOfPlChKI"
+    "0U2CWdMUj1KkWBNEqZdxt80EKtCl9LsmnmOax3ME1cR5Yq8k20Q691tx4KOBH7aoNjpQgG"
+    "agA6/pUo7NMCgDTWVMqrdO22Ai8f3h2muKo6bsd0x5Rp3msIEidUYSTsoI9CQI2oJXzLGR"
+    "nlSvTTlmxqDbafkyjSmBxWAy8dnRvy7Pz5hKN/+bLxkVSXS3bZ21nmpm4bQGjRLsDBU98C"
+    "kNazCyV2LtFRX0Ni0VmEzDpm2xVXcRuRLXGUiIBo1qUvZcdUXtrBaGtMmRykoHxlUDzt8a"
+    "QRrlqmn9QEOPMqSJxm5B47KPgk7eZIUx44MfO7bb+CeAXzzo2H1QLus+UU66WnrROky6qt"
+    "80fAX5z1c1f4Y6VmAa2IA5p6uPZK6z/unIXRfl9uw1JJQRPJyHaHVfjWEqUcDOvU/YPvcU"
+    "tMyTIXd4cn5I2YSYswnkSHd4fDa++OPV6fj3H3JEw8n52c9pfhnlwz+mk3GRbZBnYRfCoS"
+    "j3fNRXv0gHaY0pw3dEmg5GRzWGBdECgj6XfZN+6SmexLbyz8PFPV9IGsCbHp9OLqfj099y"
+    "A/loPJ1Aipony/jTV2bBlskKGfznePrLAP4d/Hl+NikO9izf9M8h6ITWSTQLo88z5EtrXv"
+    "o0BWZbplG2fj/aOIJz/JQUJAJGerrebzSPinvacxhIEnI1NlIe2w1mEtXeF7lbWUpNB3E5"
+    "dgXOuOmh1dSUkXxorbRktlEwnCpzazmEJcDhR8eKK47B1VWRPKR424GwAtuG47flaEjEV7"
+    "ADsEuNFZ+ZHSg9gBnqyJKPx8yQaDzXmQEtVSfNsAOXPreCsmkhgMC0kTwkwpRMFBbNYolU"
+    "ehCvNbHEEfwTXsWkawebkCGmBdMVWuooDOxAlMVOsRar22U9QqExdQhfcpjdZ6cClqrbwl"
+    "IQkE2m6CYDwMc0lgOiSQwNTrRGAOUwW9QOArCFVFRq3OYDNXTkIMYfB2lVpuvrUKSi8QM9"
+    "N4JYdA1R3Ezxkra4QYbHyKTVm6z1kvnKsKkd1i0UJYarRHwMUsUsJ3CLJoQcp8LO//mhuG"
+    "HYMhxHaaNM186sNYZ43eRIG2L4YopY2WcGoS2V5jA429ki74fRZ7JBzMBGoBJLn24Wr5nZ"
+    "MCTZ35cf1lowaTFtLZc0//NaLMN/BOvQg1V3QGuCD/2fw74ZMfmeaQtpXmqbwH5Tk2Yjji"
+    "X2v+sBWxLbH657cLiWu1Ragbp0qSS279Jv2qVc+Z2mEnoUReOuiB142xm8otiLxG4fvfVw"
+    "7BYoFu+XdOewKsS3sC73KqirT8tw2uzGrTXXJ8sV/jTHn7uES9TJPyhi4kHzY/iIk3shoq"
+    "dVxLLaELGsliOWOQvQYamRJF7kKtMrlny/unRdXTqw4qXzYMWOfMgl3/16gRcoqZ4YWwoO"
+    "erbOLfHfX8sOggZyuzRX6mFLPQibwSsEAfV1XpShk9eOOETL+DaqWDgeBggw/pdSmbuDyg"
+    "MdIFljG1wgMiBtnCBpp3SIGGtmyrmvgAVGIZGHvWcqM/b5cJV8CUZgqhlLnQvvKYbd1MaH"
+    "9U9N8NHwA4QILRP0MYSpkOxcKaZgk2tIdiak5LIlhSoBYf44d4GjFiK0DAtel7WwigULD8"
+    "R/6o0y9dRh0KQ8eLEcg/Hseub4YQ6hlFXn3i1NKGzame9C9wayA8dmHDuC/uB5W0b2kT6D"
+    "VnkalhwgkkcANLURonqxiDAe42ULZ0fa2mYoReQde++W6WtRV1U+QozVJqPGRyNztiDRvs"
+    "zPQTpYJ88dk+Ev+oVFoxmOxqLZAoEmd9EU3qEvRMtJ7WMj3QgUnmtwQ1baz+g+/im3jLxZ"
+    "3g9S4OTh3y7wjb2eb3vmaNMMaBPgxocIixjrNtPzsYBsUsm4bb7MIP96OfO71cbLPZ9yIq"
+    "aOhf9VT2nZsdZSK1omJ3V5mJ7sh90H4vUuEG9HjN9+RYntIDfeLwD34Z9PEv4pVt4HOuL2"
+    "sYu98cXtQxe/m9BFTnodLiK3ymiXkxvt9XT7gHdPOljqjSdByVxlxpAxsuHOLTdnfwY1Zg"
+    "j57ow8iOBzFIi506hRlxog2Ss6tdZ5P1Rj72fJIYdVdcN7So4ykiwv+aozj9pZ7M6k5uu1"
+    "bJ22xJevg0o15lFmo0Cy4OAYbpgQuWa5hvRemOlI1mogm+iZ6Vp4ZUoKiMtbZe2vQKNGDQ"
+    "9cdNTBCgfsMDNIW5Amiog3avQVKuSKSm9j8TZpaYuzxgQlu7b05pdjGcCzYE2YRdzi4lwC"
+    "KvEywdFhlpcHMHJCBHGQsuazAFIGi3yVnU+lEH3Ob8zK3gjTA6jZCriFXuASKniSskl8i+"
+    "JbdkNZfiheTd/9aEs9jy9/Gf+oGia3hk0YpFrOAibrYYKZkVkxrmsMP8PWdDonsjG7CQ8a"
+    "mclbzDiDcjnQmxayUKoDGZpWhaozuMqG7J4x9puM03JrHMOFkaCoOk2FerCtZAO3MAbOoh"
+    "DLtcf45q4CKNZp5aY1A2IZMOwMLeDKiQFXNSuLzWlQbxYFQYxTzqBBA7ZcVjYdp9Sb4Xhu"
+    "brjmamJ+1zIeDInc7YU5VqFJTu54IZEtJKxZjPErK14mlGSWSw47brmM5e7JY4SFfCPe1g"
+    "gLmM1dnPZp/u046Z/64JV30pt6Cx+9qde66CGpmbTgy0QZ0Cn+Uns5VibyfIEPT+dmnvw+"
+    "zZkuKXrV9mOaXUL7LZiUxbvHiotvNxO9Wv6BBnuvvPpPZa/zdbYDgyRJvNBrofK7YNUIvd"
+    "mEniS7WyA6qqpplqpopm3olmXYSoZmOakJ1sPjnwHZ3JJQDzVf2R8EtZDdQ90AdR3Etfg+"
+    "EtfvgEPOjowdUMvJvMjQPXHW7UoR5yX3FHEP3sDZnUC+noVdtY7jexjTy1Cpp3oz1DZyvV"
+    "uiecHinUarJJrHLCam4pcMaF7pJWo/S2UhRkHAuE9WDysB3qTVsYIy9o9GRZmUVHAUFSxo"
+    "HThYZlM/iAbuj+qVNB2EDPDb+zcyDozdNUcQPWNT+ofe1Q9kiCLeM9ak+J/AkwmgVbTAbe"
+    "tyKIep08AYW1GglsCCG79USy3Rgs0FyrR7FjCVI2XSy7AotS2Rddnr1Q2s1y4RhNDOKlaL"
+    "tZ/XUON0MFRORpex6Pr6fkmvJVoBKOlYtB2E2owSCA8REwhLOdr+WEux84qKyZ42NtBaxW"
+    "MqRX1gQpdmDJt/MV7N6Kj4kmSVYFNSVv6uSQypKaZZeoGfgMPw4OIF0zIFg6rqCg3octIJ"
+    "ZblA/qc/+KHaea72I+2JDYGXuYjHrqGedt4j+yYLKmX+Czk3aQ5OPR3ZQGxxc6AZKLnubE"
+    "GUbjsG7H3JXVvocnYFQjGTdFql6XyKVCcWS6zIAlO8tjLS2/s7F54nXg32wGoifRKu70qh"
+    "DHnrj8t+YwJ4eHU5uTigKxc5UFxeHpOT/9n0YJD9QNh1ePnH5XRyejCI7+ME3xXPTG1IeK"
+    "cFB+/UUvBO6cLmPeO+Z9y/A8a9YqVvvSyXRR+xQvcK7Q53t8BWVwKtgQX+uGfa9kzb7jNt"
+    "+yjb765jS2+mpkf8ytNlzX0tQmQnf4BiW6Ea/X4zZ1f21pyN2ha4nNALOZCU/B75SVyG71"
+    "20wvOb8Fd83zLYvRCT3VfsNoa6SwtULsr9gqyVF8dvp8OKAbg9+HbPO1TELze7cgheTqaD"
+    "s6uTk2H18rcFEB//wkV/cHzAKxc1E9y7nS980il792W3a0jqfn2+wQ/c/iKOcVo6x7X1kO"
+    "0ZsB1cvVcxXtX6eUXi6yYnL1AKXTy8lW4NU/EM6onJ3i/ocOn444t8RFD0nhjfIjEOY6nr"
+    "b1jLMrsYab79HybEd3zdagthJrCL+D3JD2QuyVbzOSJbUdd3HkqCu+I2eAZQ5/GMbA/V94"
+    "hF0QKjsBrTnFzRMUAEnwrQbNhu3TFwfn6So5MOj4uOlqvTw8nFqxGFV/w2856g/U55vM6h"
+    "kE8ZADjGq7l3W3Uk5CmN50Ek8mw6ENb38yMOZFXHsVrfTuVZrMK1w3vsm+56W3HtPOASnf"
+    "rNrv4WnZe8zcHU6AAiz76bAI5a3WU8arjLeFS+y7g2TgN+ubNrnMZVSBr43p97yevBgtj3"
+    "f/UT1gYUodW5TasUtVEM0CjsRlDA4WN/Y/ux28vX/wMd4hKH"
+)
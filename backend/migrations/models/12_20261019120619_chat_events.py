@@ -0,0 +1,116 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "chat_events" (
+    "id" CHAR(36) NOT NULL PRIMARY KEY,
+    "seq" INT NOT NULL,
+    "type" VARCHAR(32) NOT NULL,
+    "payload" JSON NOT NULL,
+    "created_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "chat_tree_id" CHAR(36) NOT NULL REFERENCES "chat_tree_detail" ("uuid") ON DELETE CASCADE,
+    CONSTRAINT "uid_chat_events_chat_tr_ab1e3d" UNIQUE ("chat_tree_id", "seq")
+) /* チャット木の変更ログ（追記のみ） */;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "chat_events";"""
+
+
+MODELS_STATE = (
+    "eJztXW1v47gR/iuGP12Bva2sdy2KAskm20svmxSJ0/a6ORh6oRL3HClnybuXHu6/l8MhRe"
+    "rVUuxsnI3zwXBEDjV8+DrPDOnfx3dpRBbZ24Msm2e5n+QfSZb5N+SI5P58MX43+n2c+HeE"
+    "flmT881o7N/fy3zwIPeDBRP1hczsDoVmEZNiufwgy5d+mNOMsb/ICH0UkSxczu/zeZqA+P"
+    "XK0HwdPgOHfXrsM4bP2IDP0IVPMmHf2ZMgYKkh+85SbXK9cn2HpjqRoV2vbC20rleWa1Cp"
+    "ONbc09OP1yvPghd5mo7FOkohMcvmgcpRGlKd58nNzml3nVwnBznVLVjlJHt3nYzoHwf93Y"
+    "gWGMT0RVYcMSmLqeoG69UjunwjCVClCRY3EXqZcagLLeC198v08zwiy3cjpryhRSgese8a"
+    "w81kxWridZapRVxn6EUz6Hugthk7tIKOpTNlLFaOFfNiq7rJQqgGd/f5LE9/IUkG5ZR1wN"
+    "bBJ9hG+IkV94sWtC1HwwJDWt6CQL9UCrUClwqYxLX7FJGnub9QpJ0ojHvJkbt7svTz1bID"
+    "ESpAdNqoFvFt6E96BOp5PsfU/015se1oFHfL053211dLiOfJPLudLYmfpUm17o6pwadFuy"
+    "zLfEOS2Tzire9YE9BOn2gnR5icBv8lYT7DZiGhHDqR0jj4xPfZc1v2R9+RioLqjq9Dv9Z1"
+    "izcUVTEn0Syf086f+3f3RSe0HTHczNgKUSU5YLFDEq15IEcOjP5VMv91RSiSNyS/JUs6B3"
+    "z6mT6eJxH5jWTi3/tfZvGcLKLyHMqnv3kEBbH0Wf5wz9Kurk6OPjAJmGGCWZguVndJXer+"
+    "Ib+F/sfFVqt59BZkIY1CDn2ERMpkmqwWCz4Ri0dYA/ogX65IoXokH0Qk9lcLmJJBujYji4"
+    "fKNMgfhWkCs/k8yQGI3//AqsiKsqdj0Pv9DwcX3xn2n1iV0iy/WbJEBsP4Dybo5z6KMlAl"
+    "imJiqWP4/tZfNmOoylQQpAr3wI4jU0Anskjs5Oq1HfDGMF4XJLnJb+m/E03rQPOfBxcMUJ"
+    "qLIZrSFRXX3jOepGMaIFtZ09ksOwTLstQeTaVfyuWmDuhJkrf2zbJcBVJahccM7j6YahsA"
+    "egMv+V6fmI7pGrbp0ixMkeKJ0wHxydm0gl5tbR2AYKPsq0RR3V4MALAq9jqxk1usOnQfFq"
+    "nfBl5ZroJdDII7OSV2gHN0fnV4ejz6x8Xx+5PLk/Mz0P/uIft1IRPhEX0wz1ktL44PTquL"
+    "S7HdHNARy0KP6obPsLZsuSOWttlDVuaa4ItcnK0+a7PVvjRbtZUZTZEhSEqJFwmhblk9MK"
+    "S5WkFkaWUUucU2BEZF5EXiuP2uWLNMh8DZKPyKgQVDO/5FMRLhQeCHv3zxl9GslpLqaaNB"
+    "yQ3sekucJ2Sa0g/WGicJcJhh0xrPuVFOiX6E/3bYHJdP5SuW/peCr6gQDrSetD4E1/n3B5"
+    "fvD46Ox3+UkC4DC0l3+l31iZ/QMiOuHKjCUaPdPT9Yhrfzz2TcQDiryW+6WOaQZpz5mHMw"
+    "s8yZr0CSQEg3SWbN0EJGkRJDEqVhwd12E6hAl7LvhnxOWJ7Qk1QT54nDmmwX6bzbigMfDf"
+    "yww7QxgQK0YxN4zYBxbJbFGGgmYzO9TVYH25ffH6+9oXm6YL8zxjOaLIcLFKk3UXDSJqAn"
+    "RdCVvGKJjQyV97qMY0YG3RXlqzSmAhbCZJOzo79fnp+hSjf/m98jFUl1d10Ta880c4h4g8"
+    "EIdkTFjCNGw1pI9iqsvaaD3rajA5Npuawurh4s0kDhOmMF0bhTTcae64F8O74FkbY5UkXp"
+    "wLgawPk7E0hjXDV7P9DQkwJpqnFQ0bjuo2CDN18Sgnzwpn27j38C+MV3A5sPysXmk+WI2T"
+    "JMV0k+VP2u7ivJfz6rRTN/4Atsi1gw5kx9Q+a6aJ+B3HVVbs9eQ0IdwcN54i8fmjEUEhXs"
+    "gocc17mnoGWeDLnD0/NDxiZknE2gW7rDk7ODi5+++3jw7z+ViIbT87O/ifwqyoc/TY8Pqm"
+    "yDOgqHEA5Vua9Hfe0W6aDMMXX4jmjVwehoxrAiWkEw4rJvxZcdxZPaVtF5snjgE0kHeNOT"
+    "j8eX04OP/yh15KOD6TGk6GWyjD/9zq7YMkUho3+dTH8Ywb+j/5yfHVc7e5Fv+p8x6OSv8n"
+    "SWpF9mfqTMeeKpAGZbplExf29sHME+fkoLkgEjOzrfrzWPqmva1zCQjj8Tpk+jeYSJ640j"
+    "AvkGmEbNeyu62yz235ZHd0F8Ty/CKmBnj3aDG8cRBBFMlP260xVH85QvRFOkVxwOK8XSfU"
+    "1uxtdH+KjROzzAgEQufGoE9/3c0OgwaZxCB1pD9t2E+sRBKGpSNT+wTtwA86RGga0YMhjz"
+    "4shUZnmYJMbdIrMMbFMA5xmGXrczMvLrSFoTVtTcIGAHeBrKe/gqravCUIKjm8VmFxuyPF"
+    "W8/UyWGe2VvBkVS6S9ZGviWlIfiJdyLLSA0M7C76oNVdiyviwJQ4NU+MoWBleM4eIUNlKh"
+    "pSuRQgvXRbvOhwgsbvMSZe+uNB+iI61VMQSgE9G6RSKgRmBhRhyRRDY7dgcsm9sLFeStiL"
+    "CoGYjbwS5FOwaTdVEqqmLLsbCKtpvoYGbpgJ1loEWNCLu6CFKi2tkSZyu2oQ6xhtrHoxu6"
+    "AnzxH7I/K1PU2/uHUVFdxcRsNR8hzqgLSRyOEPBkT+DNLrOlWbwQ2NWawnQ4ss7SBvQs3p"
+    "tpquPFYCfrEUMBbS3kLqDO3iSMlB7mye/IZmAfMG2wFFQrsmQAY5ieG9oT2UkaOzoTpUMT"
+    "a79mLJDyWMAaq+O33Ct7jlmlDrDir28HjNXyXIugDmIHTvczJBr9eYSxoXQvmfvhLczwSk"
+    "ih/7BI/R5tjXW2gsArx4Oh/azOc2st5E/lPRAFe/xzX6t5mK38HBby+C/xKglh0R+xN8GH"
+    "+dfxrhnNgHp/m47nfq2WHKtwDa12r5LI/yhH0nPgVfIkGXoPT5Kht3qSIKkSx4WzTB1C4A"
+    "BbQrikSAXFq4TW7lM0D/M3o8U8y3/eTUw7MIRalwxdgV1B2Ciwvm+ga6CAwxY36HCyoSy5"
+    "5xp2gGt4s+NE8bMOnzWrXo2n6cW9fEiXZH6T/Egevhr78tVAfAr+ZQ3ftV2uRsG5hbApt8"
+    "Qa1obVNJK5N6Bu6ueM0MZCB6NtoEktDP8BFM2wgsGEK/HuYJzBNpyaaGied7j20IxzPTgC"
+    "4rpgZDue4cuzMGi8BMzkidBF7AtjztInjjSahbnc6YPry8MUQAxhYbrc4ZKcUGmGLmQESQ"
+    "AOZTTraCmxLAs9jg6+O8AWKbgfy/WQSXCFgGrjqZAdT/2bAgCVQTDA+2jFnlOm4wSRplZu"
+    "vfMTGnJUkE6gSBABRRVrhkKxBE0kg+KOGBV4TGw0gg1prnODPOjs1j0U9fSREqQyEoohT1"
+    "B296rUIfpqy11xTbdFHCeiUnbgFp51RLxtcNR5O8FYOUSB0FVK8xDOfn7jT+P0C11OZrBM"
+    "M4n7iC0tb3DlHtPsn+oPW+1mUUzfzYPIv7edG7YR5ZbpC2lZ6rXsxhpMlEfaJ3vjZAeNE2"
+    "UGGtKkiti+SZ+1SbnyLzrsY4dOPAVLajXeDgavKvYqsduftHs8dgs/k3eBDKcAG8S3MC/v"
+    "1AG8XZqGRbU7l9ZSm9wvyec5+TLECdEm//WcEuMNdu6V01e9TpfrHafL9frpcs4CDJhqFI"
+    "lXOcvsVETjfnYZOrsMiGCUbS5D3Crx1Vzuw48XZOHnzcOiKaRu9zbzbTR50754QyQ2PdD2"
+    "jGAMIvlrc0Y7bCLqtV83Ug6u7er80N2PssS/z27Thgn0cYCA5+NSKfPloPJIR1BR2Q5XkA"
+    "pIH2eQaJSthvI+JgCyEpvLQvs4W186klY9KrZBAPDXVhN8VWoAqhLUiXG6JmTnSj0icG6l"
+    "ho6i42Azt4mnV04VWg5c8eYQnUhvBDhAhFfONoXjpEt58OZ5FvobzMIBJiJP0bvAvXyGVN"
+    "h2Cx+OGY5UR1ZbLOz606i0zaBWoUEUR5DiGQFNXR9jV/EUIz+X6Eqnj6htN5Qy/hbvikN9"
+    "HR7rrJ5qXBMp68v6ydhlSzfpc89G/KtxpJZn4AnMWKLJXVWVex8rJzyV+rXH2pamkcHRto"
+    "+LVe11KJN3EYzwHDbSy+dXcVCpuK0P/C9fiYj+x9Yznl9POXkOFI+sNg9p1cHYUytWJie3"
+    "eWis6o/eHx7ducOjL4QE2K142BfoI9gtAPdHlp/kyLKceR/pkNzHwO6MT3J/3HaXwj03Cu"
+    "HkpNfhIg2ajHY1udNeF8sH3JcywFLv3Akq5io/viUPOsndd9xihjjieJrraRB7aDCjThgg"
+    "xXHPVut8N1TDg7xq6GXTu+GEq6dNFMtLPbwbMjsL7/nuvhIeTkKqJy7FfeGgMY+2m8SKBQ"
+    "fbcMuGCD4nsJS7jGxPsVZj1UQvTNfKNT9KYGDZKut/bT8zangAp6ePliTGzcxI1EAkysg/"
+    "ZvRVXsgVVW4Q4nUyRI2LysQ1u7Z2W5HnwMk/ixjSLOIWl1mcnKzwMvHRYZGXB3JyQsTnIB"
+    "XVx0BahEU9FYinNX32nN/yXtxiZMbwZifmFnqFS2jgSeom8a2f3eKt+uWueDX98L2rtDy5"
+    "/OHge92yuTVsi+PSykHQNMkJGpkN/brF8LNcw2Rjouiz6/BgEaq8xsgZ1MuB1nR8xxc60K"
+    "7pNKg6g+uX6eqZkajLOK3XxrMC6AmabrJUeA9xi+Pz1T5wliZEfXtGbu4agMJGq1etGxA8"
+    "EmsZMVdOdrimUVmtTod6szSOMyI4gw4N1GO6dVoSqTfLC4NSdy29Cf3PdTwQidIvbpRYhS"
+    "45teGlRDGRYLWQ8asrXieUVJZLDb/uOY01nOVVf8Vha4QFjOYhwQsi/3aCFZ5641UOVrDN"
+    "HrEKttkaqgBJ3aQFnybqgE7Jb60XuhciL+VUapf9cvzvacl0qZ2gLNmPInv1WGX1vvzq5D"
+    "vMRG+Wf6TBvlPRDU9lr/N5dgCDpEi80qvMy6tgUw+9WYeeIvuyQPR03TAcXTNs1zIdx3K1"
+    "As16Uheshyd/A2RLU0I71HxmfxTUUnYPdQfUbRC34rshrt8Ah1xsGQegVpJ5lSGM+2sSvg"
+    "mKeIOAxmcJ5NuxsKunOqxfQqWd6i1QW8v1bonmBYt3mi7zdJ5hTEzDr2+yvMph8qhIxRCj"
+    "OEbuE9+DJcCJYpNofsH+sagom5EKnqaDBW0CB4s29aNo4N1RvZGmg5AB/ouTaxmHPvfFmc"
+    "RQ4n/iUCWAlumC9H2XxzhMkwXGuJoGb4kduFNPd/QaLdhdoEq7FwFTJVJGXODOqG2FrCuO"
+    "mXewXi+JIIR6NrFaWH/+hhang6VzMrqOxdBrDGp63ftLAEX0Rdfz/T69pLgx0BXDpfy7BO"
+    "t7WbXxqoqpnrauGwUr8ZhaVR8Y0LURg+MvI8sZ6xW/5cVLiK0oq343FIbUlsNM/OiEhMMK"
+    "4QIK27Elg6qbGgvo8sSAcgIg/8WP1OpumatlNyiuC7wsRTwODfVsvdUU/RdqblodIjwdRU"
+    "fs8WsXdly6jrEPUbrtGLBPNXdtpcnxKohqJmW3ytL5EGlOrJbYkAWGeOvLiisc93dPPHW8"
+    "GqyBzUT6cbK6q4UylK0/LvvMBPD46vL44h2bueiG4vLyhO78z6bvRsWP2l8nlz9dTo8/vh"
+    "tlD1lO7qp7pj4kvNeDg/daKXiv9iNje8Z9z7h/A4x7w0zfe1qui24wQ+8U2gPusNnxe3P3"
+    "TNuOTKXfGNO2j7L95hq2djJVbPEbd5ct99ZIkRf5o6nbCtXY7ZM5L2VtLdmofYErCb2SDU"
+    "nHFccBj6Iuwzf4duNKTPauYrc21F2ZoEpR7hd0rrw4eT8dN3TA7cH38rxDVfxKo6uE4OXx"
+    "dHR2dXo6bp7+tgDi/obt5gMt80VEG2Xvvhx2DYkgl4orsfAC8KzDD9z/Io4DUTrHtXeX3T"
+    "FgB7h6rzKybPXzysQ3XU5eoBSGeHgb3Rq2FlrME1OcLxhw+frmRW4QFL0nxrdIjENfYt9r"
+    "gLabL6rMS4w0t/rcime1X4pn1e7EI3d83uoLYSHwEvHTLavPtYKW1X6tIKRVrZgs+5LSpW"
+    "jomYea4EtxG3wFUOfZjC4PzfeIpemC+EkzpiW5qmOACj4VoEW33bpj4Pz8tEQnHZ5UHS1X"
+    "Hw+PL76bMHhppjluMvcE7TfK4w0OhXzKAMADspyHt01bQp7SuR/0ZZ51G8L2dt5gQ9a0HW"
+    "v17TTuxRpcO7zFnnXV24pr5xGX6LQvdu236LzmZQ6GxgAQefaXCeCk153Ok447nSf1O51b"
+    "4zTaf2myPU5j/0uTxS9NPuvy8sf/ASqQ/KY="
+)
@@ -0,0 +1,125 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "chat_forks" (
+    "fork_message" CHAR(36) NOT NULL,
+    "path" JSON NOT NULL,
+    "created_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "chat_tree_id" CHAR(36) NOT NULL PRIMARY KEY REFERENCES "chat_tree_detail" ("uuid") ON DELETE CASCADE
+) /* フォークしたチャットが元のチャットから引き継いだ祖先 */;
+        ALTER TABLE "chat_tree_detail" ADD "forked_from" CHAR(36);
+        CREATE INDEX "idx_chat_tree_d_forked__df1b8c" ON "chat_tree_detail" ("forked_from");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_chat_tree_d_forked__df1b8c";
+        ALTER TABLE "chat_tree_detail" DROP COLUMN "forked_from";
+        DROP TABLE IF EXISTS "chat_forks";"""
+
+
+MODELS_STATE = (
+    "eJztXWtz27jV/isafdrOZFOKJHjJdDpjx07XrWN3fGm7jXc0vIC2GpnyilSyfnf2v784OA"
+    "ABXkXKdizHygePQhLgwQMQxPOcg8Pfx7eLmM6zt3tZNsvyIM0/0iwLrukBzYPZfPxu9Ps4"
+    "DW4p+7HmyjejcXB3p66DA3kQznnRQJaZ3mKhacxL8auCMMuXQZSzC5NgnlF2KKZZtJzd5b"
+    "NFCsWvVpYRmPA3dPlfn/9N4G9iwd/Ig790wn/zI2HIz0b8Nz/r0KuVF7jsrBtbxtXKMSJy"
+    "tSKexUolieEdH3+8WvkEbuQbJlbrapUk/DIfTI4XEbN5ll5vnXVX6VW6lzPbwlVOs3dX6Y"
+    "j9E6C/G7EKw4TdiCQxL0W4qV643jxqqjvSEE2aYHUTaZedRKa0Am57t1x8mcV0+W7EjbeM"
+    "GIvH/LfBcbN5tYa8HbGNWNgMo2gKYw/MthOXNdAlJjeG8HpIIqqt2qYqYRbc3uXTfPGZph"
+    "nUU7YBewePYB/hX2x4UPSgQ1wDK4xYfXMK41KrlIQeK2BTz+lTRb7Ig7lW2o2jpFc5entH"
+    "l0G+WnYgwgpQk3UqoYED48mMwTw/EJgGv2k3dlyD4U58022/fbWGZJbOspvpkgbZIq223b"
+    "UN+EvYkOUXX9N0OotF77tkAtaZE+PoAE8vwv/RKJ9it9BIPTqx1jl4JAj4cUeNx8BVhoLp"
+    "bmDCuDZNIjqKmZjTeJrP2ODPg9u7YhA6rnzc7IREaJJ6YHFAUqP5QY5dePpX6ezXFWVIXt"
+    "P8hi7ZHPDpF3Z4lsb0N5rJ/959niYzOo/Lc6iY/mYxVMTPT/P7O37u8vLo4AMvATNMOI0W"
+    "89VtWi91d5/fwPgTxVarWfwWysI5BjmMERprk2m6ms/FRCwPYQvYgXy5ooXpsToQ0yRYzW"
+    "FKhtK1GVke1KZBcShapDCbz9IcgPj9D2yKaig/Oga73/+0d/aD5fyJN2mR5ddLfpLDMP6D"
+    "FwzyAItyUBWKcmKpY/j+Jlg2Y6iXqSDIDO6BnUCmgE5eorBTb6/HAW8Mz+ucptf5DfvvxD"
+    "A60PzX3hkHlF3FEV2wNyq+e0/EKRPPAbKVdzqfZYdgWS61Q1Mbl+p1Uwf0KM1bx2a5XAVS"
+    "1oRNHu4+mBoPAPQabvKjObFd27Mc22OXcEOKI24HxEcnFxX0au/WAQg2ln2VKOrLiwEAVo"
+    "u9TuzUEqsO3Yf5ImgDr1yugl0CBbdySuwA5+D0cv/4cPTPs8P3R+dHpydg/+199utcnYRD"
+    "7MAs5608O9w7rr5ciuXmgIFYLrTRMHyGd8sjD8TSMnvIm7lW8EW+nEmfdzNpfzWT2psZqc"
+    "gQJFWJFwmhSUgPDNlVrSDyc2UUBWMbAqNW5EXi+PhDscZMh8DZWPgVAwtEO/mskUQ4EAbR"
+    "56/BMp7WzizMRSOhFAS73hOnKb1YsD+8N45S0DCjpne80EaFJPoR/rfFdFwdVbdYBl8Lva"
+    "IiOLB2svZQfM+/3zt/v3dwOP6jhHQZWDh1a95WjwQpqzMWxoEpAjU23PO9ZXQz+0LHDYKz"
+    "fvpNl8ocsQunAV45WFkWyleoRCCUm5SyZhkRl0ippYTSqNBuuwVUkEv5b0sdp/yayFdSk9"
+    "CJo1rZLtF5uw0HPRr0YZdbY4ME6CQ26Joh19gI4Qo0L+Nwu23eBidQvze33jJ8U6rfGdcZ"
+    "bX6FBxKpP9FwMiZgJ0PQU7piSY2MtPt6XGNGBd2T9esypgYWwuTQk4O/n5+eoEnX/ze7Qy"
+    "mS2e55NraeW+ZSeQeLC+yIip3EXIYlKPZqqr1hgt2Oa4KSSTzeFs8M54tQ0zoTDdGk00yu"
+    "npuhujveBZF2BFJF7aC4WqD5uxM4x7Vqfn+QoScF0szisGJx3UfBH958SSnqwQ8d2338E6"
+    "AvvhvYfVAvdp+qR86W0WKV5kPN7xq+SvwXs1o8DQbewCGUwDNnmw9Urov+GahdV8vt1Gs4"
+    "UUdwf5YGy/tmDGWJCnbhfY7vuaeQZZ4Muf3j032uJmRCTWBLuv2jk72zn3/4uPefP5WEhu"
+    "PTk7/J63WU93++ONyrqg36UzhEcKiW+3bS13aJDtocU4fvgDUdSEczhpWiFQRjUfat/LGl"
+    "eDJuFZ+m83sxkXSAd3H08fD8Yu/jP0sD+WDv4hDOmGWxTBz9walwmaKS0b+PLn4awX9H/z"
+    "09OawO9uK6i/+OwaZglS+m6eLrNIi1OU8elcA8FjUq5u8HkyNYx1+wilTAyJbO92vpUfWd"
+    "9i0I0uEXyu1ppEd4cj05onDdAGrUvLZiq81i/U18tgoSa3oZVgEre+QNXpLEEEQw0dbrbl"
+    "cczVPeEKlIrzgcXgsxA0MtxtdH+OjROyLAgMYe/DUorvsF0eigNG5hA2sh/21De5Iwki2p"
+    "0g9skyBgvrIodDQigzEvrjrLmYdNE1wtcmbg2BI437LMOs/I6K8jxSZI3NwhwAN8A8v7eC"
+    "ujq8FQg2vaxWIXO7I8Vbz9QpcZG5WiGzUm0l4zmXhE2QPxUi5BBoQ8C3/rHKrgsoGqCUOD"
+    "dPjKDEMYxnFxC45UWOkppJDhesjrAojAEpyXamt3rfsQHcVW5SMAg4i1LZYBNRILOxaIpK"
+    "rbcThg3YIvVJAnMeVRMxC3g0OKDQxe1sNScRVbgQUp+m5iAs0yATtiIaNGhD1TBikx6xyF"
+    "M0kcaENioPXJ6Jq9Ab4G99mftSnq7d39qGiuRjFb6SPEGXUhiY8jBDw5E7izx7k0jxcCXm"
+    "1oSoer2qw4oE/EaGZnXT8BnmzGHAXkWqhdQJv9SRRrI8xXv1HNwDFgO8AUdBZZIsAYpudF"
+    "zkQNksaBzouyRxNbv+ZZoOVnAVusP7/lUdnzmdXaAG/89f2AsVq+RyjaIFfgbD1D49GfRx"
+    "gbytaSeRDdwAyvhRQG9/NF0KOvsc0kDP1yPBjyZ32eW8uQP5XXQAzs8S99WfMwrvwcDHn8"
+    "l2SVRvDSH/E7wR/7r+NtI82Aen9OJ65+rUyON7iGVrtXSV6/kSPpOfAqeZIss4cnyTJbPU"
+    "lwqhLHhbNMHULQAFtCuFSRCoqXKWvdp3gW5W9G81mW/7KdmHZgCK0uEV2JXSHYaLC+b5Br"
+    "oIL9FjfocLGhXHKnNWyB1vBmy4XiZ3181rz1ajpNL+3lw2JJZ9fpP+j9N1NfvhmIT6G/rN"
+    "G7HlerYZ3zedwi1fBz65WahF02QKhBKhL4irQgBezjBAb3I5nY1vqFv+Y8TSZE0k439n1F"
+    "b4Duuz5xeJ1eo8izrcZKgajNPlA+BFeOfCgpFIM+fmhX86ByDqTuWjBPqpWqtaHhvnXFoe"
+    "rtRiaO/szYVrWjPxZ1H9AMkIvqLNnzcYcNqjdkIsm4Y6Hq4tiCjHfh1QMXVJOMSH+kR7Kj"
+    "u6uWjnMD6bZQwozoLshvRs0XcTnBRrS9REMCNQ9TWa0rTK1GuFWpsK9jt4yrHWnxEK4cne"
+    "W4gCa9qhv3LqsL3CfVp6m9zlGBK2pQMHJ9z4yljU1PGTEKe9d6/DefFfr4+mE+ner7IDd8"
+    "jh1a6DZeaaA5LoRNkMiiZb0ivxEb3DZ+uIcbJkNBSAjgEXOii5LlR7xBHOnTFbuwgq0LK9"
+    "BH+BAkq+Vey7q7TPjzm2FsH6/fUf0d1X9lVH8XVrBNtPbBVFVDroWwlrFdQ1u59bG6+gFR"
+    "BvWUGLjyxFhYyUOkj3pANMGwimHpWgoRg+UTLH7YIipUK+nmW+lcyvPAH+z6VqDSNuDCLu"
+    "TLrRgXeYFcdOGyTWMia4MXeocMFEAMCRjoitxWvET3iHchI/3ZnM/7uDRFRuZpjMzFe4fY"
+    "I0WYAvF8pEmeLKC7I3XIDi+C6wIA3dltQaAsSXy3HDlSEDmtcb3oHB0V8RFgSAhs20sMS1"
+    "t4h03+cC1yrqC9ZOKgvxZbr0XFIzatw7qHob450vZTFCIBurTLZEuPcsGw4vJQXDNsqwQ3"
+    "9IogcES87eGoh5hINuRSDUJPq82XcMJiloGZLBe3jwKnTUXL1zrE1wHfzPbKiHdTdsS9D1"
+    "fUxSWJZrcIxAl8Kc5CBf/IgBxQLhuDMlQH9CODn8aLr+wNPQVqwUvcxfxt/QbZxphd/qn5"
+    "oNa96INv5JSy3r4MSF6/c7w3LNTKXdUX0nKp10gpBXXZkPHs6M6W0B29S7UpaUiXasV2Xf"
+    "qsXSqMf9F7RrYoXUq4ZMz8ZjB41WKvErtdmp7NsZsHmUokOlxUbCj+CPPyVmXv2aZpWDa7"
+    "89Va6pO7Jf0yo1+HRDC2lf92EY3jB6zcK6lbeqWmMztS05n11HRClxkw1WglXuUss1XbIX"
+    "ezy0NmF102qHVlt2dUK/YAFrtV3Tc0HrHdwaMQVhsLK7vaRbkP/zij8yBvnk+aNjJuHwtq"
+    "8+I0EYoHIvHQNELPCMag0MraZNsOm3QK9htGWrqgbX0yu8dRIqJEHwMMGXH6MpHI0uAuu1"
+    "k0vIM3QwPcmedanS8HlQ29u0VjO/y7OiB9PLyyUx51K/kmG3Are8P51lLhgiulRKqmKnrA"
+    "BvRvbSY4oPUN0NqmYtwnbpvVEMZBGzer/qPwob5Q36xktSIufGLApSZVDi9ww9ViidMu48"
+    "Hr5BN02dmFV1vufFbxrOwOljLY8QrHrB2NdO90217s9dnQaqGeq3qctBfg3mnMoiXyYnnK"
+    "9Shb29dpiN8qQHtdsddez6q1Zqd2oNqnIpuJabPjvoP4V/cxE9/CDGCJQlM4TCvfHbHKGc"
+    "a09rXv9S5NI4N3e2+2V7pXoLAYIhgIO+xJt0r50/Ch0nFbn3ii/EkODCpozTH27YxTecgw"
+    "ZVrzI61HDfS0itcp/CMi+lgPMtlFGW9dlPEL0ZG2az/2C3QzbReAu5R5T5IyT828G/q0d4"
+    "HZW+PW3sVlfzdx2UL+258vwibSrp/u5Ovy9QH5egcw9c6VoEZXRfoglWhHrb6TFhriyvRI"
+    "nm9AQLHFSZ0kIHrEYTM73w7TcJ+wHk/ddG/IsOYbE4156cnjIs6z8Dtz3Z8khExcesYv+b"
+    "06sFiE0E4SjcHBMpw4EJbrhkTLpe34GltNdIpeUNdKmmk96rQlNrQXqRFR2b45WtIEFzMj"
+    "2QJ5UoXz4q7i8g2FoVoGa9EmS7a4aExS47W1bNm+C5mnCLUULRKMyy4yd1V0meRgv7hWhB"
+    "MLQUTuoS6aj9HxCIuelUoE9/Lj4iuDRRZtO+G7ZhPB0NftuW6ixDdBdoNfdSwPxcuLDz96"
+    "+vbP85/2fjQhPpizYUem69MSkS3SnCLJbBjXLcSPeJat7a221+PBw85Fi1EzqNcDvekGbl"
+    "De0FozdQqf/2Jvz4zGXeS03hqfhDASDNPmZ+E+1CvSN1bHwMkiLW3uzej1bQNQ2Gn1pnUD"
+    "ginZiJUI49SAa3oqq83pMG+6SJKMSs2gwwI9TVxdlkTpjfhRWBqupTthCEMdD7G1XP/ia0"
+    "lV6Cqnd7wqUUwk2CxiNRteF5R0lUvfBNBzGmvYLq1/RfTRBAt4mofEv8jrHyfe5akXXuV4"
+    "F8fuEe7i2K3RLnCqW7QQ00Qd0Av6W+sHBYsiLyUrWhd/OfzPRYm61Lb1lvijvLy617f6vc"
+    "bq5DuMojeX35Cwb1WExVPxdTHPDlCQtBKv9FN65bdg0wi9XoeeVvZlgeibpmW5pmE5HrFd"
+    "l3hGgWb9VBes+0d/A2RLU0I71GJm3whqVXYHdQfUbRC34vtAXL8DDblYMg5ArVTmVUbB7n"
+    "J3fBcS8eDcHc8c0rhlYVdPlSyyhEq71FugtlbrfSSZFxjvxWKZL2YZxsTweCWM+6ChCkMK"
+    "tQwRcXEWQ4ySBLVPvA/WAGkCbGoEhfrHo6IcLir4hgkM2gYNFjn1RjLw9pjeKNNByIBICL"
+    "dWcejzvQKbWlr8TxLpAtByMad97+VzDdPmgTGeYcBdEpcnK3DNmizYXaEuuxcBUyVRRn5A"
+    "kEvbmlhX5I7oUL1ekkAI7WxStbD94g4tTgdi2nELFkNzk9TsuguWAIoci54fBH1GiZ5gsC"
+    "mh4fpRVu28qmG6p63rixaVeEyjag880LUnBp+/jC6nfFT8lhc3oY5mrP7b0hRSRz1m8qOn"
+    "Cg4SQVYOx3WUgmraBg/o8uUD5YYg/rs2XIkJgHStln/BY13gZSnicWioZ+tXddB/oV/Nmk"
+    "Olp6MYiL2yuZY+B9JHKH3sGLBPNXdtpcsxk0j1Im21ys+LR6T5ZLXGhkvgEW+9WfEJkV36"
+    "kqeOV4N3YLOQfpiubmuhDGX2J8o+swA8vjw/PHvHZy62oDg/P2Ir/5OLd6Mgy2ZgeX6Vnv"
+    "98fnH48d0ou89yeltdM/UR4f0eGrzfKsH7tY/c7xT3neL+HSjuDTN972m5XvSV7CAta8Jb"
+    "/d2mndK2JVPpd6a07aJsv7uOre1MlUv8xtVlS+ojVWSjNc4zuLeeJFRju3fmvJR3a4mj9g"
+    "WuVOiVLEhqfo/yQ1yHb/DXtSox2duK3dpQd22CKkW5n7G58uzo/cW4YQA+HnwvzztUxa/0"
+    "dJUQPD+8GJ1cHh+Pm6e/RwBx94W35g0ts3nMOmXnvhyWkEWKS0VWNczqn3X4gfsn4tiTtQ"
+    "tcew/ZLQN2gKv3MqPLVj+vOvmmy8kLksIQD2+jW8MxIsI9McX+ggFfVHh4lQ8Iit4J448o"
+    "jMNY4r9rgLbTF73MS4w0J30SK5L2vIqkllaR3op5qy+ERYGXiJ9JSJ/MlIS0Z6aEc1UWk2"
+    "VfF+xVNHTPQ63gS3EbfANQZ9mUvR6aM6otFnMapM2YlspVHQOs4FMBWgzbR3cMnJ4el+Sk"
+    "/aOqo+Xy4/7h2Q8TDi+7aIaLzJ1A+53qeINDIZ8yAHCPLmfRTdOSUJzpXA8G6pp1C8L2fn"
+    "7AgqxpOdbq22lcizW4dkSPPetb71FcOxsk0Wl/2bVn0XnNrzl4NAaAKC5/mQBOeqUFn3Sk"
+    "BZ/U04K3xmm0f/u0PU5j9/nT4vOnz/p6+eP/AXRt008="
+)
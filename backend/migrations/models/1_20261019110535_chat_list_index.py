@@ -0,0 +1,61 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE INDEX "idx_chat_tree_d_owner_u_db253e" ON "chat_tree_detail" ("owner_uuid", "updated", "uuid");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_chat_tree_d_owner_u_db253e";"""
+
+
+MODELS_STATE = (
+    "eJztW21v2zgS/iuGP3WBXCHLenNwWMBJ3FvfOvYidm73ti4ESqJiXWXJK1FNgyL/fTkUZb"
+    "3bUu00ziX5IDgkhxw+M+S8Sd+6a9/Cbvh+GIZOSJBHrnEYojt8hQly3O5551vXQ2tMf+wZ"
+    "edbpos0mHQcNBBkuI0UJjb6OiXSLUbFRyAhJgExCB9rIDTFtsnBoBs6GOL4H5MuoLyARno"
+    "bKngP2tOFp9+FpavDEPfabtRgG6zXZb9ar4GWkIZX2qlZfWEaKYMrLSNb6lMq2BW0yuV5G"
+    "AxkWGghiPK2amcRmwwbAsuWblGfHuzs57pbe0hsSypsRERyeL70O/eOgn3fohIZNF5Jti1"
+    "HJjFXN2M8eFtMVsRGz1Iun6yV8SbYpJlzAspvA/+JYODjvMOb7ghWTW+y3wHCT2LRCspws"
+    "CRbnGbRIB90DtiVbpRtUZZExI7N5ZJtPW+QtnYRysN4QnfifsRfCPHkeYunELbGM4me8cb"
+    "SVoCKrQjyhSedzMehlZlLZ0CiBhDWlyRTEJ8jNUKuWaTeiw+sNDhCJgh2IUAIsUqHKGCmg"
+    "T6IF7A0QxxR9zSysqALFXR6Iav3yxRlsx3PClR5gFPpece+qJMBTpirLBt9hT3csLn1V7g"
+    "F3Yk8YX8XdvvE/bBI9Fgs206NjZYQTtyDE2pVUH5GaMgqsq0gEvRZFmQuKskiwpROHKj9B"
+    "681WCRU1OW6SLZsxS+mBjRUSC9UH2VLh9Eee81eEKZJ3mKxwQO+Aj59os+NZ+CsOk383n3"
+    "Xbwa6Vv0P59edYMBHr18nDhvXd3o6vPjAKuGEM3fTdaO2VqTYPZAX6x8miyLHeAy30UchB"
+    "R7CVuUy9yHX5RZw0xTugDSSI8JZ1K22wsI0iF65koC7dyElj5hrkTabvwW3ueASA+PYYby"
+    "XdKGvtAt+Xvwxv3vWVn9iW/JDcBayTwdB9ZISIoJiUgZqimFwsZQwvVyioxjBLU0CQMtwA"
+    "O47MFrpkSIpdar2OA14XzquLvTuyov/2BGEHmv8Z3jBA6SiGqE8tamx7p7xLjPsA2YJNZ7"
+    "dsGyzzVG9oZvQyNTdlQMceqdXNPF0BUrqF7zncTTAVDgD0Dhb5h9iTVEnrK5JGhzBGti3q"
+    "DojH00UBvZJtbYFgJe2rRDHrXrQAsEj2OrFLXawydB9cH9WBl6crYGcD4UleiTvAuZrdXk"
+    "xGnd9uRpfj+Xg2Bf7XD+FfbtoJTbTBIWyXN6PhpGhctu5mC0XME32XGj6DbTmyIubc7DaW"
+    "uUT4Io2z3MQ2y/WmWS5Z5jgUaYNkSvEiIRRluQGGdFQtiKwvjyKP2NrAmCF5kTgeXxVLkW"
+    "kbOCuJXzGwEGjbnzNBIjQYyPx8jwJLL/X4ol8ZUPIAuyyJmYcXPn0waYw9yGGaVTae50Z5"
+    "SvQa/jvhcDxtTZcI0P02X1FIONB90v3g2M5fDueXw6tR9zGHdB5Y6FqL62IL8uicFmcOWO"
+    "GoUXUniwDvyDkXRpztyjWbdKxO6GCeY26eYjZZBhT30zyoWZma7QsDlu2EPJXSF3rZTGpl"
+    "dvhYE+9PPH3s+vdU5XRICjGKjcXU7yzOE3U/1WamEoqmOalk/I/NRnX/aUeeCULrsJXgIf"
+    "3cfRIX+IAEVV4ITSHNUx0T2GcNJfbiWLKNZdCuaDPYvJ1WsQI1i9O9T36cJnpdugFr5rkP"
+    "XOd3oLkYX4/mi+H1bywiC5OIbLgYQY+Yj9N46zulYEa3k3R+Hy9+6cC/nT9n01FRRNtxiz"
+    "+7wBOKiK97/r2OrMzxTFoTYHIizdxAbUSaIXsT6bOKlDHfws8qeVUV0f8Fp/zw6w12EYP2"
+    "yXyqH3b3lbyqx7LLeTynKQdLhctUhK3eYcqKqZmjtK+SvfAD4jshriscp7XybAUWelVR0m"
+    "BMD6XrxDNgBGVGASUlPEWFyqcyMA1WEIeKuWRaSVGvtlD/MlivrOKDB8CLpXvfJKDLwbQ9"
+    "waYepiFrvDQayYYsJBuRcJ/RIiuZIS3dB76Lm641EMBTldiLAJogwCq2CjVoURWTqrlHsE"
+    "f2Tyj3NMakkbxBgAJKpyc71wYINeEJPItUXDgzoumbGLLWl9iLBHGLPfU9nMUnDTISmVT7"
+    "+LGo4znp/EKRH1CfknxiaYfUF2TAfSXbRbCSYTb7u59qpKmkQo0r2KaWwiGbUKNXVEVO2F"
+    "JESWAvAwwS8akG6qXVfFHLbZwnIBCJX0JIK+iKjCmtokhc6NyC85GKYkswxsiNPLCa/haz"
+    "HDFmgSNfnYoaedG6lADJAZvQflcm6ngWu3s7H92cs6ND78/5fEwdnenivLN9/Wzpzf87X4"
+    "yuzzvhQ0jwumgimiSuBg3yVoPatNWglA6M78Yy8gt68OuKnVuSZwb8GCq7GP2xyDm+CVjv"
+    "rod//JRzfiez6b+S4RlwLyeziwKqhduz1SVRJj3gvjipol77SFxHFZrZKBjnlG/B22nG49"
+    "8h2Dzlm2CfPyrPHdiMR9rmuivSvca0Iw8z2gGXI3olFqKUBipiWPHajB9g5877FT88TQ3t"
+    "2eDbW0TLKUiuhjYfLTrT28mkW32CjwBiuWB2smd3L47FG6pBObJGR82V41pUKD80IXk6Ct"
+    "ouH5nCVvv1zo7MblI43w9n/fdELwvYFrnbWxpi1CZu086zXVlbCFPapGwrM0fZj4xaV7UP"
+    "n/It9XMaqR/QpbbfAGRpjpOFeOqXX576xS685vdWUwi3BC8Rvyd5wXBDTc29T03RCoWrNl"
+    "CWCF9KYuwHgOqEOjUPzpeK433h+y5GXjWmOboCngYlfCpAt2p77BvyYjab5IL5i3ExlXh7"
+    "fTG6eddj8Kbvtld8q/KWHvt/yKLE6bGDXiI9XkV/iAPHXFW5hLxnpz+I0jH7HMJ6OR/gkF"
+    "W5Y7UfeVT6YhUfd3CJPavVO8qnHfW+1xfqxjvtPvLIkLyZuTRK3bR6k54Pf5kAPsnXq7WV"
+    "yH/PZ9O2lchbj27wo+WY5Kzj0vj+02nCugNF2PXuumSxBFmwRjDBxaHfKBxqXh7/Br75cq"
+    "c="
+)
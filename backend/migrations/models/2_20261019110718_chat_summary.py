@@ -0,0 +1,72 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "chat_tree_detail" ADD "message_count" INT NOT NULL DEFAULT 0;
+        ALTER TABLE "chat_tree_detail" ADD "last_message_at" TIMESTAMP;
+        ALTER TABLE "chat_tree_detail" ADD "total_tokens" INT NOT NULL DEFAULT 0;
+        ALTER TABLE "chat_tree_detail" ADD "last_message_preview" VARCHAR(200) NOT NULL DEFAULT '';
+        ALTER TABLE "chat_tree_detail" ADD "branch_count" INT NOT NULL DEFAULT 0;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "chat_tree_detail" DROP COLUMN "message_count";
+        ALTER TABLE "chat_tree_detail" DROP COLUMN "last_message_at";
+        ALTER TABLE "chat_tree_detail" DROP COLUMN "total_tokens";
+        ALTER TABLE "chat_tree_detail" DROP COLUMN "last_message_preview";
+        ALTER TABLE "chat_tree_detail" DROP COLUMN "branch_count";"""
+
+
+MODELS_STATE = (
+    "eJztXG1v2zgS/iuGP3WBXCHLenNwWMBJ3FvfJvEidm73ti4ESqJiXWXJK1FNgyL/fTmUZO"
+    "rVlmIncS7uB8EhOeTwmeHLPBr1R3fpW9gNPw7D0AkJ8sgVDkN0hy8wQY7bPe386HpoiemP"
+    "LS1POl20WvF2UECQ4TJRlMroy1hIt5gUa4WMkATIJLShjdwQ0yILh2bgrIjjeyA+j/oCEu"
+    "FpqOw5YE8bnnYfnqYGT9xjv1mJYbBak/1mtQqeRxpSaa1q9YV5pAimPI9krU+lbFvQLi+v"
+    "5tFAhoEGghh3q2Y6sVmzAahs+SbV2fHuDk67uTf3hoTqZkQEh6dzr0P/JaCfdmiHhk0Hkm"
+    "2LSclMVc3Yrh4W+YjYiFXqxd31Ur0k2xRTLWDYVeB/cywcnHaY8n3BisUt9ltguEmsWyEd"
+    "TpYEK9EZvEgH3wO1JVulE1RlkSkjs35kO+m2qBvvhGqwXBGd+F+xF0I/eR1i68QlsY3iZz"
+    "xxtLagIqtC3KFJ+3Mx+GWmU9nQqICENaVJF8QnyM1Iq5ZpN5LDyxUOEImCDYhQASxSo8oY"
+    "KeBPogXqDVCCKfqeGVhRBYq7PBDV+uGLPdiO54QLPcAo9L3i3FVJgKdMXZY1vsOe7liJ9V"
+    "W5B9qJPWF8EVf7xv+wSfTYLNjkS8fKGCcuQYiVK9wfkcoVBdVVJIJfi6KcGIqqSLClE4c6"
+    "P0HL1doJFTVdbpItm7FKfMHGDomF6oVsqbD6I8/5K8IUyTtMFjige8DnL7TY8Sz8HYfpn6"
+    "uvuu1g18rvocn251jQEavXycOK1d3eji8+MQnYYQzd9N1o6ZWlVg9kAf6XiEWRY30EWaij"
+    "kIOPYCuzmXqR6yYbcVoUz4AWkCDCa9UtXmBhG0UubMkgXdqR08LMNpgUmb4Hu7njEQDix2"
+    "M8FT5RVtoFvc9/Gd586Cs/sSn5IbkLWCWDofvIBBFBsSgDlaOYbixlDM8XKKjGMCtTQJAq"
+    "3AC7BJk1dGkTjh0/vfYDXhfWq4u9O7Kgf/YEYQOa/xneMEBpK4aoT0/U+Oy9TqrEuA6QLZ"
+    "zpbJdtg2Ve6ohmxi/5cVMGdOyRWt/MyxUgpVN4yuJugqmwA6B3MMg/xJ6kSlpfkTTahCmy"
+    "LlE3QDy+nhXQK52tLRCslH2XKGavFy0ALIq9T+z4FasM3SfXR3Xg5eUK2NkgeJBb4gZwLi"
+    "a3Z5ejzm83o/PxdDy5Bv2XD+FfLq+EIlrgEDbLm9Hwsni4rK+bLRwxL/QkN3yFs2XPjpi7"
+    "Zrc5mUuCb/JwlpuczXL90SyXTuY4FGmDJJd4kxCKstwAQ9qqFkRWl0cxidjawJgReZM47t"
+    "8VS5FpGzgrhd8xsBBo218zQSIUGMj8eo8CSy/V+KJfGVAmAXbZEhMPz3z6YNYYe8BhmlVn"
+    "fMKNJpToFfx1wOE4L+VDBOh+zVcUCAc6TzofHJ/z58Pp+fBi1H3MIZ0HFqqW4rJYgjzap5"
+    "UoB6okqFF3J7MAb+CcCy1ONnHNJm2rE9o44ZibU8wmY0Bxn/OgZiU12xcGjO0EnkrpC70s"
+    "k1rJDu+jYyB2U7OYfuQRYN2wDE+BsbWKXT8UbUO71wbAmmmaAnzZoI84fQiK9AVDZhwX+4"
+    "3RmpIVeyrnzahS3ja2WFFs1qtEp6HZBitXmXYwsiwJMfecIVzxIMP4KZzZiwl1rPJa0IL2"
+    "LwEzajDIZKa1ZnImWxCbsXSfu/49XZ86MGhMYmWxtXoSk2rdL7U0XirRlMBL278sddf9px"
+    "15Jnh4h40ED+nn7rPECzuweXkjNIU0L7VPYF817tqKY+kiUQbtghbDBWHjFaICNSuR+5j+"
+    "OEz0unQC1sRzHxKf34DmbHw1ms6GV7+x8DVMw9fhbAQ1Yj6oTUo/KIU7x7qTzu/j2S8d+L"
+    "Pz5+R6VDTRut3szy7ohCLi655/ryMrszzT0hSYnEkzO1Abk2bEjiZ9VZMmypdf+LAjuw0N"
+    "UpR7l4ScEdD79qI1eEWxd4ndkQh+OnYuCnmqCqpwvc37cYX4Hvblg+KHD2kbTqe98WjN2W"
+    "QV4G8Ovm/DvNTJP4l8edL66O5wcy+Qg41efoobXn6KQlv6pXQkVmxKZ4nkp19vsIvYHMsI"
+    "74lqebHVUyJbHstM1P64lBwsFUxKEbZ6HiVrpmb8ybYEt5kfEN8JcV0+GY/4s4lZUKuKkg"
+    "ZteoiPE/cAPIWEBbTmBlRgNJSBabA8OUikk0wrzfWpzd97G6pXJvdBrJvkUG1NMIx5IKUn"
+    "2PNIM4CBYRlTkWzIQjoRCfeZLLLSHnhGX+C7uOlYA+CKqPLQUhMEGMVWITVNVMU0mc4j2C"
+    "PbO5R7GlPSSBMLUUDl9HTm2gChJjpBDM3NhTMtmiZoylpfYgxWXGJf+x7O4sO5x9Qm1Xxc"
+    "bOo17yYU9QH3KdkntnaIA50B952sB8FKRtns7z73SFPhRo0T20yNwyGbkLqnqIqcqqWIks"
+    "ByBAep+VQD9XiSn6jlJp68l0Akzk3kiXWKDCSlokiJ0ZNYNWmZpfJ4y2b03ZGdewl2DpZ8"
+    "9T1p5EXL0nuRHLCp7MvdkSpP7O7tdHRzypYO3T+n0zG9S17PTjvrrPS5N/3vdDa6Ou2EDy"
+    "HBy+IR0eRONWhwoxrU3qcGpbeE8d5YRn5GF35dDtRa5JUB30uAMfpjlostUrA+XA3/+CkX"
+    "X1xOrv+VNs+Ae345OSugWtg9W20SZdEd9ouDiuXac85PiInzkkea8jCZ5ycYNi95NOxh8c"
+    "/ZG2mb7a4o9x5fsCVhRjvgckLv5IQo0UBFDMsAfvID7Nx5v+KH50mteTX4tubW5Bwkl1oz"
+    "Hc0617eXl93qFbwHEMt5NAe7drfiWNyhGmQp1fiouXBcixrlRQnJw3HQdnwkh632o94NzG"
+    "6aT7cdzvrPjN8WsC2421saYtQSt7zyZBNrC2FKG8q2kjnKfnvcOtlt9y6P1M9hUD/gS20/"
+    "DczK7IeFeO6c2OfO98bLZN9qCuFa4C3i9yzfHazoUXPv06NogcJFGyhLgm+FGHsBUJ1Qp8"
+    "eD861ieZ/5vouRV41pTq6Ap0EFnwvQtdvue4c8m0wuc8H82bhIJd5enY1uPvQYvPyTt4pP"
+    "WI/02P8DixLTYzt9W7K/N/pDHDjmoupKmNRsvA8i3mbbhbDezjtcyKquY7W5Z5V3sYqMs8"
+    "Rir3rq7SXjrP7u9Y1e4512335mRI7HHI9SV60+sEuav00An+U/tah9E/nv6eS67ZvIW49O"
+    "8LPlmOSk49L4/sthwroBRZj15veSxVeQhdMIOjjb9dPFXY+Xx78BidYDmQ=="
+)
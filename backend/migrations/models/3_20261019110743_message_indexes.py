@@ -0,0 +1,71 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE INDEX "idx_messages_chat_tr_812ae1" ON "messages" ("chat_tree_id", "user_context_id");
+        CREATE INDEX "idx_messages_parent__35c962" ON "messages" ("parent_id");
+        CREATE INDEX "idx_messages_user_co_230a41" ON "messages" ("user_context_id", "created_at");
+        CREATE INDEX "idx_messages_chat_tr_831d35" ON "messages" ("chat_tree_id", "created_at");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_messages_chat_tr_831d35";
+        DROP INDEX IF EXISTS "idx_messages_user_co_230a41";
+        DROP INDEX IF EXISTS "idx_messages_parent__35c962";
+        DROP INDEX IF EXISTS "idx_messages_chat_tr_812ae1";"""
+
+
+MODELS_STATE = (
+    "eJztXGtv2zgW/SuGP3WAbCHLejlYDOAk7o53nHgQOzuzUxcCJVGxtrLkkaimQZH/PryUZO"
+    "ppS7GTOJv0g+CQPOTluXweXfVHd+Vb2A0/DsPQCQnyyCUOQ3SLLzBBjts97fzoemiF6Y8d"
+    "JU86XbRe83KQQJDhMihKMfoqBukWQ7FSyAhJgExCC9rIDTFNsnBoBs6aOL4H8EXUF5AIT0"
+    "NlzwF72vC0+/A0NXjiHvvNUgyD5ZrsN8tV8CLSkEpzVasvLCJFMOVFJGt9irJtQZtMLhfR"
+    "QIaGBoIYV6tmKrFZsQGYbPkmtdnxbo/OuoW38IaE2mZEBIenC69D/yWkn3ZohYZNG5Jti6"
+    "FkZqpm7DYPi7xFbMQm9eLqeqldkm2KqRXQ7DrwvzkWDk47zPi+YMVwi/0WGG8Sq1ZIm5Ml"
+    "wUpshlGkw9gDsyVbpR1UZZEZI7N6ZDuptmgbr4RasFoTnfhfsRdCPXkbYu/EKbGP4mfccb"
+    "TxoCKrQlyhSetzMYzLTKWyoVGAhDWlSRXEJ8jNoFXLtBvh8GqNA0SiYAsjFIBF6lQZIwXG"
+    "k2iBeQOUcIq+ZxpWVIHyLg9Etb75Yg224znhUg8wCn2v2HdVEuAp0yHLCt9iT3esxPuq3A"
+    "PrxJ4wvoizfeN/2CR67BZs8qljZZwTpyDE0hU+HpHKDQXTVSTCuBZFOXEUNZFgSycOHfwE"
+    "rdabQaio6XSTbNmMTeITNh6QWKieyJYKsz/ynL8iTJm8xWSJA7oGfP5Ckx3Pwt9xmP65/q"
+    "rbDnat/BqaLH+OBRWxfJ3cr1nezc344hNDwApj6KbvRiuvjFrfkyWMvwQWRY71EbCQRymH"
+    "MYKtzGLqRa6bLMRpUtwDmkCCCG9Mt3iChW0UubAkA7q0IqeJmWUwSTJ9D1ZzxyNAxI+HuC"
+    "u8oyy1C3af/zK8/tBXfmJd8kNyG7BMRkP3gQERQTGUkcpZTBeWMofnSxRUc5jFFBikBjfg"
+    "LmFmQ11ahHPHd6/DkNeF+epi75Ys6Z89QdjC5n+G14xQWoox6tMdNd57r5IsMc4DZgt7Ol"
+    "tl23CZR72zmRmXfLspEzr2SO3YzOMKlNIuPGZyN+FU2IPQW2jkH2JPUiWtr0gaLcIM2aSo"
+    "WygeX80L7JX21hYMVmLfJIvZ40ULAouwt8kdP2KVqfvk+qiOvDyuwJ0NwKNcEreQczG9OZ"
+    "uMOr9dj87Hs/H0Cuxf3Yd/uTwTkmiCQ1gvr0fDSXFz2Rw3WwzEPOhRw/AF9pYDD8TcMbvN"
+    "zlwCvsrNWW6yN8v1W7Nc2pnjq0gbJjniVVIoynIDDmmpWhJZXp7F5MbWhsYM5FXyePihWL"
+    "qZtqGzEvyGiYWLtv01c0mEBAOZX+9QYOmlHF/0Ky+UyQW77Imph+c+fTBvjD3QMM2qPT7R"
+    "RhNJ9BL+OuLrOE/lTQTobqNXFAQH2k/aHxzv8+fD2fnwYtR9yDGdJxayVuKqmII8WqeVGA"
+    "emJKzR4U7mAd6iORdKnGzTmk1aVie0cKIxN5eYTaaA4j7XQc1KabYvDJjaCTqV0hd6WSW1"
+    "Uh0+RMUg7KZuMf3II6C6YRmeAlNrFbu+KVqGVq8NQDXTNAX0skEfcfkQDOkLhsw0LvYbo4"
+    "0kK/ZUrptRo7xdarGi2KxWiXZDsw2WrjLroGVZEmLtOSO44kFG8VO4shcL6ljluWAFrV8C"
+    "ZdRglMnMas3kSrYgNlPpPnf9Ozo/dVDQGGJtsbl6Eotq3S+1Ml6KaCrgpeWfV7rr/tOOPB"
+    "NGeIe1BA/p5+6T3Bf2UPPyTmhKaR51SGJf9N61k8fSQaJM2gVNhgPC1iNEBWtWgvuY/jhO"
+    "9rq0A9bUc++TMb+Fzfn4cjSbDy9/Y9fXML2+DucjyBHzl9ok9YNSOHNsKun8Pp7/0oE/O3"
+    "9Or0ZFF23Kzf/sgk0oIr7u+Xc6sjLTM01Nicm5NLMCtXFpBvbu0hd1aWJ8+YUP27LbyCBF"
+    "3JsU5IyAnreXrckrwt4kd+9C8OO5c1HIQ1VQxdDbvh5XwA+wLh+VPnxMy3Da7a1ba84n6w"
+    "B/c/BdG+WlDv8o8eVR86O7x8m9IA42evkpbnn5KQpt5ZfSllixKJ0lyE+/XmMXsT6WGT6Q"
+    "1PJss6cktjyUlajDaSk5WiqUlCJt9TpK1k3N9JNdAW5zPyC+E+K6eDJ+488GZkGuKkoalO"
+    "kh3k5cA+gUEhbQRhtQQdFQBqbB4uQgkE4yrTTWpzZ+73WYXhncB3fdJIZqZ4BhrAMpPcFe"
+    "RJoBCgyLmIpkQxbSjki4z7DISmvgEX2B7+KmbQ1AK6LGQ0lNEKAVW4XQNFEV02A6j2CP7K"
+    "5Q7mnMSCMNLEQBxelpz7UBQk1sgjs0dxfOlGgaoClrfYkpWHGKfeV7OMsP1x5Tn1TrcbGr"
+    "N7qbULQHhk/JP7G3QxzojLjvZNMIVjLGZn/3+Yg0Fe7UOLDN1Dgdsgmhe4qqyKlZiigJLE"
+    "ZwkLpPNVCPB/mJWq7jyXsJROLYRB5Yp8ggUiqKlDg9uasmJbNSHi/ZVL7L0s0weXK6FFAu"
+    "xE2N85PBlBYv1lFAvEuCzyEJwjpTfTgbedGq9DImR2yKfb6DWeUxoXszG12fsvlKF+3ZbE"
+    "wPsFfz084mFH7hzf47m48uTzvhfUjwqrgvNTnIDRoc4wa1h7hB6dVkvCCXmZ/TyVAXeLWB"
+    "vDDhB7nVjP6Y5y40KVkfLod//JS71EymV/9Ki2fIPZ9MzwqsVqwojReJMnSP9eKoLpDthe"
+    "5HXMTzyHdt9Djl7kc4No98d+xxid7FI1fT5a6Ie4tv9fhxtAVxOdAb2SFK2lORwzKBn/wA"
+    "O7fer/j+aeJ5Xoy+nQE9uQGSi+eZjeadq5vJpFs9gw9AYjl452jn7k4eiytUg9ComjFqLh"
+    "3Xok55VhX0eAZoOxGU01b7JfEWOTkN4ttNZ/23za+L2BaC8Q29YtSqxTzzZJtUDNeUNjpx"
+    "pVyV/eC5dYTd/lXu8VHnu/RzQOkHxlLb7xGzmMOoEE8diPvUQeZ4laxbTSncAF4jf0/ysc"
+    "OabjV3Pt2KlihctqGyBHwtwtgzkOqEOt0enG8V0/vM912MvGpOc7gCnwYFPhWhm2F76BXy"
+    "bDqd5C7zZ+OilHhzeTa6/tBj9PLv7Cq+m32Xx/4fVJRYHtvrg5bDhREMceCYy6ojYZKz9T"
+    "yIeJldB8J6P+9xIKs6jtUGvFWexSrC3BKPveiud5Awt/qz1zd6jHfafXCagbxvc/yWum71"
+    "VV9S/HUS+CT/k0btm8h/z6ZXbd9E3ni0g58txyQnHZfe778cJ61bWIReb38vWXwFWdiNoI"
+    "Kzfb+X3Hd7efgbvdgsPw=="
+)
@@ -0,0 +1,65 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE INDEX "idx_chat_tree_d_updated_90ae9a" ON "chat_tree_detail" ("updated", "uuid");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_chat_tree_d_updated_90ae9a";"""
+
+
+MODELS_STATE = (
+    "eJztXG1v4zYS/iuGP22B3EKW9eagOMBJvFe3TlzETq/XdSFQEhWrK0uuRG02WOS/l0NJpl"
+    "5tKXYS55L9IDgkhxw+MxySj0b7vbvyLeyGH4dh6IQEeeQShyG6xReYIMftnna+dz20wvTH"
+    "jpYnnS5ar3k7KCDIcJkoSmX0VSykW0yKtUJGSAJkEtrQRm6IaZGFQzNw1sTxPRBfRH0Bif"
+    "A0VPYcsKcNT7sPT1ODJ+6x36zEMFityX6zWgUvIg2ptFa1+sIiUgRTXkSy1qdSti1ok8nl"
+    "IhrIMNBAEONu1UwnNms2AJUt36Q6O97t0Wm38BbekFDdjIjg8HThdei/BPTTDu3QsOlAsm"
+    "0xKZmpqhm71cMiHxEbsUq9uLteqpdkm2KqBQy7DvyvjoWD0w5Tvi9YsbjFfgsMN4l1K6TD"
+    "yZJgJTqDF+nge6C2ZKt0gqosMmVk1o9sJ90WdeOdUA1Wa6IT/wv2Qugnr0NsnbgktlH8jC"
+    "eONhZUZFWIOzRpfy4Gv8x0KhsaFZCwpjTpgvgEuRlp1TLtRnJ4tcYBIlGwBREqgEVqVBkj"
+    "BfxJtEC9AUowRd8yAyuqQHGXB6JaP3yxB9vxnHCpBxiFvlecuyoJ8JSpy7LGt9jTHSuxvi"
+    "r3QDuxJ4wv4mrf+AubRI/Ngk2+dKyMceIShFi5wv0RqVxRUF1FIvi1KMqJoaiKBFs6cajz"
+    "E7Rab5xQUdPlJtmyGavEF2zskFioXsiWCqs/8py/I0yRvMVkiQMaAz7/SYsdz8LfcJj+uf"
+    "6i2w52rXwMTcKfY0FHrF4n92tWd3MzvvjEJCDCGLrpu9HKK0ut78kS/C8RiyLH+giyUEch"
+    "Bx/BViaYepHrJoE4LYpnQAtIEOGN6hYvsLCNIhdCMkiXInJamAmDSZHpexDNHY8AEN8f4q"
+    "nwibLSLuh9/tPw+kNf+YFNyQ/JbcAqGQzdByaICIpFGagcxTSwlDE8X6KgGsOsTAFBqnAD"
+    "7BJkNtClTTh2fPc6DHhdWK8u9m7Jkv7ZE4QtaP42vGaA0lYMUZ/uqPHee5VUiXEdIFvY01"
+    "mUbYNlXuodzYxf8u2mDOjYI7W+mZcrQEqn8JjF3QRTYQ9Ab2GQf4k9SZW0viJptAlTZFOi"
+    "boF4fDUvoFfaW1sgWCn7JlHMHi9aAFgUe5vY8SNWGbpPro/qwMvLFbCzQfAoQ+IWcC6mN2"
+    "eTUefX69H5eDaeXoH+q/vwb5dXQhEtcAib5fVoOCluLpvjZgtHzAs9yg1fYG85sCPmjtlt"
+    "duaS4KvcnOUme7NcvzXLpZ05voq0QZJLvEoIRVlugCFtVQsiq8ujmNzY2sCYEXmVOB7eFU"
+    "s30zZwVgq/YWDhom1/yVwSocBA5pc7FFh6qcYX/coLZXLBLlti6uG5Tx/MGmMPOEyzao9P"
+    "uNGEEr2Ev474Os5L+RAButvwFQXCgc6TzgfH+/z5cHY+vBh1H3JI54GFqpW4KpYgj/ZpJc"
+    "qBKglq1N3JPMBbOOdCi5NtXLNJ2+qENk445uYUs8kYUNznPKhZSc32hQFjO4GnUvpCL8uk"
+    "VrLDh+gYiN3ULKYfeQRYNyzDU2BsrWLXD0Xb0O61AbBmmqYAXzboI04fgiJ9wZAZx8V+Y7"
+    "ShZMWeynkzqpS3iy1WFJv1KtFpaLbBylWmHYwsS0LMPWcIVzzIMH4KZ/ZiQh2rvBa0oP1L"
+    "wIwaDDKZaa2ZnMkWxGYs3eeuf0fXpw4MGpNYW2ytnsSkWpc2/1wurOX20m6asnpp++fl87"
+    "o/2pFngtt32EjwkP7dfZJLxB4UX94yTSHNSx0S2Be9jO3EsXS6KIN2QYvh1LD1XFGBmpXI"
+    "fUx/HCd6XToBa+q594nPb0FzPr4czebDy1/ZnTZM77TD+QhqxPxNNyn9oBQOIptOOv8dz3"
+    "/qwJ+dP6ZXo6KJNu3mf3RBJxQRX/f8Ox1ZmeWZlqbA5EyaiUBtTJoRezfpi5o0Ub78Fojt"
+    "4224kaLcm2TpjIAewpetwSuKvUns3tnhx2PnopDnr6AK19sejyvEDxCXj4o0PqYwnE5769"
+    "aas8k6wF8dfNeGjqmTfxQj86j10d3j5F5gDBu9ERW3vBEVhbacTGlLrAhKZ4nkp1+usYvY"
+    "HMsIH4h/ebbVU2JgHsr01OEIlhwsFfRKEbZ6ciVrpmakyq6st7kfEN8JcV2SGacBstlaUK"
+    "uKkgZteoiPE/cA5IWEBbQhDFSgOZSBabDkOciuk0wrTQCqTep7HapXZvzBXTdJrNqZdRiT"
+    "Q0pPsBeRZgAtw9KoItmQhXQiEu4zWWSlPfA0v8B3cdOxBkAgUeWhpSYIMIqtQr6aqIpphp"
+    "1HsEd2dyj3NKakkWYbooDK6enMtQFCTXSCOzQ3F860aJq1KWt9idFacYl95Xs4iw8nJFOb"
+    "VJN0sak3ZJxQ1Afcp2Sf2NohDnQG3DeyGQQrGWWzv/vcI02FGzXOdjM1DodsQj6foipyqp"
+    "YiSgJLHByk5lMN1OOZf6KWm3jysgKROGGRZ9spMjCXiiIlRk/uqknLLL/HWzbl9LJwM5k8"
+    "ODGrV2zEVY3rE2fakICFPgoS75Tgc1CCEGeqD2cjL1qV3tDkgE1ln+9gVnlM6N7MRtenbL"
+    "3SoD2bjekB9mp+2tnkxy+82f9m89HlaSe8DwleFfelJge5QYNj3KD2EDcova+MA3IZ+Tld"
+    "DHXZWBuRFwb8ILea0e/z3IUmBevD5fD3H3KXmsn06j9p8wy455PpWQHViojSOEiURfeIF0"
+    "d1gWxPdD/iIp6XfOdGj5PufoRh85Lvhj0u0rt45Goa7opyb/GtHj+OtgAuJ/RGdogS91TE"
+    "sAzgJz/Azq33C75/miSfF4NvZ5ZPzkFyST6z0bxzdTOZdKtX8AFALGf0HO3a3YljMUI1yJ"
+    "eq8VFz6bgWNcqzsqDH46DtSFAOW+3nxVvo5DSzbzec9R88vy5gWxDGN/SKUcsW88qTbVQx"
+    "XFPa8MSVdFX2K+jWaXf7d7nHl57v1M8BqR/wpbYfKWZlDsNCPHV27lNnnuNVEreaQrgReI"
+    "34PckXEGu61dz5dCtaonDZBsqS4Gshxp4BVCfU6fbgfK1Y3me+72LkVWOakyvgaVDBpwJ0"
+    "47aHjpBn0+kkd5k/GxepxJvLs9H1hx6Dl398V/Ex7Ts99v/AosT02F5fuRwujWCIA8dcVh"
+    "0Jk5qt50HE2+w6ENbbeY8DWdVxrDbhrfIsVpHmlljsRXe9g6S51Z+9vtJjvNPuK9SMyPs2"
+    "x2+p61af+iXNXyeAT/Lfa9S+ifx5Nr1q+ybyxqMT/Gw5JjnpuPR+/+dxwroFRZj19veSxV"
+    "eQhd0IOjjb9yPKfbeXh38AAzUytQ=="
+)
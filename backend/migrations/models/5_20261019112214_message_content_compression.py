@@ -0,0 +1,67 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "messages" ADD "content_compressed" BLOB;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "messages" DROP COLUMN "content_compressed";"""
+
+
+MODELS_STATE = (
+    "eJztXG1v4zYS/iuGP22B3EKW9ebgUMBOvFdf81LETq/bdWFQEpXoVpZcidpssMh/Pw4pmX"
+    "q1pdhJnEvyQZBJDjl8OOSQD0f50V0GNvaij8MociOCfHKOowjd4FNMkOt1jzs/uj5aYvqy"
+    "peRRp4tWK1EOEggyPSaKUpnFkgstbCbFSiEzIiGyCC3oIC/CNMnGkRW6K+IGPojP476EZH"
+    "iaOnsO2NOBp9OHp2XAE/fYO0sxTZZrsXeWq+F5bCCd5up2X5rHmmSp81g1+lTKcSTj7Ox8"
+    "Hg9UaGggybxaPVOJw4oNQGU7sKjOrn9zcNrN/bk/JFQ3MyY4Op77HfqXgH7coRWaDm1IdW"
+    "wmpTJVDXO7elgWLWKTq9Tj1fVSvRTHklMtoNlVGHxzbRwed5jyfcnm4jZ7lxhuCqtWSptT"
+    "FclOdAYrWoDtgdqKo9MO6qrMlFFZPaqTVFvUTVRCNViuyIIEX7EfQT15Hfjo8BQ+RvzJO4"
+    "7WI6ipusQrtGh9Hga7zFSqmgYVULChNamCBAR5GWndtpxGcni5wiEicbgBESqAZTqoKkYa"
+    "2JNsg3oDlGCKvmca1nSJ4q4OZL2++WINjuu70e0ixCgK/GLfdUWCp0pNlhW+wf7CtZPR19"
+    "UeaCf3pMkpzw7M/2KLLPiwYEtMHTszODwFIZauCXtEulAUVNeRDHYty2oyUFRFgu0Fcanx"
+    "E7RcrY1Q09PppjiqxVUSE5YbJJaqJ7Ktw+yPfffvGFMkbzC5xSFdA778RZNd38bfcZT+XH"
+    "1dOC727Pwamix/rg0VsfwFuV+xvOvryeknJgErjLmwAi9e+mWp1T25BftLxOLYtT+CLORR"
+    "yMFGsJ1ZTP3Y85KFOE3iPaAJJIzxWnVbJNjYQbEHSzJIl1bkNDGzDCZJVuDDau76BID48c"
+    "C7IjrKUrug98kvw6sPfe0n1qUgIjchy2QwdB+YICKIizJQBYrpwlLG8OQWhdUYZmUKCFKF"
+    "G2CXILOGLi0isBPeaz/gdWG+eti/Ibf0Z0+SNqD5+/CKAUpLMUQD6lG5771IsmSeB8gWfD"
+    "pbZdtgmZd6RzNjl8LdlAGd+KTWNvNyBUhpFx4zuZtgKu0A6A008g+5p+iK0dcUgxZhiqxT"
+    "9A0QTy5mBfRKvrUFgpWybxLF7PaiBYBFsbeJndhilaH75AWoDry8XAE7BwQPckncAM7p5f"
+    "XobNz57Wp8MplOLi9A/+V99LcnMiGJJriE9fJqPDwrOpf1drOFIeaFHmWGL+Bb9myIuW12"
+    "G89cEnyVzllt4pvVetesljwzP4q0QVJIvEoIZVVtgCEtVQsiy8ujmJzY2sCYEXmVOO7fFE"
+    "sn0zZwVgq/YWDhoO18zRwSIcFE1tc7FNqLUk4gB5UHyuSAXR6JSx/PAvpgozHxgcO0qnx8"
+    "wo0mlOg5/Drg47hIFU2E6G7NVxQIB9pP2h/M/fzJcHoyPB13H3JI54GFrKW8LKYgn9ZpJ8"
+    "qBKglq1NzJLMQbOOdCiaNNXLNFyy4ILZxwzM0pZosxoLgveFCrkprtSwPGdgJPpfWlXpZJ"
+    "rWSH91ExELvpsFhB7BNg3bAKT4mxtZpT3xQtQ6s3BsCaGYYGfNmgjwR9CIr0JVNlHBd7x2"
+    "hNyco9XfBmVCl/G1usaQ6rVaHdMByTpetMO2hZVSTOPWcIVzzIMH6aYPY4oY51kQta0PoV"
+    "YEZNBpnKtDYswWRLcjOW7ks3uKPzcwEMGpNY2WyuHnFSrUuLfykn1nJ7aTVNWb20/PPyed"
+    "1/OrFvgdl3WEvwUH7uPskhYgeKLz8yTSHNS+0T2Bc9jG3FsbS7KIN2SpNh17BxX1GBmp3I"
+    "fUxfDhO9Lu2Afel794nNb0BzNjkfT2fD89/YmTZKz7TD2Rhy5PxJN0n9oBU2IutKOv+ZzH"
+    "7pwM/On5cX4+IQrcvN/uyCTigmwcIP7hbIzkzPNDUFJjekmRWozZBmxN6H9EWHNFG+fAvE"
+    "/HgbbqQo9yZZOjOkm/Db1uAVxd4kdu/s8OOx81Ak4ldQheltXo8rxPewLh8UaXxIy3Da7Y"
+    "2uNTcmqxB/c/FdGzqmTv5RjMyj5kd3h517gTFsdCMqb7gRlaW2nEzJJVYsSqNE8tOvV9hD"
+    "rI9lhPfEvzzb7CkxMA9lemp/BEsOlgp6pQhbPbmSHaZmpMq2qLdZEJLAjXBdkJmgAbLRWp"
+    "Cry4oBZXpItMNrAPJCwRJaEwY60BzawDJZ8BxE1ymWnQYA1Qb1vQ7VKyP+4KybBFZtjTrk"
+    "5JDWk5x5bJhAy7Awqlg1VSntiIL7TBbZaQ0izC8MPNy0rQEQSFR5KGlIErTi6BCvJutyGm"
+    "HnE+yT7RWqPYMpCVFaXElVh1A2HctsRHhInKalhJpqqoVQOdXoK4yPMlL+TEc6AmbJ0Fl5"
+    "PdvNRLEFhBpQFxRhBnBVmywMT5ettCau3UA1IUJNkhWWC+1gQ0qByZYHXS4CH+diKVEIja"
+    "fjagwQaoI4MATCGHGmRNOY1CJIRcUE3ZpaXDUFyQ15TTVKRX1gcpSsj9tyhMMFQ/87WTeC"
+    "tYyy2fe+mG+WJkyWx/JZhoBDtSBaUdM1dT0GsiKxsMhBapy6iXoirlE2ch1PrmIQ4eGYIp"
+    "ZQU4GX1TQlMenkJJ6UzLKXomRTxjILN5PJg8M5y2IhoSrPT4xpTXEW6ihIvBOez0F4wipa"
+    "vfUc+/GydP+UAzaVfb5tZ+UmqHs9HV8ds/lKXdJ0OqHb84vZcWcd/T/3p5+ns/H5cSe6jw"
+    "heFr1uk23qoMEmdVC7RR2UbmP5ql5GfkYnQ12s2VrkhQHfy5lt/Mcsd1xLwfpwPvzjp9yR"
+    "7ezy4l9p8Qy4J2eXo2pUM76yYl/v+ii83whxQb6AtnlP+Eb0NR2RRwBWFm6K9mhyMbz6XI"
+    "13Wj67mow+z8bDAuIVa3jjZbksusMKfVBot784eQSxk5d859oP8/rkEQObl3wf2MO6RClu"
+    "cpsud0W5t3hLLA4ALYDLCb0RD1HiMosYlgH8FITYvfF/xfdPEzT2YvBtjRrLGUguaGw6nn"
+    "Uurs/OutUzeA8gliPEDnbubsWxuEI1iL+rsVHr1vVsOijPyqofjoG2I9UFbLWfq2+4nkgj"
+    "RbfDWf8B/esCtsUFxDU9YtTePojMo01XD3BMaXPvUEkQZr+qbx3GuXuVO3w5/E627ZFsA1"
+    "tq+9FrVmY/vM9TR3s/9ZcMeJmsW00hXAu8Rvye5IuaFXU1dwF1Rbcoum0DZUnwtVCRzwCq"
+    "Gy2oe3C/VUzvURB4GPnVmObkimQjFXwqQNdmu3ey8fLyLHeYH02K5O31+Wh89aHH4BUfc1"
+    "Z8nP1Oj/0/sCicHtvpq6n9haUMcehat1VbwiRn434QiTLbNoT147zDhqxqO1YbQFm5F6sI"
+    "m0xG7EW93l7CJuv3Xt/oNt5t91VzRuTdzYlT6qrVp6NJ8dcJ4JP8u5bau99/Ty8v2t79Xv"
+    "u0g19s1yJHHY+e7/86TFg3oAi93nwTXLz0LXgjqGC060e5u7qXh/8BE4nviQ=="
+)
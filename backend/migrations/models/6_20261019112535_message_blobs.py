@@ -0,0 +1,87 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "message_blobs" (
+    "hash" VARCHAR(64) NOT NULL PRIMARY KEY,
+    "content" TEXT NOT NULL,
+    "content_compressed" BLOB,
+    "length" INT NOT NULL,
+    "ref_count" INT NOT NULL DEFAULT 0,
+    "created_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+) /* メッセージ本文（内容のハッシュで重複排除する） */;
+        ALTER TABLE "messages" ADD "blob_id" VARCHAR(64) REFERENCES "message_blobs" ("hash") ON DELETE RESTRICT;
+        CREATE INDEX "idx_messages_blob_id_d10af8" ON "messages" ("blob_id");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_messages_blob_id_d10af8";
+        ALTER TABLE "messages" DROP COLUMN "blob_id";
+        DROP TABLE IF EXISTS "message_blobs";"""
+
+
+MODELS_STATE = (
+    "eJztXGtv2zgW/SuGP3WAtJBlPYPFAHbibr2TxyB2ZqfTDAxKohJtbckjyU2Dov99eUlJpF"
+    "6OFDuN3TgfBIfkJS8PLx/38ErfuovAwfPo3SCKvChGfnyOowjd4lMcI2/ePe586/pogcmP"
+    "R0oedbpoueTlICFG1pyKolRmtmBCM4dK0VLIiuIQ2TEp6KJ5hEmSgyM79JaxF/ggfrPqS0"
+    "iGp6XTp0mfLjzdPjxtA564R3/TFMuiuTb9TXM1fLMykE5ydacv3aw0yVZvVqrRJ1KuKxln"
+    "Z+c3K1OFhkxJZtXqQiUuLWaCyk5gE509/3bntLvxb/xBTHSzVjGOjm/8DvlLQD/ukAotlz"
+    "Skug6VUqmqhvW4eljmLWKLqdRj1fVSvRTXllMtoNllGHzxHBwed6jyfclh4g79LVHcFFqt"
+    "lDanKpKT6AxWNAPbA7UVVycd1FWZKqPSelQ3qbaoG6+EaLBYxrM4+Iz9COrJ68BGh6WwMW"
+    "JP1nGUjaCm6hKr0Cb1zTHYpVCpahlEQMGG1qSKOIjRXJDWHdttJIcXSxyieBWuQYQIYJkM"
+    "qoqRBvYkO6CeiRJM0VehYU2XCO6qKev1zRdrcD3fi+5mIUZR4Bf7risSPFVisrTwLfZnnp"
+    "OMvq72QDu5J41PWXZg/Q/b8YwNC7b51HGEwWEpCNF0jdsj0rmioLqOZLBrWVaTgSIqxtiZ"
+    "xR4x/hgtlpkRano63RRXtZlKfMIyg8RS9UR2dJj9K9/7Z4UJkrc4vsMhWQM+/U2SPd/BX3"
+    "GU/rv8PHM9PHfya2iy/HkOVETzZ/HDkuZdX49P31MJWGGsmR3MVwu/LLV8iO/A/hKx1cpz"
+    "3oEs5BHIwUawIyym/mo+TxbiNIn1gCTE4Qpnqjs8wcEuWs1hSQbp0oqcJgrLYJJkBz6s5p"
+    "4fAxDfvrOu8I7S1C7offJhcPWmr/1CuxRE8W1IMykM3e9UEMWIiVJQOYrpwlLG8OQOhdUY"
+    "ijIFBInCDbBLkMmgS4tw7PjutR3wujBf59i/je/Ivz1JWoPmH4MrCigpRRENyI7K9t6LJE"
+    "tmeYBsYU+nq2wbLPNSBzQFu+TbTRnQsR/X2mZergAp6cJTJncTTKUNAL2FRt7KPUVXjL6m"
+    "GKQIVSRL0ddAPL6YFtAr7a0tEKyUfZUoiseLFgAWxV4ndvyIVYbu/TxAdeDl5QrYuSC4k0"
+    "viGnBOL6+HZ6PO71ejk/FkfHkB+i8eon/mPBOSSIIX015ejQZnxc0lO262MMS80JPM8AX2"
+    "li0bYu6Y3WZnLgnu5easNtmb1fqtWS3tzMwVaYMkl9hLCGVVbYAhKVULIs3Lo5h4bG1gFE"
+    "T2Esftm2LJM20DZ6XwKwYWHG33s+AkQoKF7M/3KHRmpZxADiodysTBLo/EpY+nAXnQ0Rj7"
+    "wGHaVXt8wo0mlOg5/LfD7jhP5U2E6D7jKwqEA+kn6Q9m+/zJYHIyOB11v+eQzgMLWQt5UU"
+    "xBPqnTSZQDVRLUiLnH0xCv4ZwLJY7Wcc02KTuLSeGEY25OMduUAcV9zoPaldRsXzIp2wk8"
+    "ldaXeiKTWskOb6NiIHbTYbGDlR8D64ZVeEqUrdXc+qZIGVK9YQJrZhga8GVmH3H6EBTpS5"
+    "ZKOS76G6OMkpV7OufNiFL+Y2yxprm0VoV0w3Atmq5T7aBlVZEY9ywQrtgUGD+NM3uMUMc6"
+    "zwUtSP0KMKMWhUylWhs2Z7IluRlL96kb3JP5OQMGjUosHTpXjxip1iXFP5UTa7m9tJqmrF"
+    "5a/sfyed1/uSvfBrPv0JbgofzafRYnYgOKLz8yTSHNS20T2Bd1xh7FsXS6KIN2SpLh1LD2"
+    "XFGBmpPIvUt/7CZ6XdIB59KfPyQ2vwbN6fh8NJkOzn+nPm2U+rSD6Qhy5Lynm6S+0QoHka"
+    "ySzn/H0w8d+Lfz1+XFqDhEWbnpX13QCa3iYOYH9zPkCNMzTU2ByQ2psAK1GVJB7DCkLzqk"
+    "ifLlWyC6j7fhRopyr5Kls0JyCL9rDV5R7FVid2CHn47dHEU8fgVVmN769bhCfAvr8k6Rxr"
+    "u0DKfdXru15sZkGeIvHr5vQ8fUyT+JkXnS/OhucHIvMIaNbkTlNTeistSWkyltiRWL0jCR"
+    "fP/bFZ4j2scywlviX37Y7CkxMN/L9NT2CJYEluE8sLoV7IqYfbSOWkkt3SIlW4TureUKdB"
+    "licFRDZzFlNyu1Z0Dgm8WibxgzkURI9QVOQE3ZALNnA89gSsAM9IFAMTVNyUe31cbt7YZq"
+    "wO3kiZGqtnUItJN6SCBshHhDW+OBS+tj3AyF9sQRY7JSjROiqOcq+agyVQNaSLdUmq4xHc"
+    "xEe0o+9YBZUmgHNMbL9FIqS7VUIUiNMUhqH2IF9R5jlZrHIULHaUwcJcs6IXbZia6TkUNJ"
+    "pmKIhFCxwURR2g/FFfrUT3ucdQZ6LyuoauxozVUBl3coumMhdvlhvJ6+f2sIqOHJh8FbWd"
+    "WSeEoNBrifi6EkC0WM/biqMqKXDrF7OpYxh1fTqmGno2j0FWpnRtozHekorZOU1yuankFs"
+    "BdlzI+zQgL+KNmncYUk7U7UgJE+SFZoL7WBDygZRKA+6XAQ+Fltn+1Kx36kBcH15gGRmCy"
+    "yiUO1XN2WWjIEDR4xBaW2JuXhDFLPgTB5ZqKmwIBDbachK1vKLYFRtDidp+e0cRp77aiJ/"
+    "GNGUBmcRTak9ikDWeoIxse4yoFP8tTbIKBP5cQe85zusj/6c5s7pKXpvzgd//pI7q59dXv"
+    "w7LS6gfXJ2OSzFcBXXjIoDneej8GEtxAX5AtrWQ8wOivvkGw0BLBFugvZwfDG4+liNd1pe"
+    "dHmGH6ejQdErZVOmuS/PBX6cF79b0TXZRtECtZzMq6Q/+A73xMuF7ZEeBzJ60/uF/fHRX2"
+    "wRfxEXnaFS76NnqD3qpG/JP4dz7jQI48CLWFxAxXtg3BUVnU3I1WWFujvMaWXtsBogvoA4"
+    "myhz23SIRNBM26Lvt8G5WQHnmZ2kn+S/747qlT4iXEcn7z496mcwt1zrSeCYUreOvukELp"
+    "CUdkTBfSqLnLQG7kyFwRw3bcsED50oDyUNSYJWXB1eKZN1ueSTrq9Q5EuYkkVXDJikjJMQ"
+    "PMss6MT6ObxZ6GeVL8v6n7RQwxapsuLUYCGEvqhug+Et6bVEIYCS2qJhItTESiDwgE8gLJ"
+    "Ro+qprcfCKivEornSWVEc2scmXEWJSUR+Y0KUZw+ZfhMMZtYqvcdYI1gRlxd99vkYwpo1N"
+    "s4R7Mzgcqg0vQWq6pma2ISsSfdvSTCeUbqEef11SNnIdb0AkJB1gF/xJSTEoqi3l8Kkrwk"
+    "1l8uCwUKhiIeFcR/MTY8oipwp1VEiA+c8OQVWtHMkNgqpgG6hmkEb+alGKcc07QInsCzMf"
+    "3evJ6OqYTl6yp04mY3L4vZged7IvDNz4k4+T6ej8uBM9RDFeFI8NTdgnswH5ZNZyT2Yp4v"
+    "tANR2opp+AaqpY0Bsvy2XRDVbonUK7fXDmgUL5GSiUihDNJwxsXvIwsLsVqJmeTyvPTDVh"
+    "hlxkL9/L2tbNm7DqFdyGpntGUe41hvNzl6oFcDmhV7LNlgjt/CQuw/c+CLF36/+GH9q925"
+    "dGSe0qdo++2ycsULkX+67IWnk1Ppl2Kwxwe/DtH+1fxC83u3IITkbTzsX12Vm3evnbAojl"
+    "9yB3duF7FMfi8t7gLdOaCW7feXOHDMrhXqrBvRSHrfajjGsu+NL3oR+Hs/4zkfsFbIs7vG"
+    "vi5NZe4PHMo3W3d+Aot7m6q+SrxW9Htn5ZefMqN4hxO9C9W6R7wZbaftpNlNnHwMHtf68D"
+    "L5J1qymEmcA+4vcs341Zkq3mPiBbUdsQ1pLgvpDhPwBUL5qR7cH7UjG9h0Ewx8ivxjQnV6"
+    "S7ieBzAZqZ7dbp7svLsxydNBwXrw+uz4ejqzc9Ci//ZNkhxu0n5fFax7g9Z2TXAIeefVd1"
+    "JExy1p4HES/z2IGwfpw3OJBVHcdqg2Qrz2IV0bHJiL3orreV6Nj6s9cXcoz32n27TxA5bH"
+    "PcS122+kBaUnw/AXyWjxLXRh/8Z3J50Tb64NonHfzkeHZ81JkT//7v3YR1DYrQ6/WxCMWw"
+    "g8JuBBUMN/303Kbby/f/A1+46Aw="
+)
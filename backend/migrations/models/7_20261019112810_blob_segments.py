@@ -0,0 +1,84 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "message_blobs" ADD "segment" INT;
+        ALTER TABLE "message_blobs" ADD "segment_length" BIGINT;
+        ALTER TABLE "message_blobs" ADD "segment_offset" BIGINT;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "message_blobs" DROP COLUMN "segment";
+        ALTER TABLE "message_blobs" DROP COLUMN "segment_length";
+        ALTER TABLE "message_blobs" DROP COLUMN "segment_offset";"""
+
+
+MODELS_STATE = (
+    "eJztXGtv2zgW/SuGP3WAtJD1VrBYwE7cqXfyGCTO7nSagUFJVKKtLXksuWlQ9L8PL0lJ1D"
+    "NS4jR243wQHJKXvPfw8nV4pW/9RejiefRuGEV+FKMgPsVRhG7wMY6RP+8f9r71A7TA5McD"
+    "JQ96fbRcZuUgIUb2nIqiRGa2YEIzl0rRUsiO4hVyYlLQQ/MIkyQXR87KX8Z+GID49VqRkA"
+    "xP26BPiz49eHoKPB0TnnhAf9MU26a5Dv1Nc3V8vTaRQXINV5Gu17rkaNdrzVSIlOdJ5snJ"
+    "6fXa0qAhS5JZtYZQiUeLWaCyGzpEZz+42TrtroPrYBgT3ex1jKPD66BH/jjohz1Soe2Rhj"
+    "TPpVIaVdW0H1YPy1mL2GYqDVh1g0Qv1XPkRAtodrkKv/guXh32qPKK5DJxl/6WKG4qrVZK"
+    "mtNUyeU6gxfNwPdAbdUziIGGJlNlNFqP5vFqi7pllRANFst4FoefcRBBPXkdWO+wFNZH7M"
+    "kMR2kP6pohsQodUt8cg18KlWq2SQRUbOptqojDGM0FacN1vFZyeLHEKxSvVw2IEAEsk07V"
+    "MNLBn2QX1LMQxxR9FRrWDYngrlmyUd98sQbPD/zodrbCKAqDou2GKsFTIy5LC9/gYOa7vP"
+    "cNbQDayQNpcsyyQ/v/2IlnrFuwkw0dV+gcloIQTdczf0RGpiiobiAZ/FqWNd5RRMUYu7PY"
+    "J84fo8UydULdSIab6mkOUykbsMwhsVQ9kF0DRv868P9eY4LkDY5v8YrMAZ/+Isl+4OKvOE"
+    "r+XX6eeT6eu/k5lE9/vgsV0fxZfL+keVdXk+P3VAJmGHvmhPP1IihLLe/jW/A/LrZe++47"
+    "kIU8Ajn4CHaFyTRYz+d8Ik6SmAUkIV6tcaq6myW42EPrOUzJIF2akZNEYRrkSU4YwGzuBz"
+    "EA8e07MyUzlKb2Qe+jD8OLN4r+CzUpjOKbFc2kMPS/U0EUIyZKQc1QTCaWMoZHt2hVjaEo"
+    "U0CQKNwCO45MCl1SJMMuW702A14fxuscBzfxLfl3IEkNaP53eEEBJaUooiFZUdnae8azZJ"
+    "YHyBbWdDrLdsEyL7VHU/DLbLkpAzoJ4lrfzMsVICUmPGZwt8FUegKgN9DIW3mgGqqp6KpJ"
+    "ilBF0hSjAeLJ2bSAXmlt7YBgpeyrRFHcXnQAsCj2OrHLtlhl6N7PQ1QHXl6ugJ0Hgls5JT"
+    "aAc3x+NToZ936/GB9NLifnZ6D/4j76e55lQhJJ8GNq5cV4eFJcXNLtZgdHzAs9yg1fYG3Z"
+    "sCPmttldVuaS4E4uzlqbtVmrX5q10srMjiJdkMwkdhJCWdNaYEhK1YJI8/Io8hNbFxgFkZ"
+    "3EcfOuWDqZdoGzUvgVAwsHbe+zcEiEBBs5n+/Qyp2VckI5rDxQ8gN2uSfOAzwNyYP2xiQA"
+    "DtOpWuM5N8op0VP4b4uP41lq1sQK3aV8RYFwIHYSezBb54+Gl0fD43H/ew7pPLCQtZAXxR"
+    "QUkDpdrhyowlEj7h5PV7iBcy6UOGjimh1SdhaTwpxjbk8xO5QBxUrGgzqV1KwiWZTtBJ5K"
+    "V6SByKRWssObqBiI3aRbnHAdxMC6YQ2eEmVrda++KVKGVG9awJqZpg58maWgjD4ERRTJ1i"
+    "jHRX9jlFKy8sDIeDOiVPAQW6zrHq1VJWaYnk3TDaodtKypEuOeBcIVWwLjp2fMHiPUsZHl"
+    "ghakfhWYUZtCplGtTSdjsiW5HUv3qR/ekfE5AwaNSixdOlYPGKnWJ8U/lRNrub2kmrasXl"
+    "L+x/J5/X9568ABt+/RluCh/rv/LIeIJ1B8+Z5pC2leapPAvuhh7EEcS7uLMmjHJBl2DY37"
+    "igrUXC73Lvmxnej1iQHueTC/5z7fgOZ0cjq+nA5Pf6dn2ig50w6nY8iR8yddnvpGL2xE0k"
+    "p6/5tMP/Tg396f52fjYhel5aZ/9kEntI7DWRDezZArDM8kNQEm16XCDNSlSwWxfZe+aJdy"
+    "5cu3QHQd78KNFOVeJUtnr8gm/LYzeEWxV4ndnh1+PHZzFGXxK6jC9Zrn4wrxDczLW0Uab9"
+    "M0nJjduLTm+mS5wl98fNeFjqmTfxQj86jx0X/Czr3AGLa6EZUbbkRlqSsnU1oSKyalEZd8"
+    "/9sFniNqYxnhDfEvP2z0lBiY72V6anMEC4dlNA/tfgW7ImYfNFEriafbpGSH0L1GrsCQIQ"
+    "ZHMw0WU3a91gYmBL7ZLPqGMRM8QkoROAEtYQOsgQM8gyUBM6AAgWLpupqPbquN29sO1YDb"
+    "yRMjVW0bEGgnDZBA2Ajxho6eBS41x7iZKrXEFWOyEo05UTTw1HxUmaYDLWTYGk3XmQ4W15"
+    "6STwNgllRqgM54mUFCZWm2JgSpMQZJUyBW0BgwVql9HCIYTmPiKFnWW2GP7eh6KTnEM1VT"
+    "JISKDXJFqR2qJ9ikJBanxoD1soqq+o7WTIyxDA2Cz7DCVLSzqDrVTeoWexRqPR6lZQe6QG"
+    "FpiIOUms9oLgaLGE/qUilE03nYmp1ApHrQsuExP8k6hDGMCbfI7KE2lINGb1F0y8IE8654"
+    "NX3/1hR6Hl9+GL6VNZ3HhOrgpEouDpRMdjEO4qrKiPUGIGVgGRc8zlRUOiZSn30ID8AysV"
+    "hVq+uB3jSQgRIdiGsaFarOIJ6E7DMi7NIgxxody9ZYmg2eIMkqzYV2sCmljlvwgbMwwGLr"
+    "Eb5ZVADFOq1sWjMghgZupykeVy5zuKpRWTSnQb1Z6HkRjlncZpMGbLqsNB0DVCYdKI6dc9"
+    "dcS2xzUsaDIZELITbFWNkmObHjM4l0ImFmaUq14lZpJmHw6XrWNZ2msVywKopZZG8Wlqpr"
+    "sJqQiaclpV1LTsNo7rKzTcpvZif73Pda+Z2srrbYyOpq7T4WsprZaT5NlAGd4q+1EWqpyI"
+    "87HTzfSW/8xzR3yEvQe3M6/OOX3EHv5Pzs16S4gPbRyfmoFABYnHwrTgN+gFb3jRAX5Ato"
+    "2/cxO2Xs0sF6BGCJcBO0R5Oz4cXHaryT8uJ5efRxOh4WEOfzbAcmSJB4pbFZ+VWwykNvHk"
+    "JPkN0tEC1ZVhRDlhTd1FTD0EwpRbOc1QTraPIrIJubEuqh5jP7o6DOZPdQN0BdB3Etvk/E"
+    "9SXukzY8EaRbxg6o5WReJYue7XUfeUe9Oe58f6f51Gvq3aF6X2w79yJML0OlnupNUXuQ69"
+    "0QzQsn3mm4ikM/YuFlFa8T07JCqJeb5hqyShknxn2ydlgNEKamYgml7J8BAW06JRUsSYYT"
+    "tAocLDtTP4oG3h7VK2k6iGrir9A+yDgwdlcfSMBvUvqHvjALZIiUGKJihcoiN6khI4BW4R"
+    "y3bcuiHKZKXw83JQla8Qx4M1k25BIt2FyhSLszJYukDFxIJDShSNalsYsNrNcuEYRgZxWr"
+    "xeznLdRcOmgyJ6PLWIj0s9eie0t6LdEKQEl80bQQauMlEL+WDSAslGj7xYRi5xUVy4KBk1"
+    "FSHSDLBl96ryIV9YEBXRoxbPxFeDWjXvE1ThvBuqCs+FsRGFI9G2b8CsfM4NAceJdeN/SM"
+    "QZVVib60byUDyrCB/E/eupfNnOEtKEVuAIsT4yXF2Nqu5OOnvgg3lcmDwyJqi4WEfR3N58"
+    "6UBuAW6qiQAPef7WNza/cgG47NhWWgmkseB+tF6VWJ/AGIy74wB9q/uhxfHNLBS9bUy8sJ"
+    "2fyeTQ976YdqroPLj5fT8elhL7qPYrwobhva8NBWCxraqmWhrdKLQ3vSeU86/wSkc8WE3n"
+    "paLos+YYbeKrS7x/jvKZSfgUKpiPR/RMfmJfcdu13x/sn+tHLPVBOtnons5Ou9m7qDF2a9"
+    "wrGh7ZpRlHuNb4VlR6oOwOWEXskyWyK084O4DN/7cIX9m+A3fN/tFfEk2HZbsXvwFXFhgs"
+    "q9H35B5sqLydG0X+GAm4Nv92j/In650ZVD8HI87Z1dnZz0q6e/DYBYfp1+aye+B3EsTu8t"
+    "PlZQM8CdW3/ukk7Z30u1uJfKYKv9tm/DBV/yWY2H4az/2vBuAdvhDu+KHHJrL/CyzIOm2z"
+    "s4KHe5uqvkq8VPEHf+5sXTq3xCtOue7t0g3Qu+1PULoaLMLoYQb/6zT3jB5622EKYCu4jf"
+    "s3x+bEmWmruQLEVdg9lLgrtChv8AUP1oRpYH/0vF8B6F4RyjoBrTnFyR7iaCzwVo6rYbp7"
+    "vPz09ydNJoUrw+uDodjS/eDCi82Zcv9zFuPymP1znG7Tkju4Z45Tu3VVtCntO4H0RZmYc2"
+    "hPX9/IQNWdV2rDZItnIvVhEdy3vsRVe9jUTH1u+9vpBtvN/tE7CCyH6Zy06py07f2eTFdx"
+    "PAZ/m2fW30wX8uz8+6Rh9cBcTAT67vxAe9OTnf/7WdsDagCFY3xyIUww4KqxFUMHrqF0yf"
+    "urx8/wf+MNhg"
+)
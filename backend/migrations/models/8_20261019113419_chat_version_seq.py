@@ -0,0 +1,87 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "chat_tree_detail" ADD "version" INT NOT NULL DEFAULT 0;
+        ALTER TABLE "messages" ADD "seq" INT NOT NULL DEFAULT 0;
+        CREATE INDEX "idx_messages_chat_tr_821cb9" ON "messages" ("chat_tree_id", "seq");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_messages_chat_tr_821cb9";
+        ALTER TABLE "chat_tree_detail" DROP COLUMN "version";
+        ALTER TABLE "messages" DROP COLUMN "seq";"""
+
+
+MODELS_STATE = (
+    "eJztXW1v27YW/iuGP3VAV8h6V3BxASdxN9/lZUice7c1g0FJVKJbW3IluW0w9L+Ph6Qk6t"
+    "VS4jT24n4QHJKHPHx4eEg+PFL/Gi5DFy/id+M49uMEBck5jmN0h09xgvzF8Gjw1zBAS0x+"
+    "bCj5djBEq1VeDhISZC+oKEpl5ksmNHepFC2F7DiJkJOQgh5axJgkuTh2In+V+GEA4rdrRU"
+    "IyPG2DPi369ODpKfB0THjiEf1NU2yb5jr0N83V8e3aRAbJNVxFul3rkqPdrjVTIVKeJ5ln"
+    "Z+e3a0uDhixJZtUaQiUeLWaBym7oEJ394G7ntLsNboNxQnSz1wmOj26DAfnHQT8akAptjz"
+    "SkeS6V0qiqpr1ZPSznLWKbqTRi1Y1SvVTPkVMtoNlVFH72XRwdDajyiuQycZf+lihuKq1W"
+    "SpvTVMnlOoMVzcH2QG3VM0gHDU2mymi0Hs3j1ZZ1yyshGixXyTwJP+IghnqKOrDRYSlsjN"
+    "iTdRxlI6hrhsQqdEh9Cwx2KVSq2SYRULGpd6kiCRO0EKQN1/E6yeHlCkcoWUctiBABLJNB"
+    "1TDSwZ5kF9SzEMcUfRUa1g2J4K5ZstHcfLkGzw/8+H4eYRSHQbnvhirBUyMmSwvf4WDuu3"
+    "z0DW0E2skjaXrKskP7/9hJ5mxYsJNPHVcYHJaCEE3Xc3tERq4oqG4gGexaljU+UETFBLvz"
+    "xCfGn6DlKjNC3Uinm+ppDlMpn7DMILFUP5FdA2b/OvA/rTFB8g4n9zgiPuDDnyTZD1z8Fc"
+    "fpn6uPc8/HC7foQ7n7812oiObPk4cVzbu5mZ6+pxLgYey5Ey7Wy6AqtXpI7sH+uNh67bvv"
+    "QBbyCORgI9gVnGmwXiy4I06TWA9IQhKtcaa6mye42EPrBbhkkK545DRRcIM8yQkD8OZ+kA"
+    "AQf31jXck7SlOHoPfJz+OrN4r+A+1SGCd3Ec2kMAy/UUGUICZKQc1RTB1LFcOTexTVYyjK"
+    "lBAkCnfAjiOTQZcWybHLV6/tgDeE+brAwV1yT/4cSVILmv8dX1FASSmKaEhWVLb2XvAsme"
+    "UBsqU1nXrZPlgWpQ5oCnaZLzdVQKdB0mibRbkSpKQLj5ncXTCVngDoHTTyozxSDdVUdNUk"
+    "RagiWYrRAvH0YlZCr7K29kCwVvZVoihuL3oAWBZ7ndjlW6wqdO8XIWoCryhXws4DwZ10iS"
+    "3gnF7eHJ9NBr9eTU6m19PLC9B/+RB/WuSZkEQS/IT28moyPisvLtl2s4chFoUeZYYvsLZs"
+    "2RAL2+w+K3NFcC8XZ63L2qw1L81aZWVmR5E+SOYSewmhrGkdMCSlGkGkeUUU+YmtD4yCyF"
+    "7iuH1TrJxM+8BZK/yKgYWDtvdROCRCgo2cj19Q5M4rOaEc1h4o+QG7OhKXAZ6F5EFHYxoA"
+    "h+nUrfGcG+WU6Dn8tcPH8Tw1byJCXzK+okQ4kH6S/mC2zp+Mr0/Gp5PhtwLSRWAhaykvyy"
+    "koIHW6XDlQhaNGzD2ZRbiFcy6VeNvGNTuk7DwhhTnH3J1idigDipWcB3VqqVlFsijbCTyV"
+    "rkgjkUmtZYe3UTEQu+mwOOE6SIB1wxo8JcrW6l5zU6QMqd60gDUzTR34MktBOX0IiiiSrV"
+    "GOi/7GKKNk5ZGR82ZEqWATW6zrHq1VJd0wPZumG1Q7aFlTJcY9C4QrtgTGT8+ZPUaoYyPP"
+    "BS1I/SowozaFTKNam07OZEvybfAZRzEZ2sEmZHSDIaBCTy2Jge3ldWn0t8HattmIUGh0Fd"
+    "h5i6qmmqmAIcNvStoWIJvM0F0GgIspVQlkqaYAqal5UA9Q6gCYB4yrjCqdY6psukUYxPjT"
+    "IG1Kt10VqpQUzsvTXqTkMVFcZ3h1YzU/DMMvxJ/NgXGkEiuX+ra3jIQckuIfqomNXGhaTV"
+    "cWNC3/ffnP4b+8deCAmxjQluCh/nv4LIeuJ1CixZHpCmlRapvAvujhdSOOld1YFbRTkgy7"
+    "rNZ9WA1qLpd7l/7YTfSGpAPuZbB44DbfguZsej65no3Pf6UcQJxyAOPZBHLkIjPAU9/opY"
+    "1bVsngf9PZzwP4c/DH5cWkPERZudkfQ9AJrZNwHoRf5sgVpmeamgJTGFLBA/UZUkHsMKQv"
+    "OqRc+eqtGd339OGSynKvktW0I3Joue8NXlnsVWJ3YNMfj90CxXm8D6oxvXZ/XCO+Bb+8Uy"
+    "T7LrnhtNutS2thTFYR/uzjL33oqyb5RzFYj5ofwyfs3EsMa6cbZLnlBlmu3iDzY2sPVyNI"
+    "vBov04P1q2wiatz4MZd8/8sVXqCkHs0tMXzfzd9UOL5vVQJ0exQeh+V4EdrDGv5OzH7bRt"
+    "6lvsEmJXsEh7ayUYYMUV6amVEs2siE0EqbxXcx7ovH4CkC66SlFI41coDJsiTgnhSg6Cxd"
+    "VwvkXHNk6G6oBuxhkXqra9uAUE5phARKUIhodfQ8NK49itJUaU9cMeov1ZhTkSOPaZnFLW"
+    "o6EI+GrdF0nelgCbSVNwLuUqUd0Bk5NkrJUs3WhDBIxlFqCkSjGiNGwnWPdIWOpwSeJQ8i"
+    "7LE98CCjH3lmzvpRyrHUIFeU9kP1hD4paY+zzkDvZRXVjR0jM0mOoQFniBUzpfDSuE3VTe"
+    "sWRxRqPT3Oyo50kUdEHKSs+4xIZbCIEcsulUI0nQdG2ilEqgctGx6zk3xAGIedstesP7QP"
+    "1bDkexTfs0DUoinezN7/aAojj69/Hv8oazqPOtbBSJVCpDFxdgkOkrrKSO8NQMrAMi5ZnK"
+    "modE5kNrsJD8Ay7bGq1tcDo2kgA6U6ENM0alSdQ8QS2ZnF2KVhtA06VntjaTZYgiSrNBfa"
+    "waaUGW7JBi7CAIutx/huWQMUG7Rq19oBMTQwO03xuHK5wdXNynJ3WtSbh54X44RFBrdpwN"
+    "xlbdcxQGXSieLYBXMttMS2c1U8GBKFIPWU2KfybXLiwOcSmSNh3dKUesWtiidh8Ol6PjS9"
+    "3FghHBolLHY8D3zWNVhNiOPpeAnQSOfDbO5zFkjLb2fv/9w3p8W9v6522PrrauPOH7La+X"
+    "zuJqqAzvDXxhjITOT7naee72w8+W1WOBan6L05H//2Q+FofHZ58VNaXED75OzyuBJiWna+"
+    "NacBP0DRQyvEJfkS2vZDwk4Z+0RFHANYItwE7ePpxfjq93q80/Iiw3D8+2wyLiHO/WyPA6"
+    "0g8Uqj/4qrYJ2F3m1CT5DdLxAtWVYUQ5YU3dRUw9BMKUOzmtUG6/H0J0C24BKaoeae/VFQ"
+    "57IHqFugboK4Ed8n4voSN3BbdgTZlrEHagWZV8MI1gVY9r9yKEoeboF34GJ/f6jeF9vOvQ"
+    "jTy1Bppnoz1DZyvVuieeHEOwujJPRjFsBY88I6LSsEE7pZLovb8zzGfbJ2WA0QCKliCWXs"
+    "Hw0Y1CmpYEkynKBV4GDZmfpRNPDuqF5L00EcGH9JeyPjwNhdfSQBv0npH/pKNpAhUtoRFS"
+    "tUFrlpDTkBFIUL3LUti3KYKv0AgSlJ0IpnwLvvsiFXaMH2CkXanSlZJmXgQiKlCUWyLouO"
+    "bWG99okghH7WsVqs/7yFhksHTeZkdBWLvmGsFb1WKAJQUls0LYS6WAlE/OUTCAslun6Toz"
+    "x4ZcXycPN0lrQHGvN7FamsD0zoyoxh8y/G0ZxaxdckawTrgrLib0VgSPV8mvErHDOHQ3Mg"
+    "AFk39JxBlVWJfhbCSieUYQP5n37XQTaLXO0nOhIb4pX1LBQ8u89qiYYX46dBzWLg/zt+2Q"
+    "2lYe6LpUl3cHrTkRki7mJqUmE4OxClfFhYvCAvKcak96VUPwxFI6IyxSFnkdXlQsJulebz"
+    "KZIFYpfqqJGASd1YPRnfQ/D29wnehlWvnjqfBOtl5d2j4nmPy74w5Tu8uZ5cHVFfRbYQ19"
+    "dTste/mB0Nsi8/3QbXv1/PJudHg/ghTvCyvEvqQrtbHVh3q5F0typv4h049gPH/g/g2Gs8"
+    "fWe3XBV9gofeKbR7vAQCS10FtBbe99OBWztwa/vPrdW8NPOIgS1KHgZ2t16dSbf4tbvLhh"
+    "c/cpG9/LLAtoIzBK9XOhp1XV3Lcq/xBcv8VNoDuILQK9mQVG46ipO4Ct/7MML+XfALfuj3"
+    "dYo0CntXsdv4dQrBQRU+TXFFfOXV9GQ2rDHA7cG3f/dBZfwKs6uA4PVkNri4OTsb1ru/LY"
+    "BY/ZLHzjq+jTiW3XuH76Q0THDn3l+4ZFAOF5YdLixz2Bo/K95y85t+0WcznM0fOt8vYHtc"
+    "7t7EOGq82c0z37Zd6wKl0OdOt/YiQ/z6ee/P7Ty9yieEQR+I8S0S42BLfT9OLMrsY2z59r"
+    "84h5fcb3WFMBPYR/ye5cuHK7LUfAnJUtT3LYeK4L5cG3wHUP14TpYH/3PN9D4OwwVGQT2m"
+    "BbnyxQARfC5AM7Pd+sXA5eVZgU46npYvWm7OjydXb0YU3vyjuweC9h/K4/UOfnzOkL8xjn"
+    "znvm5LyHNa94MoL7NpQ9g8zk/YkNVtxxrvdmr3YjVXO3zEXnTV28rVTvPeq/FTFM2LXfO3"
+    "KF7zMgdToweIvPh+Avgs/61GY5zGf64vL/rGadwEpIMfXN9J3g4W5Hz/527C2oIi9LqwaF"
+    "WiNsoBGqXVCCo4furHk5+6vHz7G1J8OjE="
+)
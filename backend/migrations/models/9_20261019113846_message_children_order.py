@@ -0,0 +1,85 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_messages_parent__35c962";
+        CREATE INDEX "idx_messages_parent__2dc1b6" ON "messages" ("parent_id", "created_at");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_messages_parent__2dc1b6";
+        CREATE INDEX "idx_messages_parent__35c962" ON "messages" ("parent_id");"""
+
+
+MODELS_STATE = (
+    "eJztXW1v27YW/iuGP3VAV8h6V3BxASdxN9/lZUice7c1g0FJVKJbW3IluW0w9L+Ph6Qk6t"
+    "VS4jT24n4QHJKHPHx4eEg+PFL/Gi5DFy/id+M49uMEBck5jmN0h09xgvzF8Gjw1zBAS0x+"
+    "bCj5djBEq1VeDhISZC+oKEpl5ksmNHepFC2F7DiJkJOQgh5axJgkuTh2In+V+GEA4rdrRU"
+    "IyPG2DPi369ODpKfB0THjiEf1NU2yb5jr0N83V8e3aRAbJNVxFul3rkqPdrjVTIVKeJ5ln"
+    "Z+e3a0uDhixJZtUaQiUeLWaBym7oEJ394G7ntLsNboNxQnSz1wmOj26DAfnHQT8akAptjz"
+    "SkeS6V0qiqpr1ZPSznLWKbqTRi1Y1SvVTPkVMtoNlVFH72XRwdDajyiuQycZf+lihuKq1W"
+    "SpvTVMnlOoMVzcH2QG3VM0gHDU2mymi0Hs3j1ZZ1yyshGixXyTwJP+IghnqKOrDRYSlsjN"
+    "iTdRxlI6hrhsQqdEh9Cwx2KVSq2SYRULGpd6kiCRO0EKQN1/E6yeHlCkcoWUctiBABLJNB"
+    "1TDSwZ5kF9SzEMcUfRUa1g2J4K5ZstHcfLkGzw/8+H4eYRSHQbnvhirBUyMmSwvf4WDuu3"
+    "z0DW0E2skjaXrKskP7/9hJ5mxYsJNPHVcYHJaCEE3Xc3tERq4oqG4gGexaljU+UETFBLvz"
+    "xCfGn6DlKjNC3Uinm+ppDlMpn7DMILFUP5FdA2b/OvA/rTFB8g4n9zgiPuDDnyTZD1z8Fc"
+    "fpn6uPc8/HC7foQ7n7812oiObPk4cVzbu5mZ6+pxLgYey5Ey7Wy6AqtXpI7sH+uNh67bvv"
+    "QBbyCORgI9gVnGmwXiy4I06TWA9IQhKtcaa6mye42EPrBbhkkK545DRRcIM8yQkD8OZ+kA"
+    "AQf31jXck7SlOHoPfJz+OrN4r+A+1SGCd3Ec2kMAy/UUGUICZKQc1RTB1LFcOTexTVYyjK"
+    "lBAkCnfAjiOTQZcWybHLV6/tgDeE+brAwV1yT/4cSVILmv8dX1FASSmKaEhWVLb2XvAsme"
+    "UBsqU1nXrZPlgWpQ5oCnaZLzdVQKdB0mibRbkSpKQLj5ncXTCVngDoHTTyozxSDdVUdNUk"
+    "RagiWYrRAvH0YlZCr7K29kCwVvZVoihuL3oAWBZ7ndjlW6wqdO8XIWoCryhXws4DwZ10iS"
+    "3gnF7eHJ9NBr9eTU6m19PLC9B/+RB/WuSZkEQS/IT28moyPisvLtl2s4chFoUeZYYvsLZs"
+    "2RAL2+w+K3NFcC8XZ63L2qw1L81aZWVmR5E+SOYSewmhrGkdMCSlGkGkeUUU+YmtD4yCyF"
+    "7iuH1TrJxM+8BZK/yKgYWDtvdROCRCgo2cj19Q5M4rOaEc1h4o+QG7OhKXAZ6F5EFHYxoA"
+    "h+nUrfGcG+WU6Dn8tcPH8Tw1byJCXzK+okQ4kH6S/mC2zp+Mr0/Gp5PhtwLSRWAhaykvyy"
+    "koIHW6XDlQhaNGzD2ZRbiFcy6VeNvGNTuk7DwhhTnH3J1idigDipWcB3VqqVlFsijbCTyV"
+    "rkgjkUmtZYe3UTEQu+mwOOE6SIB1wxo8JcrW6l5zU6QMqd60gDUzTR34MktBOX0IiiiSrV"
+    "GOi/7GKKNk5ZGR82ZEqWATW6zrHq1VJd0wPZumG1Q7aFlTJcY9C4QrtgTGT8+ZPUaoYyPP"
+    "BS1I/SowozaFTKNam07OZEvybfAZRzEZ2sEmZHSDIaBCTy2Jge3ldWn0t8HattmIUGh0Fd"
+    "h5i6qmmqmAIcNvStoWIJvM0F0GgIspVQlkqaYAqal5UA9Q6gCYB4yrjCqdY6psukUYxPjT"
+    "IG1Kt10VqpQUzsvTXqTkMVFcZ3h1YzU/DMMvxJ/NgXGkEiuX+ra3jIQckuIfqomNXGhaTV"
+    "cWNC3/ffnP4b+8deCAmxjQluCh/nv4LIeuJ1CixZHpCmlRapvAvujhdSOOld1YFbRTkgy7"
+    "rNZ9WA1qLpd7l/7YTfSGpAPuZbB44DbfguZsej65no3Pf6UcQJxyAOPZBHLkIjPAU9/opY"
+    "1bVsngf9PZzwP4c/DH5cWkPERZudkfQ9AJrZNwHoRf5sgVpmeamgJTGFLBA/UZUkHsMKQv"
+    "OqRc+eqtGd339OGSynKvktW0I3Joue8NXlnsVWJ3YNMfj90CxXm8D6oxvXZ/XCO+Bb+8Uy"
+    "T7LrnhtNutS2thTFYR/uzjL33oqyb5RzFYj5ofwyfs3EsMa6cbZLnlBlmu3iDzY2sPVyNI"
+    "vBov04P1q2wiatz4MZd8/8sVXqCkHs0tMXzfzd9UOL5vVQJ0exQeh+V4EdrDGv5OzH7bRt"
+    "6lvsEmJXsEh7ayUYYMUV6amVEs2siE0EqbxXcx7ovH4CkC66SlFI41coDJsiTgnhSg6Cxd"
+    "VwvkXHNk6G6oBuxhkXqra9uAUE5phARKUIhodfQ8NK49itJUaU9cMeov1ZhTkSOPaZnFLW"
+    "o6EI+GrdF0nelgCbSVNwLuUqUd0Bk5NkrJUs3WhDBIxlFqCkSjGiNGwnWPdIWOpwSeJQ8i"
+    "7LE98CCjH3lmzvpRyrHUIFeU9kP1hD4paY+zzkDvZRXVjR0jM0mOoQFniBUzpfDSuE3VTe"
+    "sWRxRqPT3Oyo50kUdEHKSs+4xIZbCIEcsulUI0nQdG2ilEqgctGx6zk3xAGIedstesP7QP"
+    "1bDkexTfs0DUoinezN7/aAojj69/Hv8oazqPOtbBSJVCpDFxdgkOkrrKSO8NQMrAMi5ZnK"
+    "modE5kNrsJD8Ay7bGq1tcDo2kgA6U6ENM0alSdQ8QS2ZnF2KVhtA06VntjaTZYgiSrNBfa"
+    "waaUGW7JBi7CAIutx/huWQMUG7Rq19oBMTQwO03xuHK5wdXNynJ3WtSbh54X44RFBrdpwN"
+    "xlbdcxQGXSieLYBXMttMS2c1U8GBKFIPWU2KfybXLiwOcSmSNh3dKUesWtiidh8Ol6PjS9"
+    "3FghHBolLHY8D3zWNVhNiOPpeAnQSOfDbO5zFkjLb2fv/9w3p8W9v6522PrrauPOH7La+X"
+    "zuJqqAzvDXxhjITOT7naee72w8+W1WOBan6L05H//2Q+FofHZ58VNaXED75OzyuBJiWna+"
+    "NacBP0DRQyvEJfkS2vZDwk4Z+0RFHANYItwE7ePpxfjq93q80/Iiw3D8+2wyLiHO/WyPA6"
+    "0g8Uqj/4qrYJ2F3m1CT5DdLxAtWVYUQ5YU3dRUw9BMKUOzmtUG6/H0J0C24BKaoeae/VFQ"
+    "57IHqFugboK4Ed8n4voSN3BbdgTZlrEHagWZV8MI1gVY9r9yKEoeboF34GJ/f6jeF9vOvQ"
+    "jTy1Bppnoz1DZyvVuieeHEOwujJPRjFsBY88I6LSsEE7pZLovb8zzGfbJ2WA0QCKliCWXs"
+    "Hw0Y1CmpYEkynKBV4GDZmfpRNPDuqF5L00EcGH9JeyPjwNhdfSQBv0npH/pKNpAhUtoRFS"
+    "tUFrlpDTkBFIUL3LUti3KYKv0AgSlJ0IpnwLvvsiFXaMH2CkXanSlZJmXgQiKlCUWyLouO"
+    "bWG99okghH7WsVqs/7yFhksHTeZkdBWLvmGsFb1WKAJQUls0LYS6WAlE/OUTCAslun6Toz"
+    "x4ZcXycPN0lrQHGvN7FamsD0zoyoxh8y/G0ZxaxdckawTrgrLib0VgSPV8mvErHDOHQ3Mg"
+    "AFk39JxBlVWJfhbCSieUYQP5n37XQTaLXO0nOhIb4pX1LBQ8u89qiYYX46dBzWLg/zt+2Q"
+    "2lYe6LpUl3cHrTkRki7mJqUmE4OxClfFhYvCAvKcak96VUPwxFI6IyxSFnkdXlQsJulebz"
+    "KVKfWa6xpghM8cbGyGgfQrm/Tyg3rIH1RPokWC8rbyIVT39c9oUJ4OHN9eTqiHousqG4vp"
+    "6Snf/F7GiQfQfqNrj+/Xo2OT8axA9xgpflPVMXEt7qwMFbjRS8VXkv78C4Hxj3fwDjXuPp"
+    "O7vlqugTPPROod3jlRBY6iqgtbDAnw5M24Fp23+mreYVmkcMbFHyMLC79SJNusWv3V02vA"
+    "aSi+zldwa2FaoheL3S0ajr6lqWe42vWxbOqF2BKwi9kg1J5d6jOImr8L0PI+zfBb/gh37f"
+    "qkhjsncVu43fqhAcVOFDFVfEV15NT2bDGgPcHnz7dztUxq8wuwoIXk9mg4ubs7NhvfvbAo"
+    "jV73rsrOPbiGPZvXf4akrDBHfu/YVLBuVwfdnh+jKHrfEj4y33wOn3fTbD2fzZ8/0CtsdV"
+    "702Mo8Z73jzzbdslL1AKfW54a681xG+h9/74ztOrfEJQ9IEY3yIxDrbU91PFosw+Rppv//"
+    "tzeMn9VlcIM4F9xO9ZvoO4IkvNl5AsRX3feagI7su1wXcA1Y/nZHnwP9dM7+MwXGAU1GNa"
+    "kCtfDBDB5wI0M9utXwxcXp4V6KTjafmi5eb8eHL1ZkThzT/BeyBo/6E8Xu9QyOcMABzjyH"
+    "fu67aEPKd1P4jyMps2hM3j/IQNWd12rPFup3YvVnO1w0fsRVe9rVztNO+9Gj9M0bzYNX+Z"
+    "4jUvczA1eoDIi+8ngM/yn2w0xmn85/ryom+cxk1AOvjB9Z3k7WBBzvd/7iasLShCrwuLVi"
+    "VqoxygUVqNoILjp35K+anLy7e/ATQaPs0="
+)
@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Callable
+from datetime import datetime
 
 from src.domain.entities.message_entity import MessageEntity
-from src.domain.entities.chat_tree_entity import ChatTreeEntity
+from src.domain.entities.chat_tree_entity import ChatTreeEntity, MessageNode
 from src.domain.entities.user_entity import UserEntity
 
 class ChatRepositoryProtcol(ABC):
@@ -15,25 +17,190 @@ class ChatRepositoryProtcol(ABC):
         "渡されたmessageを参考にして、chat_treeから自動的にparentを取得して隣接リストで保存する。"
         pass
     
+    @abstractmethod
+    async def bulk_create_messages(
+        self,
+        chat_tree: ChatTreeEntity,
+        nodes: list[MessageNode],
+        current_user: UserEntity,
+        *,
+        metadata: dict[str, dict] | None = None,
+        created: datetime | None = None,
+        updated: datetime | None = None,
+        chunk_size: int = 2000,
+        on_progress: Callable[[int], None] | None = None,
+        ) -> None:
+        "bulk_add_messagesで追加したノード（親が先の順序）をチャンクごとのトランザクションでまとめて保存する"
+        pass
+
     @abstractmethod
     async def save_assistant_message_detail(
         self,
         related_message: MessageEntity,
         llm_details: dict,
+        chat_tree: ChatTreeEntity,
         current_user: UserEntity
         ) -> None:
-        ""
+        "アシスタントメッセージの詳細を、チャットの所有者のシャードに保存する"
         pass
     
+    @abstractmethod
+    async def fork_chat(
+        self,
+        chat_uuid: str,
+        message_uuid: str,
+        current_user: UserEntity,
+        ) -> str | None:
+        "メッセージを分岐点にしたフォークを作成し、そのUUIDを返す（祖先はコピーせず参照する）"
+        pass
+
+    @abstractmethod
+    async def delete_subtree(
+        self,
+        chat_uuid: str,
+        message_uuid: str,
+        current_user: UserEntity,
+        *,
+        owner_uuid: str,
+        ) -> int | None:
+        "メッセージと子孫を所有者のシャードから全て削除し、削除した件数を返す（見つからない場合はNone）"
+        pass
+
     @abstractmethod
     async def get_chat_tree_messages(
         self,
         chat_tree_id: str,
-        current_user: UserEntity
+        current_user: UserEntity,
+        *,
+        all_users: bool = False,
+        content_handles: bool = False,
+        since: int | None = None,
         ) -> list[dict] | None:
         ""
         pass
 
+    @abstractmethod
+    async def load_chat_tree_messages(
+        self,
+        chat_tree_id: str,
+        current_user: UserEntity,
+        ) -> list[dict] | None:
+        "チャット木の全メッセージを、行を1件ずつ読まずにスナップショットと末尾の追加分から取得"
+        pass
+
+    @abstractmethod
+    async def get_chat_tree_skeleton(
+        self,
+        chat_tree_id: str,
+        current_user: UserEntity,
+        ) -> list[dict] | None:
+        "本文を除いたチャット木の構造（uuid/parent_uuid/role/length/created_at）を取得"
+        pass
+
+    @abstractmethod
+    async def get_chat_subtree(
+        self,
+        chat_tree_id: str,
+        current_user: UserEntity,
+        *,
+        root_uuid: str | None = None,
+        depth: int,
+        breadth: int,
+        cursor: str | None = None,
+        ) -> dict | None:
+        "起点から depth 段・各ノードの子 breadth 件までの部分木を構造だけ取得（打ち切った兄弟はカーソルで続きを取る）"
+        pass
+
+    @abstractmethod
+    async def get_message_contents(
+        self,
+        chat_tree_id: str,
+        message_uuids: list[str],
+        current_user: UserEntity,
+        ) -> list[dict] | None:
+        "チャット木の中の指定したメッセージの本文をまとめて取得"
+        pass
+
+    @abstractmethod
+    async def get_messages(
+        self,
+        message_uuids: list[str],
+        current_user: UserEntity,
+        *,
+        with_content: bool = True,
+        ) -> list[dict] | None:
+        "ユーザーが所有するチャットのメッセージをUUIDで取得（見つからないものは含めない）"
+        pass
+
+    @abstractmethod
+    async def get_branch_diff(
+        self,
+        chat_tree_id: str,
+        left_uuid: str,
+        right_uuid: str,
+        current_user: UserEntity,
+        ) -> dict | None:
+        "2つのメッセージの最も近い共通の祖先と、そこから先のそれぞれの枝を取得（チャット木全体は読まない）"
+        pass
+
+    @abstractmethod
+    async def search_messages(
+        self,
+        current_user: UserEntity,
+        query: str,
+        *,
+        role: str | None = None,
+        model_name: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        limit: int = 20,
+        offset: int = 0,
+        ) -> list[dict]:
+        "ユーザーが所有するチャットのメッセージを全文検索し、関連度の高い順に返す"
+        pass
+
+    @abstractmethod
+    async def open_message_content(
+        self,
+        chat_tree_id: str,
+        message_uuid: str,
+        current_user: UserEntity,
+        ) -> memoryview | None:
+        "メッセージ本文のUTF-8バイト列を取得（大きな本文はコピーせずに返す）"
+        pass
+
+    @abstractmethod
+    def iter_export_records(
+        self,
+        current_user: UserEntity,
+        chat_uuid: str | None = None,
+        ) -> AsyncIterator[dict]:
+        "ユーザーのチャットとメッセージをエクスポート用のレコードとして順に返す（メモリに全件を載せない）"
+        pass
+
+    @abstractmethod
+    async def get_chat_events(
+        self,
+        chat_tree_id: str,
+        current_user: UserEntity,
+        *,
+        since: int = 0,
+        limit: int = 500,
+        ) -> list[dict]:
+        "チャットの変更ログのうち、版数 since より後のイベントを seq 順に取得"
+        pass
+
+    @abstractmethod
+    def subscribe_chat_events(
+        self,
+        chat_tree_id: str,
+        current_user: UserEntity,
+        *,
+        since: int = 0,
+        ) -> AsyncIterator[dict]:
+        "チャットの変更ログを版数 since より後から順に返し、新しいイベントを待ち続ける"
+        pass
+
     @abstractmethod
     async def get_all_chat_tree_ids(
         self,
@@ -43,6 +210,34 @@ class ChatRepositoryProtcol(ABC):
         pass
 
     @abstractmethod
-    async def get_chat_tree_info(self, chat_uuid: str) -> dict | None:
-        """チャットツリーのメタ情報（owner_uuid含む）を取得"""
+    async def list_chat_trees(
+        self,
+        current_user: UserEntity,
+        *,
+        limit: int | None = None,
+        cursor: str | None = None,
+        ) -> tuple[list[dict], str | None]:
+        "ユーザーのチャット一覧をupdatedの降順で取得し、次ページのカーソルと一緒に返す"
+        pass
+
+    @abstractmethod
+    async def get_chat_tree_info(
+        self,
+        chat_uuid: str,
+        current_user: UserEntity | None = None,
+        ) -> dict | None:
+        """
+        チャットツリーのメタ情報（owner_uuid含む）を取得。current_userを渡すとその所有者の範囲だけを探す
+
+        読むだけで、アーカイブ済みのチャットは archived を True にして返す
+        """
+        pass
+
+    @abstractmethod
+    async def restore_archived_chat(
+        self,
+        chat_uuid: str,
+        owner_uuid: str,
+        ) -> int | None:
+        "アーカイブしたチャットのメッセージを戻し、戻したメッセージ数を返す（既に戻っていればNone）"
         pass
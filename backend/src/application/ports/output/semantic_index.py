@@ -0,0 +1,26 @@
+from abc import ABC, abstractmethod
+
+from src.domain.entities.message_entity import MessageEntity
+
+
+class SemanticIndexProtcol(ABC):
+    """メッセージの意味検索（関連する枝の検索）のインデックス"""
+
+    @abstractmethod
+    async def add_message(self, owner_uuid: str, chat_uuid: str, message: MessageEntity) -> None:
+        """保存したメッセージのベクトルを追加する"""
+        pass
+
+    @abstractmethod
+    async def add_messages(self, owner_uuid: str, chat_uuid: str, messages: list[MessageEntity]) -> None:
+        """まとめて保存したメッセージ（インポートなど）のベクトルを一度に追加する"""
+        pass
+
+    @abstractmethod
+    async def search(self, owner_uuid: str, query: str, limit: int) -> list[tuple[str, str, float]]:
+        """
+        意味の近いメッセージの (メッセージのUUID, チャットのUUID, スコア)（スコアの高い順）
+
+        削除済みのメッセージを含むことがあるので、呼び出し側がリポジトリで確認する。
+        """
+        pass
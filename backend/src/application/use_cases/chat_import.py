@@ -0,0 +1,154 @@
+import logging
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from uuid import UUID
+
+from src.domain.entities.chat_tree_entity import ChatTreeEntity
+from src.domain.entities.message_entity import MessageEntity, Role
+from src.domain.entities.user_entity import UserEntity
+from src.application.ports.output.chat_repository import ChatRepositoryProtcol
+from src.application.ports.output.semantic_index import SemanticIndexProtcol
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ImportResult:
+    """一括インポートの結果"""
+
+    chats: int = 0
+    messages: int = 0
+    skipped_chats: int = 0
+
+
+class ChatImport:
+    """
+    エクスポート形式（chat レコードの後にそのメッセージが続く）のレコードを一括で取り込む
+
+    1件ずつ MessageHandler で追加する代わりに、チャットごとに
+    ChatTreeEntity.bulk_add_messages で木の形を1パスで検証し、
+    リポジトリの bulk_create_messages でチャンク単位に保存する。
+    既に存在するチャットは取り込まずに数えるだけにする（バックアップの再取り込み用）。
+    semantic_indexを渡すと、保存したチャットごとにメッセージを意味検索のインデックスにもまとめて追加する。
+    """
+
+    def __init__(
+            self,
+            chat_repository: ChatRepositoryProtcol,
+            current_user: UserEntity,
+            semantic_index: SemanticIndexProtcol | None = None,
+            ) -> None:
+        self.chat_repository = chat_repository
+        self.user = current_user
+        self.semantic_index = semantic_index
+
+    async def import_records(
+            self,
+            records: Iterable[dict],
+            *,
+            chunk_size: int = 2000,
+            on_progress: Callable[[int], None] | None = None,
+            ) -> ImportResult:
+        """
+        レコードを順に読み、チャットごとに取り込む
+
+        メモリには1チャット分のメッセージだけを載せる。
+
+        Args:
+            records: エクスポート形式のレコード
+            chunk_size: 1トランザクションで保存するメッセージ数
+            on_progress: 保存済みのメッセージ数（全チャットの累計）で呼ばれる
+
+        Raises:
+            ValueError: レコードの形式やチャットの木の形が不正な場合
+        """
+        result = ImportResult()
+        chat_record, message_records = None, []
+        for record in records:
+            if record.get("type") == "chat":
+                if chat_record is not None:
+                    await self._import_chat(chat_record, message_records, result, chunk_size, on_progress)
+                chat_record, message_records = record, []
+            elif record.get("type") == "message":
+                if chat_record is None:
+                    raise ValueError("Message record appears before any chat record")
+                if record.get("chat_uuid", chat_record["uuid"]) != chat_record["uuid"]:
+                    raise ValueError(f"Message {record.get('uuid')} does not belong to chat {chat_record['uuid']}")
+                message_records.append(record)
+            else:
+                raise ValueError(f"Unknown record type: {record.get('type')}")
+        if chat_record is not None:
+            await self._import_chat(chat_record, message_records, result, chunk_size, on_progress)
+        return result
+
+    async def _import_chat(
+            self,
+            chat_record: dict,
+            message_records: list[dict],
+            result: ImportResult,
+            chunk_size: int,
+            on_progress: Callable[[int], None] | None,
+            ) -> None:
+        """1チャット分のレコードを検証して保存する"""
+        try:
+            chat_uuid = UUID(chat_record["uuid"])
+            messages, metadata = [], {}
+            for r in message_records:
+                message_uuid = str(UUID(r["uuid"]))
+                messages.append(
+                    (MessageEntity(uuid=message_uuid, role=Role(r["role"]), content=r["content"]), r.get("parent_uuid"))
+                )
+                metadata[message_uuid] = {
+                    "created_at": _parse_datetime(r.get("created_at")),
+                    "updated_at": _parse_datetime(r.get("updated_at")),
+                    "assistant_detail": r.get("assistant_detail"),
+                }
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"Invalid record in chat {chat_record.get('uuid')}: {e!r}") from e
+
+        if await self.chat_repository.get_chat_tree_info(str(chat_uuid), self.user) is not None:
+            result.skipped_chats += 1
+            return
+
+        # 木の形（親の欠落・循環・重複）はDBに書く前に1パスで検証する
+        chat_tree = ChatTreeEntity()
+        chat_tree.uuid = chat_uuid
+        chat_tree.owner_uuid = str(self.user.uuid)
+        try:
+            nodes = chat_tree.bulk_add_messages(messages)
+        except ValueError as e:
+            raise ValueError(f"Invalid tree in chat {chat_uuid}: {e}") from e
+
+        imported_before = result.messages
+        await self.chat_repository.bulk_create_messages(
+            chat_tree,
+            nodes,
+            self.user,
+            metadata=metadata,
+            created=_parse_datetime(chat_record.get("created")),
+            updated=_parse_datetime(chat_record.get("updated")),
+            chunk_size=chunk_size,
+            on_progress=(lambda saved: on_progress(imported_before + saved)) if on_progress else None,
+        )
+        result.chats += 1
+        result.messages += len(nodes)
+        await self._index_messages(chat_uuid, [node.message for node in nodes])
+
+    async def _index_messages(self, chat_uuid: UUID, messages: list[MessageEntity]) -> None:
+        """
+        取り込んだメッセージを意味検索のインデックスに追加する
+
+        インデックスは作り直せる（scripts/semantic_index.py rebuild）ので、失敗しても取り込みは成功として扱う。
+        """
+        if self.semantic_index is None:
+            return
+        try:
+            await self.semantic_index.add_messages(self.user.uuid, str(chat_uuid), messages)
+        except Exception:
+            logger.exception("Failed to index imported chat %s", chat_uuid)
+
+
+def _parse_datetime(value: str | None) -> datetime | None:
+    """ISO 8601 の日時（省略時はNone）"""
+    return datetime.fromisoformat(value) if value else None
@@ -1,6 +1,7 @@
 from uuid import UUID
 
-from src.domain.entities.chat_tree_entity import ChatTreeEntity
+from src.domain.entities.chat_tree_entity import BranchDiff, ChatTreeEntity
+from src.domain.entities.message_entity import MessageEntity, Role
 from src.domain.entities.user_entity import UserEntity
 from src.application.ports.output.chat_repository import ChatRepositoryProtcol
 
@@ -13,23 +14,36 @@ class ChatSelection:
         self.chat_repository = chat_repository
         self.user = current_user
 
-    async def restart_chat(self, chat_uuid: str) -> ChatTreeEntity:
-        """チャットを再開する"""
-        # 1. チャット情報をDBから取得
-        chat_info = await self.chat_repository.get_chat_tree_info(chat_uuid)
+    async def open_chat(self, chat_uuid: str) -> dict:
+        """
+        所有するチャットのメタ情報を取得する。アーカイブ済みならメッセージを戻してから返す
+
+        チャットのメッセージを読み書きする処理は、所有者を確認できたここでだけアーカイブを戻す。
+
+        Raises:
+            ValueError: チャットが見つからない、またはアクセス権限がない場合
+        """
+        chat_info = await self.chat_repository.get_chat_tree_info(chat_uuid, self.user)
         if not chat_info:
             raise ValueError(f"Chat tree with ID {chat_uuid} not found")
-
-        # 2. アクセス制御チェック
         if chat_info["owner_uuid"] != str(self.user.uuid):
             raise ValueError(
                 f"Access denied: user {self.user.uuid} does not own chat {chat_uuid}"
             )
+        if chat_info["archived"]:
+            await self.chat_repository.restore_archived_chat(chat_uuid, chat_info["owner_uuid"])
+            chat_info = await self.chat_repository.get_chat_tree_info(chat_uuid, self.user)
+        return chat_info
 
-        # 3. メッセージリスト取得
-        message_list = await self.chat_repository.get_chat_tree_messages(chat_uuid, self.user)
+    async def restart_chat(self, chat_uuid: str) -> ChatTreeEntity:
+        """チャットを再開する"""
+        # 1. チャット情報をDBから取得し、アクセス制御をチェックする（アーカイブ済みなら戻す）
+        chat_info = await self.open_chat(chat_uuid)
 
-        # 4. ツリー復元（DBから取得した正しいowner_uuidで）
+        # 2. メッセージリスト取得（スナップショット + 末尾の追加分）
+        message_list = await self.chat_repository.load_chat_tree_messages(chat_uuid, self.user)
+
+        # 3. ツリー復元（DBから取得した正しいowner_uuidで）
         self.chat_tree = ChatTreeEntity.restore_from_message_list(message_list)
         self.chat_tree.uuid = UUID(chat_uuid)
         self.chat_tree.owner_uuid = chat_info["owner_uuid"]  # 修正:DBから取得
@@ -37,27 +51,71 @@ class ChatSelection:
     
     async def get_chat_tree(self, chat_uuid: str) -> ChatTreeEntity:
         """指定されたチャットツリーを取得"""
-        # 1. チャット情報をDBから取得
-        chat_info = await self.chat_repository.get_chat_tree_info(chat_uuid)
-        if not chat_info:
-            raise ValueError(f"Chat tree with ID {chat_uuid} not found")
+        # 1. チャット情報をDBから取得し、アクセス制御をチェックする（アーカイブ済みなら戻す）
+        chat_info = await self.open_chat(chat_uuid)
 
-        # 2. アクセス制御チェック
-        if chat_info["owner_uuid"] != str(self.user.uuid):
-            raise ValueError(
-                f"Access denied: user {self.user.uuid} does not own chat {chat_uuid}"
-            )
-
-        # 3. メッセージリスト取得
-        message_list = await self.chat_repository.get_chat_tree_messages(chat_uuid, self.user)
+        # 2. メッセージリスト取得（スナップショット + 末尾の追加分）
+        message_list = await self.chat_repository.load_chat_tree_messages(chat_uuid, self.user)
 
-        # 4. ツリー復元（DBから取得した正しいowner_uuidで）
+        # 3. ツリー復元（DBから取得した正しいowner_uuidで）
         chat_tree = ChatTreeEntity.restore_from_message_list(message_list)
         chat_tree.uuid = UUID(chat_uuid)
         chat_tree.owner_uuid = chat_info["owner_uuid"]  # 修正：DBから取得
         return chat_tree
 
+    async def fork_chat(self, chat_uuid: str, message_uuid: str) -> str:
+        """
+        チャットのメッセージから分岐した新しいチャットを作る（祖先はコピーしない）
+
+        Returns:
+            作成したチャットのUUID
+
+        Raises:
+            ValueError: チャットやメッセージが見つからない、またはアクセス権限がない場合
+        """
+        await self.open_chat(chat_uuid)
+
+        fork_uuid = await self.chat_repository.fork_chat(chat_uuid, message_uuid, self.user)
+        if fork_uuid is None:
+            raise ValueError(f"Message {message_uuid} not found in chat {chat_uuid}")
+        return fork_uuid
+
+    async def diff_branches(self, chat_uuid: str, left_uuid: str, right_uuid: str) -> BranchDiff:
+        """
+        チャットの2つのメッセージまでの会話を比べる（どこで分かれ、その後に何が違うか）
+
+        Raises:
+            ValueError: チャットやメッセージが見つからない、またはアクセス権限がない場合。
+                祖先の親が循環している場合は、そのサブクラス（リポジトリの TreeCycleError）
+        """
+        await self.open_chat(chat_uuid)
+
+        # チャット木を復元せず、2つのメッセージからルートまでの経路だけをリポジトリで辿る
+        diff = await self.chat_repository.get_branch_diff(chat_uuid, left_uuid, right_uuid, self.user)
+        if diff is None:
+            raise ValueError(f"Message {left_uuid} or {right_uuid} not found in chat {chat_uuid}")
+        return BranchDiff(
+            ancestor=_to_message_entity(diff["ancestor"]),
+            common_length=diff["common_length"],
+            left=[_to_message_entity(m) for m in diff["left"]],
+            right=[_to_message_entity(m) for m in diff["right"]],
+        )
 
     async def get_all_chat_uuid(self) -> list[str]:
         uuids = await self.chat_repository.get_all_chat_tree_ids(self.user)
-        return uuids
\ No newline at end of file
+        return uuids
+
+    async def list_chats(
+            self,
+            *,
+            limit: int | None = None,
+            cursor: str | None = None,
+            ) -> tuple[list[dict], str | None]:
+        """チャット一覧を新しい順にページ単位で取得"""
+        return await self.chat_repository.list_chat_trees(
+            self.user, limit=limit, cursor=cursor
+        )
+
+
+def _to_message_entity(message: dict) -> MessageEntity:
+    return MessageEntity(uuid=message["uuid"], role=Role(message["role"]), content=message["content"])
@@ -1,26 +1,49 @@
+import logging
+
 from src.application.ports.output.chat_repository import ChatRepositoryProtcol
+from src.application.ports.output.semantic_index import SemanticIndexProtcol
 from src.application.ports.input.llm_adapter import LLMCAdapterProtcol
 from src.domain.entities.chat_tree_entity import ChatTreeEntity
 from src.domain.entities.message_entity import MessageEntity
 from src.domain.entities.user_entity import UserEntity
 
+logger = logging.getLogger(__name__)
+
+
 class MessageHandler:
     """
     メッセージのやりとり全般を担当するユースケース
     
     あらゆる種類のメッセージ（USER/ASSISTANT/SYSTEM）の生成・保存・ツリー追加を統一的に処理。
     LLMは外部サービスとして扱い、応答生成のみ委譲する。
+    semantic_indexを渡すと、保存したメッセージを意味検索のインデックスにも追加する。
     """
     
     def __init__(
             self,
             repo: ChatRepositoryProtcol,
             llm_client: LLMCAdapterProtcol,
-            current_user: UserEntity
+            current_user: UserEntity,
+            semantic_index: SemanticIndexProtcol | None = None,
             ) -> None:
         self.repo = repo
         self.llm_client = llm_client
         self.user = current_user
+        self.semantic_index = semantic_index
+
+    async def _save_message(self, message: MessageEntity, chat_tree: ChatTreeEntity) -> None:
+        """
+        メッセージを保存し、意味検索のインデックスに追加する
+
+        インデックスは作り直せるので、追加に失敗してもメッセージの保存は成功として扱う。
+        """
+        await self.repo.save_message(message, chat_tree, self.user)
+        if self.semantic_index is None:
+            return
+        try:
+            await self.semantic_index.add_message(self.user.uuid, chat_tree.uuid, message)
+        except Exception:
+            logger.exception("Failed to index message %s", message.uuid)
 
     async def create_initial_message(
             self,
@@ -60,7 +83,7 @@ class MessageHandler:
         """
         message = MessageEntity.create_user_message(content)
         chat_tree.add_message(parent_message, message)
-        await self.repo.save_message(message, chat_tree, self.user)
+        await self._save_message(message, chat_tree)
         return message
     
     async def add_assistant_message(
@@ -82,7 +105,7 @@ class MessageHandler:
         """
         message = MessageEntity.create_assistant_message(content)
         chat_tree.add_message(parent_message, message)
-        await self.repo.save_message(message, chat_tree, self.user)
+        await self._save_message(message, chat_tree)
         return message
     
     async def add_system_message(
@@ -104,7 +127,7 @@ class MessageHandler:
         """
         message = MessageEntity.create_system_message(content)
         chat_tree.add_message(parent_message, message)
-        await self.repo.save_message(message, chat_tree, self.user)
+        await self._save_message(message, chat_tree)
         return message
     
     async def generate_llm_response(
@@ -144,6 +167,7 @@ class MessageHandler:
         await self.repo.save_assistant_message_detail(
             llm_message_entity,
             raw_response,
+            chat_tree,
             self.user
         )
 
@@ -1,14 +1,10 @@
+from dataclasses import dataclass
 from typing import Any, Optional
 from uuid import UUID
 
-from anytree import find, NodeMixin
-from anytree.importer import DictImporter
+from anytree import find, NodeMixin, PreOrderIter
 
-from src.domain.entities.message_entity import MessageEntity
-from src.domain.services.tree_reconstruction import (
-    convert_parent_uuid_to_children_format,
-    convert_anytree_to_message_node
-)
+from src.domain.entities.message_entity import MessageEntity, Role
 
 
 class MessageNode(NodeMixin):
@@ -17,6 +13,102 @@ class MessageNode(NodeMixin):
         self.parent = parent
         self.message: MessageEntity = message
 
+@dataclass
+class BranchDiff:
+    """
+    2つの枝の比較結果
+
+    Attributes:
+        ancestor: 2つの枝が分かれたメッセージ（最も近い共通の祖先）
+        common_length: ルートから ancestor までの共通部分のメッセージ数
+        left: ancestor の次から左の枝の末端までのメッセージ（片方がもう片方の祖先なら空）
+        right: ancestor の次から右の枝の末端までのメッセージ
+    """
+
+    ancestor: MessageEntity
+    common_length: int
+    left: list[MessageEntity]
+    right: list[MessageEntity]
+
+
+class _AncestorIndex:
+    """
+    ノードの祖先の索引（binary lifting）
+
+    ノードごとに深さと 2^k 個上の祖先を持つので、最も近い共通の祖先を O(log n) で求められる。
+    葉の追加は O(log n) で索引を伸ばせる（ツリーは追加しかされない）。
+    """
+
+    def __init__(self) -> None:
+        self.nodes: list[MessageNode] = []
+        self.position: dict[str, int] = {}
+        self.depth: list[int] = []
+        # up[k][i] は i の 2^k 個上の祖先（ルートより上はルート自身）
+        self.up: list[list[int]] = [[]]
+
+    @classmethod
+    def build(cls, root: MessageNode) -> "_AncestorIndex":
+        """親が子より先に来る順に全てのノードを追加する（深い会話でも再帰しない）"""
+        index = cls()
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            index.add(node)
+            stack.extend(reversed(node.children))
+        return index
+
+    def add(self, node: MessageNode) -> None:
+        """ノードを追加する（親は追加済みであること）"""
+        i = len(self.nodes)
+        parent = i if node.parent is None else self.position[str(node.parent.message.uuid)]
+        self.nodes.append(node)
+        self.position[str(node.message.uuid)] = i
+        self.depth.append(0 if parent == i else self.depth[parent] + 1)
+        self.up[0].append(parent)
+        for k in range(1, len(self.up)):
+            self.up[k].append(self.up[k - 1][self.up[k - 1][i]])
+        # 深さが 2^段数 に届いたら1段増やす
+        while 1 << len(self.up) <= self.depth[i]:
+            prev = self.up[-1]
+            self.up.append([prev[prev[j]] for j in range(len(self.nodes))])
+
+    def lookup(self, message_uuid: str | UUID) -> int:
+        position = self.position.get(str(message_uuid))
+        if position is None:
+            raise ValueError(f"Message with UUID {message_uuid} not found")
+        return position
+
+    def lift(self, i: int, steps: int) -> int:
+        """i の steps 個上の祖先"""
+        k = 0
+        while steps:
+            if steps & 1:
+                i = self.up[k][i]
+            steps >>= 1
+            k += 1
+        return i
+
+    def common_ancestor(self, a: int, b: int) -> int:
+        if self.depth[a] < self.depth[b]:
+            a, b = b, a
+        a = self.lift(a, self.depth[a] - self.depth[b])
+        if a == b:
+            return a
+        for k in reversed(range(len(self.up))):
+            if self.up[k][a] != self.up[k][b]:
+                a, b = self.up[k][a], self.up[k][b]
+        return self.up[0][a]
+
+    def suffix(self, ancestor: int, i: int) -> list[MessageEntity]:
+        """ancestor の次から i までのメッセージ（ルート側から順）"""
+        messages = []
+        while i != ancestor:
+            messages.append(self.nodes[i].message)
+            i = self.up[0][i]
+        messages.reverse()
+        return messages
+
+
 class ChatTreeEntity:
     """
     チャットの会話ツリーを管理するドメインエンティティ
@@ -25,6 +117,8 @@ class ChatTreeEntity:
         self.uuid: Optional[UUID] = None
         self.root_node: Optional[MessageNode] = None
         self.owner_uuid: Optional[str] = None
+        # 枝の比較に使う祖先の索引（最初の比較で作り、以降の追加では伸ばす）
+        self._ancestor_index: Optional[_AncestorIndex] = None
 
     def new_chat(
         self,
@@ -34,6 +128,7 @@ class ChatTreeEntity:
         chat_uuid: UUID | str,
     ) -> None:
         self.root_node = MessageNode(parent=None, message=initial_message)
+        self._ancestor_index = None
         self.uuid = UUID(str(chat_uuid))
         self.owner_uuid = owner_uuid
 
@@ -51,6 +146,9 @@ class ChatTreeEntity:
         if self.root_node is None:
             raise ValueError("Chat tree is empty")
 
+        if self._ancestor_index is not None:
+            # 祖先の索引があればツリーを走査せずに引ける
+            return self._ancestor_index.nodes[self._ancestor_index.lookup(message_uuid)]
         target_uuid = str(message_uuid)
         found = find(self.root_node, lambda node: str(node.message.uuid) == target_uuid)
         if not found:
@@ -64,7 +162,92 @@ class ChatTreeEntity:
     def add_message(self, parent_message: MessageEntity, message: MessageEntity) -> None:
         """メッセージをツリーに追加"""
         parent_node = self.get_message_node_by_uuid(parent_message.uuid)
-        MessageNode(parent=parent_node, message = message)
+        node = MessageNode(parent=parent_node, message = message)
+        if self._ancestor_index is not None:
+            self._ancestor_index.add(node)
+
+    def bulk_add_messages(
+        self,
+        messages: list[tuple[MessageEntity, str | None]],
+    ) -> list[MessageNode]:
+        """
+        (メッセージ, 親のUUID) の一覧をまとめてツリーに追加する
+
+        一覧の順序は問わない。既存ノードのUUID索引を1回だけ作り、親から子へ順に
+        辿りながら追加するので、1件ずつ add_message するより速く、同時に
+        親の欠落・循環・UUIDの重複を検出できる。ツリーが空なら、親がNoneの
+        メッセージ1件がルートになる。検証に失敗した場合はツリーを変更しない。
+
+        Returns:
+            追加したノード（親が必ず子より先に来る順序）
+
+        Raises:
+            ValueError: 親が見つからない、循環している、UUIDが重複している、ルートが不正な場合
+        """
+        existing = {}
+        if self._ancestor_index is not None:
+            index = self._ancestor_index
+            existing = {message_uuid: index.nodes[i] for message_uuid, i in index.position.items()}
+        elif self.root_node is not None:
+            existing = {str(node.message.uuid): node for node in PreOrderIter(self.root_node)}
+
+        children: dict[str | None, list[MessageEntity]] = {}
+        seen = set()
+        for message, parent_uuid in messages:
+            message_uuid = str(message.uuid)
+            if message_uuid in seen or message_uuid in existing:
+                raise ValueError(f"Duplicate message UUID {message_uuid}")
+            seen.add(message_uuid)
+            children.setdefault(str(parent_uuid) if parent_uuid is not None else None, []).append(message)
+
+        roots = children.pop(None, [])
+        if roots and (self.root_node is not None or len(roots) > 1):
+            raise ValueError("Multiple root nodes found")
+        if self.root_node is None and not roots and messages:
+            raise ValueError("No root node found (no message with parent_uuid=None)")
+
+        # 親が確定したものから順に並べる（ここで辿れなかったものは親の欠落か循環）
+        ordered: list[tuple[MessageEntity, str | None]] = [(root, None) for root in roots]
+        queue = [str(root.uuid) for root in roots] + [u for u in existing if u in children]
+        while queue:
+            parent_uuid = queue.pop()
+            for child in children.pop(parent_uuid, []):
+                ordered.append((child, parent_uuid))
+                queue.append(str(child.uuid))
+        if children:
+            # 残った親のうち一覧にないものがあれば欠落、全て一覧にあれば循環
+            missing = next((p for p in children if p not in seen), None)
+            if missing is not None:
+                raise ValueError(f"Parent with UUID {missing} not found for message {children[missing][0].uuid}")
+            raise ValueError(f"Cycle detected among messages {sorted(children)}")
+
+        nodes = existing
+        added = []
+        new_children: dict[str, list[MessageNode]] = {}
+        for message, parent_uuid in ordered:
+            node = MessageNode(message=message)
+            if parent_uuid is None:
+                self.root_node = node
+            else:
+                new_children.setdefault(parent_uuid, []).append(node)
+            nodes[str(message.uuid)] = node
+            added.append(node)
+
+        # anytree は親を繋ぐたびに親から祖先を辿ってループを検査する（深さに比例する）。
+        # 葉の側の親から子をまとめて繋ぐと、新しい親はまだ上に繋がっていないので検査は1段で終わる
+        for node in reversed(added):
+            children = new_children.pop(str(node.message.uuid), None)
+            if children:
+                node.children = children
+        # 残りは既存のノードの下に追加する子（既存の子の後ろに並べる）
+        for parent_uuid, children in new_children.items():
+            for child in children:
+                child.parent = nodes[parent_uuid]
+
+        if self._ancestor_index is not None:
+            for node in added:
+                self._ancestor_index.add(node)
+        return added
 
     def get_conversation_path(self, target_message: MessageEntity) -> list[MessageEntity]:
         """指定メッセージまでの会話履歴パスを取得"""
@@ -72,6 +255,43 @@ class ChatTreeEntity:
         path = [node.message for node in selected_node.path]
         return path
 
+    def find_common_ancestor(self, left_uuid: str | UUID, right_uuid: str | UUID) -> MessageEntity:
+        """
+        2つのメッセージの最も近い共通の祖先（片方がもう片方の祖先ならそのメッセージ）
+
+        Raises:
+            ValueError: ツリーが空、またはメッセージが見つからない場合
+        """
+        index = self._get_ancestor_index()
+        ancestor = index.common_ancestor(index.lookup(left_uuid), index.lookup(right_uuid))
+        return index.nodes[ancestor].message
+
+    def diff_branches(self, left_uuid: str | UUID, right_uuid: str | UUID) -> BranchDiff:
+        """
+        2つのメッセージまでの会話を比べ、分かれた位置とそれぞれの続きを返す
+
+        分かれた位置は O(log n) で求め、続きは枝の長さに比例する時間で取り出す。
+
+        Raises:
+            ValueError: ツリーが空、またはメッセージが見つからない場合
+        """
+        index = self._get_ancestor_index()
+        left, right = index.lookup(left_uuid), index.lookup(right_uuid)
+        ancestor = index.common_ancestor(left, right)
+        return BranchDiff(
+            ancestor=index.nodes[ancestor].message,
+            common_length=index.depth[ancestor] + 1,
+            left=index.suffix(ancestor, left),
+            right=index.suffix(ancestor, right),
+        )
+
+    def _get_ancestor_index(self) -> _AncestorIndex:
+        if self.root_node is None:
+            raise ValueError("Chat tree is empty")
+        if self._ancestor_index is None:
+            self._ancestor_index = _AncestorIndex.build(self.root_node)
+        return self._ancestor_index
+
     def can_add_message_to(self, parent_message: MessageEntity) -> bool:
         """指定の親にメッセージを追加可能かチェック"""
         try:
@@ -96,25 +316,16 @@ class ChatTreeEntity:
         """
         if not messages:
             raise ValueError("Messages list is empty")
-        
-        # parent_uuid形式からchildren形式に変換
-        root_dict = convert_parent_uuid_to_children_format(messages)
-        if root_dict is None:
-            raise ValueError("Could not find root node")
-        
-        # anytreeで木構造を構築
-        importer = DictImporter()
-        anytree_root = importer.import_(root_dict)
-        
-        # MessageNodeに変換
-        message_root = convert_anytree_to_message_node(anytree_root)
-        
-        # ChatTreeEntityを構築
+
+        # children形式の辞書やanytreeのノードを経由せず、親子の索引から1パスで組み立てる
+        # （深い会話でも再帰しない）
         chat_tree = cls()
-        chat_tree.root_node = message_root
-        
+        chat_tree.bulk_add_messages([
+            (MessageEntity(uuid=msg["uuid"], role=Role(msg["role"]), content=msg["content"]), msg.get("parent_uuid"))
+            for msg in messages
+        ])
         return chat_tree
-        
+
     def _render_tree(self):
         from anytree.render import RenderTree
         for pre, _, node in RenderTree(self.root_node):
@@ -2,21 +2,122 @@
 TortoiseORM設定
 
 このモジュールはTortoiseORMとAerichマイグレーションツールの設定を提供します。
+接続先は DATABASE_URL で切り替え、SQLite と PostgreSQL（asyncpg）に対応する。
 """
 from pathlib import Path
+from typing import Any
+
+from tortoise.backends.base.config_generator import expand_db_url
+
+from src.infrastructure.config import settings
 
 # backend/db.sqlite3 への絶対パスを生成
 # config.py は backend/src/infrastructure/db/ にあるので、3階層上がbackend/
 DB_PATH = Path(__file__).parent.parent.parent.parent / "db.sqlite3"
 
-TORTOISE_ORM = {
-    "connections": {
-        "default": f"sqlite://{DB_PATH}"
-    },
-    "apps": {
-        "models": {
-            "models": ["src.infrastructure.db.models", "aerich.models"],
-            "default_connection": "default",
+
+
+def db_dialect(db_url: str) -> str:
+    """DB URLから方言（"sqlite" または "postgres"）を判定"""
+    return "postgres" if db_url.startswith(("postgres://", "asyncpg://")) else "sqlite"
+
+
+DATABASE_URL = settings.DATABASE_URL or f"sqlite://{DB_PATH}"
+DB_DIALECT = db_dialect(DATABASE_URL)
+
+# 書き込み用（唯一の書き込みコネクション）
+WRITE_CONNECTION = "default"
+# 所有者ごとにチャット関連の行を振り分けるシャード（DB_SHARDS > 0 のときだけ作られる）
+SHARD_CONNECTIONS = [f"shard_{i}" for i in range(settings.DB_SHARDS)]
+# 読み取り専用コネクション名（シャーディングしないSQLiteで DB_READ_CONNECTIONS > 0 のときだけ作られる）
+READ_CONNECTIONS = (
+    [f"reader_{i}" for i in range(settings.DB_READ_CONNECTIONS)]
+    if DB_DIALECT == "sqlite" and not SHARD_CONNECTIONS
+    else []
+)
+
+
+def sqlite_pragmas(profile: str) -> dict[str, Any]:
+    """
+    SQLiteのプロファイルに応じたpragmaを返す
+
+    TortoiseのSQLiteクライアントはcredentialsの追加キーを接続時に PRAGMA として実行する。
+    """
+    if profile == "default":
+        return {}
+    if profile == "production":
+        return {
+            # 新しく作るDBだけに効く（既存のDBは scripts/reclaim_space.py --full で切り替える）
+            "auto_vacuum": "INCREMENTAL",
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "cache_size": -settings.DB_SQLITE_CACHE_SIZE_KB,  # 負の値はKiB単位
+            "mmap_size": settings.DB_SQLITE_MMAP_SIZE,
+            "busy_timeout": settings.DB_SQLITE_BUSY_TIMEOUT_MS,
+            "temp_store": "MEMORY",
+        }
+    raise ValueError(f"Unknown SQLite profile: {profile}")
+
+
+def build_connection(db_url: str, **credentials: Any) -> dict[str, Any]:
+    """DB URLを展開し、追加のcredentials（pragmaやプールサイズ）を足した接続設定を返す"""
+    connection = expand_db_url(db_url)
+    # auto_vacuum はDBファイルができる前に実行しないと効かないため、
+    # expand_db_url が既定で入れる journal_mode（WALへの切り替えでファイルができる）より先に置く
+    first = {"auto_vacuum": credentials.pop("auto_vacuum")} if "auto_vacuum" in credentials else {}
+    connection["credentials"] = {**first, **connection["credentials"], **credentials}
+    return connection
+
+
+def shard_urls(db_url: str) -> list[str]:
+    """シャードごとの接続URL"""
+    if settings.DB_SHARD_URLS:
+        if len(settings.DB_SHARD_URLS) != len(SHARD_CONNECTIONS):
+            raise ValueError("DB_SHARD_URLS must have exactly DB_SHARDS entries")
+        return settings.DB_SHARD_URLS
+    if db_dialect(db_url) == "postgres":
+        raise ValueError("DB_SHARD_URLS is required when sharding PostgreSQL")
+    return [f"sqlite://{DB_PATH.with_name(f'db_shard_{i}.sqlite3')}" for i in range(len(SHARD_CONNECTIONS))]
+
+
+def build_tortoise_config(db_url: str = DATABASE_URL) -> dict[str, Any]:
+    """設定値からTortoiseORMの設定辞書を組み立てる"""
+    if db_dialect(db_url) == "postgres":
+        # 読み書きともasyncpgのプールで並行処理する
+        connections = {
+            WRITE_CONNECTION: build_connection(
+                db_url,
+                minsize=settings.DB_POOL_MIN_SIZE,
+                maxsize=settings.DB_POOL_MAX_SIZE,
+            )
+        }
+    else:
+        pragmas = sqlite_pragmas(settings.DB_SQLITE_PROFILE)
+        connections = {WRITE_CONNECTION: build_connection(db_url, **pragmas)}
+        for name in READ_CONNECTIONS:
+            # 読み取り側は書き込みを受け付けないようにする
+            connections[name] = build_connection(db_url, **pragmas, query_only="ON")
+
+    # usersとaerichはdefaultに残し、チャット関連の行だけをシャードに置く
+    for name, url in zip(SHARD_CONNECTIONS, shard_urls(db_url) if SHARD_CONNECTIONS else []):
+        if db_dialect(url) == "postgres":
+            extra = {"minsize": settings.DB_POOL_MIN_SIZE, "maxsize": settings.DB_POOL_MAX_SIZE}
+        else:
+            extra = sqlite_pragmas(settings.DB_SQLITE_PROFILE)
+        connections[name] = build_connection(url, **extra)
+
+    config: dict[str, Any] = {
+        "connections": connections,
+        "apps": {
+            "models": {
+                "models": ["src.infrastructure.db.models", "aerich.models"],
+                "default_connection": WRITE_CONNECTION,
+            },
         },
-    },
-}
+    }
+    if READ_CONNECTIONS:
+        config["routers"] = ["src.infrastructure.db.router.ReadWriteRouter"]
+    return config
+
+
+TORTOISE_ORM = build_tortoise_config()
@@ -0,0 +1,79 @@
+"""
+メッセージ本文の圧縮フォーマット
+
+閾値以上の本文を圧縮して messages.content_compressed に保存する。
+先頭1バイトが圧縮方式を表すマーカーで、残りが圧縮データ。
+読み込み側はマーカーを見て展開するので、方式を切り替えても既存の行はそのまま読める。
+
+    0x01: zlib
+    0x02: zstd（zstandard パッケージが必要。uv sync --extra zstd）
+"""
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zstdはオプション依存
+    zstandard = None
+
+from src.infrastructure.config import settings
+
+MARKER_ZLIB = b"\x01"
+MARKER_ZSTD = b"\x02"
+CODECS = ("none", "zlib", "zstd")
+
+
+def compress_content(text: str, codec: str | None = None, threshold: int | None = None) -> bytes | None:
+    """
+    本文を圧縮する
+
+    Args:
+        text: 本文
+        codec: "none" / "zlib" / "zstd"（省略時は設定値）
+        threshold: 圧縮する最小バイト数（省略時は設定値）
+
+    Returns:
+        マーカー付きの圧縮データ。閾値未満、または圧縮しても小さくならない場合はNone
+
+    Raises:
+        ValueError: 未知の圧縮方式の場合
+        RuntimeError: zstdが指定されたが zstandard がインストールされていない場合
+    """
+    codec = codec or settings.DB_CONTENT_COMPRESSION
+    threshold = settings.DB_CONTENT_COMPRESSION_THRESHOLD if threshold is None else threshold
+    if codec not in CODECS:
+        raise ValueError(f"Unknown content compression: {codec}")
+    if codec == "none":
+        return None
+
+    raw = text.encode("utf-8")
+    if len(raw) < threshold:
+        return None
+
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd compression requires the 'zstandard' package")
+        data = MARKER_ZSTD + zstandard.ZstdCompressor(level=3).compress(raw)
+    else:
+        data = MARKER_ZLIB + zlib.compress(raw, 6)
+
+    # 既に圧縮済みのデータなどで小さくならない場合は平文のまま保存する
+    return data if len(data) < len(raw) else None
+
+
+def decompress_content(data: bytes) -> str:
+    """
+    マーカー付きの圧縮データを本文に戻す
+
+    Raises:
+        ValueError: マーカーが不正な場合
+        RuntimeError: zstdのデータだが zstandard がインストールされていない場合
+    """
+    data = bytes(data)
+    marker, payload = data[:1], data[1:]
+    if marker == MARKER_ZLIB:
+        return zlib.decompress(payload).decode("utf-8")
+    if marker == MARKER_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstd compressed content requires the 'zstandard' package")
+        return zstandard.ZstdDecompressor().decompress(payload).decode("utf-8")
+    raise ValueError(f"Unknown content compression marker: {marker!r}")
@@ -0,0 +1,33 @@
+"""
+TortoiseORM用のカスタムフィールド
+"""
+from typing import Any
+from uuid import UUID
+
+from tortoise import fields
+
+
+class BinaryUUIDField(fields.UUIDField):
+    """
+    UUIDを36文字のテキストではなく16バイトのBLOBとして保存するフィールド
+
+    SQLite向け。主キーに使うと、それを参照する外部キー列も同じ形式になる
+    （Tortoiseは外部キー列を参照先の主キーフィールドの複製として作るため）。
+    PostgreSQLはネイティブのUUID型が16バイトなので、このフィールドは使わない。
+    """
+
+    SQL_TYPE = "BLOB"
+
+    def to_db_value(self, value: Any, instance: Any) -> bytes | None:
+        if value is None:
+            return None
+        if not isinstance(value, UUID):
+            value = UUID(str(value))
+        return value.bytes
+
+    def to_python_value(self, value: Any) -> UUID | None:
+        if value is None or isinstance(value, UUID):
+            return value
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return UUID(bytes=bytes(value))
+        return UUID(value)
@@ -1,12 +1,26 @@
+from functools import cached_property
 from tortoise.models import Model
 from tortoise import fields
 from src.domain.entities.message_entity import Role
+from src.infrastructure.config import settings
+from src.infrastructure.db.config import DB_DIALECT
+from src.infrastructure.db.content_codec import decompress_content
+from src.infrastructure.db.fields import BinaryUUIDField
+from src.infrastructure.storage.segment_store import SegmentLocation, get_segment_store
+
+# UUID列の保存形式は設定で切り替える（既存DBの変換は scripts/convert_uuid_storage.py）
+# PostgreSQLはネイティブのUUID型（16バイト）を使う
+UUIDField = (
+    BinaryUUIDField
+    if settings.DB_UUID_STORAGE == "binary" and DB_DIALECT == "sqlite"
+    else fields.UUIDField
+)
 
 
 class UserModel(Model):
     """ユーザー情報を保持する"""
 
-    uuid = fields.UUIDField(pk=True)
+    uuid = UUIDField(pk=True)
     username = fields.CharField(max_length=50, unique=True)
     email = fields.CharField(max_length=255, unique=True)
     password_hash = fields.CharField(max_length=255)
@@ -18,14 +32,219 @@ class UserModel(Model):
 
 
 class ChatTreeDetail(Model):
-    "チャットの詳細を保持する"
-    uuid = fields.UUIDField(pk=True)
-    owner_uuid = fields.UUIDField()
+    """
+    チャットの詳細を保持する
+
+    message_count以下はチャット一覧表示用のサマリー列で、
+    メッセージ書き込みと同じトランザクションで更新される。
+    version はチャット木が変わるたびに1ずつ増える版数で、
+    ETagと差分取得（追加されたメッセージの seq と比較）に使う。
+    archived_at が入っているチャットはメッセージを ChatArchive に移したスタブで、
+    サマリー列だけが残る（一覧表示はそのまま使える）。
+    forked_from が入っているチャットは他のチャットのメッセージから分岐したフォークで、
+    分岐点までの祖先はコピーせずに参照する（ChatFork を参照）。
+    """
+    uuid = UUIDField(pk=True)
+    owner_uuid = UUIDField()
     created = fields.DatetimeField(auto_now_add=True)
     updated = fields.DatetimeField(auto_now=True)
+    message_count = fields.IntField(default=0)
+    branch_count = fields.IntField(default=0)  # 葉ノードの数
+    total_tokens = fields.IntField(default=0)
+    last_message_at = fields.DatetimeField(null=True)
+    last_message_preview = fields.CharField(max_length=200, default="")
+    version = fields.IntField(default=0)
+    archived_at = fields.DatetimeField(null=True)
+    forked_from = UUIDField(null=True)  # 分岐点のメッセージがあるチャット
 
     class Meta(Model.Meta):# 型チェッカー対策
         table = "chat_tree_detail"
+        indexes = (
+            # チャット一覧のキーセットページネーション用（owner絞り込み + updated降順）
+            ("owner_uuid", "updated", "uuid"),
+            # 全ユーザー横断の一覧（管理用、シャードごとに取得してマージする）
+            ("updated", "uuid"),
+            # フォークされているチャットの判定（参照されている祖先はアーカイブしない）
+            ("forked_from",),
+        )
+
+
+class ChatFork(Model):
+    """
+    フォークしたチャットが元のチャットから引き継いだ祖先
+
+    フォークは分岐点のメッセージまでの祖先（ルートから分岐点まで）を messages にコピーせず、
+    UUIDの一覧だけを持つ。フォークのメッセージは「chat_tree_id がフォークの行」と
+    「path の行」を合わせたもので、フォークで追加したメッセージだけが新しい行になる。
+    フォークのフォークでは、元のフォークの path を先頭に引き継ぐ。
+
+    Attributes:
+        chat_tree: フォークしたチャット（1対1関係）
+        fork_message: 分岐点のメッセージのUUID（path の末尾）
+        path: ルートから分岐点までのメッセージのUUID（文字列）の一覧
+        created_at: フォークした日時
+    """
+    chat_tree = fields.OneToOneField(
+        "models.ChatTreeDetail",
+        pk=True,
+        related_name="fork",
+        on_delete=fields.CASCADE,
+    )
+    fork_message = UUIDField()
+    path = fields.JSONField()
+    created_at = fields.DatetimeField(auto_now_add=True)
+
+    class Meta(Model.Meta):# 型チェッカー対策
+        table = "chat_forks"
+
+
+class ChatArchive(Model):
+    """
+    アーカイブしたチャットのメッセージ（コールドストレージ）
+
+    長く更新されていないチャットのメッセージを messages から外し、
+    エクスポートと同じ message レコードのNDJSONをgzipで1行にまとめて保存する。
+    本文もblobではなくレコードに含めるので、blobの参照数も減らせる。
+
+    Attributes:
+        chat_tree: アーカイブしたチャット（1対1関係）
+        data: message レコードのNDJSON（gzip）
+        message_count: アーカイブしたメッセージ数
+        archived_at: アーカイブした日時
+    """
+    chat_tree = fields.OneToOneField(
+        "models.ChatTreeDetail",
+        pk=True,
+        related_name="archive",
+        on_delete=fields.CASCADE,
+    )
+    data = fields.BinaryField()
+    message_count = fields.IntField()
+    archived_at = fields.DatetimeField(auto_now_add=True)
+
+    class Meta(Model.Meta):# 型チェッカー対策
+        table = "chat_archives"
+
+
+class ChatTreeSnapshot(Model):
+    """
+    チャット木のスナップショット（木の形と本文の参照）
+
+    version（その時点のチャットの版数）までに追加されたメッセージを1行に圧縮して持つ。
+    チャットを開くときは、これと seq が version より後のメッセージ（末尾）だけを読めばよい。
+    メッセージから作り直せるキャッシュなので、削除しても失われるデータはない。
+    形式は gateways/tree_snapshot.py を参照。
+
+    Attributes:
+        chat_tree: 対象のチャット（1対1関係）
+        version: スナップショットに含まれるメッセージの最大の seq
+        message_count: スナップショットに含まれるメッセージ数
+        data: 圧縮したスナップショット
+        updated_at: 更新日時
+    """
+    chat_tree = fields.OneToOneField(
+        "models.ChatTreeDetail",
+        pk=True,
+        related_name="snapshot",
+        on_delete=fields.CASCADE,
+    )
+    version = fields.IntField()
+    message_count = fields.IntField()
+    data = fields.BinaryField()
+    updated_at = fields.DatetimeField(auto_now=True)
+
+    class Meta(Model.Meta):# 型チェッカー対策
+        table = "chat_tree_snapshots"
+
+
+class ChatEvent(Model):
+    """
+    チャット木の変更ログ（追記のみ）
+
+    メッセージの追加とアシスタント詳細の付与を、チャットへの書き込みと同じ
+    トランザクションで1件ずつ記録する。seq はその変更で進んだチャットの版数
+    （ChatTreeDetail.version）で、チャット内で連番になる。
+    スナップショット（version まで）とそれより後のイベントから木を再生でき、
+    クライアントの差分同期やキャッシュの無効化にも使う。
+    形式は gateways/chat_events.py を参照。
+
+    Attributes:
+        id: イベントの一意識別子（シャード間で移動しても重ならないようUUID）
+        chat_tree: 対象のチャット
+        seq: チャット内の連番（変更後のチャットの版数）
+        type: イベントの種類（message_added / detail_attached）
+        payload: イベントの内容
+        created_at: 記録日時
+    """
+    id = UUIDField(pk=True)
+    chat_tree = fields.ForeignKeyField(
+        "models.ChatTreeDetail",
+        related_name="events",
+        on_delete=fields.CASCADE,
+    )
+    seq = fields.IntField()
+    type = fields.CharField(max_length=32)
+    payload = fields.JSONField()
+    created_at = fields.DatetimeField(auto_now_add=True)
+
+    class Meta(Model.Meta):# 型チェッカー対策
+        table = "chat_events"
+        # 同じ版数のイベントは1件だけ（同時書き込みの検出と、seq での範囲読み込み）
+        unique_together = (("chat_tree", "seq"),)
+
+
+class MessageBlob(Model):
+    """
+    メッセージ本文（内容のハッシュで重複排除する）
+
+    同じ本文（共通のシステムプロンプトや再生成で一致した回答など）は1行だけ保存し、
+    参照するメッセージの数を ref_count で数える。参照がなくなった行は削除する。
+    非常に大きな本文はDBに入れず、セグメントファイルの位置だけを持つ。
+
+    Attributes:
+        hash: 本文（UTF-8）のSHA-256（16進）
+        content: 本文（圧縮した場合やセグメントに置いた場合は空文字）
+        content_compressed: 圧縮した本文（閾値未満の本文はNone）
+        segment: 本文を置いたセグメント番号（DBに保存した本文はNone）
+        segment_offset: セグメント内の本文の開始位置
+        segment_length: 本文のバイト数
+        length: 本文の文字数
+        ref_count: この本文を参照しているメッセージの数
+        created_at: 作成日時
+    """
+    hash = fields.CharField(max_length=64, pk=True)
+    content = fields.TextField()
+    content_compressed = fields.BinaryField(null=True)
+    segment = fields.IntField(null=True)
+    segment_offset = fields.BigIntField(null=True)
+    segment_length = fields.BigIntField(null=True)
+    length = fields.IntField()
+    ref_count = fields.IntField(default=0)
+    created_at = fields.DatetimeField(auto_now_add=True)
+
+    class Meta(Model.Meta):# 型チェッカー対策
+        table = "message_blobs"
+
+    @property
+    def location(self) -> SegmentLocation | None:
+        """セグメント上の本文の位置（DBに保存した本文はNone）"""
+        if self.segment is None:
+            return None
+        return SegmentLocation(self.segment, self.segment_offset, self.segment_length)
+
+    @cached_property
+    def text(self) -> str:
+        """本文（圧縮されていれば展開し、セグメントにあれば読み込む。初回アクセス時のみ）"""
+        return self.decode_text(self.content, self.content_compressed, self.location)
+
+    @staticmethod
+    def decode_text(content: str, content_compressed: bytes | None, location: SegmentLocation | None) -> str:
+        """列の値から本文を取り出す（モデルを作らずに values で読んだ場合にも使う）"""
+        if location is not None:
+            return get_segment_store().read_text(location)
+        if content_compressed is None:
+            return content
+        return decompress_content(content_compressed)
 
 
 class MessageModel(Model):
@@ -35,16 +254,26 @@ class MessageModel(Model):
     Attributes:
         uuid: メッセージの一意識別子（主キー）
         role: メッセージの送信者役割
-        content: メッセージ内容
+        content: メッセージ内容（本文をblobや圧縮列に保存した場合は空文字）
+        content_compressed: 圧縮した本文（閾値未満の本文はNone）
+        blob: 本文のblob（重複排除前に保存されたメッセージはNone）
         parent_uuid: 親メッセージのUUID（ルートメッセージの場合はNone）
         chat_tree_id: チャット木のグループ識別子
         user_context_id: ユーザーコンテキストID（将来の所有者管理用）
+        seq: 追加されたときのチャットの版数（ChatTreeDetail.version、版数導入前のメッセージは0）
         created_at: 作成日時
         updated_at: 更新日時
     """
-    uuid = fields.UUIDField(pk=True)
+    uuid = UUIDField(pk=True)
     role = fields.CharEnumField(Role)
     content = fields.TextField()
+    content_compressed = fields.BinaryField(null=True)
+    blob = fields.ForeignKeyField(
+        "models.MessageBlob",
+        related_name="messages",
+        null=True,
+        on_delete=fields.RESTRICT,  # blobは参照がなくなってから削除する
+    )
     parent = fields.ForeignKeyField(
         "models.MessageModel",
         related_name="children",
@@ -56,12 +285,41 @@ class MessageModel(Model):
         related_name="messages",
         on_delete=fields.CASCADE,
     )
-    user_context_id = fields.UUIDField(null=True)
+    user_context_id = UUIDField(null=True)
+    seq = fields.IntField(default=0)
     created_at = fields.DatetimeField(auto_now_add=True)
     updated_at = fields.DatetimeField(auto_now=True)
     
     class Meta(Model.Meta):# 型チェッカー対策
         table = "messages"
+        indexes = (
+            # get_chat_tree_messages: チャット + ユーザーでの絞り込み
+            ("chat_tree_id", "user_context_id"),
+            # チャット内の最新メッセージ取得
+            ("chat_tree_id", "created_at"),
+            # 子ノードの有無・子ノード一覧の取得（部分木の取得では作成順に親ごとの件数を絞る）
+            ("parent_id", "created_at"),
+            # ユーザー横断でのメッセージ走査
+            ("user_context_id", "created_at"),
+            # blobを参照しているメッセージの有無（ガベージコレクション）
+            ("blob_id",),
+            # 差分取得: 指定した版数より後に追加されたメッセージ
+            ("chat_tree_id", "seq"),
+        )
+
+    @cached_property
+    def text(self) -> str:
+        """
+        メッセージ自体に保存された本文（圧縮されていれば初回アクセス時に展開する）
+
+        blobに保存された本文は含まない（リポジトリがblobをまとめて解決する）。
+        content_compressed を読み込んでいないインスタンス（.only() など）では
+        content をそのまま返す。
+        """
+        compressed = getattr(self, "content_compressed", None)
+        if compressed is None:
+            return self.content
+        return decompress_content(compressed)
 
 
 class AssistantMessageDetail(Model):
@@ -0,0 +1,42 @@
+"""
+生SQLを組み立てるための小さなヘルパー
+
+ORMで表現できない文（ON CONFLICT での加算や、auto_now を上書きしない挿入など）を、
+SQLiteとPostgreSQLのどちらでも実行できるようにする。
+"""
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.models import Model
+
+
+def placeholder(db: BaseDBAsyncClient, index: int) -> str:
+    """index番目（1始まり）のパラメーターのプレースホルダー（SQLiteは ?、PostgreSQLは $index）"""
+    if db.capabilities.dialect == "sqlite":
+        return "?"
+    return f"${index}"
+
+
+def placeholders(db: BaseDBAsyncClient, count: int, start: int = 1) -> str:
+    """start番目から count 個のパラメーターのプレースホルダーをカンマでつないだもの"""
+    return ", ".join(placeholder(db, i) for i in range(start, start + count))
+
+
+async def insert_rows(model: type[Model], db: BaseDBAsyncClient, rows: list[dict]) -> None:
+    """
+    行（フィールド名 -> 値の辞書）を1文でまとめて挿入する
+
+    モデル経由で作成すると auto_now の列（updated など）が現在時刻で上書きされ、
+    一覧の並び順が変わってしまうため、列の値をそのまま書き込む。
+    行は全てのDB列の値を持っている必要がある。
+    """
+    if not rows:
+        return
+    projection = model._meta.fields_db_projection
+    names = list(projection)
+    columns = ", ".join(f'"{projection[name]}"' for name in names)
+    sql = f'INSERT INTO "{model._meta.db_table}" ({columns}) VALUES ({placeholders(db, len(names))})'
+
+    fields_map = model._meta.fields_map
+    values = [
+        [fields_map[name].to_db_value(row[name], model) for name in names] for row in rows
+    ]
+    await db.execute_many(sql, values)
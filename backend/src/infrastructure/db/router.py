@@ -0,0 +1,25 @@
+"""
+TortoiseORMのDBルーター
+"""
+from itertools import cycle
+
+from src.infrastructure.db.config import READ_CONNECTIONS, WRITE_CONNECTION
+
+
+class ReadWriteRouter:
+    """
+    読み取りを読み取り専用コネクションに振り分け、書き込みは単一のコネクションに集める
+
+    WALモードでは読み取りが書き込みにブロックされないため、
+    読み取りを複数コネクションにラウンドロビンで分散する。
+    トランザクション内のクエリは using_db で明示したコネクションが使われ、ここは通らない。
+    """
+
+    def __init__(self) -> None:
+        self._readers = cycle(READ_CONNECTIONS or [WRITE_CONNECTION])
+
+    def db_for_read(self, model) -> str:
+        return next(self._readers)
+
+    def db_for_write(self, model) -> str:
+        return WRITE_CONNECTION
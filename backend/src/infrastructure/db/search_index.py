@@ -0,0 +1,197 @@
+"""
+メッセージ本文の全文検索インデックス（message_search）
+
+本文はblob（内容のハッシュ）単位で1回だけ索引し、検索ではメッセージの blob_id と結合する。
+Tortoiseのモデルでは表せないため、テーブルは最初に使うときにコネクションごとに作る。
+
+    SQLite      FTS5の仮想テーブル（trigramトークナイザー。日本語のように空白で区切らない文でも
+                3文字以上の語なら部分一致で引ける）。rowid はハッシュの先頭60ビットで、
+                ハッシュから rowid を引く表（message_search_keys）を併せて持つ。
+                先頭60ビットが他のハッシュと重なった場合は、空いている次の rowid を使う
+    PostgreSQL  tsvector の列とGINインデックス（'simple' 設定。語は空白と記号で区切る）
+
+検索は所有者のメッセージから blob_id で索引の行を引くので、SQLiteではSQLの中でハッシュを
+rowid に変換できるように message_search_keys を使う（FTS5の "hash" 列は UNINDEXED で引けない）。
+
+blobの作成・削除と同じトランザクションで index_blob_texts / unindex_blobs を呼んで同期する。
+既存のblobの索引は scripts/search_index.py rebuild で作る。
+"""
+import weakref
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from src.infrastructure.db.raw_sql import placeholders
+
+SEARCH_TABLE = "message_search"
+# SQLiteでハッシュから索引の rowid を引く表
+SEARCH_KEY_TABLE = "message_search_keys"
+# trigramトークナイザーで索引から引ける語の最小文字数（これより短い語は本文を走査して絞り込む）
+MIN_TOKEN_LENGTH = 3
+
+# テーブルを作成済みのクライアント（トランザクションは元のクライアントで数える）
+_ready: "weakref.WeakSet[BaseDBAsyncClient]" = weakref.WeakSet()
+
+
+def is_postgres(db: BaseDBAsyncClient) -> bool:
+    return db.capabilities.dialect == "postgres"
+
+
+def search_rowid(blob_hash: str) -> int:
+    """
+    FTS5の rowid の候補（ハッシュの先頭60ビット。符号付き64ビットに収まる）
+
+    他のハッシュと重なることがあるので、実際の rowid は message_search_keys で引く。
+    """
+    return int(blob_hash[:15], 16)
+
+
+async def ensure_search_index(db: BaseDBAsyncClient) -> None:
+    """コネクションに検索インデックスのテーブルがなければ作る"""
+    client = getattr(db, "_parent", db)
+    if client in _ready:
+        return
+    # トランザクションの中からも呼ぶので、コミットしてしまう execute_script は使わない
+    if is_postgres(db):
+        await db.execute_query(
+            f'CREATE TABLE IF NOT EXISTS "{SEARCH_TABLE}" '
+            '("hash" VARCHAR(64) NOT NULL PRIMARY KEY, "document" TSVECTOR NOT NULL)'
+        )
+        await db.execute_query(
+            f'CREATE INDEX IF NOT EXISTS "idx_{SEARCH_TABLE}_document" ON "{SEARCH_TABLE}" USING GIN ("document")'
+        )
+    else:
+        await db.execute_query(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS "{SEARCH_TABLE}" '
+            "USING fts5(\"hash\" UNINDEXED, \"content\", tokenize = 'trigram')"
+        )
+        _, columns = await db.execute_query(f'PRAGMA table_info("{SEARCH_KEY_TABLE}")')
+        if not columns:
+            await db.execute_query(
+                f'CREATE TABLE "{SEARCH_KEY_TABLE}" '
+                '("hash" VARCHAR(64) NOT NULL PRIMARY KEY, "search_rowid" INTEGER NOT NULL) WITHOUT ROWID'
+            )
+            # 表を追加する前に作った索引の分を埋める
+            await db.execute_query(
+                f'INSERT INTO "{SEARCH_KEY_TABLE}" ("hash", "search_rowid") '
+                f'SELECT "hash", "rowid" FROM "{SEARCH_TABLE}"'
+            )
+        # rowid が重なっていないかを索引するときに確かめる
+        await db.execute_query(
+            f'CREATE UNIQUE INDEX IF NOT EXISTS "uid_{SEARCH_KEY_TABLE}_search_rowid" '
+            f'ON "{SEARCH_KEY_TABLE}" ("search_rowid")'
+        )
+    _ready.add(client)
+
+
+async def _assign_search_rowids(
+        conn: BaseDBAsyncClient,
+        blob_hashes: list[str],
+        batch_size: int,
+        ) -> dict[str, int]:
+    """
+    ハッシュごとの rowid を決め、新しいハッシュは message_search_keys に登録する
+
+    索引済みのハッシュは登録済みの rowid をそのまま使う。新しいハッシュは search_rowid を使い、
+    他のハッシュが既に使っていれば（先頭60ビットの衝突）、空いている次の値を探す。
+    """
+    assigned: dict[str, int] = {}
+    for start in range(0, len(blob_hashes), batch_size):
+        batch = blob_hashes[start:start + batch_size]
+        _, rows = await conn.execute_query(
+            f'SELECT "hash", "search_rowid" FROM "{SEARCH_KEY_TABLE}" '
+            f'WHERE "hash" IN ({placeholders(conn, len(batch))})',
+            batch,
+        )
+        assigned.update((row[0], row[1]) for row in rows)
+    new_hashes = list(dict.fromkeys(h for h in blob_hashes if h not in assigned))
+    taken: set[int] = set()
+    for start in range(0, len(new_hashes), batch_size):
+        batch = [search_rowid(h) for h in new_hashes[start:start + batch_size]]
+        _, rows = await conn.execute_query(
+            f'SELECT "search_rowid" FROM "{SEARCH_KEY_TABLE}" '
+            f'WHERE "search_rowid" IN ({placeholders(conn, len(batch))})',
+            batch,
+        )
+        taken.update(row[0] for row in rows)
+
+    new_keys = []
+    for blob_hash in new_hashes:
+        rowid = search_rowid(blob_hash)
+        while rowid in taken:
+            rowid += 1
+            _, rows = await conn.execute_query(
+                f'SELECT 1 FROM "{SEARCH_KEY_TABLE}" WHERE "search_rowid" = ?', [rowid]
+            )
+            if rows:
+                taken.add(rowid)
+        taken.add(rowid)
+        assigned[blob_hash] = rowid
+        new_keys.append([blob_hash, rowid])
+    if new_keys:
+        # 同時に同じハッシュが登録されていれば主キーの違反で失敗させる（黙って置き換えない）
+        await conn.execute_many(
+            f'INSERT INTO "{SEARCH_KEY_TABLE}" ("hash", "search_rowid") VALUES (?, ?)', new_keys
+        )
+    return assigned
+
+
+async def index_blob_texts(
+        conn: BaseDBAsyncClient,
+        blobs: list[tuple[str, str]],
+        batch_size: int = 500,
+        ) -> None:
+    """(ハッシュ, 本文) を索引する（既にあれば置き換える）"""
+    if not blobs:
+        return
+    await ensure_search_index(conn)
+    if is_postgres(conn):
+        await conn.execute_many(
+            f'INSERT INTO "{SEARCH_TABLE}" ("hash", "document") '
+            f"VALUES ($1, to_tsvector('simple', $2)) "
+            'ON CONFLICT ("hash") DO UPDATE SET "document" = excluded."document"',
+            [[blob_hash, text] for blob_hash, text in blobs],
+        )
+    else:
+        rowids = await _assign_search_rowids(conn, [blob_hash for blob_hash, _ in blobs], batch_size)
+        # rowid はこのハッシュのものなので、置き換えるのは同じハッシュの行だけ
+        await conn.execute_many(
+            f'INSERT OR REPLACE INTO "{SEARCH_TABLE}" ("rowid", "hash", "content") VALUES (?, ?, ?)',
+            [[rowids[blob_hash], blob_hash, text] for blob_hash, text in blobs],
+        )
+
+
+async def unindex_blobs(conn: BaseDBAsyncClient, blob_hashes: list[str], batch_size: int = 500) -> None:
+    """削除したblobを索引から除く"""
+    if not blob_hashes:
+        return
+    await ensure_search_index(conn)
+    for start in range(0, len(blob_hashes), batch_size):
+        batch = blob_hashes[start:start + batch_size]
+        if is_postgres(conn):
+            await conn.execute_query(
+                f'DELETE FROM "{SEARCH_TABLE}" WHERE "hash" IN ({placeholders(conn, len(batch))})', batch
+            )
+        else:
+            _, rows = await conn.execute_query(
+                f'SELECT "search_rowid" FROM "{SEARCH_KEY_TABLE}" '
+                f'WHERE "hash" IN ({placeholders(conn, len(batch))})',
+                batch,
+            )
+            if rows:
+                await conn.execute_query(
+                    f'DELETE FROM "{SEARCH_TABLE}" WHERE "rowid" IN ({placeholders(conn, len(rows))})',
+                    [row[0] for row in rows],
+                )
+            await conn.execute_query(
+                f'DELETE FROM "{SEARCH_KEY_TABLE}" WHERE "hash" IN ({placeholders(conn, len(batch))})', batch
+            )
+
+
+def fts_match_query(terms: list[str]) -> str | None:
+    """
+    索引から引ける語（MIN_TOKEN_LENGTH 文字以上）をFTS5のMATCH式にする（全ての語を含む）
+
+    語は二重引用符で囲み、FTS5の演算子として解釈させない。引ける語がなければNone。
+    """
+    quoted = ['"' + term.replace('"', '""') + '"' for term in terms if len(term) >= MIN_TOKEN_LENGTH]
+    return " ".join(quoted) or None
@@ -0,0 +1,57 @@
+"""
+所有者UUIDによるシャーディング
+
+ChatTreeDetail / MessageModel / AssistantMessageDetail の行を、
+所有者UUIDの安定したハッシュで選んだシャードのコネクションに置く。
+シャードの選択には Jump Consistent Hash を使い、シャード数を増やしたときに
+移動が必要なユーザーを約 1/N に抑える（移動は scripts/shards.py rebalance）。
+"""
+from uuid import UUID
+
+from tortoise import connections
+from tortoise.utils import get_schema_sql
+
+from src.infrastructure.db.config import SHARD_CONNECTIONS, WRITE_CONNECTION
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """Jump Consistent Hash（Lamping & Veach, 2014）"""
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+    return b
+
+
+def shard_index(owner_uuid: str | UUID, shards: int) -> int:
+    """所有者UUIDからシャード番号を求める"""
+    key = int.from_bytes(UUID(str(owner_uuid)).bytes[:8], "big")
+    return jump_hash(key, shards)
+
+
+def shard_for(owner_uuid: str | UUID) -> str | None:
+    """所有者の行を置くシャードのコネクション名（シャーディングしない場合はNone）"""
+    if not SHARD_CONNECTIONS:
+        return None
+    return SHARD_CONNECTIONS[shard_index(owner_uuid, len(SHARD_CONNECTIONS))]
+
+
+def chat_connection_names() -> list[str]:
+    """チャット関連の行を持ち得る全コネクション名（横断処理用）"""
+    return SHARD_CONNECTIONS or [WRITE_CONNECTION]
+
+
+async def ensure_shard_schemas() -> None:
+    """
+    各シャードにテーブルを作成する
+
+    Tortoiseは各モデルを既定コネクションにしか作らないため、
+    defaultと同じスキーマをシャードにも適用する。
+    """
+    if not SHARD_CONNECTIONS:
+        return
+    schema = get_schema_sql(connections.get(WRITE_CONNECTION), safe=True)
+    for name in SHARD_CONNECTIONS:
+        shard = connections.get(name)
+        await shard.schema_generator(shard).generate_from_string(schema)
@@ -0,0 +1,91 @@
+"""
+大量の行を削除した後の空き領域の解放
+
+SQLiteは削除した行のページをファイル内の空きページとして残すため、auto_vacuum=INCREMENTAL
+のDBでは PRAGMA incremental_vacuum で少しずつファイルから返す（全体を書き直す VACUUM と違い、
+書き込みロックは解放するページ数に比例する時間だけ持つ）。auto_vacuum が NONE のまま作られた
+既存のDBは、一度 scripts/reclaim_space.py --full で VACUUM してモードを切り替える。
+PostgreSQLは autovacuum がデッドタプルを回収するので何もしない。
+"""
+import asyncio
+import logging
+
+from tortoise import connections
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+logger = logging.getLogger(__name__)
+
+# 1回の incremental_vacuum で返すページ数（他の書き込みを長く待たせないよう小分けにする）
+INCREMENTAL_VACUUM_PAGES = 2000
+# 削除から解放までの待ち時間（秒、続けて削除された場合は1回にまとめる）
+RECLAIM_DELAY = 5.0
+# PRAGMA auto_vacuum の値
+_AUTO_VACUUM_INCREMENTAL = 2
+
+# 解放を予約済みのコネクション名
+_scheduled: set[str] = set()
+# 実行中の解放のタスク（イベントループは弱参照しか持たないため、終わるまでここで参照を持つ）
+_tasks: set[asyncio.Task] = set()
+
+
+async def _pragma(db: BaseDBAsyncClient, name: str) -> int:
+    """値を1つ返すPRAGMAを読む"""
+    _, rows = await db.execute_query(f"PRAGMA {name}")
+    return rows[0][0]
+
+
+async def reclaim_free_pages(db: BaseDBAsyncClient, *, pages: int = INCREMENTAL_VACUUM_PAGES) -> int:
+    """
+    SQLiteの空きページを pages ずつ、なくなるまでファイルから返す
+
+    Returns:
+        解放したページ数（SQLite以外や auto_vacuum=INCREMENTAL でないDBでは0）
+    """
+    if db.capabilities.dialect != "sqlite":
+        return 0
+    if await _pragma(db, "auto_vacuum") != _AUTO_VACUUM_INCREMENTAL:
+        return 0
+    freed = 0
+    while (free := await _pragma(db, "freelist_count")) > 0:
+        await db.execute_script(f"PRAGMA incremental_vacuum({pages})")
+        freed += free - await _pragma(db, "freelist_count")
+        # 小分けにした解放の間に他のリクエストを通す
+        await asyncio.sleep(0)
+    return freed
+
+
+def schedule_space_reclamation(connection_name: str) -> None:
+    """
+    コネクションの空きページの解放をバックグラウンドで予約する
+
+    RECLAIM_DELAY 秒後に1回だけ実行し、それまでの予約は1つにまとめる。
+    失敗してもログに残すだけ（空きページは次回の解放で返る）。
+    """
+    if connection_name in _scheduled:
+        return
+    _scheduled.add(connection_name)
+    task = asyncio.get_running_loop().create_task(
+        _reclaim_later(connection_name), name=f"reclaim-space-{connection_name}"
+    )
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    task.add_done_callback(_log_failure)
+
+
+def _log_failure(task: asyncio.Task) -> None:
+    """解放のタスクが例外で終わった場合にログに残す"""
+    if task.cancelled():
+        return
+    if (error := task.exception()) is not None:
+        logger.error("Failed to reclaim free pages (%s)", task.get_name(), exc_info=error)
+
+
+async def _reclaim_later(connection_name: str) -> None:
+    try:
+        await asyncio.sleep(RECLAIM_DELAY)
+        _scheduled.discard(connection_name)
+        freed = await reclaim_free_pages(connections.get(connection_name))
+        if freed:
+            logger.info("Reclaimed %d free pages on %s", freed, connection_name)
+    finally:
+        _scheduled.discard(connection_name)
@@ -0,0 +1,131 @@
+"""
+意味検索（関連する枝の検索）に使う、本文をベクトルにする埋め込み器
+
+埋め込み器は差し替えられる（SEMANTIC_EMBEDDER に "module:factory" を指定すると、
+引数なしで呼んだ戻り値を使う）。既定の HashingEmbedder はモデルも学習もいらず、
+オフラインで動く。
+
+    HashingEmbedder  語と、語の中の文字2〜3-gramを特徴量ハッシュで dim 次元に畳み込む。
+                     日本語は文字種（カタカナ・漢字・ひらがな）の切れ目で語に区切り、
+                     ひらがなだけの語は軽く扱う。綴りや活用が少し違う語（deploy / deployment、
+                     言い換えの共通部分）も近いベクトルになる。IDFはユーザーごとの文書頻度が
+                     要るので使わず、出現回数は 1 + log(tf) で抑える。
+
+ベクトルはL2正規化したfloat32で、内積がそのままコサイン類似度になる。
+NumPyが必要（uv sync --extra semantic）。
+"""
+import importlib
+import math
+import re
+import unicodedata
+import zlib
+from abc import ABC, abstractmethod
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:  # 意味検索はオプション依存
+    np = None
+
+from src.infrastructure.config import settings
+
+# 語（空白で区切らない日本語は、カタカナ・漢字・ひらがなの並びごとに区切る）
+_WORD_PATTERN = re.compile(
+    r"[\u30a0-\u30ff]+|[\u4e00-\u9fff\u3005]+|[\u3040-\u309f]+|[^\W\u3040-\u30ff\u4e00-\u9fff\u3005]+"
+)
+_HIRAGANA_PATTERN = re.compile(r"[\u3040-\u309f]+")
+# ひらがなだけの語（助詞や送り仮名が多い）の重み
+HIRAGANA_WEIGHT = 0.3
+# 語の中の文字n-gramの長さ
+NGRAM_SIZES = (2, 3)
+# 文字n-gramの重み（語そのものより弱くする）
+NGRAM_WEIGHT = 0.5
+
+
+def numpy_available() -> bool:
+    return np is not None
+
+
+class Embedder(ABC):
+    """
+    本文をL2正規化したベクトルにする
+
+    Attributes:
+        name: ベクトルの保存先を分ける名前（方式や次元が変わればベクトルの互換性がなくなるため）
+        dim: ベクトルの次元
+    """
+
+    name: str
+    dim: int
+
+    @abstractmethod
+    def embed(self, texts: list[str]) -> "np.ndarray":
+        """(len(texts), dim) のfloat32の行列（空の本文は零ベクトル）"""
+
+
+class HashingEmbedder(Embedder):
+    """語と文字n-gramの特徴量ハッシュ（符号付き）"""
+
+    def __init__(self, dim: int = 256) -> None:
+        if np is None:
+            raise RuntimeError("Semantic search requires the 'numpy' package")
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts: list[str]) -> "np.ndarray":
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for feature, weight in _features(text).items():
+                h = zlib.crc32(feature.encode("utf-8"))
+                # 下位ビットで次元、最上位ビットで符号を決める（衝突が打ち消し合うように）
+                sign = -1.0 if h & 0x80000000 else 1.0
+                vectors[i, h % self.dim] += sign * weight
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+def _features(text: str) -> dict[str, float]:
+    """特徴量 -> 重み（語は "w:"、文字n-gramは "c:" を付けて区別する）"""
+    words = _WORD_PATTERN.findall(unicodedata.normalize("NFKC", text).lower())
+    counts: Counter[str] = Counter()
+    for word in words:
+        counts["w:" + word] += 1
+        if _HIRAGANA_PATTERN.fullmatch(word):
+            continue
+        padded = f"<{word}>"
+        for n in NGRAM_SIZES:
+            for start in range(len(padded) - n + 1):
+                counts["c:" + padded[start:start + n]] += 1
+    return {
+        feature: (1.0 + math.log(tf)) * _feature_weight(feature)
+        for feature, tf in counts.items()
+    }
+
+
+def _feature_weight(feature: str) -> float:
+    if feature[0] == "c":
+        return NGRAM_WEIGHT
+    return HIRAGANA_WEIGHT if _HIRAGANA_PATTERN.fullmatch(feature[2:]) else 1.0
+
+
+def load_embedder(spec: str | None = None, dim: int | None = None) -> Embedder:
+    """
+    設定から埋め込み器を作る
+
+    Args:
+        spec: "hashing"、または "module:factory"（省略時は設定値）
+        dim: HashingEmbedder の次元（省略時は設定値）
+
+    Raises:
+        RuntimeError: NumPyがインストールされていない場合
+        ValueError: factory が Embedder を返さない場合
+    """
+    spec = spec or settings.SEMANTIC_EMBEDDER
+    if spec == "hashing":
+        return HashingEmbedder(dim or settings.SEMANTIC_DIM)
+    module_name, _, attr = spec.partition(":")
+    embedder = getattr(importlib.import_module(module_name), attr)()
+    if not isinstance(embedder, Embedder):
+        raise ValueError(f"{spec} did not return an Embedder")
+    return embedder
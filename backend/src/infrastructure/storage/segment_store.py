@@ -0,0 +1,195 @@
+"""
+大きなメッセージ本文をDBの外に置くセグメントファイルのストア
+
+本文は追記専用のセグメントファイル（segment_000000.dat, ...）にレコードとして書き込み、
+DBには (セグメント番号, オフセット, 長さ) だけを保存する。
+読み込みはセグメントを mmap して該当範囲の memoryview を返すので、
+ORMやPythonの文字列を経由せずにそのままクライアントへ送れる。
+
+レコードの形式（オフセットは本文の先頭を指す）:
+
+    magic(4) "CBB1" | 本文の長さ(8, big endian) | SHA-256(32) | 本文(UTF-8)
+
+ヘッダーがあるので、DBがなくてもセグメントを先頭から走査して検証・圧縮できる。
+複数プロセスからの追記は flock で直列化する。
+"""
+import fcntl
+import hashlib
+import mmap
+import os
+import threading
+from collections.abc import Iterator
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from src.infrastructure.config import settings
+
+RECORD_MAGIC = b"CBB1"
+HEADER_SIZE = len(RECORD_MAGIC) + 8 + 32
+
+
+@dataclass(frozen=True)
+class SegmentLocation:
+    """セグメント内の本文の位置"""
+
+    segment: int
+    offset: int
+    length: int
+
+
+@dataclass(frozen=True)
+class SegmentRecord:
+    """セグメントを走査して得たレコード"""
+
+    location: SegmentLocation
+    digest: str
+
+
+class SegmentStore:
+    """
+    追記専用のセグメントファイル群
+
+    Args:
+        root: セグメントファイルを置くディレクトリ
+        segment_size: 1セグメントの目安の最大サイズ（超えたら次のセグメントに書く）
+    """
+
+    def __init__(self, root: Path, segment_size: int) -> None:
+        self.root = Path(root)
+        self.segment_size = segment_size
+        self._maps: dict[int, mmap.mmap] = {}
+        self._lock = threading.Lock()
+
+    def segment_path(self, segment: int) -> Path:
+        return self.root / f"segment_{segment:06d}.dat"
+
+    def segments(self) -> list[int]:
+        """存在するセグメント番号（昇順）"""
+        if not self.root.exists():
+            return []
+        return sorted(int(p.stem.split("_")[1]) for p in self.root.glob("segment_*.dat"))
+
+    def append(self, data: bytes) -> SegmentLocation:
+        """
+        本文を末尾のセグメントに追記する
+
+        書き込み後に fsync するので、返した位置をDBに保存してよい。
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        header = RECORD_MAGIC + len(data).to_bytes(8, "big") + hashlib.sha256(data).digest()
+
+        # 追記位置を決めてから書き込むまでを、プロセス間でもロックする
+        with open(self.root / ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                segments = self.segments()
+                segment = segments[-1] if segments else 0
+                path = self.segment_path(segment)
+                if path.exists() and path.stat().st_size + len(header) + len(data) > self.segment_size:
+                    segment += 1
+                    path = self.segment_path(segment)
+
+                with open(path, "ab") as f:
+                    offset = f.tell() + len(header)
+                    f.write(header)
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        return SegmentLocation(segment=segment, offset=offset, length=len(data))
+
+    def start_segment(self) -> int:
+        """
+        以降の追記を新しい空のセグメントに書くようにする（末尾のセグメントを圧縮する前に使う）
+
+        Returns:
+            作成したセグメント番号
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                segments = self.segments()
+                segment = segments[-1] + 1 if segments else 0
+                self.segment_path(segment).touch()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return segment
+
+    def view(self, location: SegmentLocation) -> memoryview:
+        """
+        本文のmemoryview（コピーせずにmmapの該当範囲を指す）
+
+        Raises:
+            ValueError: 位置がセグメントの範囲外の場合
+        """
+        mapped = self._map(location.segment, location.offset + location.length)
+        return memoryview(mapped)[location.offset:location.offset + location.length]
+
+    def read_text(self, location: SegmentLocation) -> str:
+        """本文を文字列として読む（LLMへの入力など、全文が必要な場合）"""
+        return str(self.view(location), "utf-8")
+
+    def iter_records(self, segment: int) -> Iterator[SegmentRecord]:
+        """
+        セグメントのレコードを先頭から順に返す
+
+        Raises:
+            ValueError: ヘッダーが壊れている場合
+        """
+        path = self.segment_path(segment)
+        size = path.stat().st_size
+        with open(path, "rb") as f:
+            position = 0
+            while position < size:
+                header = f.read(HEADER_SIZE)
+                if len(header) < HEADER_SIZE or header[:4] != RECORD_MAGIC:
+                    raise ValueError(f"Corrupted record header in {path.name} at {position}")
+                length = int.from_bytes(header[4:12], "big")
+                offset = position + HEADER_SIZE
+                yield SegmentRecord(
+                    location=SegmentLocation(segment=segment, offset=offset, length=length),
+                    digest=header[12:].hex(),
+                )
+                f.seek(length, os.SEEK_CUR)
+                position = offset + length
+
+    def remove_segment(self, segment: int) -> None:
+        """セグメントを削除する（圧縮でレコードを移した後に使う）"""
+        with self._lock:
+            mapped = self._maps.pop(segment, None)
+        if mapped is not None:
+            mapped.close()
+        self.segment_path(segment).unlink(missing_ok=True)
+
+    def close(self) -> None:
+        """mmapをすべて閉じる"""
+        with self._lock:
+            maps, self._maps = self._maps, {}
+        for mapped in maps.values():
+            mapped.close()
+
+    def _map(self, segment: int, required: int) -> mmap.mmap:
+        """セグメントのmmapを返す（追記で伸びていれば張り直す）"""
+        with self._lock:
+            mapped = self._maps.get(segment)
+            if mapped is not None and len(mapped) >= required:
+                return mapped
+
+            with open(self.segment_path(segment), "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < required:
+                    raise ValueError(f"Segment {segment} is shorter than {required} bytes")
+                # 古いmapは参照中のmemoryviewがあるかもしれないので閉じずに置き換える
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = mapped
+            return mapped
+
+
+@lru_cache()
+def get_segment_store() -> SegmentStore:
+    """設定値から作ったセグメントストアのシングルトン"""
+    return SegmentStore(Path(settings.BLOB_STORE_DIR), settings.BLOB_SEGMENT_SIZE)
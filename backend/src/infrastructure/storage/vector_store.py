@@ -0,0 +1,277 @@
+"""
+意味検索のベクトルを置く、ユーザーごとの追記専用ファイル
+
+    vectors.f32  (件数, dim) のfloat32の行列（行優先）。検索では np.memmap で読む
+    keys.bin     行ごとに (メッセージのUUID, チャットのUUID) の32バイト
+    ivf.npz      任意。build_ivf で作る転置ファイル索引（クラスターの重心と、クラスターごとの行）
+
+件数は keys.bin の大きさで決まる（ベクトルを書いてからキーを書くので、途中で落ちても
+キーのない行は数えず、次の追記で切り詰める）。削除したメッセージの行は残るので、
+呼び出し側がDBで確認して除く（scripts/semantic_index.py rebuild で詰め直せる）。
+
+検索はクエリとの内積（ベクトルは正規化済みなのでコサイン類似度）の上位k件。
+IVFがあれば、重心が近い nprobe 個のクラスターの行と、IVFを作った後に追記された行だけを調べる。
+なければ全行をチャンクごとに調べる。複数プロセスからの追記は flock で直列化する。
+"""
+import fcntl
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from uuid import UUID
+
+try:
+    import numpy as np
+except ImportError:  # 意味検索はオプション依存
+    np = None
+
+KEY_SIZE = 32
+# 全行を調べるときに1回で読む行数
+SCAN_CHUNK_ROWS = 65536
+# k-meansで重心を求めるのに使う行数（クラスターあたり）
+IVF_SAMPLE_PER_LIST = 64
+# 重心への割り当てで1回に計算する行数
+ASSIGN_CHUNK_ROWS = 8192
+
+
+@dataclass(frozen=True)
+class VectorHit:
+    """検索結果の1行"""
+
+    message_uuid: UUID
+    chat_uuid: UUID
+    score: float
+
+
+@dataclass(frozen=True)
+class _Ivf:
+    centroids: "np.ndarray"
+    # クラスター i の行は rows[offsets[i]:offsets[i + 1]]
+    offsets: "np.ndarray"
+    rows: "np.ndarray"
+    # IVFを作ったときの件数（これ以降の行は全て調べる）
+    count: int
+    mtime: float
+
+
+class VectorStore:
+    """
+    1ユーザー分のベクトルファイル
+
+    Args:
+        root: ファイルを置くディレクトリ
+        dim: ベクトルの次元
+    """
+
+    def __init__(self, root: Path, dim: int) -> None:
+        if np is None:
+            raise RuntimeError("Semantic search requires the 'numpy' package")
+        self.root = Path(root)
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._vectors: np.ndarray | None = None
+        self._keys: np.ndarray | None = None
+        self._mapped_as: tuple[int, int] | None = None
+        self._ivf: _Ivf | None = None
+
+    @property
+    def vectors_path(self) -> Path:
+        return self.root / "vectors.f32"
+
+    @property
+    def keys_path(self) -> Path:
+        return self.root / "keys.bin"
+
+    @property
+    def ivf_path(self) -> Path:
+        return self.root / "ivf.npz"
+
+    def __len__(self) -> int:
+        try:
+            return self.keys_path.stat().st_size // KEY_SIZE
+        except FileNotFoundError:
+            return 0
+
+    def append(self, keys: list[tuple[UUID, UUID]], vectors: "np.ndarray") -> None:
+        """(メッセージのUUID, チャットのUUID) とベクトルを末尾に追記する"""
+        if not keys:
+            return
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.shape != (len(keys), self.dim):
+            raise ValueError(f"Expected vectors of shape ({len(keys)}, {self.dim}), got {vectors.shape}")
+        key_bytes = b"".join(message.bytes + chat.bytes for message, chat in keys)
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                count = len(self)
+                with open(self.vectors_path, "ab") as f:
+                    # キーを書く前に落ちた行を捨ててから書く
+                    f.truncate(count * self.dim * 4)
+                    f.write(vectors.tobytes())
+                    f.flush()
+                with open(self.keys_path, "ab") as f:
+                    f.truncate(count * KEY_SIZE)
+                    f.write(key_bytes)
+                    f.flush()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def search(self, query: "np.ndarray", k: int, nprobe: int | None = None) -> list[VectorHit]:
+        """
+        クエリに近い上位k件（スコアの高い順）
+
+        Args:
+            query: 正規化済みのクエリベクトル
+            k: 件数
+            nprobe: IVFで調べるクラスター数（Noneか、IVFがなければ全行を調べる）
+        """
+        vectors, keys = self._map()
+        count = len(keys)
+        if count == 0 or k <= 0:
+            return []
+        query = np.asarray(query, dtype=np.float32)
+
+        ivf = self._load_ivf() if nprobe is not None else None
+        if ivf is None or nprobe >= len(ivf.centroids):
+            rows, scores = _scan(vectors, query, k, 0, count)
+        else:
+            lists = _top_k(ivf.centroids @ query, nprobe)[0]
+            candidates = np.sort(np.concatenate(
+                [ivf.rows[ivf.offsets[i]:ivf.offsets[i + 1]] for i in lists]
+            ))
+            rows, scores = _top_k(vectors[candidates] @ query, k)
+            rows = candidates[rows]
+            if ivf.count < count:
+                tail_rows, tail_scores = _scan(vectors, query, k, ivf.count, count)
+                rows, scores = _merge(rows, scores, tail_rows, tail_scores, k)
+
+        return [
+            VectorHit(
+                message_uuid=UUID(bytes=keys[row, :16].tobytes()),
+                chat_uuid=UUID(bytes=keys[row, 16:].tobytes()),
+                score=float(score),
+            )
+            for row, score in zip(rows, scores)
+        ]
+
+    def build_ivf(self, nlist: int | None = None, iterations: int = 10, seed: int = 0) -> int:
+        """
+        現在の行でIVF（球面k-meansのクラスター）を作る
+
+        Args:
+            nlist: クラスター数（省略時は件数の平方根）
+            iterations: k-meansの反復回数
+            seed: 乱数のシード
+
+        Returns:
+            クラスター数（行が少なすぎて作らなかった場合は0）
+        """
+        vectors, _ = self._map()
+        count = len(vectors)
+        nlist = min(nlist or int(np.sqrt(count)), count)
+        if nlist < 2:
+            return 0
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(count, min(count, nlist * IVF_SAMPLE_PER_LIST), replace=False))
+        sample = np.asarray(vectors[sample_rows])
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = _assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            sizes = np.bincount(assign, minlength=nlist)
+            # 空のクラスターはサンプルから選び直す
+            empty = np.flatnonzero(sizes == 0)
+            sums[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = np.divide(sums, norms, out=sums, where=norms > 0)
+
+        assign = np.concatenate([
+            _assign(np.asarray(vectors[start:start + SCAN_CHUNK_ROWS]), centroids)
+            for start in range(0, count, SCAN_CHUNK_ROWS)
+        ])
+        rows = np.argsort(assign, kind="stable")
+        offsets = np.searchsorted(assign[rows], np.arange(nlist + 1))
+        tmp_path = self.root / "ivf.tmp.npz"
+        np.savez(tmp_path, centroids=centroids, offsets=offsets, rows=rows, count=np.int64(count))
+        os.replace(tmp_path, self.ivf_path)
+        return nlist
+
+    def close(self) -> None:
+        with self._lock:
+            self._vectors = self._keys = self._mapped_as = None
+            self._ivf = None
+
+    def _map(self) -> tuple["np.ndarray", "np.ndarray"]:
+        """ベクトルとキーのmemmap（追記で伸びていれば張り直す）"""
+        with self._lock:
+            try:
+                stat = self.keys_path.stat()
+            except FileNotFoundError:
+                stat = None
+            if stat is None or stat.st_size < KEY_SIZE:
+                return np.empty((0, self.dim), dtype=np.float32), np.empty((0, KEY_SIZE), dtype=np.uint8)
+            # 作り直されたファイルは件数が同じでも別のinodeになる
+            mapped_as = (stat.st_ino, stat.st_size // KEY_SIZE)
+            if self._mapped_as != mapped_as:
+                count = mapped_as[1]
+                self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(count, self.dim))
+                self._keys = np.memmap(self.keys_path, dtype=np.uint8, mode="r", shape=(count, KEY_SIZE))
+                self._mapped_as = mapped_as
+            return self._vectors, self._keys
+
+    def _load_ivf(self) -> _Ivf | None:
+        """IVFを読む（作り直されていれば読み直す）"""
+        try:
+            mtime = self.ivf_path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            if self._ivf is None or self._ivf.mtime != mtime:
+                with np.load(self.ivf_path) as data:
+                    self._ivf = _Ivf(
+                        centroids=data["centroids"],
+                        offsets=data["offsets"],
+                        rows=data["rows"],
+                        count=int(data["count"]),
+                        mtime=mtime,
+                    )
+            return self._ivf
+
+
+def _top_k(scores: "np.ndarray", k: int) -> tuple["np.ndarray", "np.ndarray"]:
+    """スコアの高い順に上位k件の (位置, スコア)"""
+    if len(scores) > k:
+        top = np.argpartition(scores, -k)[-k:]
+    else:
+        top = np.arange(len(scores))
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return top, scores[top]
+
+
+def _merge(rows_a, scores_a, rows_b, scores_b, k: int) -> tuple["np.ndarray", "np.ndarray"]:
+    rows = np.concatenate([rows_a, rows_b])
+    top, scores = _top_k(np.concatenate([scores_a, scores_b]), k)
+    return rows[top], scores
+
+
+def _scan(vectors: "np.ndarray", query: "np.ndarray", k: int, start: int, stop: int):
+    """start〜stop の行をチャンクごとに調べた上位k件の (行, スコア)"""
+    rows = np.empty(0, dtype=np.int64)
+    scores = np.empty(0, dtype=np.float32)
+    for chunk_start in range(start, stop, SCAN_CHUNK_ROWS):
+        chunk_stop = min(chunk_start + SCAN_CHUNK_ROWS, stop)
+        chunk_rows, chunk_scores = _top_k(vectors[chunk_start:chunk_stop] @ query, k)
+        rows, scores = _merge(rows, scores, chunk_rows + chunk_start, chunk_scores, k)
+    return rows, scores
+
+
+def _assign(vectors: "np.ndarray", centroids: "np.ndarray") -> "np.ndarray":
+    """各行に最も近い重心の番号（行×クラスターの行列が大きくならないように分けて計算する）"""
+    step = ASSIGN_CHUNK_ROWS
+    return np.concatenate([
+        np.argmax(vectors[start:start + step] @ centroids.T, axis=1)
+        for start in range(0, len(vectors), step)
+    ])
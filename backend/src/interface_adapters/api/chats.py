@@ -1,13 +1,22 @@
+import json
 from uuid import uuid4, UUID
 from functools import lru_cache
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from src.infrastructure.db.models import UserModel, ChatTreeDetail, MessageModel
+from src.infrastructure.db.models import UserModel
 from src.interface_adapters.api.auth import get_current_user
+from src.interface_adapters.api.http_cache import (
+    REVALIDATE_CACHE_CONTROL, etag_matches, make_etag, not_modified,
+)
 from src.application.use_cases.chat_interaction import ChatInteraction
+from src.application.use_cases.chat_selection import ChatSelection
 from src.application.use_cases.services.message_handler import MessageHandler
-from src.interface_adapters.gateways.chat_repository import ChatRepositoryImpl
+from src.interface_adapters.gateways.chat_repository import EVENT_PAGE_SIZE, ChatRepositoryImpl
 from src.interface_adapters.gateways.llm_api_adapter import LLMAdapter
+from src.interface_adapters.gateways.semantic_index import SemanticIndexImpl, get_semantic_index
+from src.interface_adapters.gateways.tree_integrity import TreeCycleError
+from src.interface_adapters.gateways.ndjson import encode_ndjson
 from src.infrastructure.openrouter_client import OpenRouterClient
 from src.infrastructure.config import settings
 from src.domain.entities.chat_tree_entity import ChatTreeEntity
@@ -15,6 +24,14 @@ from src.domain.entities.user_entity import UserEntity
 
 router = APIRouter(prefix="/api/v1/chats", tags=["chats"])
 
+# チャット一覧の1ページあたりの上限件数
+MAX_CHAT_PAGE_SIZE = 100
+# 次ページのカーソルを返すレスポンスヘッダー
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# 部分木の取得で指定できる深さと、1ノードあたりの子の件数の上限
+MAX_SUBTREE_DEPTH = 20
+MAX_SUBTREE_BREADTH = 100
+
 
 # 依存性注入: シングルトンとして管理
 @lru_cache()
@@ -37,6 +54,36 @@ class ChatResponse(BaseModel):
     owner_uuid: str
     created: str
     updated: str
+    message_count: int = 0
+    branch_count: int = 0
+    total_tokens: int = 0
+    last_message_at: str | None = None
+    last_message_preview: str = ""
+    # フォークしたチャットなら、分岐点のメッセージがあるチャットのUUID
+    forked_from: str | None = None
+
+
+class ForkChatRequest(BaseModel):
+    """チャットのフォークリクエスト"""
+
+    message_uuid: UUID
+
+
+def _to_chat_response(chat: dict) -> ChatResponse:
+    """リポジトリのチャット情報辞書をレスポンスに変換"""
+    last_message_at = chat["last_message_at"]
+    return ChatResponse(
+        uuid=chat["uuid"],
+        owner_uuid=chat["owner_uuid"],
+        created=chat["created"].isoformat(),
+        updated=chat["updated"].isoformat(),
+        message_count=chat["message_count"],
+        branch_count=chat["branch_count"],
+        total_tokens=chat["total_tokens"],
+        last_message_at=last_message_at.isoformat() if last_message_at else None,
+        last_message_preview=chat["last_message_preview"],
+        forked_from=chat["forked_from"],
+    )
 
 
 class MessageResponse(BaseModel):
@@ -48,6 +95,8 @@ class MessageResponse(BaseModel):
     parent_uuid: str | None
     created_at: str
     updated_at: str
+    # Trueなら本文は大きいため省略している（GET .../messages/{uuid}/content で取得）
+    content_external: bool = False
 
 
 class ChatTreeResponse(BaseModel):
@@ -57,14 +106,95 @@ class ChatTreeResponse(BaseModel):
     owner_uuid: str
     created: str
     updated: str
+    # チャットの版数（次回の ?since= に渡すと差分だけを取得できる）
+    version: int = 0
     messages: list[MessageResponse]
 
 
+class MessageNodeResponse(BaseModel):
+    """本文を除いたメッセージのノード"""
+
+    uuid: str
+    parent_uuid: str | None
+    role: str
+    length: int
+    created_at: str
+
+
+class SubtreeNodeResponse(MessageNodeResponse):
+    """部分木のノード（child_countが返したノードの数より多ければ続きがある）"""
+
+    child_count: int
+
+
+class SubtreeMoreResponse(BaseModel):
+    """途中で打ち切った兄弟の一覧（cursorを渡すと続きを取得できる）"""
+
+    parent_uuid: str | None
+    cursor: str
+
+
+class ChatSubtreeResponse(BaseModel):
+    """チャットツリーの部分木のレスポンス"""
+
+    uuid: str
+    version: int
+    nodes: list[SubtreeNodeResponse]
+    more: list[SubtreeMoreResponse]
+
+
+class ChatEventResponse(BaseModel):
+    """チャットの変更ログの1件（payload の形式は gateways/chat_events.py を参照）"""
+
+    seq: int
+    type: str
+    payload: dict
+    created_at: str
+
+
+class ChatEventsResponse(BaseModel):
+    """チャットの変更ログのレスポンス"""
+
+    uuid: str
+    # チャットの現在の版数（最後のイベントの seq がこれより小さければ続きがある）
+    version: int
+    events: list[ChatEventResponse]
+
+
+class BranchMessageResponse(BaseModel):
+    """枝の比較で返すメッセージ"""
+
+    uuid: str
+    role: str
+    content: str
+
+
+class BranchDiffResponse(BaseModel):
+    """2つの枝の比較のレスポンス"""
+
+    # 2つの枝が分かれたメッセージ（最も近い共通の祖先）
+    ancestor_uuid: str
+    # ルートから ancestor までの共通部分のメッセージ数
+    common_length: int
+    # ancestor の次からそれぞれの枝の末端まで（ルート側から順）
+    left: list[BranchMessageResponse]
+    right: list[BranchMessageResponse]
+
+
+class ChatSkeletonResponse(BaseModel):
+    """チャットツリーの構造だけのレスポンス"""
+
+    uuid: str
+    owner_uuid: str
+    nodes: list[MessageNodeResponse]
+
+
 @router.post("", response_model=ChatResponse, status_code=status.HTTP_201_CREATED)
 async def create_chat(
     current_user: UserModel = Depends(get_current_user),
     chat_repository: ChatRepositoryImpl = Depends(get_chat_repository),
     llm_adapter: LLMAdapter = Depends(get_llm_adapter),
+    semantic_index: SemanticIndexImpl | None = Depends(get_semantic_index),
 ):
     """
     新しいチャットを作成
@@ -91,6 +221,7 @@ async def create_chat(
         repo=chat_repository,
         llm_client=llm_adapter,
         current_user=user_entity,
+        semantic_index=semantic_index,
     )
     chat_tree = ChatTreeEntity()
 
@@ -106,50 +237,171 @@ async def create_chat(
     await chat_interaction.start_chat(initial_message="", chat_uuid=chat_uuid)
 
     # ChatTreeDetailを取得（start_chat内で作成されている）
-    chat = await ChatTreeDetail.get(uuid=chat_uuid)
+    chat = await chat_repository.get_chat_tree_info(str(chat_uuid))
+    if chat is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Chat was not created"
+        )
 
-    return ChatResponse(
-        uuid=str(chat.uuid),
-        owner_uuid=str(chat.owner_uuid),
-        created=chat.created.isoformat(),
-        updated=chat.updated.isoformat(),
+    return _to_chat_response(chat)
+
+
+@router.post("/{chat_uuid}/fork", response_model=ChatResponse, status_code=status.HTTP_201_CREATED)
+async def fork_chat(
+    chat_uuid: UUID,
+    request: ForkChatRequest,
+    current_user: UserModel = Depends(get_current_user),
+    chat_repository: ChatRepositoryImpl = Depends(get_chat_repository),
+):
+    """
+    チャットのメッセージから分岐した新しいチャットを作成
+
+    分岐点までの会話はコピーせずに元のチャットを参照するので、履歴を送り直す必要はない。
+    フォークへのメッセージ送信は通常のチャットと同じ。
+
+    Args:
+        chat_uuid: 元のチャットUUID
+        request: 分岐点のメッセージUUID
+        current_user: 認証済みユーザー（依存注入）
+        chat_repository: チャットリポジトリ（依存注入）
+
+    Returns:
+        ChatResponse: 作成されたチャット情報
+
+    Raises:
+        HTTPException: チャットやメッセージが存在しない、またはアクセス権限がない場合
+    """
+    user_entity = UserEntity(
+        uuid=str(current_user.uuid),
+        username=current_user.username,
+        email=current_user.email,
     )
 
+    chat_selection = ChatSelection(chat_repository, user_entity)
+    try:
+        fork_uuid = await chat_selection.fork_chat(str(chat_uuid), str(request.message_uuid))
+    except ValueError:
+        # 他のユーザーのチャットも存在しない場合と同じ404を返す
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat or message not found")
+
+    chat = await chat_repository.get_chat_tree_info(fork_uuid, user_entity)
+    if chat is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Chat was not created"
+        )
+    return _to_chat_response(chat)
+
 
 @router.get("", response_model=list[ChatResponse])
-async def get_all_chats(current_user: UserModel = Depends(get_current_user)):
+async def get_all_chats(
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=MAX_CHAT_PAGE_SIZE),
+    cursor: str | None = None,
+    current_user: UserModel = Depends(get_current_user),
+    chat_repository: ChatRepositoryImpl = Depends(get_chat_repository),
+):
     """
-    ユーザーの全チャット一覧を取得
+    ユーザーのチャット一覧を新しい順に取得
+
+    limitを指定するとページ単位で返し、続きがある場合は
+    次ページのカーソルを X-Next-Cursor ヘッダーで返す。
 
     Args:
+        response: レスポンス（ヘッダー設定用）
+        limit: 1ページの最大件数（未指定なら全件）
+        cursor: 前ページのレスポンスで受け取ったカーソル
         current_user: 認証済みユーザー（依存注入）
+        chat_repository: チャットリポジトリ（依存注入）
 
     Returns:
         list[ChatResponse]: チャット一覧
+
+    Raises:
+        HTTPException: カーソルが不正な場合
     """
-    chats = await ChatTreeDetail.filter(owner_uuid=current_user.uuid).all()
+    user_entity = UserEntity(
+        uuid=str(current_user.uuid),
+        username=current_user.username,
+        email=current_user.email,
+    )
+    chat_selection = ChatSelection(chat_repository, user_entity)
+
+    try:
+        chats, next_cursor = await chat_selection.list_chats(limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    return [_to_chat_response(chat) for chat in chats]
+
+
+def _export_response(records, *, compress: bool, filename: str) -> StreamingResponse:
+    """エクスポートのレコードをNDJSON（compressならgzip）のダウンロードとして返す"""
+    if compress:
+        media_type, filename = "application/gzip", filename + ".ndjson.gz"
+    else:
+        media_type, filename = "application/x-ndjson", filename + ".ndjson"
+    return StreamingResponse(
+        encode_ndjson(records, compress=compress),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
-    return [
-        ChatResponse(
-            uuid=str(chat.uuid),
-            owner_uuid=str(chat.owner_uuid),
-            created=chat.created.isoformat(),
-            updated=chat.updated.isoformat(),
-        )
-        for chat in chats
-    ]
+
+@router.get("/export")
+async def export_all_chats(
+    gzip: bool = False,
+    current_user: UserModel = Depends(get_current_user),
+    chat_repository: ChatRepositoryImpl = Depends(get_chat_repository),
+):
+    """
+    ユーザーの全チャットをNDJSONでエクスポート
+
+    行はDBからキーセットで少しずつ読みながら送るので、アカウントが大きくても
+    サーバーのメモリ使用量は一定。形式は gateways/ndjson.py を参照。
+
+    Args:
+        gzip: Trueならgzipで圧縮して返す
+        current_user: 認証済みユーザー（依存注入）
+        chat_repository: チャットリポジトリ（依存注入）
+    """
+    user_entity = UserEntity(
+        uuid=str(current_user.uuid),
+        username=current_user.username,
+        email=current_user.email,
+    )
+    return _export_response(
+        chat_repository.iter_export_records(user_entity),
+        compress=gzip,
+        filename=f"chats-{current_user.username}",
+    )
 
 
 @router.get("/{chat_uuid}", response_model=ChatTreeResponse)
 async def get_chat_tree(
-    chat_uuid: UUID, current_user: UserModel = Depends(get_current_user)
+    chat_uuid: UUID,
+    request: Request,
+    response: Response,
+    since: int | None = Query(None, ge=0),
+    current_user: UserModel = Depends(get_current_user),
+    chat_repository: ChatRepositoryImpl = Depends(get_chat_repository),
 ):
     """
     特定のチャットツリーを取得
 
+    レスポンスにはチャットの版数（version）から作ったETagを付け、
+    If-None-Match が一致すればメッセージを読まずに 304 を返す。
+    sinceに前回のレスポンスのversionを渡すと、それ以降に追加されたメッセージだけを返す。
+
     Args:
         chat_uuid: チャットUUID
+        request: リクエスト（If-None-Match の参照用）
+        response: レスポンス（ヘッダー設定用）
+        since: 差分取得の基準にする版数（未指定なら全メッセージ）
         current_user: 認証済みユーザー（依存注入）
+        chat_repository: チャットリポジトリ（依存注入）
 
     Returns:
         ChatTreeResponse: チャットツリー情報
@@ -157,37 +409,327 @@ async def get_chat_tree(
     Raises:
         HTTPException: チャットが存在しない、またはアクセス権限がない場合
     """
-    # チャットを取得
-    chat = await ChatTreeDetail.filter(uuid=chat_uuid).first()
+    user_entity = UserEntity(
+        uuid=str(current_user.uuid),
+        username=current_user.username,
+        email=current_user.email,
+    )
 
-    if chat is None:
+    # チャットを取得（シャーディング時は所有者のシャードだけを探し、アーカイブ済みならメッセージを戻す）
+    # アクセス権限がない場合も、セキュリティのために404を返す。
+    try:
+        chat = await ChatSelection(chat_repository, user_entity).open_chat(str(chat_uuid))
+    except ValueError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found"
         )
 
-    # アクセス権限チェック, セキュリティのために404を返す。
-    if chat.owner_uuid != current_user.uuid:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found"
-        )
+    # 版数が変わっていなければメッセージは読まない（sinceの有無はURLで区別される）
+    etag = make_etag(["chat", chat["uuid"], chat["version"]])
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return not_modified(etag, REVALIDATE_CACHE_CONTROL)
 
     # メッセージを取得
-    messages = await MessageModel.filter(chat_tree=chat).all()
+    messages = await chat_repository.get_chat_tree_messages(
+        str(chat_uuid), user_entity, all_users=True, content_handles=True, since=since
+    ) or []
 
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
     return ChatTreeResponse(
-        uuid=str(chat.uuid),
-        owner_uuid=str(chat.owner_uuid),
-        created=chat.created.isoformat(),
-        updated=chat.updated.isoformat(),
-        messages=[
-            MessageResponse(
-                uuid=str(msg.uuid),
-                role=msg.role.value,
-                content=msg.content,
-                parent_uuid=str(msg.parent_id) if msg.parent_id else None,
-                created_at=msg.created_at.isoformat(),
-                updated_at=msg.updated_at.isoformat(),
-            )
-            for msg in messages
-        ],
+        uuid=chat["uuid"],
+        owner_uuid=chat["owner_uuid"],
+        created=chat["created"].isoformat(),
+        updated=chat["updated"].isoformat(),
+        version=chat["version"],
+        messages=[MessageResponse(**msg) for msg in messages],
+    )
+
+
+@router.get("/{chat_uuid}/events", response_model=ChatEventsResponse)
+async def get_chat_events(
+    chat_uuid: UUID,
+    since: int = Query(0, ge=0),
+    limit: int = Query(EVENT_PAGE_SIZE, ge=1, le=EVENT_PAGE_SIZE),
+    current_user: UserModel = Depends(get_current_user),
+    chat_repository: ChatRepositoryImpl = Depends(get_chat_repository),
+):
+    """
+    チャットの変更ログ（メッセージの追加・アシスタント詳細の付与）を取得
+
+    GET /{chat_uuid} で受け取った version を since に渡すと、それ以降の変更だけを
+    seq 順に返す。最後のイベントの seq を次の since にして読み進める。
+
+    Raises:
+        HTTPException: チャットが存在しない、またはアクセス権限がない場合
+    """
+    user_entity = UserEntity(
+        uuid=str(current_user.uuid),
+        username=current_user.username,
+        email=current_user.email,
+    )
+
+    try:
+        chat = await ChatSelection(chat_repository, user_entity).open_chat(str(chat_uuid))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found")
+
+    events = await chat_repository.get_chat_events(str(chat_uuid), user_entity, since=since, limit=limit)
+    return ChatEventsResponse(
+        uuid=chat["uuid"],
+        version=chat["version"],
+        events=[ChatEventResponse(**event) for event in events],
+    )
+
+
+def _format_sse(event: dict) -> str:
+    """イベントを Server-Sent Events の1件にする（id は seq なので再接続時に Last-Event-ID で続きから読める）"""
+    data = json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {event['seq']}\nevent: {event['type']}\ndata: {data}\n\n"
+
+
+@router.get("/{chat_uuid}/events/stream")
+async def stream_chat_events(
+    chat_uuid: UUID,
+    request: Request,
+    since: int | None = Query(None, ge=0),
+    current_user: UserModel = Depends(get_current_user),
+    chat_repository: ChatRepositoryImpl = Depends(get_chat_repository),
+):
+    """
+    チャットの変更ログを Server-Sent Events で購読
+
+    since（省略時は Last-Event-ID ヘッダー、どちらもなければ現在の版数）より後の
+    イベントを送った後、新しいイベントを待ち続ける。クライアントが切断すると終わる。
+
+    Raises:
+        HTTPException: チャットが存在しない、またはアクセス権限がない場合
+    """
+    user_entity = UserEntity(
+        uuid=str(current_user.uuid),
+        username=current_user.username,
+        email=current_user.email,
+    )
+
+    try:
+        chat = await ChatSelection(chat_repository, user_entity).open_chat(str(chat_uuid))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found")
+
+    if since is None:
+        last_event_id = request.headers.get("Last-Event-ID", "")
+        since = int(last_event_id) if last_event_id.isdigit() else chat["version"]
+
+    async def stream():
+        async for event in chat_repository.subscribe_chat_events(str(chat_uuid), user_entity, since=since):
+            yield _format_sse(event)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/{chat_uuid}/skeleton", response_model=ChatSkeletonResponse)
+async def get_chat_skeleton(
+    chat_uuid: UUID,
+    request: Request,
+    response: Response,
+    current_user: UserModel = Depends(get_current_user),
+    chat_repository: ChatRepositoryImpl = Depends(get_chat_repository),
+):
+    """
+    チャットツリーの構造だけを取得
+
+    本文を含まないため大きなチャットでも軽く、クライアントは表示するノードの本文だけを
+    POST /{chat_uuid}/messages/contents でまとめて取得する。
+    レスポンスにはチャットの版数から作ったETagを付け、If-None-Match が一致すればノードを読まずに 304 を返す。
+
+    Raises:
+        HTTPException: チャットが存在しない、またはアクセス権限がない場合
+    """
+    user_entity = UserEntity(
+        uuid=str(current_user.uuid),
+        username=current_user.username,
+        email=current_user.email,
+    )
+
+    try:
+        chat = await ChatSelection(chat_repository, user_entity).open_chat(str(chat_uuid))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found")
+
+    # 構造の変更（追加・削除・修復）は版数を進めるので、版数が同じならノードは読まない
+    etag = make_etag(["skeleton", chat["uuid"], chat["version"]])
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return not_modified(etag, REVALIDATE_CACHE_CONTROL)
+
+    nodes = await chat_repository.get_chat_tree_skeleton(str(chat_uuid), user_entity) or []
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+    return ChatSkeletonResponse(
+        uuid=chat["uuid"],
+        owner_uuid=chat["owner_uuid"],
+        nodes=[MessageNodeResponse(**node) for node in nodes],
+    )
+
+
+@router.get("/{chat_uuid}/subtree", response_model=ChatSubtreeResponse)
+async def get_chat_subtree(
+    chat_uuid: UUID,
+    request: Request,
+    response: Response,
+    root: UUID | None = None,
+    depth: int = Query(3, ge=0, le=MAX_SUBTREE_DEPTH),
+    breadth: int = Query(10, ge=1, le=MAX_SUBTREE_BREADTH),
+    cursor: str | None = None,
+    current_user: UserModel = Depends(get_current_user),
+    chat_repository: ChatRepositoryImpl = Depends(get_chat_repository),
+):
+    """
+    表示中のノードの近傍だけを構造のみで取得
+
+    rootのメッセージ（省略時はチャットのルート）から depth 段下までを、
+    各ノードの子は breadth 件までに絞って返す。打ち切った兄弟の一覧は more のカーソルを
+    cursor に渡すと続きから取得でき、最下段より下は child_count を見て root を指定し直す。
+    本文は POST /{chat_uuid}/messages/contents で取得する。
+
+    Args:
+        chat_uuid: チャットUUID
+        request: リクエスト（If-None-Match の参照用）
+        response: レスポンス（ヘッダー設定用）
+        root: 起点のメッセージUUID
+        depth: 起点から下に辿る段数
+        breadth: 1ノードあたりに返す子の最大件数
+        cursor: more で受け取った兄弟の続きのカーソル（rootより優先）
+        current_user: 認証済みユーザー（依存注入）
+        chat_repository: チャットリポジトリ（依存注入）
+
+    Raises:
+        HTTPException: チャットや起点のメッセージが存在しない、アクセス権限がない、またはカーソルが不正な場合
+    """
+    user_entity = UserEntity(
+        uuid=str(current_user.uuid),
+        username=current_user.username,
+        email=current_user.email,
+    )
+
+    try:
+        chat = await ChatSelection(chat_repository, user_entity).open_chat(str(chat_uuid))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found")
+
+    etag = make_etag(["subtree", chat["uuid"], chat["version"]])
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return not_modified(etag, REVALIDATE_CACHE_CONTROL)
+
+    try:
+        subtree = await chat_repository.get_chat_subtree(
+            str(chat_uuid),
+            user_entity,
+            root_uuid=str(root) if root else None,
+            depth=depth,
+            breadth=breadth,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+    if subtree is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Message not found")
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+    return ChatSubtreeResponse(
+        uuid=chat["uuid"],
+        version=chat["version"],
+        nodes=[SubtreeNodeResponse(**node) for node in subtree["nodes"]],
+        more=[SubtreeMoreResponse(**m) for m in subtree["more"]],
+    )
+
+
+@router.get("/{chat_uuid}/diff", response_model=BranchDiffResponse)
+async def diff_branches(
+    chat_uuid: UUID,
+    left: UUID,
+    right: UUID,
+    current_user: UserModel = Depends(get_current_user),
+    chat_repository: ChatRepositoryImpl = Depends(get_chat_repository),
+):
+    """
+    チャットの2つのメッセージまでの会話を比較（GET /{chat_uuid}/diff?left=...&right=...）
+
+    2つの回答などを比べるために、枝が分かれた位置と、そこから先のそれぞれの枝を返す。
+    片方がもう片方の祖先なら、その側の続きは空になる。
+
+    Args:
+        chat_uuid: チャットUUID
+        left: 比べる一方のメッセージUUID
+        right: 比べるもう一方のメッセージUUID
+        current_user: 認証済みユーザー（依存注入）
+        chat_repository: チャットリポジトリ（依存注入）
+
+    Raises:
+        HTTPException: チャットやメッセージが存在しない、またはアクセス権限がない場合（404）、
+            メッセージの祖先の親が循環していて経路を辿れない場合（409）
+    """
+    user_entity = UserEntity(
+        uuid=str(current_user.uuid),
+        username=current_user.username,
+        email=current_user.email,
+    )
+
+    chat_selection = ChatSelection(chat_repository, user_entity)
+    try:
+        diff = await chat_selection.diff_branches(str(chat_uuid), str(left), str(right))
+    except TreeCycleError:
+        # 木が壊れている。修復（check_chat_tree）するまで比べられない
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Chat tree has a parent cycle")
+    except ValueError:
+        # 他のユーザーのチャットも存在しない場合と同じ404を返す
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat or message not found")
+
+    return BranchDiffResponse(
+        ancestor_uuid=str(diff.ancestor.uuid),
+        common_length=diff.common_length,
+        left=[BranchMessageResponse(uuid=str(m.uuid), role=m.role.value, content=m.content) for m in diff.left],
+        right=[BranchMessageResponse(uuid=str(m.uuid), role=m.role.value, content=m.content) for m in diff.right],
+    )
+
+
+@router.get("/{chat_uuid}/export")
+async def export_chat(
+    chat_uuid: UUID,
+    gzip: bool = False,
+    current_user: UserModel = Depends(get_current_user),
+    chat_repository: ChatRepositoryImpl = Depends(get_chat_repository),
+):
+    """
+    チャットを1件NDJSONでエクスポート
+
+    Args:
+        chat_uuid: チャットUUID
+        gzip: Trueならgzipで圧縮して返す
+        current_user: 認証済みユーザー（依存注入）
+        chat_repository: チャットリポジトリ（依存注入）
+
+    Raises:
+        HTTPException: チャットが存在しない、またはアクセス権限がない場合
+    """
+    user_entity = UserEntity(
+        uuid=str(current_user.uuid),
+        username=current_user.username,
+        email=current_user.email,
+    )
+
+    try:
+        chat = await ChatSelection(chat_repository, user_entity).open_chat(str(chat_uuid))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found")
+
+    return _export_response(
+        chat_repository.iter_export_records(user_entity, str(chat_uuid)),
+        compress=gzip,
+        filename=f"chat-{chat_uuid}",
     )
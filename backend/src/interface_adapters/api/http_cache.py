@@ -0,0 +1,38 @@
+"""
+HTTPキャッシュ（ETag / If-None-Match）用のヘルパー
+
+ETagはレスポンスの内容から作る強いETagとして扱い、
+クライアントが同じ値を If-None-Match で送ってきたら 304 を返す。
+"""
+import hashlib
+import json
+
+from fastapi import Response, status
+
+# 書き込み後に変わらないリソース（メッセージ本文など）のCache-Control
+# 認証付きのレスポンスなので、共有キャッシュには置かせない
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+# 変わり得るリソース（チャットツリーなど）は、キャッシュしても毎回ETagで再検証させる
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(payload) -> str:
+    """JSON化できる値から強いETag（"..."で囲んだ文字列）を作る"""
+    raw = json.dumps(payload, separators=(",", ":"), sort_keys=True, ensure_ascii=False)
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match ヘッダーがETagに一致するか（弱いETag指定と * も受け付ける）"""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or any(c.removeprefix("W/") == etag for c in candidates)
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    """304 Not Modified のレスポンス"""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
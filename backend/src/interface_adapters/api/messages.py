@@ -1,20 +1,45 @@
 from uuid import UUID
+from datetime import datetime
 from functools import lru_cache
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from src.infrastructure.db.models import UserModel, ChatTreeDetail
+from collections.abc import Iterator
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from src.infrastructure.db.models import UserModel
 from src.interface_adapters.api.auth import get_current_user
+from src.interface_adapters.api.http_cache import (
+    IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL, etag_matches, make_etag, not_modified,
+)
 from src.application.use_cases.chat_selection import ChatSelection
 from src.application.use_cases.chat_interaction import ChatInteraction
-from src.interface_adapters.gateways.chat_repository import ChatRepositoryImpl
+from src.interface_adapters.gateways.chat_repository import SEARCH_PAGE_SIZE, ChatRepositoryImpl
 from src.application.use_cases.services.message_handler import MessageHandler
+from src.domain.entities.message_entity import Role
 from src.domain.entities.user_entity import UserEntity
 from src.domain.entities.chat_tree_entity import ChatTreeEntity
 from src.interface_adapters.gateways.llm_api_adapter import LLMAdapter
+from src.interface_adapters.gateways.semantic_index import SemanticIndexImpl, get_semantic_index
 from src.infrastructure.openrouter_client import OpenRouterClient
 from src.infrastructure.config import settings
 
 router = APIRouter(prefix="/api/v1/chats", tags=["messages"])
+# チャットを指定せずにメッセージを直接読むためのリソース
+message_router = APIRouter(prefix="/api/v1/messages", tags=["messages"])
+
+# 本文をストリーミングするときの1チャンクのバイト数
+CONTENT_CHUNK_SIZE = 64 * 1024
+# 本文をまとめて取得するときの1リクエストあたりの上限件数
+MAX_CONTENT_BATCH_SIZE = 200
+# 全文検索の1リクエストあたりの上限件数
+MAX_SEARCH_RESULTS = 100
+# 全文検索の検索語の最大文字数
+MAX_SEARCH_QUERY_LENGTH = 200
+# 意味検索の既定の件数
+RELATED_PAGE_SIZE = 10
+# 意味検索の検索文の最大文字数
+MAX_RELATED_QUERY_LENGTH = 2000
+# 削除済みのメッセージを除いても件数が足りるように、インデックスから多めに取る倍率
+RELATED_OVERFETCH = 2
 
 
 # 依存性注入: シングルトンとして管理
@@ -48,6 +73,67 @@ class MessageResponse(BaseModel):
     parent_uuid: str | None
 
 
+class MessageContentsRequest(BaseModel):
+    """本文の一括取得リクエスト"""
+
+    uuids: list[str] = Field(min_length=1, max_length=MAX_CONTENT_BATCH_SIZE)
+
+
+class MessageContentResponse(BaseModel):
+    """メッセージ本文"""
+
+    uuid: str
+    content: str
+    # Trueなら本文は大きいため省略している（GET .../messages/{uuid}/content で取得）
+    content_external: bool = False
+
+
+class MessageResourceResponse(BaseModel):
+    """チャットを指定せずに読むメッセージ"""
+
+    uuid: str
+    chat_uuid: str
+    parent_uuid: str | None
+    role: str
+    content: str
+    # Trueなら本文は大きいため省略している（GET /chats/{chat_uuid}/messages/{uuid}/content で取得）
+    content_external: bool = False
+    created_at: str
+
+
+class DeleteSubtreeResponse(BaseModel):
+    """部分木の削除レスポンス"""
+
+    deleted: int
+
+
+class SearchContextResponse(BaseModel):
+    """検索結果の祖先（ルート側から順）"""
+
+    uuid: str
+    role: str
+    preview: str
+
+
+class MessageSearchHitResponse(BaseModel):
+    """全文検索の結果"""
+
+    chat_uuid: str
+    message_uuid: str
+    role: str
+    model_name: str | None
+    created_at: datetime
+    score: float
+    snippet: str
+    context: list[SearchContextResponse]
+
+
+class RelatedMessageResponse(MessageResourceResponse):
+    """意味検索の結果"""
+
+    score: float
+
+
 class SendMessageResponse(BaseModel):
     """メッセージ送信レスポンス"""
 
@@ -62,15 +148,8 @@ async def send_message(
     current_user: UserModel = Depends(get_current_user),
     chat_repository: ChatRepositoryImpl = Depends(get_chat_repository),
     llm_adapter: LLMAdapter = Depends(get_llm_adapter),
+    semantic_index: SemanticIndexImpl | None = Depends(get_semantic_index),
 ):
-    # --- チャットの存在・権限チェック ---
-    chat = await ChatTreeDetail.filter(uuid=chat_uuid).first()
-    if chat is None:
-        raise HTTPException(status_code=404, detail="Chat not found")
-    if chat.owner_uuid != current_user.uuid:
-        #raise HTTPException(status_code=403, detail="Forbidden")
-        raise HTTPException(status_code=404, detail="Chat not found")
-
     # --- UserEntity ---
     user_entity = UserEntity(
         uuid=str(current_user.uuid),
@@ -78,11 +157,20 @@ async def send_message(
         email=current_user.email,
     )
 
+    # --- チャットの存在・権限チェック ---
+    chat = await chat_repository.get_chat_tree_info(str(chat_uuid), user_entity)
+    if chat is None:
+        raise HTTPException(status_code=404, detail="Chat not found")
+    if chat["owner_uuid"] != str(current_user.uuid):
+        #raise HTTPException(status_code=403, detail="Forbidden")
+        raise HTTPException(status_code=404, detail="Chat not found")
+
     # --- MessageHandlerとChatSelectionを構築 ---
     message_handler = MessageHandler(
         repo=chat_repository,
         llm_client=llm_adapter,
         current_user=user_entity,
+        semantic_index=semantic_index,
     )
     chat_selection = ChatSelection(chat_repository, user_entity)
 
@@ -135,3 +223,322 @@ async def send_message(
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+def _iter_chunks(content: memoryview) -> Iterator[memoryview]:
+    """本文をコピーせずにチャンクへ分割する"""
+    for start in range(0, len(content), CONTENT_CHUNK_SIZE):
+        yield content[start:start + CONTENT_CHUNK_SIZE]
+
+
+@router.get("/{chat_uuid}/messages/{message_uuid}/content")
+async def get_message_content(
+    chat_uuid: UUID,
+    message_uuid: UUID,
+    current_user: UserModel = Depends(get_current_user),
+    chat_repository: ChatRepositoryImpl = Depends(get_chat_repository),
+):
+    """
+    メッセージ本文だけをストリーミングで取得
+
+    チャットツリーの取得で content_external=True になった大きな本文を読むために使う。
+    本文はセグメントファイルのmmapから、コピーせずにチャンク単位で送る。
+
+    Raises:
+        HTTPException: チャットまたはメッセージが存在しない、またはアクセス権限がない場合
+    """
+    user_entity = UserEntity(
+        uuid=str(current_user.uuid),
+        username=current_user.username,
+        email=current_user.email,
+    )
+
+    try:
+        chat = await ChatSelection(chat_repository, user_entity).open_chat(str(chat_uuid))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Chat not found")
+
+    content = await chat_repository.open_message_content(
+        str(chat_uuid), str(message_uuid), user_entity
+    )
+    if content is None:
+        raise HTTPException(status_code=404, detail="Message not found")
+
+    return StreamingResponse(
+        _iter_chunks(content),
+        media_type="text/plain; charset=utf-8",
+        headers={"Content-Length": str(len(content))},
+    )
+
+
+@router.delete("/{chat_uuid}/messages/{message_uuid}", response_model=DeleteSubtreeResponse)
+async def delete_subtree(
+    chat_uuid: UUID,
+    message_uuid: UUID,
+    current_user: UserModel = Depends(get_current_user),
+    chat_repository: ChatRepositoryImpl = Depends(get_chat_repository),
+):
+    """
+    メッセージとその子孫（枝全体）を削除
+
+    子孫の数によらず数文のSQLで削除し、空いた領域はバックグラウンドで解放する。
+    購読側には変更ログの subtree_deleted で伝わる。
+
+    Raises:
+        HTTPException: チャットまたはメッセージが存在しない、アクセス権限がない（404）、
+            または枝の中にフォークの分岐点がある場合（409）
+    """
+    user_entity = UserEntity(
+        uuid=str(current_user.uuid),
+        username=current_user.username,
+        email=current_user.email,
+    )
+
+    try:
+        chat = await ChatSelection(chat_repository, user_entity).open_chat(str(chat_uuid))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Chat not found")
+
+    try:
+        deleted = await chat_repository.delete_subtree(
+            str(chat_uuid), str(message_uuid), user_entity, owner_uuid=chat["owner_uuid"]
+        )
+    except ValueError:
+        raise HTTPException(status_code=409, detail="Branch is referenced by a forked chat")
+    if deleted is None:
+        raise HTTPException(status_code=404, detail="Message not found")
+    return DeleteSubtreeResponse(deleted=deleted)
+
+
+@router.post("/{chat_uuid}/messages/contents", response_model=list[MessageContentResponse])
+async def get_message_contents(
+    chat_uuid: UUID,
+    body: MessageContentsRequest,
+    request: Request,
+    response: Response,
+    current_user: UserModel = Depends(get_current_user),
+    chat_repository: ChatRepositoryImpl = Depends(get_chat_repository),
+):
+    """
+    複数のメッセージ本文をまとめて取得
+
+    GET /chats/{chat_uuid}/skeleton で取得した構造のうち、表示するノードの本文だけを読むために使う。
+    見つからないUUIDは結果に含めない。本文は書き込み後に変わらないため、
+    返したメッセージの組み合わせからETagを作り、If-None-Match が一致すれば 304 を返す。
+
+    Raises:
+        HTTPException: チャットが存在しない、アクセス権限がない、またはUUIDが不正な場合
+    """
+    user_entity = UserEntity(
+        uuid=str(current_user.uuid),
+        username=current_user.username,
+        email=current_user.email,
+    )
+
+    try:
+        chat = await ChatSelection(chat_repository, user_entity).open_chat(str(chat_uuid))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Chat not found")
+
+    contents = await chat_repository.get_message_contents(str(chat_uuid), body.uuids, user_entity)
+    if contents is None:
+        raise HTTPException(status_code=400, detail="Invalid message uuid")
+
+    etag = make_etag([str(chat_uuid), sorted(c["uuid"] for c in contents)])
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return not_modified(etag, IMMUTABLE_CACHE_CONTROL)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return [MessageContentResponse(**c) for c in contents]
+
+
+def _message_etag(message: dict) -> str:
+    """
+    メッセージのETag
+
+    本文は書き込み後に変わらないが、親は木の修復（check_chat_tree）で付け替わることがあるため、
+    UUIDと親のUUIDから作る。
+    """
+    return make_etag(["message", message["uuid"], message["parent_uuid"]])
+
+
+@message_router.get("", response_model=list[MessageResourceResponse])
+async def get_messages(
+    request: Request,
+    response: Response,
+    uuids: list[str] = Query(..., min_length=1, max_length=MAX_CONTENT_BATCH_SIZE),
+    current_user: UserModel = Depends(get_current_user),
+    chat_repository: ChatRepositoryImpl = Depends(get_chat_repository),
+):
+    """
+    複数のメッセージをまとめて取得（GET /api/v1/messages?uuids=...&uuids=...）
+
+    見つからないUUIDは結果に含めない。返したメッセージとそれぞれの親の組み合わせからETagを作り、
+    If-None-Match が一致すれば本文を読まずに 304 を返す。親は付け替わることがあるので毎回再検証させる。
+
+    Raises:
+        HTTPException: UUIDが不正な場合
+    """
+    user_entity = UserEntity(
+        uuid=str(current_user.uuid),
+        username=current_user.username,
+        email=current_user.email,
+    )
+
+    # 再検証のときは、まず本文を読まずにETagだけを計算する
+    if_none_match = request.headers.get("If-None-Match")
+    messages = await chat_repository.get_messages(
+        uuids, user_entity, with_content=if_none_match is None
+    )
+    if messages is None:
+        raise HTTPException(status_code=400, detail="Invalid message uuid")
+    etag = make_etag(["messages", sorted([m["uuid"], m["parent_uuid"]] for m in messages)])
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, REVALIDATE_CACHE_CONTROL)
+    if if_none_match is not None:
+        messages = await chat_repository.get_messages([m["uuid"] for m in messages], user_entity)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+    return [MessageResourceResponse(**m) for m in messages]
+
+
+@message_router.get("/search", response_model=list[MessageSearchHitResponse])
+async def search_messages(
+    q: str = Query(..., min_length=1, max_length=MAX_SEARCH_QUERY_LENGTH),
+    role: Role | None = None,
+    model: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=MAX_SEARCH_RESULTS),
+    offset: int = Query(0, ge=0),
+    current_user: UserModel = Depends(get_current_user),
+    chat_repository: ChatRepositoryImpl = Depends(get_chat_repository),
+):
+    """
+    自分のチャットのメッセージを全文検索（GET /api/v1/messages/search?q=...）
+
+    空白で区切った語を全て含むメッセージを関連度の高い順に返す。
+    role・model（アシスタントのモデル名）・since/until（作成日時）で絞り込める。
+    結果にはメッセージのあるチャットと、場所が分かるように数件の祖先を含める
+    （そこから GET /chats/{chat_uuid}/subtree などで枝を開く）。
+    """
+    user_entity = UserEntity(
+        uuid=str(current_user.uuid),
+        username=current_user.username,
+        email=current_user.email,
+    )
+
+    hits = await chat_repository.search_messages(
+        user_entity,
+        q,
+        role=role.value if role is not None else None,
+        model_name=model,
+        since=since,
+        until=until,
+        limit=limit,
+        offset=offset,
+    )
+    return [MessageSearchHitResponse(**hit) for hit in hits]
+
+
+@message_router.get("/related", response_model=list[RelatedMessageResponse])
+async def get_related_messages(
+    q: str | None = Query(None, min_length=1, max_length=MAX_RELATED_QUERY_LENGTH),
+    message: UUID | None = None,
+    limit: int = Query(RELATED_PAGE_SIZE, ge=1, le=MAX_SEARCH_RESULTS),
+    current_user: UserModel = Depends(get_current_user),
+    chat_repository: ChatRepositoryImpl = Depends(get_chat_repository),
+    semantic_index: SemanticIndexImpl | None = Depends(get_semantic_index),
+):
+    """
+    意味の近いメッセージを探す（GET /api/v1/messages/related?q=... または ?message=...）
+
+    q の文、または message のメッセージの本文に近いメッセージを、自分の全てのチャットから
+    類似度の高い順に返す（言い換えでキーワードが一致しない関連する枝を見つけるため）。
+    message を指定した場合、そのメッセージ自身は結果に含めない。
+
+    Raises:
+        HTTPException: q と message のどちらか一方だけを指定していない（400）、
+            message が見つからない（404）、または意味検索が無効な場合（503）
+    """
+    if (q is None) == (message is None):
+        raise HTTPException(status_code=400, detail="Specify either q or message")
+    if semantic_index is None:
+        raise HTTPException(status_code=503, detail="Semantic search is not available")
+    user_entity = UserEntity(
+        uuid=str(current_user.uuid),
+        username=current_user.username,
+        email=current_user.email,
+    )
+
+    exclude = set()
+    if message is not None:
+        source = await chat_repository.get_messages([str(message)], user_entity)
+        if not source:
+            raise HTTPException(status_code=404, detail="Message not found")
+        source = source[0]
+        q = source["content"]
+        if source["content_external"]:
+            content = await chat_repository.open_message_content(
+                source["chat_uuid"], source["uuid"], user_entity
+            )
+            q = str(content, "utf-8") if content is not None else ""
+        exclude.add(source["uuid"])
+
+    hits = await semantic_index.search(user_entity.uuid, q, (limit + len(exclude)) * RELATED_OVERFETCH)
+    scores: dict[str, float] = {}
+    for message_uuid, _, score in hits:
+        if message_uuid not in exclude:
+            scores.setdefault(message_uuid, score)
+    if not scores:
+        return []
+    # インデックスには削除済みのメッセージも残っているので、DBにあるものだけを返す
+    messages = await chat_repository.get_messages(list(scores), user_entity)
+    messages.sort(key=lambda m: scores[m["uuid"]], reverse=True)
+    return [RelatedMessageResponse(**m, score=scores[m["uuid"]]) for m in messages[:limit]]
+
+
+
+@message_router.get("/{message_uuid}", response_model=MessageResourceResponse)
+async def get_message(
+    message_uuid: UUID,
+    request: Request,
+    response: Response,
+    current_user: UserModel = Depends(get_current_user),
+    chat_repository: ChatRepositoryImpl = Depends(get_chat_repository),
+):
+    """
+    メッセージを1件取得
+
+    本文は書き込み後に変わらないが、親は木の修復で付け替わることがあるので、
+    ETagを親のUUIDを含めて作り、毎回再検証させる。
+    If-None-Match が一致した場合は、本文を読まずに 304 を返す。
+
+    Raises:
+        HTTPException: メッセージが存在しない、またはアクセス権限がない場合
+    """
+    user_entity = UserEntity(
+        uuid=str(current_user.uuid),
+        username=current_user.username,
+        email=current_user.email,
+    )
+
+    # 再検証のときは、まず本文を読まずにETagだけを計算する
+    if_none_match = request.headers.get("If-None-Match")
+    messages = await chat_repository.get_messages(
+        [str(message_uuid)], user_entity, with_content=if_none_match is None
+    )
+    if not messages:
+        raise HTTPException(status_code=404, detail="Message not found")
+    etag = _message_etag(messages[0])
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, REVALIDATE_CACHE_CONTROL)
+    if if_none_match is not None:
+        messages = await chat_repository.get_messages([str(message_uuid)], user_entity)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+    return MessageResourceResponse(**messages[0])
+
@@ -0,0 +1,62 @@
+"""
+チャット木の変更ログ（chat_events）のイベントと、同じプロセス内での新着通知
+
+イベントの種類と payload:
+
+    message_added    スナップショットの1件と同じキー（tree_snapshot.SNAPSHOT_KEYS）。
+                     一括インポートではアシスタント詳細を assistant_detail として含む
+    detail_attached  {"message_uuid": ..., "detail": アシスタント詳細の列}
+    chat_forked      {"source_chat_uuid": ..., "fork_message_uuid": ..., "path": 引き継いだ祖先のUUID}
+                     （フォークの最初のイベント。祖先の内容は GET /chats/{uuid} で取得する）
+    subtree_deleted  {"message_uuid": 削除した部分木の根, "count": 削除したメッセージ数}
+                     （根の子孫も全て削除されている）
+    tree_repaired    {"recovery": 追加した復旧用のノード（message_added と同じキー）,
+                      "reparented": 復旧用のノードの下に付け替えたメッセージのUUID}
+
+本文はblobのハッシュ（blob_id）で参照するので、購読側は本文を
+POST /chats/{uuid}/messages/contents でまとめて取得する。
+アーカイブから戻したチャットは同じメッセージを新しい seq で記録し直すため、
+購読側はメッセージのUUIDで重複を除いて適用する。
+
+新着の通知はこのプロセス内だけで届く。他のプロセス（別のワーカー）で書き込まれた
+イベントは購読側のポーリング（wait_chat_event のタイムアウト）で拾う。
+"""
+import asyncio
+from uuid import UUID
+
+MESSAGE_ADDED = "message_added"
+DETAIL_ATTACHED = "detail_attached"
+CHAT_FORKED = "chat_forked"
+SUBTREE_DELETED = "subtree_deleted"
+TREE_REPAIRED = "tree_repaired"
+
+# チャットUUID -> そのチャットの新着を待っている購読者
+_waiters: dict[str, set[asyncio.Event]] = {}
+
+
+def notify_chat_event(chat_uuid: str | UUID) -> None:
+    """チャットにイベントが記録されたことを待っている購読者に知らせる（コミット後に呼ぶ）"""
+    for waiter in _waiters.get(str(chat_uuid), ()):
+        waiter.set()
+
+
+async def wait_chat_event(chat_uuid: str | UUID, timeout: float) -> bool:
+    """
+    チャットの新着通知を最大 timeout 秒待つ
+
+    Returns:
+        通知が届いた場合はTrue（タイムアウトした場合はFalse）
+    """
+    key = str(chat_uuid)
+    waiter = asyncio.Event()
+    _waiters.setdefault(key, set()).add(waiter)
+    try:
+        await asyncio.wait_for(waiter.wait(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        waiters = _waiters[key]
+        waiters.discard(waiter)
+        if not waiters:
+            del _waiters[key]
@@ -1,23 +1,265 @@
-from uuid import UUID
+from collections.abc import AsyncIterator, Callable
+from datetime import datetime, timezone as dt_timezone
+from uuid import UUID, uuid4
+
+from pypika_tortoise.context import SqlContext
+from pypika_tortoise.terms import Term, ValueWrapper
+from tortoise import connections, timezone
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.exceptions import IntegrityError
+from tortoise.expressions import F, Q, Subquery
+from tortoise.functions import Count, Sum
+from tortoise.transactions import in_transaction
 
 from src.application.ports.output.chat_repository import ChatRepositoryProtcol
-from src.domain.entities.message_entity import MessageEntity
-from src.domain.entities.chat_tree_entity import ChatTreeEntity
+from src.domain.entities.message_entity import MessageEntity, Role
+from src.domain.entities.chat_tree_entity import ChatTreeEntity, MessageNode
 from src.domain.entities.user_entity import UserEntity
-from src.infrastructure.db.models import MessageModel, AssistantMessageDetail, ChatTreeDetail
+from src.infrastructure.db.config import SHARD_CONNECTIONS, WRITE_CONNECTION
+from src.infrastructure.db.content_codec import decompress_content
+from src.infrastructure.db.sharding import shard_for
+from src.infrastructure.db.models import (
+    MessageModel, AssistantMessageDetail, ChatArchive, ChatEvent, ChatFork, ChatTreeDetail, ChatTreeSnapshot,
+    MessageBlob,
+)
+from src.infrastructure.db.raw_sql import insert_rows, placeholder, placeholders
+from src.infrastructure.db.search_index import (
+    MIN_TOKEN_LENGTH, SEARCH_KEY_TABLE, ensure_search_index, fts_match_query, is_postgres,
+)
+from src.infrastructure.db.vacuum import schedule_space_reclamation
+from src.infrastructure.storage.segment_store import get_segment_store
+from src.interface_adapters.gateways.chat_events import (
+    CHAT_FORKED, DETAIL_ATTACHED, MESSAGE_ADDED, SUBTREE_DELETED, TREE_REPAIRED, notify_chat_event,
+    wait_chat_event,
+)
+from src.interface_adapters.gateways.message_blobs import (
+    acquire_blob, acquire_blobs, collect_message_blobs, release_blobs, release_collected_blobs,
+    resolve_blob_texts, resolve_blobs,
+)
+from src.interface_adapters.gateways.ndjson import decode_ndjson, encode_ndjson
+from src.interface_adapters.gateways.tree_integrity import (
+    RECOVERY_CONTENT, TreeCycleError, TreeIssues, find_tree_issues, plan_repair,
+)
+from src.interface_adapters.gateways.tree_snapshot import decode_snapshot, encode_snapshot
+from src.interface_adapters.gateways.pagination import encode_cursor, decode_cursor
+
+
+# チャット一覧に表示する最終メッセージのプレビュー文字数
+PREVIEW_LENGTH = 100
+# エクスポートで1回に読み込む行数
+EXPORT_BATCH_SIZE = 500
+# 一括インポートで1トランザクションに書き込むメッセージ数
+BULK_CHUNK_SIZE = 2000
+# 書き込みでスナップショットより版数がこの件数以上進んだらスナップショットを書き直す
+SNAPSHOT_COMPACT_TAIL = 64
+# スナップショットが参照するblobを1回に読む件数
+SNAPSHOT_BLOB_BATCH = 500
+# 変更ログを1回に読むイベント数
+EVENT_PAGE_SIZE = 500
+# 購読中に新着の通知が来なくても変更ログを読み直す間隔（秒、他のプロセスでの書き込み用）
+EVENT_POLL_INTERVAL = 2.0
+# 全文検索で1回に返す件数
+SEARCH_PAGE_SIZE = 20
+# 全文検索の結果に含める本文の該当箇所の文字数
+SEARCH_SNIPPET_LENGTH = 120
+# 全文検索の結果に含める祖先の数（場所が分かるように親の方向へ辿る）
+SEARCH_CONTEXT_DEPTH = 3
+# 整合性の検査・修復で1文に渡すUUIDの数
+INTEGRITY_BATCH_SIZE = 500
+# 枝の比較で本文を読むメッセージを1文に渡す数
+BRANCH_BATCH_SIZE = 500
+# 部分木の削除で子孫のUUIDを集める一時テーブル
+_SUBTREE_TABLE = "pruned_messages"
+# エクスポートするアシスタント詳細の列
+_DETAIL_EXPORT_FIELDS = (
+    "provider", "model_name", "prompt_tokens", "completion_tokens", "total_tokens", "temperature",
+    "max_tokens", "finish_reason", "gen_id", "object_", "created_timestamp",
+)
+
+
+def _make_preview(content: str) -> str:
+    """一覧表示用に改行を潰して先頭だけを切り出す"""
+    return " ".join(content.split())[:PREVIEW_LENGTH]
+
+
+def _make_snippet(content: str, terms: list[str]) -> str:
+    """検索結果に表示する、最初に見つかった語の前後（改行は潰す）"""
+    text = " ".join(content.split())
+    lowered = text.lower()
+    positions = [p for p in (lowered.find(term.lower()) for term in terms) if p >= 0]
+    start = max(0, min(positions, default=0) - SEARCH_SNIPPET_LENGTH // 3)
+    snippet = text[start:start + SEARCH_SNIPPET_LENGTH]
+    return ("…" if start > 0 else "") + snippet + ("…" if start + SEARCH_SNIPPET_LENGTH < len(text) else "")
+
+
+def _message_added_payload(row: dict) -> dict:
+    """挿入したメッセージの行（フィールド名 -> 値、本文はblob）を message_added の payload にする"""
+    return {
+        "uuid": str(row["uuid"]),
+        "parent_uuid": str(row["parent_id"]) if row["parent_id"] else None,
+        "role": Role(row["role"]).value,
+        "blob_id": row["blob_id"],
+        "content": None,
+        "user_context_id": str(row["user_context_id"]) if row["user_context_id"] else None,
+        "created_at": row["created_at"].isoformat(),
+        "updated_at": row["updated_at"].isoformat(),
+    }
+
+
+def _write_connection(owner_uuid: str | UUID) -> str:
+    """所有者の行を書き込むコネクション名（シャーディングしない場合はdefault）"""
+    return shard_for(owner_uuid) or WRITE_CONNECTION
+
+
+def _read_db(owner_uuid: str | UUID) -> BaseDBAsyncClient | None:
+    """所有者の行を読むコネクション（Noneならルーターに任せる）"""
+    shard = shard_for(owner_uuid)
+    return connections.get(shard) if shard else None
+
+
+async def _inline_lengths(db: BaseDBAsyncClient | None, message_uuids: list) -> dict[str, int]:
+    """blob導入前に保存されたメッセージの本文の文字数（blobがあれば length 列で足りる）"""
+    if not message_uuids:
+        return {}
+    messages = await MessageModel.filter(uuid__in=message_uuids).using_db(db).only(
+        "uuid", "content", "content_compressed"
+    )
+    return {str(msg.uuid): len(msg.text) for msg in messages}
+
+
+async def _chat_scope(chat_uuid: UUID, db: BaseDBAsyncClient | None) -> tuple[Q, list[UUID]] | None:
+    """
+    チャットのメッセージの範囲と、フォークで引き継いだ祖先（ルートから分岐点まで）
+
+    通常のチャットは chat_tree_id だけで絞り込み、フォークは引き継いだ祖先の行も含める。
+    チャットが見つからない場合はNone。
+    """
+    chat = await ChatTreeDetail.filter(uuid=chat_uuid).using_db(db).first().values("forked_from")
+    if chat is None:
+        return None
+    if chat["forked_from"] is None:
+        return Q(chat_tree_id=chat_uuid), []
+    fork = await ChatFork.filter(chat_tree_id=chat_uuid).using_db(db).first().values("fork_message", "path")
+    if fork is None:
+        return Q(chat_tree_id=chat_uuid), []
+    path = [UUID(u) for u in fork["path"]]
+    return Q(chat_tree_id=chat_uuid) | Q(uuid__in=_AncestorUUIDs(fork["fork_message"])), path
+
+
+# メッセージから親の方向へ主キーで1行ずつ辿る再帰CTE（{start} は起点のUUIDのパラメーター）。
+# 読む行数は深さだけで、チャットの大きさによらない。フォークの行からは、引き継いだ祖先
+# （元のチャットの行）へそのまま辿る。壊れたデータで親が循環していても終わるよう、UNION で
+# 一度出た行を除く（深さの列を持つと行が毎回違うので除けない。順序は呼び出し側が親から決める）。
+_ANCESTORS_CTE = """
+    WITH RECURSIVE "ancestors"("uuid", "parent_id") AS (
+        SELECT "uuid", "parent_id" FROM "messages" WHERE "uuid" = {start}
+        UNION
+        SELECT m."uuid", m."parent_id" FROM "messages" m JOIN "ancestors" a ON m."uuid" = a."parent_id"
+    )
+"""
+
+
+class _AncestorUUIDs(Term):
+    """
+    メッセージとその祖先のUUIDを返す副問い合わせ（filter の __in に渡す）
+
+    フォークの範囲をUUIDの一覧で絞り込むと、深い会話ではバインド変数の上限
+    （SQLiteの SQLITE_MAX_VARIABLE_NUMBER）を超えるため、分岐点だけを渡して祖先はDBで辿る。
+    """
+
+    def __init__(self, message_uuid: UUID) -> None:
+        super().__init__()
+        self.start = ValueWrapper(MessageModel._meta.fields_map["uuid"].to_db_value(message_uuid, MessageModel))
+
+    def get_sql(self, ctx: SqlContext) -> str:
+        return f'({_ANCESTORS_CTE.format(start=self.start.get_sql(ctx))} SELECT "uuid" FROM "ancestors")'
+
+
+async def _message_path(db: BaseDBAsyncClient, message_uuid: UUID) -> list[UUID]:
+    """
+    ルートからメッセージまでのUUID（ルート側から順）
+
+    Raises:
+        TreeCycleError: 親を辿るとメッセージの祖先に戻る（親が循環している）場合
+    """
+    uuid_field = MessageModel._meta.fields_map["uuid"]
+    _, rows = await db.execute_query(
+        _ANCESTORS_CTE.format(start=placeholder(db, 1)) + 'SELECT "uuid", "parent_id" FROM "ancestors"',
+        [uuid_field.to_db_value(message_uuid, MessageModel)],
+    )
+    parents = {
+        uuid_field.to_python_value(row[0]): uuid_field.to_python_value(row[1]) if row[1] is not None else None
+        for row in rows
+    }
+    path, seen, current = [], set(), message_uuid
+    while current in parents:
+        if current in seen:
+            raise TreeCycleError(f"Parent cycle above message {message_uuid}")
+        seen.add(current)
+        path.append(current)
+        current = parents[current]
+    return path[::-1]
+
+
+async def _collect_subtree(conn: BaseDBAsyncClient, chat_uuid: UUID, message_uuid: UUID) -> None:
+    """
+    メッセージとチャット内の子孫のUUIDを一時テーブル（_SUBTREE_TABLE）に集める
+
+    子は (parent_id, created_at) のインデックスで辿る。親が循環していても終わるよう、UNION で
+    一度集めた行を除く。一時テーブルはコネクションごとなので、同時に別のチャットで削除しても衝突しない。
+    """
+    await conn.execute_query(f'DROP TABLE IF EXISTS "{_SUBTREE_TABLE}"')
+    # CREATE TABLE AS にはパラメーターを渡せないDBがあるため、空で作ってから挿入する
+    await conn.execute_query(
+        f'CREATE TEMPORARY TABLE "{_SUBTREE_TABLE}" AS SELECT "uuid" FROM "messages" WHERE 1 = 0'
+    )
+    chat_value = ChatTreeDetail._meta.fields_map["uuid"].to_db_value(chat_uuid, ChatTreeDetail)
+    await conn.execute_query(
+        f"""
+        WITH RECURSIVE "subtree"("uuid") AS (
+            SELECT "uuid" FROM "messages"
+            WHERE "uuid" = {placeholder(conn, 1)} AND "chat_tree_id" = {placeholder(conn, 2)}
+            UNION
+            SELECT m."uuid" FROM "messages" m JOIN "subtree" s ON m."parent_id" = s."uuid"
+            WHERE m."chat_tree_id" = {placeholder(conn, 3)}
+        )
+        INSERT INTO "{_SUBTREE_TABLE}" ("uuid") SELECT "uuid" FROM "subtree"
+        """,
+        [MessageModel._meta.fields_map["uuid"].to_db_value(message_uuid, MessageModel), chat_value, chat_value],
+    )
+
+
+def _all_read_dbs() -> list[BaseDBAsyncClient | None]:
+    """全所有者を横断して読むときのコネクション一覧"""
+    if not SHARD_CONNECTIONS:
+        return [None]
+    return [connections.get(name) for name in SHARD_CONNECTIONS]
 
 
 class ChatRepositoryImpl(ChatRepositoryProtcol):
+    """
+    チャットのリポジトリ
+
+    シャーディングが有効な場合、チャット関連の行は所有者UUIDで選んだ
+    シャードにだけ置かれるため、全ての読み書きで所有者からコネクションを決める。
+    """
+
     def __init__(self) -> None:
         super().__init__()
 
-    async def ensure_chat_tree_detail(self, chat_tree: ChatTreeEntity) -> ChatTreeDetail:
+    async def ensure_chat_tree_detail(
+            self,
+            chat_tree: ChatTreeEntity,
+            using_db: BaseDBAsyncClient | None = None,
+            ) -> ChatTreeDetail:
         """
         ChatTreeEntityに対応するChatTreeDetailがなければ作成する（owner_uuid含む）
         """
 
         chat_tree_detail, created = await ChatTreeDetail.get_or_create(
-            uuid=chat_tree.uuid, defaults={"owner_uuid": UUID(chat_tree.owner_uuid)}
+            uuid=chat_tree.uuid,
+            defaults={"owner_uuid": UUID(chat_tree.owner_uuid)},
+            using_db=using_db,
         )
         return chat_tree_detail
 
@@ -30,10 +272,11 @@ class ChatRepositoryImpl(ChatRepositoryProtcol):
             ) -> None:
         """
         Messageをデータベースに保存
-        """
-        chat_tree_detail = await self.ensure_chat_tree_detail(chat_tree)
 
-        parent_message_model = None
+        本文はハッシュで重複排除したblobに保存し、メッセージはそれを参照する。
+        ChatTreeDetailのサマリー列も同じトランザクション内で更新する。
+        """
+        parent_uuid = None
         if chat_tree.root_node is not None:
             try:
                 # message_entity自身をツリーから検索
@@ -41,85 +284,1616 @@ class ChatRepositoryImpl(ChatRepositoryProtcol):
 
                 # その親ノードを取得（重要：.parentでアクセス）
                 if message_node.parent is not None:
-                    parent_uuid = message_node.parent.message.uuid
-                    parent_message_model = await MessageModel.get(uuid=parent_uuid)
-                # message_node.parentがNoneの場合は、parent_message_modelはNoneのまま（ルートノード）
+                    parent_uuid = UUID(str(message_node.parent.message.uuid))
+                # message_node.parentがNoneの場合は、parent_uuidはNoneのまま（ルートノード）
             except ValueError:
                 # message_entityがツリーに見つからない場合
-                parent_message_model = None
-
-        await MessageModel.create(
-            uuid=message_entity.uuid,
-            role=message_entity.role,
-            content=message_entity.content,
-            parent=parent_message_model,
-            chat_tree=chat_tree_detail,
-            user_context_id=current_user.uuid
-        )
+                parent_uuid = None
+
+        async with in_transaction(_write_connection(chat_tree.owner_uuid)) as conn:
+            chat_tree_detail = await self.ensure_chat_tree_detail(chat_tree, using_db=conn)
+
+            # 葉の数：ルートの追加か、既に子を持つ親への追加（分岐）で1つ増える
+            # 子は同じチャットの中だけで数える（フォークで追加された子は数えない）
+            adds_branch = True
+            if parent_uuid is not None:
+                adds_branch = await MessageModel.filter(
+                    parent_id=parent_uuid, chat_tree_id=chat_tree_detail.uuid
+                ).using_db(conn).exists()
+                if not adds_branch and chat_tree_detail.forked_from is not None:
+                    # 引き継いだ祖先は、分岐点以外なら次の祖先を子に持つ
+                    _, path = await _chat_scope(chat_tree_detail.uuid, conn)
+                    adds_branch = parent_uuid in path[:-1]
+
+            # 先に版数を進めて行をロックし、同じチャットへの同時書き込みでもseqが重ならないようにする
+            await ChatTreeDetail.filter(uuid=chat_tree_detail.uuid).using_db(conn).update(
+                version=F("version") + 1
+            )
+            version = await ChatTreeDetail.filter(uuid=chat_tree_detail.uuid).using_db(
+                conn
+            ).first().values_list("version", flat=True)
+
+            blob_hash = await acquire_blob(conn, message_entity.content)
+            message_model = await MessageModel.create(
+                uuid=message_entity.uuid,
+                role=message_entity.role,
+                content="",
+                blob_id=blob_hash,
+                parent_id=parent_uuid,
+                chat_tree=chat_tree_detail,
+                user_context_id=current_user.uuid,
+                seq=version,
+                using_db=conn,
+            )
+            await ChatEvent.create(
+                chat_tree_id=chat_tree_detail.uuid,
+                seq=version,
+                type=MESSAGE_ADDED,
+                payload=_message_added_payload({
+                    "uuid": message_model.uuid,
+                    "parent_id": parent_uuid,
+                    "role": message_entity.role,
+                    "blob_id": blob_hash,
+                    "user_context_id": current_user.uuid,
+                    "created_at": message_model.created_at,
+                    "updated_at": message_model.updated_at,
+                }),
+                using_db=conn,
+            )
+
+            await ChatTreeDetail.filter(uuid=chat_tree_detail.uuid).using_db(conn).update(
+                message_count=F("message_count") + 1,
+                branch_count=F("branch_count") + int(adds_branch),
+                last_message_at=message_model.created_at,
+                last_message_preview=_make_preview(message_entity.content),
+                updated=timezone.now(),
+            )
+        await self._compact_snapshot(chat_tree_detail.uuid, chat_tree.owner_uuid, version)
+        notify_chat_event(chat_tree.uuid)
     
+    async def bulk_create_messages(
+            self,
+            chat_tree: ChatTreeEntity,
+            nodes: list[MessageNode],
+            current_user: UserEntity,
+            *,
+            metadata: dict[str, dict] | None = None,
+            created: datetime | None = None,
+            updated: datetime | None = None,
+            chunk_size: int = BULK_CHUNK_SIZE,
+            on_progress: Callable[[int], None] | None = None,
+            ) -> None:
+        """
+        ChatTreeEntity.bulk_add_messages で追加したノードをまとめて保存する
+
+        chunk_size 件ごとに1トランザクションで、blobの作成・メッセージの挿入・
+        アシスタント詳細の挿入をそれぞれ1文（execute_many）で行う。
+        ノードは親が子より先に来る順序なので、チャンクの境界で外部キーが欠けることはない。
+        変更ログ（chat_events）にもメッセージごとの message_added を同じトランザクションで記録する。
+        seq に使う版数は最初のトランザクションで nodes の件数分まとめて進めて確保するので、
+        同時に save_message で書き込まれてもseqが重ならず、途中のチャンクが失敗しても
+        版数より大きいseqは残らない（確保した残りの版数は欠番になる）。最後にサマリー列をまとめて更新する。
+
+        Args:
+            chat_tree: 保存先のチャット（なければ作成する）
+            nodes: 保存するノード（bulk_add_messages の戻り値）
+            current_user: 書き込むユーザー（metadata に user_context_id がなければその値になる）
+            metadata: メッセージUUID -> created_at / updated_at / user_context_id / assistant_detail（元データの値を保つ）
+            created: チャットの作成日時（省略時は現在時刻）
+            updated: チャットの更新日時（省略時は現在時刻）
+            chunk_size: 1トランザクションのメッセージ数
+            on_progress: チャンクを保存するたびに、保存済みのメッセージ数で呼ばれる
+        """
+        metadata = metadata or {}
+        connection_name = _write_connection(chat_tree.owner_uuid)
+        async with in_transaction(connection_name) as conn:
+            chat_tree_detail = await self.ensure_chat_tree_detail(chat_tree, using_db=conn)
+            # 版数を件数分進めて行をロックし、確保した範囲 (base_version, base_version + len(nodes)] をseqに使う
+            await ChatTreeDetail.filter(uuid=chat_tree_detail.uuid).using_db(conn).update(
+                version=F("version") + len(nodes)
+            )
+            reserved_version = await ChatTreeDetail.filter(uuid=chat_tree_detail.uuid).using_db(
+                conn
+            ).first().values_list("version", flat=True)
+            base_version = reserved_version - len(nodes)
+
+        user_context_id = UUID(str(current_user.uuid))
+        saved = 0
+        for start in range(0, len(nodes), chunk_size):
+            chunk = nodes[start:start + chunk_size]
+            now = timezone.now()
+            async with in_transaction(connection_name) as conn:
+                blob_hashes = await acquire_blobs(conn, [node.message.content for node in chunk])
+                rows, details, events = [], [], []
+                for i, (node, blob_hash) in enumerate(zip(chunk, blob_hashes)):
+                    message_uuid = UUID(str(node.message.uuid))
+                    meta = metadata.get(str(node.message.uuid), {})
+                    row = {
+                        "uuid": message_uuid,
+                        "role": Role(node.message.role),
+                        "content": "",
+                        "content_compressed": None,
+                        "blob_id": blob_hash,
+                        "parent_id": UUID(str(node.parent.message.uuid)) if node.parent else None,
+                        "chat_tree_id": chat_tree.uuid,
+                        "user_context_id": UUID(meta["user_context_id"]) if meta.get("user_context_id") else user_context_id,
+                        "seq": base_version + start + i + 1,
+                        "created_at": meta.get("created_at") or now,
+                        "updated_at": meta.get("updated_at") or meta.get("created_at") or now,
+                    }
+                    rows.append(row)
+                    payload = _message_added_payload(row)
+                    if meta.get("assistant_detail"):
+                        details.append(AssistantMessageDetail(
+                            message_id=message_uuid, **meta["assistant_detail"]
+                        ))
+                        payload["assistant_detail"] = meta["assistant_detail"]
+                    events.append({
+                        "id": uuid4(),
+                        "chat_tree_id": chat_tree.uuid,
+                        "seq": row["seq"],
+                        "type": MESSAGE_ADDED,
+                        "payload": payload,
+                        "created_at": now,
+                    })
+                await insert_rows(MessageModel, conn, rows)
+                if details:
+                    await AssistantMessageDetail.bulk_create(details, using_db=conn)
+                await insert_rows(ChatEvent, conn, events)
+            saved += len(chunk)
+            if on_progress is not None:
+                on_progress(saved)
+
+        async with in_transaction(connection_name) as conn:
+            await ChatTreeDetail.filter(uuid=chat_tree.uuid).using_db(conn).update(
+                **({"created": created} if created else {}),
+                updated=updated or timezone.now(),
+            )
+        await self.refresh_chat_summary(chat_tree.uuid, chat_tree.owner_uuid)
+        await self._compact_snapshot(chat_tree.uuid, chat_tree.owner_uuid, reserved_version)
+        notify_chat_event(chat_tree.uuid)
+
     async def save_assistant_message_detail(
             self,
             related_message: MessageEntity,
             llm_details: dict,
+            chat_tree: ChatTreeEntity,
             current_user: UserEntity
             ) -> None:
         """
         アシスタントメッセージの詳細情報を保存
+
+        save_message と同じく、チャットの所有者のシャードに書き込む。
+        チャットの版数を進め、変更ログに detail_attached を記録する。
         """
-        # 関連するMessageModelを取得
-        message_model = await MessageModel.get(uuid=related_message.uuid)
-
-        # AssistantMessageDetailを作成
-        await AssistantMessageDetail.create(
-            message=message_model,
-            provider=llm_details.get("provider"),
-            model_name=llm_details.get("model"),
-            prompt_tokens=llm_details.get("usage", {}).get("prompt_tokens", 0),
-            completion_tokens=llm_details.get("usage", {}).get("completion_tokens", 0),
-            total_tokens=llm_details.get("usage", {}).get("total_tokens", 0),
-            temperature=llm_details.get("temperature"),
-            max_tokens=llm_details.get("max_tokens"),
-            finish_reason=llm_details.get("finish_reason"),
-            gen_id=llm_details.get("id"),
-            object_=llm_details.get("object"),
-            created_timestamp=llm_details.get("created")
-        )
-    
+        async with in_transaction(_write_connection(chat_tree.owner_uuid)) as conn:
+            # 関連するMessageModelを取得
+            message_model = await MessageModel.get(uuid=related_message.uuid).using_db(conn)
+
+            # AssistantMessageDetailを作成
+            detail = await AssistantMessageDetail.create(
+                message=message_model,
+                provider=llm_details.get("provider"),
+                model_name=llm_details.get("model"),
+                prompt_tokens=llm_details.get("usage", {}).get("prompt_tokens", 0),
+                completion_tokens=llm_details.get("usage", {}).get("completion_tokens", 0),
+                total_tokens=llm_details.get("usage", {}).get("total_tokens", 0),
+                temperature=llm_details.get("temperature"),
+                max_tokens=llm_details.get("max_tokens"),
+                finish_reason=llm_details.get("finish_reason"),
+                gen_id=llm_details.get("id"),
+                object_=llm_details.get("object"),
+                created_timestamp=llm_details.get("created"),
+                using_db=conn,
+            )
+
+            await ChatTreeDetail.filter(uuid=message_model.chat_tree_id).using_db(conn).update(
+                total_tokens=F("total_tokens") + detail.total_tokens,
+                version=F("version") + 1,
+            )
+            version = await ChatTreeDetail.filter(uuid=message_model.chat_tree_id).using_db(
+                conn
+            ).first().values_list("version", flat=True)
+            await ChatEvent.create(
+                chat_tree_id=message_model.chat_tree_id,
+                seq=version,
+                type=DETAIL_ATTACHED,
+                payload={
+                    "message_uuid": str(message_model.uuid),
+                    "detail": {field: getattr(detail, field) for field in _DETAIL_EXPORT_FIELDS},
+                },
+                using_db=conn,
+            )
+        notify_chat_event(message_model.chat_tree_id)
+
+    async def refresh_chat_summary(
+            self,
+            chat_uuid: str | UUID,
+            owner_uuid: str | UUID | None = None,
+            ) -> None:
+        """
+        ChatTreeDetailのサマリー列をメッセージから集計し直す
+
+        バックフィルや、サマリーと実データがずれた場合の修復に使う。
+        フォークは引き継いだ祖先も含めて集計する。
+        owner_uuidを省略すると、チャットのあるシャードを探してから集計する。
+        """
+        chat_uuid = UUID(str(chat_uuid))
+        if owner_uuid is None:
+            chat_info = await self.get_chat_tree_info(str(chat_uuid))
+            if chat_info is None:
+                return
+            owner_uuid = chat_info["owner_uuid"]
+
+        async with in_transaction(_write_connection(owner_uuid)) as conn:
+            scope = await _chat_scope(chat_uuid, conn)
+            if scope is None:
+                return
+            scope, _ = scope
+            rows = await MessageModel.filter(scope).using_db(conn).values_list("uuid", "parent_id")
+            parent_uuids = {parent_id for _, parent_id in rows if parent_id is not None}
+
+            last_message = await MessageModel.filter(scope).using_db(
+                conn
+            ).order_by("-created_at").only("content", "content_compressed", "blob_id", "created_at").first()
+            last_content = ""
+            if last_message is not None:
+                last_content = last_message.text
+                if last_message.blob_id is not None:
+                    blob = await MessageBlob.get(hash=last_message.blob_id).using_db(conn)
+                    last_content = blob.text
+
+            # messagesとJOINするとGROUP BYが全列に付くため、サブクエリで絞り込む
+            token_rows = await AssistantMessageDetail.filter(
+                message_id__in=Subquery(MessageModel.filter(scope).values("uuid"))
+            ).using_db(conn).annotate(total=Sum("total_tokens")).values("total")
+            total_tokens = token_rows[0]["total"] if token_rows and token_rows[0]["total"] else 0
+
+            await ChatTreeDetail.filter(uuid=chat_uuid).using_db(conn).update(
+                message_count=len(rows),
+                branch_count=len(rows) - len(parent_uuids),
+                total_tokens=total_tokens,
+                last_message_at=last_message.created_at if last_message else None,
+                last_message_preview=_make_preview(last_content),
+            )
+
     async def get_chat_tree_messages(
             self,
             chat_tree_id: str,
-            current_user: UserEntity
+            current_user: UserEntity,
+            *,
+            all_users: bool = False,
+            content_handles: bool = False,
+            since: int | None = None,
             ) -> list[dict] | None:
         """
         指定したチャット木IDに属する全てのメッセージを一括取得
+
+        all_usersがFalseならcurrent_userが書いたメッセージだけに絞り込む。
+        content_handlesがTrueなら、セグメントファイルに置いた大きな本文は読まずに
+        content を空にして content_external=True を返す（本文は open_message_content で読む）。
+        sinceを指定すると、チャットの版数がsinceより後に追加されたメッセージだけを返す
+        （フォークで引き継いだ祖先は版数1で追加されたものとして扱う）。
         """
+        db = _read_db(current_user.uuid)
         try:
-            # ChatTreeDetailを取得
-            chat_tree_detail = await ChatTreeDetail.get(uuid=chat_tree_id)
-        except:
+            chat_uuid = UUID(str(chat_tree_id))
+        except ValueError:
+            return None
+        scope = await _chat_scope(chat_uuid, db)
+        if scope is None:
             # チャットツリーが見つからない場合
             return None
+        scope, path = scope
 
         # そのチャット木に属する全てのメッセージを取得（ユーザーでフィルタリング）
-        messages = await MessageModel.filter(
-            chat_tree=chat_tree_detail,
-            user_context_id=current_user.uuid
-        ).prefetch_related("parent")
+        # 親はparent_idだけで足りるので、親メッセージ自体は読み込まない
+        query = MessageModel.filter(scope)
+        if not all_users:
+            query = query.filter(user_context_id=current_user.uuid)
+        if since is not None:
+            added = Q(chat_tree_id=chat_uuid, seq__gt=since)
+            if since < 1 and path:
+                added |= Q(uuid__in=_AncestorUUIDs(path[-1]))
+            query = query.filter(added)
+        messages = await query.using_db(db)
+        # 本文のblobはチャット木全体の分を1クエリで解決する
+        blobs = await resolve_blobs(query, db)
 
         # メッセージを辞書形式に変換
         result = []
         for msg in messages:
+            blob = blobs.get(msg.blob_id)
+            external = content_handles and blob is not None and blob.location is not None
+            if external:
+                content = ""
+            else:
+                content = blob.text if blob is not None else msg.text
             result.append({
                 "uuid": str(msg.uuid),
                 "role": msg.role.value,  # Enumの場合は.valueで文字列化
-                "content": msg.content,
-                "parent_uuid": str(msg.parent.uuid) if msg.parent else None,
+                "content": content,
+                "content_external": external,
+                "parent_uuid": str(msg.parent_id) if msg.parent_id else None,
                 "created_at": msg.created_at.isoformat(),
                 "updated_at": msg.updated_at.isoformat()
             })
 
         return result
 
+    async def load_chat_tree_messages(
+            self,
+            chat_tree_id: str,
+            current_user: UserEntity,
+            ) -> list[dict] | None:
+        """
+        チャット木の全メッセージをスナップショットと末尾のメッセージから取得
+
+        get_chat_tree_messages（all_users=False）と同じ形式を返す。メッセージの行は
+        スナップショットの version より後に追加された分だけを (chat_tree_id, seq) の索引で読み、
+        本文はスナップショットのblob参照からまとめて解決する。
+        末尾は変更ログ（chat_events）から再生し、ログが版数まで連続していない場合
+        （ログ導入前のメッセージや一括インポートの途中）だけメッセージの行を読む。
+        スナップショットがない場合や、アーカイブから戻して seq が振り直された場合は
+        メッセージの行から組み立てる。読むだけで、スナップショットの作成と書き直しは
+        書き込み側（_compact_snapshot）で行う。
+        """
+        db = _read_db(current_user.uuid)
+        try:
+            chat_uuid = UUID(str(chat_tree_id))
+        except ValueError:
+            return None
+        chat = await ChatTreeDetail.filter(uuid=chat_uuid).using_db(db).first().values("owner_uuid", "version")
+        if chat is None:
+            return None
+
+        entries, _ = await self._current_tree_entries(chat_uuid, chat["version"], db)
+
+        user_uuid = str(current_user.uuid)
+        entries_for_user = [entry for entry in entries if entry["user_context_id"] == user_uuid]
+        blob_hashes = list({entry["blob_id"] for entry in entries_for_user if entry["blob_id"] is not None})
+        texts = await resolve_blob_texts(blob_hashes, db, batch_size=SNAPSHOT_BLOB_BATCH)
+        if len(texts) != len(blob_hashes):
+            # 参照先のblobが消えている（スナップショットが古い）ので行から読み直す
+            return await self.get_chat_tree_messages(chat_tree_id, current_user)
+
+        return [
+            {
+                "uuid": entry["uuid"],
+                "role": entry["role"],
+                "content": texts[entry["blob_id"]] if entry["blob_id"] is not None else entry["content"],
+                "content_external": False,
+                "parent_uuid": entry["parent_uuid"],
+                "created_at": entry["created_at"],
+                "updated_at": entry["updated_at"],
+            }
+            for entry in entries_for_user
+        ]
+
+    async def _current_tree_entries(
+            self,
+            chat_uuid: UUID,
+            version: int,
+            db: BaseDBAsyncClient | None,
+            ) -> tuple[list[dict], int]:
+        """
+        版数 version 時点の全メッセージをスナップショットの1件の形式で組み立てる
+
+        スナップショットに末尾（変更ログ、連続していなければメッセージの行）を足す。
+        スナップショットがないか、末尾と重なる（seq が振り直された）場合はメッセージの行から読む。
+
+        Returns:
+            メッセージの一覧と、それが含む最大の版数
+        """
+        snapshot = await ChatTreeSnapshot.filter(chat_tree_id=chat_uuid).using_db(db).first()
+        if snapshot is not None:
+            entries = decode_snapshot(snapshot.data)
+            tail = await self._event_tail(chat_uuid, snapshot.version, version, db)
+            if tail is None:
+                tail = await self._snapshot_entries(
+                    MessageModel.filter(chat_tree_id=chat_uuid, seq__gt=snapshot.version), db
+                )
+            known = {entry["uuid"] for entry in entries}
+            if not any(entry["uuid"] in known for entry in tail):
+                return entries + tail, max([snapshot.version, *(entry["seq"] for entry in tail)])
+        entries = await self._tree_entries(chat_uuid, db)
+        return entries, max([0, *(entry["seq"] for entry in entries)])
+
+    async def _compact_snapshot(
+            self,
+            chat_uuid: UUID,
+            owner_uuid: str | UUID,
+            version: int,
+            ) -> None:
+        """
+        書き込みの後に、スナップショットがないか、版数がスナップショットより
+        SNAPSHOT_COMPACT_TAIL 以上進んでいればスナップショットを書き直す
+
+        スナップショットがあれば変更ログの末尾を足すだけで、メッセージの行は読まない。
+        """
+        db = connections.get(_write_connection(owner_uuid))
+        snapshot_version = await ChatTreeSnapshot.filter(chat_tree_id=chat_uuid).using_db(db).first().values_list(
+            "version", flat=True
+        )
+        if snapshot_version is not None and version - snapshot_version < SNAPSHOT_COMPACT_TAIL:
+            return
+        entries, entries_version = await self._current_tree_entries(chat_uuid, version, db)
+        await self._save_snapshot(chat_uuid, owner_uuid, entries, entries_version)
+
+    async def refresh_chat_tree_snapshot(
+            self,
+            chat_uuid: str | UUID,
+            owner_uuid: str | UUID,
+            ) -> int:
+        """
+        チャットのスナップショットを全メッセージから作り直す（コンパクション）
+
+        Returns:
+            スナップショットに含めたメッセージ数
+        """
+        chat_uuid = UUID(str(chat_uuid))
+        db = connections.get(_write_connection(owner_uuid))
+        entries = await self._tree_entries(chat_uuid, db)
+        version = max([0, *(entry["seq"] for entry in entries)])
+        await self._save_snapshot(chat_uuid, owner_uuid, entries, version)
+        return len(entries)
+
+    @staticmethod
+    async def _event_tail(
+            chat_uuid: UUID,
+            since: int,
+            version: int,
+            db: BaseDBAsyncClient | None,
+            ) -> list[dict] | None:
+        """
+        変更ログから版数 since より後に追加されたメッセージをスナップショットの1件の形式（と seq）で読む
+
+        イベントが since から version まで連続していない場合や、部分木の削除・木の修復を含む場合はNone。
+        """
+        events = await ChatEvent.filter(chat_tree_id=chat_uuid, seq__gt=since).using_db(db).order_by(
+            "seq"
+        ).values_list("seq", "type", "payload")
+        if len(events) != version - since:
+            return None
+        if any(event_type in (SUBTREE_DELETED, TREE_REPAIRED) for _, event_type, _ in events):
+            # 削除や付け替えの前の message_added も残っているので、現在の行から読む
+            return None
+        return [{**payload, "seq": seq} for seq, event_type, payload in events if event_type == MESSAGE_ADDED]
+
+    async def get_chat_events(
+            self,
+            chat_tree_id: str,
+            current_user: UserEntity,
+            *,
+            since: int = 0,
+            limit: int = EVENT_PAGE_SIZE,
+            ) -> list[dict]:
+        """
+        チャットの変更ログのうち、版数 since より後のイベントを seq 順に最大 limit 件取得
+
+        クライアントは GET /chats/{uuid} の version（またはスナップショットの version）を
+        since に渡し、返ったイベントを順に適用すれば最新の木に追いつける。
+        アクセス権の確認は呼び出し側で行う。
+        """
+        try:
+            chat_uuid = UUID(str(chat_tree_id))
+        except ValueError:
+            return []
+        events = await ChatEvent.filter(chat_tree_id=chat_uuid, seq__gt=since).using_db(
+            _read_db(current_user.uuid)
+        ).order_by("seq").limit(limit).values("seq", "type", "payload", "created_at")
+        return [
+            {
+                "seq": event["seq"],
+                "type": event["type"],
+                "payload": event["payload"],
+                "created_at": event["created_at"].isoformat(),
+            }
+            for event in events
+        ]
+
+    async def subscribe_chat_events(
+            self,
+            chat_tree_id: str,
+            current_user: UserEntity,
+            *,
+            since: int = 0,
+            poll_interval: float = EVENT_POLL_INTERVAL,
+            ) -> AsyncIterator[dict]:
+        """
+        チャットの変更ログを版数 since より後から順に返し、新しいイベントを待ち続ける
+
+        同じプロセスでの書き込みは通知ですぐに届き、他のプロセスでの書き込みは
+        poll_interval 秒ごとの読み直しで届く。呼び出し側が反復をやめるまで終わらない。
+        """
+        while True:
+            events = await self.get_chat_events(chat_tree_id, current_user, since=since)
+            for event in events:
+                since = event["seq"]
+                yield event
+            if len(events) < EVENT_PAGE_SIZE:
+                await wait_chat_event(chat_tree_id, poll_interval)
+
+    async def _tree_entries(self, chat_uuid: UUID, db: BaseDBAsyncClient | None) -> list[dict]:
+        """
+        チャットの全メッセージをスナップショットの1件の形式（と seq）で読む
+
+        フォークで引き継いだ祖先は先頭に置き、seq を0にする（元のチャットの seq なので、
+        フォークの版数とは比べられない）。
+        """
+        scope = await _chat_scope(chat_uuid, db)
+        entries = await self._snapshot_entries(MessageModel.filter(chat_tree_id=chat_uuid), db)
+        if scope is not None and scope[1]:
+            inherited = await self._snapshot_entries(
+                MessageModel.filter(uuid__in=_AncestorUUIDs(scope[1][-1])), db
+            )
+            for entry in inherited:
+                entry["seq"] = 0
+            entries = inherited + entries
+        return entries
+
+    @staticmethod
+    async def _snapshot_entries(query, db: BaseDBAsyncClient | None) -> list[dict]:
+        """メッセージの行をスナップショットの1件の形式（と seq）にする"""
+        messages = await query.using_db(db).order_by("seq", "created_at")
+        return [
+            {
+                "uuid": str(msg.uuid),
+                "parent_uuid": str(msg.parent_id) if msg.parent_id else None,
+                "role": msg.role.value,
+                "blob_id": msg.blob_id,
+                "content": msg.text if msg.blob_id is None else None,
+                "user_context_id": str(msg.user_context_id) if msg.user_context_id else None,
+                "created_at": msg.created_at.isoformat(),
+                "updated_at": msg.updated_at.isoformat(),
+                "seq": msg.seq,
+            }
+            for msg in messages
+        ]
+
+    @staticmethod
+    async def _save_snapshot(
+            chat_uuid: UUID,
+            owner_uuid: str | UUID,
+            entries: list[dict],
+            version: int,
+            ) -> None:
+        """スナップショットを作成・更新する（キャッシュなので同時に作られた場合は先の方を残す）"""
+        data = encode_snapshot(entries)
+        try:
+            async with in_transaction(_write_connection(owner_uuid)) as conn:
+                values = {"version": version, "message_count": len(entries), "data": data, "updated_at": timezone.now()}
+                if not await ChatTreeSnapshot.filter(chat_tree_id=chat_uuid).using_db(conn).update(**values):
+                    await ChatTreeSnapshot.create(chat_tree_id=chat_uuid, **values, using_db=conn)
+        except IntegrityError:
+            pass
+
+    async def get_chat_tree_skeleton(
+            self,
+            chat_tree_id: str,
+            current_user: UserEntity,
+            ) -> list[dict] | None:
+        """
+        チャット木の構造だけ（本文を除いたノード一覧）を取得
+
+        各ノードは uuid / parent_uuid / role / length（本文の文字数）/ created_at を持つ。
+        本文は読まないので、blobの文字数はJOINで取得する。
+        チャット木が見つからない場合はNone。
+        """
+        db = _read_db(current_user.uuid)
+        try:
+            chat_uuid = UUID(str(chat_tree_id))
+        except ValueError:
+            return None
+        scope = await _chat_scope(chat_uuid, db)
+        if scope is None:
+            return None
+
+        rows = await MessageModel.filter(scope[0]).using_db(db).order_by(
+            "created_at", "uuid"
+        ).values("uuid", "parent_id", "role", "created_at", "blob_id", "blob__length")
+
+        inline_lengths = await _inline_lengths(
+            db, [row["uuid"] for row in rows if row["blob_id"] is None]
+        )
+
+        return [
+            {
+                "uuid": str(row["uuid"]),
+                "parent_uuid": str(row["parent_id"]) if row["parent_id"] else None,
+                "role": Role(row["role"]).value,
+                "length": row["blob__length"] if row["blob_id"] is not None else inline_lengths[str(row["uuid"])],
+                "created_at": row["created_at"].isoformat(),
+            }
+            for row in rows
+        ]
+
+    async def get_chat_subtree(
+            self,
+            chat_tree_id: str,
+            current_user: UserEntity,
+            *,
+            root_uuid: str | None = None,
+            depth: int,
+            breadth: int,
+            cursor: str | None = None,
+            ) -> dict | None:
+        """
+        チャット木の一部（ノードの近傍）だけを構造のみで取得
+
+        起点のノード群から depth 段下までを、各ノードの子は breadth 件までに絞って返す。
+        起点は root_uuid のメッセージ（省略時はチャットのルート）か、cursor で指定した
+        「途中で打ち切った兄弟の続き」。子の取得は段ごとに1クエリで、親ごとの件数制限は
+        ウィンドウ関数で行うため、木全体は読み込まない。
+
+        Returns:
+            nodes: 取得したノード（get_chat_tree_skeleton の各項目 + child_count）
+            more: 子を打ち切った親と、続きを取得するためのカーソル
+            チャット木や root_uuid のメッセージが見つからない場合はNone
+
+        Raises:
+            ValueError: カーソルが不正な場合
+        """
+        db = _read_db(current_user.uuid)
+        try:
+            chat_uuid = UUID(str(chat_tree_id))
+        except ValueError:
+            return None
+        scope = await _chat_scope(chat_uuid, db)
+        if scope is None:
+            return None
+        scope, path = scope
+        # フォークで引き継いだ祖先の子は、フォークの行と次の祖先（分岐点の子はフォークの行だけ）
+        inherited_child = {str(parent): child for parent, child in zip(path, path[1:])}
+
+        columns = ("uuid", "parent_id", "role", "created_at", "blob_id", "blob__length")
+        query = MessageModel.filter(scope).using_db(db)
+        more = []
+        if cursor is not None:
+            parent_uuid, created_at, last_uuid = decode_cursor(cursor, 3)
+            try:
+                created_at = datetime.fromisoformat(created_at)
+                UUID(last_uuid)
+                parent_filter = {"parent_id": UUID(parent_uuid)} if parent_uuid else {"parent_id__isnull": True}
+            except ValueError as e:
+                raise ValueError(f"Invalid cursor: {cursor}") from e
+            top = await query.filter(**parent_filter).filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, uuid__gt=last_uuid)
+            ).order_by("created_at", "uuid").limit(breadth + 1).values(*columns)
+        elif root_uuid is not None:
+            try:
+                top = await query.filter(uuid=UUID(str(root_uuid))).values(*columns)
+            except ValueError:
+                return None
+            if not top:
+                return None
+        else:
+            parent_uuid = ""
+            top = await query.filter(parent_id__isnull=True).order_by(
+                "created_at", "uuid"
+            ).limit(breadth + 1).values(*columns)
+
+        # 起点が兄弟の一覧（ルート群かカーソルの続き）なら、breadth件を超えた分は次のカーソルにする
+        if root_uuid is None or cursor is not None:
+            if len(top) > breadth:
+                top = top[:breadth]
+                last = top[-1]
+                more.append({
+                    "parent_uuid": parent_uuid or None,
+                    "cursor": encode_cursor(parent_uuid, last["created_at"].isoformat(), str(last["uuid"])),
+                })
+
+        nodes = [
+            {
+                "uuid": str(row["uuid"]),
+                "parent_uuid": str(row["parent_id"]) if row["parent_id"] else None,
+                "role": Role(row["role"]).value,
+                "length": row["blob__length"],
+                "created_at": row["created_at"],
+                "child_count": 0,
+            }
+            for row in top
+        ]
+        by_uuid = {node["uuid"]: node for node in nodes}
+        frontier = list(by_uuid)
+        for _ in range(depth):
+            if not frontier:
+                break
+            children = await self._children_window(
+                db or MessageModel._choose_db(),
+                chat_uuid,
+                frontier,
+                breadth,
+                [inherited_child[u] for u in frontier if u in inherited_child],
+            )
+            frontier = []
+            shown: dict[str, list[dict]] = {}
+            for child in children:
+                parent = by_uuid[child["parent_uuid"]]
+                parent["child_count"] = child.pop("siblings")
+                shown.setdefault(child["parent_uuid"], []).append(child)
+                by_uuid[child["uuid"]] = child
+                nodes.append(child)
+                frontier.append(child["uuid"])
+            for parent_uuid, siblings in shown.items():
+                if by_uuid[parent_uuid]["child_count"] > len(siblings):
+                    last = siblings[-1]
+                    more.append({
+                        "parent_uuid": parent_uuid,
+                        "cursor": encode_cursor(parent_uuid, last["created_at"].isoformat(), last["uuid"]),
+                    })
+
+        # 最下段のノードは子を読まないので、子の数だけを数える
+        if frontier:
+            inherited = [inherited_child[u] for u in frontier if u in inherited_child]
+            in_chat = Q(chat_tree_id=chat_uuid) | Q(uuid__in=inherited) if inherited else Q(chat_tree_id=chat_uuid)
+            rows = await MessageModel.filter(in_chat, parent_id__in=frontier).using_db(db).annotate(
+                children=Count("uuid")
+            ).group_by("parent_id").values_list("parent_id", "children")
+            for parent_id, count in rows:
+                by_uuid[str(parent_id)]["child_count"] = count
+
+        inline_lengths = await _inline_lengths(db, [n["uuid"] for n in nodes if n["length"] is None])
+        for node in nodes:
+            if node["length"] is None:
+                node["length"] = inline_lengths[node["uuid"]]
+            node["created_at"] = node["created_at"].isoformat()
+        return {"nodes": nodes, "more": more}
+
+    @staticmethod
+    async def _children_window(
+            db: BaseDBAsyncClient,
+            chat_uuid: UUID,
+            parent_uuids: list[str],
+            limit: int,
+            inherited: list[UUID] | None = None,
+            ) -> list[dict]:
+        """
+        複数の親の子を、親ごとに作成順で limit 件まで1クエリで取得する
+
+        ORMではパーティションごとの件数制限を書けないため、ROW_NUMBER() を使った生SQLにする。
+        (parent_id, created_at) のインデックスで親ごとに並んだ子だけを読む。
+        siblings にはその親の子の総数が入る。
+        inherited にはフォークが引き継いだ祖先のうち、子として含めるものを渡す。
+        """
+        fields_map = MessageModel._meta.fields_map
+        inherited = inherited or []
+        values = [
+            ChatTreeDetail._meta.fields_map["uuid"].to_db_value(chat_uuid, ChatTreeDetail),
+            *(fields_map["uuid"].to_db_value(u, MessageModel) for u in inherited),
+            *(fields_map["uuid"].to_db_value(UUID(u), MessageModel) for u in parent_uuids),
+            limit,
+        ]
+        in_chat = f'm."chat_tree_id" = {placeholder(db, 1)}'
+        if inherited:
+            in_chat = f'({in_chat} OR m."uuid" IN ({placeholders(db, len(inherited), start=2)}))'
+        parents_start = 2 + len(inherited)
+        sql = f"""
+            SELECT "uuid", "parent_id", "role", "created_at", "length", "siblings" FROM (
+                SELECT m."uuid", m."parent_id", m."role", m."created_at", b."length",
+                    ROW_NUMBER() OVER (PARTITION BY m."parent_id" ORDER BY m."created_at", m."uuid") AS "rank",
+                    COUNT(*) OVER (PARTITION BY m."parent_id") AS "siblings"
+                FROM "messages" m LEFT JOIN "message_blobs" b ON b."hash" = m."blob_id"
+                WHERE {in_chat}
+                    AND m."parent_id" IN ({placeholders(db, len(parent_uuids), start=parents_start)})
+            ) t
+            WHERE "rank" <= {placeholder(db, len(values))}
+            ORDER BY "parent_id", "rank"
+        """
+        rows = await db.execute_query_dict(sql, values)
+        # UUIDの保存形式（テキスト/バイナリ）や日時の表現はフィールドに戻させる
+        uuid_field, created_at_field = fields_map["uuid"], fields_map["created_at"]
+        return [
+            {
+                "uuid": str(uuid_field.to_python_value(row["uuid"])),
+                "parent_uuid": str(uuid_field.to_python_value(row["parent_id"])),
+                "role": Role(row["role"]).value,
+                "length": row["length"],
+                "created_at": created_at_field.to_python_value(row["created_at"]),
+                "child_count": 0,
+                "siblings": row["siblings"],
+            }
+            for row in rows
+        ]
+
+    async def get_message_contents(
+            self,
+            chat_tree_id: str,
+            message_uuids: list[str],
+            current_user: UserEntity,
+            ) -> list[dict] | None:
+        """
+        チャット木の中の指定したメッセージの本文をまとめて取得
+
+        見つからないUUIDは結果に含めない。セグメントファイルに置いた大きな本文は
+        get_chat_tree_messages(content_handles=True) と同じく content_external=True で返す。
+        チャット木が見つからない場合はNone。
+        """
+        db = _read_db(current_user.uuid)
+        try:
+            chat_uuid = UUID(str(chat_tree_id))
+            uuids = [UUID(str(u)) for u in message_uuids]
+        except ValueError:
+            return None
+        scope = await _chat_scope(chat_uuid, db)
+        if scope is None:
+            return None
+
+        query = MessageModel.filter(scope[0], uuid__in=uuids)
+        messages = await query.using_db(db).only("uuid", "content", "content_compressed", "blob_id")
+        blobs = await resolve_blobs(query, db)
+
+        result = []
+        for msg in messages:
+            blob = blobs.get(msg.blob_id)
+            external = blob is not None and blob.location is not None
+            if external:
+                content = ""
+            else:
+                content = blob.text if blob is not None else msg.text
+            result.append({"uuid": str(msg.uuid), "content": content, "content_external": external})
+        return result
+
+    async def get_messages(
+            self,
+            message_uuids: list[str],
+            current_user: UserEntity,
+            *,
+            with_content: bool = True,
+            ) -> list[dict] | None:
+        """
+        current_userが所有するチャットのメッセージをUUIDで取得
+
+        チャットを指定せずに読めるよう、所有者はチャットとJOINして確認する。
+        見つからないUUIDと他のユーザーのメッセージは結果に含めない。
+        with_contentがFalseなら本文を読まない（存在確認だけのとき）。
+        UUIDが不正な場合はNone。
+        """
+        try:
+            uuids = [UUID(str(u)) for u in message_uuids]
+        except ValueError:
+            return None
+        db = _read_db(current_user.uuid)
+        query = MessageModel.filter(
+            uuid__in=uuids, chat_tree__owner_uuid=UUID(str(current_user.uuid))
+        )
+        messages = await query.using_db(db)
+        blobs = await resolve_blobs(query, db) if with_content else {}
+
+        result = []
+        for msg in messages:
+            blob = blobs.get(msg.blob_id)
+            external = blob is not None and blob.location is not None
+            if not with_content or external:
+                content = ""
+            else:
+                content = blob.text if blob is not None else msg.text
+            result.append({
+                "uuid": str(msg.uuid),
+                "chat_uuid": str(msg.chat_tree_id),
+                "parent_uuid": str(msg.parent_id) if msg.parent_id else None,
+                "role": msg.role.value,
+                "content": content,
+                "content_external": external,
+                "created_at": msg.created_at.isoformat(),
+            })
+        return result
+
+    async def get_branch_diff(
+            self,
+            chat_tree_id: str,
+            left_uuid: str,
+            right_uuid: str,
+            current_user: UserEntity,
+            ) -> dict | None:
+        """
+        チャットの2つのメッセージまでの会話を比べる（最も近い共通の祖先と、そこから先のそれぞれの枝）
+
+        チャット木全体は読まず、2つのメッセージからルートまでの経路だけを再帰CTEで辿り、
+        本文は共通の祖先と分かれた後のメッセージの分だけ読む。
+        各メッセージは uuid / role / content を持つ。
+        チャットかどちらかのメッセージが（フォークで引き継いだ祖先を含めて）チャットにない場合はNone。
+
+        Raises:
+            TreeCycleError: どちらかのメッセージの祖先の親が循環している場合
+        """
+        db = _read_db(current_user.uuid)
+        try:
+            chat_uuid = UUID(str(chat_tree_id))
+            left_uuid, right_uuid = UUID(str(left_uuid)), UUID(str(right_uuid))
+        except ValueError:
+            return None
+        scope = await _chat_scope(chat_uuid, db)
+        if scope is None:
+            return None
+        found = await MessageModel.filter(scope[0], uuid__in=[left_uuid, right_uuid]).using_db(db).count()
+        if found != len({left_uuid, right_uuid}):
+            return None
+
+        conn = db or connections.get(WRITE_CONNECTION)
+        left_path = await _message_path(conn, left_uuid)
+        right_path = await _message_path(conn, right_uuid)
+        common_length = 0
+        for a, b in zip(left_path, right_path):
+            if a != b:
+                break
+            common_length += 1
+        if common_length == 0:
+            return None
+
+        wanted = [left_path[common_length - 1], *left_path[common_length:], *right_path[common_length:]]
+        messages = {}
+        for start in range(0, len(wanted), BRANCH_BATCH_SIZE):
+            rows = await MessageModel.filter(uuid__in=wanted[start:start + BRANCH_BATCH_SIZE]).using_db(
+                db
+            ).values_list("uuid", "role", "content", "content_compressed", "blob_id")
+            texts = await resolve_blob_texts([row[4] for row in rows if row[4] is not None], db)
+            for message_uuid, role, content, compressed, blob_id in rows:
+                if blob_id is not None:
+                    content = texts.get(blob_id, "")
+                elif compressed is not None:
+                    content = decompress_content(compressed)
+                messages[message_uuid] = {"uuid": str(message_uuid), "role": Role(role).value, "content": content}
+
+        return {
+            "ancestor": messages[left_path[common_length - 1]],
+            "common_length": common_length,
+            "left": [messages[u] for u in left_path[common_length:]],
+            "right": [messages[u] for u in right_path[common_length:]],
+        }
+
+    async def search_messages(
+            self,
+            current_user: UserEntity,
+            query: str,
+            *,
+            role: str | None = None,
+            model_name: str | None = None,
+            since: datetime | None = None,
+            until: datetime | None = None,
+            limit: int = SEARCH_PAGE_SIZE,
+            offset: int = 0,
+            ) -> list[dict]:
+        """
+        current_userが所有するチャットのメッセージを全文検索し、関連度の高い順に返す
+
+        本文はblob単位で索引し、blobは他のユーザーとも共有するので、所有者のチャットのメッセージから
+        始めて blob_id で索引の行を引く（他のユーザーのメッセージは照合も順位付けもしない）。
+        ロール・モデル名（アシスタント詳細）・作成日時で絞り込み、空白で区切った語を全て含む
+        メッセージを返す。SQLiteでは MIN_TOKEN_LENGTH 文字未満の語は索引で引けないため、本文に
+        含まれるかを確かめる。
+
+        関連度はメッセージの本文だけで決める（PostgreSQLは ts_rank、SQLiteは語の出現回数）。
+        FTS5の bm25 は索引全体の統計を使い、他のユーザーの本文に左右されるうえ行ごとに
+        語の全ての出現を読むため使わない。
+
+        各結果には、本文の該当箇所（snippet）と、場所が分かるように SEARCH_CONTEXT_DEPTH 件までの
+        祖先（ルート側から順、ロールとプレビュー）を含める。
+
+        Returns:
+            chat_uuid, message_uuid, role, model_name, created_at, score, snippet, context の辞書のリスト
+        """
+        terms = query.split()
+        if not terms:
+            return []
+        owner_uuid = UUID(str(current_user.uuid))
+        await ensure_search_index(connections.get(_write_connection(owner_uuid)))
+        db = _read_db(owner_uuid) or MessageModel._choose_db()
+        fields_map = MessageModel._meta.fields_map
+
+        values: list = []
+
+        def bind(value) -> str:
+            values.append(value)
+            return placeholder(db, len(values))
+
+        conditions = []
+        if is_postgres(db):
+            conditions.append(f"s.\"document\" @@ plainto_tsquery('simple', {bind(query)})")
+            score = f"-ts_rank(s.\"document\", plainto_tsquery('simple', {bind(query)}))"
+            # 行の順序はプランナーに任せる（所有者の絞り込みは owner_uuid の索引で先に効く）
+            tables = """
+                "chat_tree_detail" c
+                JOIN "messages" m ON m."chat_tree_id" = c."uuid"
+                JOIN "message_search" s ON s."hash" = m."blob_id"
+            """
+        else:
+            # ? は文中の順に対応するので、SELECT 句の語を先に束縛する
+            occurrences = " + ".join(
+                f'(length(lower(s."content")) - length(replace(lower(s."content"), {bind(term.lower())}, \'\'))) '
+                f"/ {len(term)}"
+                for term in terms
+            )
+            score = f"-({occurrences})"
+            match = fts_match_query(terms)
+            if match:
+                conditions.append(f'"message_search" MATCH {bind(match)}')
+            # 索引で引けない短い語は、本文に含まれるかを確かめる（lower はASCIIだけを小文字にする）
+            conditions += [
+                f'instr(lower(s."content"), {bind(term.lower())}) > 0'
+                for term in terms if len(term) < MIN_TOKEN_LENGTH
+            ]
+            # CROSS JOIN で結合順を固定し、所有者のメッセージごとに rowid で索引を引く
+            # （MATCH から始めると、他のユーザーの本文まで全て照合してから絞り込むことになる）
+            tables = f"""
+                "chat_tree_detail" c
+                CROSS JOIN "messages" m ON m."chat_tree_id" = c."uuid"
+                CROSS JOIN "{SEARCH_KEY_TABLE}" k ON k."hash" = m."blob_id"
+                CROSS JOIN "message_search" s ON s."rowid" = k."search_rowid"
+            """
+        conditions.append(
+            f'c."owner_uuid" = {bind(ChatTreeDetail._meta.fields_map["owner_uuid"].to_db_value(owner_uuid, ChatTreeDetail))}'
+        )
+        joins = ""
+        if role is not None:
+            conditions.append(f'm."role" = {bind(Role(role).value)}')
+        if model_name is not None:
+            joins = 'JOIN "assistant_message_details" a ON a."message_id" = m."uuid"'
+            conditions.append(f'a."model_name" = {bind(model_name)}')
+        # 日時はUTCで保存しているので、比較する値もUTCにそろえる（タイムゾーンのない値はUTCとみなす）
+        for column_condition, value in (('m."created_at" >=', since), ('m."created_at" <', until)):
+            if value is not None:
+                value = value.replace(tzinfo=dt_timezone.utc) if value.tzinfo is None else value
+                conditions.append(f"{column_condition} {bind(value.astimezone(dt_timezone.utc))}")
+        sql = f"""
+            SELECT m."uuid", m."chat_tree_id", m."parent_id", m."role", m."blob_id", m."created_at",
+                {score} AS "score"
+            FROM {tables}
+            {joins}
+            WHERE {" AND ".join(conditions)}
+            ORDER BY "score", m."created_at" DESC, m."uuid"
+            LIMIT {bind(limit)} OFFSET {bind(offset)}
+        """
+        _, rows = await db.execute_query(sql, values)
+        uuid_field, created_at_field = fields_map["uuid"], fields_map["created_at"]
+        hits = [
+            {
+                "message_uuid": uuid_field.to_python_value(row[0]),
+                "chat_uuid": str(ChatTreeDetail._meta.fields_map["uuid"].to_python_value(row[1])),
+                "parent_uuid": uuid_field.to_python_value(row[2]) if row[2] is not None else None,
+                "role": Role(row[3]).value,
+                "blob_id": row[4],
+                "created_at": created_at_field.to_python_value(row[5]),
+                "score": -float(row[6]) or 0.0,
+            }
+            for row in rows
+        ]
+        if not hits:
+            return []
+
+        # 祖先を親の方向に SEARCH_CONTEXT_DEPTH 段まで、段ごとに1クエリで読む
+        ancestors: dict[UUID, dict] = {}
+        frontier = {hit["parent_uuid"] for hit in hits if hit["parent_uuid"] is not None}
+        for _ in range(SEARCH_CONTEXT_DEPTH):
+            frontier -= ancestors.keys()
+            if not frontier:
+                break
+            parents = await MessageModel.filter(uuid__in=list(frontier)).using_db(db).values(
+                "uuid", "parent_id", "role", "blob_id"
+            )
+            ancestors.update({parent["uuid"]: parent for parent in parents})
+            frontier = {parent["parent_id"] for parent in parents if parent["parent_id"] is not None}
+
+        texts = await resolve_blob_texts(
+            list({hit["blob_id"] for hit in hits} | {a["blob_id"] for a in ancestors.values() if a["blob_id"]}),
+            db,
+        )
+        model_names = dict(
+            await AssistantMessageDetail.filter(
+                message_id__in=[hit["message_uuid"] for hit in hits]
+            ).using_db(db).values_list("message_id", "model_name")
+        )
+        result = []
+        for hit in hits:
+            context = []
+            parent_uuid = hit["parent_uuid"]
+            while parent_uuid in ancestors and len(context) < SEARCH_CONTEXT_DEPTH:
+                ancestor = ancestors[parent_uuid]
+                context.append({
+                    "uuid": str(ancestor["uuid"]),
+                    "role": Role(ancestor["role"]).value,
+                    "preview": _make_preview(texts.get(ancestor["blob_id"], "")),
+                })
+                parent_uuid = ancestor["parent_id"]
+            result.append({
+                "chat_uuid": hit["chat_uuid"],
+                "message_uuid": str(hit["message_uuid"]),
+                "role": hit["role"],
+                "model_name": model_names.get(hit["message_uuid"]),
+                "created_at": hit["created_at"],
+                "score": hit["score"],
+                "snippet": _make_snippet(texts.get(hit["blob_id"], ""), terms),
+                "context": context[::-1],
+            })
+        return result
+
+    async def open_message_content(
+            self,
+            chat_tree_id: str,
+            message_uuid: str,
+            current_user: UserEntity,
+            ) -> memoryview | None:
+        """
+        メッセージ本文のUTF-8バイト列を返す
+
+        セグメントファイルに置いた本文はmmapの該当範囲をコピーせずに返す。
+        メッセージが見つからない場合はNone。
+        """
+        try:
+            chat_uuid, message_uuid = UUID(str(chat_tree_id)), UUID(str(message_uuid))
+        except ValueError:
+            return None
+        db = _read_db(current_user.uuid)
+        scope = await _chat_scope(chat_uuid, db)
+        if scope is None:
+            return None
+        message = await MessageModel.filter(
+            scope[0], uuid=message_uuid
+        ).using_db(db).only("uuid", "content", "content_compressed", "blob_id").first()
+        if message is None:
+            return None
+        if message.blob_id is None:
+            return memoryview(message.text.encode("utf-8"))
+
+        blob = await MessageBlob.get(hash=message.blob_id).using_db(db)
+        if blob.location is not None:
+            return get_segment_store().view(blob.location)
+        return memoryview(blob.text.encode("utf-8"))
+
+    async def iter_export_records(
+            self,
+            current_user: UserEntity,
+            chat_uuid: str | None = None,
+            *,
+            batch_size: int = EXPORT_BATCH_SIZE,
+            ) -> AsyncIterator[dict]:
+        """
+        ユーザーのチャット（chat_uuidを指定すればそのチャットだけ）をエクスポート用のレコードとして返す
+
+        chat レコードに続けて、そのチャットのメッセージを作成順に message レコードとして返す
+        （アシスタントの詳細は assistant_detail に入れる）。フォークは引き継いだ祖先も含めて返すので、
+        単独のチャットとして取り込める。チャットもメッセージも
+        キーセットで batch_size 行ずつ読むので、アカウントの大きさに関わらずメモリは一定。
+        形式は gateways/ndjson.py を参照。
+        """
+        db = _read_db(current_user.uuid)
+        chats = ChatTreeDetail.filter(owner_uuid=UUID(str(current_user.uuid))).using_db(db)
+        if chat_uuid is not None:
+            chats = chats.filter(uuid=UUID(str(chat_uuid)))
+
+        last_chat = None
+        while True:
+            query = chats if last_chat is None else chats.filter(uuid__gt=last_chat)
+            chat_batch = await query.order_by("uuid").limit(batch_size)
+            if not chat_batch:
+                return
+            last_chat = chat_batch[-1].uuid
+
+            for chat in chat_batch:
+                yield {
+                    "type": "chat",
+                    "uuid": str(chat.uuid),
+                    "owner_uuid": str(chat.owner_uuid),
+                    "created": chat.created.isoformat(),
+                    "updated": chat.updated.isoformat(),
+                }
+                if chat.archived_at is not None:
+                    # アーカイブ済みのチャットは戻さずに、アーカイブのレコードをそのまま返す
+                    archive = await ChatArchive.filter(chat_tree_id=chat.uuid).using_db(db).first()
+                    if archive is not None:
+                        for record in decode_ndjson([archive.data], compressed=True):
+                            yield record
+                    continue
+                scope, _ = await _chat_scope(chat.uuid, db)
+                async for record in self._iter_message_records(db, chat.uuid, batch_size, scope):
+                    yield record
+
+    @staticmethod
+    async def _iter_message_records(
+            db: BaseDBAsyncClient | None,
+            chat_uuid: UUID,
+            batch_size: int,
+            scope: Q | None = None,
+            ) -> AsyncIterator[dict]:
+        """チャット（scope を渡せばその範囲）のメッセージを (created_at, uuid) のキーセットで batch_size 行ずつ読む"""
+        messages = MessageModel.filter(scope or Q(chat_tree_id=chat_uuid)).using_db(db)
+        last = None
+        while True:
+            query = messages
+            if last is not None:
+                query = query.filter(
+                    Q(created_at__gt=last.created_at) | Q(created_at=last.created_at, uuid__gt=last.uuid)
+                )
+            batch = await query.order_by("created_at", "uuid").limit(batch_size)
+            if not batch:
+                return
+            last = batch[-1]
+
+            batch_uuids = [m.uuid for m in batch]
+            batch_query = MessageModel.filter(uuid__in=batch_uuids)
+            blobs = await resolve_blobs(batch_query, db)
+            details = {
+                d["message_id"]: d
+                for d in await AssistantMessageDetail.filter(message_id__in=batch_uuids).using_db(
+                    db
+                ).values("message_id", *_DETAIL_EXPORT_FIELDS)
+            }
+            for msg in batch:
+                blob = blobs.get(msg.blob_id)
+                detail = details.get(msg.uuid)
+                if detail is not None:
+                    detail = {name: detail[name] for name in _DETAIL_EXPORT_FIELDS}
+                yield {
+                    "type": "message",
+                    "uuid": str(msg.uuid),
+                    "chat_uuid": str(chat_uuid),
+                    "parent_uuid": str(msg.parent_id) if msg.parent_id else None,
+                    "role": msg.role.value,
+                    "content": blob.text if blob is not None else msg.text,
+                    "user_context_id": str(msg.user_context_id) if msg.user_context_id else None,
+                    "created_at": msg.created_at.isoformat(),
+                    "updated_at": msg.updated_at.isoformat(),
+                    "assistant_detail": detail,
+                }
+
+    async def fork_chat(
+            self,
+            chat_uuid: str | UUID,
+            message_uuid: str | UUID,
+            current_user: UserEntity,
+            *,
+            fork_uuid: str | UUID | None = None,
+            ) -> str | None:
+        """
+        チャットのメッセージを分岐点にして、新しいチャット（フォーク）を作る
+
+        分岐点までの祖先はコピーせず、UUIDの一覧（ChatFork.path）として参照する。
+        本文もblobも複製しないので、作成のコストは祖先の数に比例する1行だけ。
+        フォークの版数は1から始まり、変更ログに chat_forked を記録する。
+        フォークで追加するメッセージは通常どおり save_message で保存する。
+
+        Args:
+            chat_uuid: 元のチャット（フォークのフォークでもよい）
+            message_uuid: 分岐点のメッセージ（元のチャットの木にあるもの）
+            current_user: 元のチャットの所有者（フォークの所有者になる）
+            fork_uuid: 作成するチャットのUUID（省略時は新しく振る）
+
+        Returns:
+            作成したチャットのUUID（元のチャットか分岐点のメッセージが見つからない場合はNone）
+
+        Raises:
+            TreeCycleError: 分岐点の祖先の親が循環している場合
+        """
+        try:
+            chat_uuid, message_uuid = UUID(str(chat_uuid)), UUID(str(message_uuid))
+        except ValueError:
+            return None
+        fork_uuid = UUID(str(fork_uuid)) if fork_uuid is not None else uuid4()
+        owner_uuid = UUID(str(current_user.uuid))
+
+        async with in_transaction(_write_connection(owner_uuid)) as conn:
+            if not await ChatTreeDetail.filter(
+                uuid=chat_uuid, owner_uuid=owner_uuid, archived_at__isnull=True
+            ).using_db(conn).exists():
+                return None
+            scope, _ = await _chat_scope(chat_uuid, conn)
+            message = await MessageModel.filter(scope, uuid=message_uuid).using_db(conn).first().values(
+                "chat_tree_id"
+            )
+            if message is None:
+                return None
+
+            # 分岐点から親へ辿ると、元のチャットの行から引き継いだ祖先（ルートまで）に続く
+            fork_path = await _message_path(conn, message_uuid)
+
+            await ChatTreeDetail.create(
+                uuid=fork_uuid,
+                owner_uuid=owner_uuid,
+                forked_from=message["chat_tree_id"],
+                version=1,
+                using_db=conn,
+            )
+            await ChatFork.create(
+                chat_tree_id=fork_uuid,
+                fork_message=message_uuid,
+                path=[str(u) for u in fork_path],
+                using_db=conn,
+            )
+            await ChatEvent.create(
+                chat_tree_id=fork_uuid,
+                seq=1,
+                type=CHAT_FORKED,
+                payload={
+                    "source_chat_uuid": str(message["chat_tree_id"]),
+                    "fork_message_uuid": str(message_uuid),
+                    "path": [str(u) for u in fork_path],
+                },
+                using_db=conn,
+            )
+        await self.refresh_chat_summary(fork_uuid, owner_uuid)
+        return str(fork_uuid)
+
+    async def delete_subtree(
+            self,
+            chat_uuid: str | UUID,
+            message_uuid: str | UUID,
+            current_user: UserEntity,
+            *,
+            owner_uuid: str | UUID,
+            ) -> int | None:
+        """
+        メッセージとその子孫を全て削除する
+
+        子孫は再帰CTEで一時テーブルに集め、アシスタント詳細・メッセージをそれぞれ1文で削除する
+        （1行ずつのカスケードや、Pythonへの全UUIDの読み込みはしない）。blobの参照数を減らし、
+        版数を進めて変更ログに subtree_deleted を記録し、スナップショットを作り直す。
+        空いたページの解放はバックグラウンドで予約する。
+        フォークで引き継いだ祖先は削除できない（フォーク自身の行だけが対象）。
+
+        Args:
+            chat_uuid: メッセージのあるチャット
+            message_uuid: 削除する部分木の起点のメッセージ
+            current_user: 削除するユーザー（チャットの所有者でなければ削除しない）
+            owner_uuid: チャットの所有者（書き込むシャードを決める）
+
+        Returns:
+            削除したメッセージ数（チャットかメッセージが見つからない、所有者でない場合はNone）
+
+        Raises:
+            ValueError: 子孫がフォークの分岐点として参照されている場合
+        """
+        try:
+            chat_uuid, message_uuid = UUID(str(chat_uuid)), UUID(str(message_uuid))
+        except ValueError:
+            return None
+        connection_name = _write_connection(owner_uuid)
+        async with in_transaction(connection_name) as conn:
+            if not await MessageModel.filter(
+                uuid=message_uuid, chat_tree_id=chat_uuid, chat_tree__owner_uuid=UUID(str(current_user.uuid))
+            ).using_db(conn).exists():
+                return None
+
+            await _collect_subtree(conn, chat_uuid, message_uuid)
+            try:
+                fork_messages = await ChatFork.filter(chat_tree__forked_from=chat_uuid).using_db(conn).values_list(
+                    "fork_message", flat=True
+                )
+                if fork_messages:
+                    uuid_field = MessageModel._meta.fields_map["uuid"]
+                    _, rows = await conn.execute_query(
+                        f'SELECT COUNT(*) FROM "{_SUBTREE_TABLE}" WHERE "uuid" IN '
+                        f'({placeholders(conn, len(fork_messages))})',
+                        [uuid_field.to_db_value(u, MessageModel) for u in fork_messages],
+                    )
+                    if rows[0][0]:
+                        raise ValueError(f"Subtree of message {message_uuid} is referenced by a forked chat")
+
+                await collect_message_blobs(conn, _SUBTREE_TABLE)
+                _, rows = await conn.execute_query(f'SELECT COUNT(*) FROM "{_SUBTREE_TABLE}"')
+                deleted = rows[0][0]
+
+                await conn.execute_query(
+                    f'DELETE FROM "assistant_message_details" '
+                    f'WHERE "message_id" IN (SELECT "uuid" FROM "{_SUBTREE_TABLE}")'
+                )
+                await conn.execute_query(
+                    f'DELETE FROM "messages" WHERE "uuid" IN (SELECT "uuid" FROM "{_SUBTREE_TABLE}")'
+                )
+                await release_collected_blobs(conn)
+            finally:
+                await conn.execute_query(f'DROP TABLE IF EXISTS "{_SUBTREE_TABLE}"')
+
+            await ChatTreeDetail.filter(uuid=chat_uuid).using_db(conn).update(
+                version=F("version") + 1, updated=timezone.now()
+            )
+            version = await ChatTreeDetail.filter(uuid=chat_uuid).using_db(conn).first().values_list(
+                "version", flat=True
+            )
+            await ChatEvent.create(
+                chat_tree_id=chat_uuid,
+                seq=version,
+                type=SUBTREE_DELETED,
+                payload={"message_uuid": str(message_uuid), "count": deleted},
+                using_db=conn,
+            )
+            await ChatTreeSnapshot.filter(chat_tree_id=chat_uuid).using_db(conn).delete()
+        await self.refresh_chat_summary(chat_uuid, owner_uuid)
+        await self.refresh_chat_tree_snapshot(chat_uuid, owner_uuid)
+        notify_chat_event(chat_uuid)
+        schedule_space_reclamation(connection_name)
+        return deleted
+
+    async def archive_chat(
+            self,
+            chat_uuid: str | UUID,
+            owner_uuid: str | UUID,
+            *,
+            inactive_before: datetime,
+            ) -> int | None:
+        """
+        チャットのメッセージを chat_archives へ移し、ChatTreeDetail をスタブにする
+
+        メッセージはエクスポートと同じ message レコードのgzip NDJSONにまとめ、
+        messages・アシスタント詳細・変更ログの行を削除してblobの参照数を減らす
+        （戻すときにメッセージを新しい seq で記録し直す）。
+        updated は変えないので、チャット一覧の並びとサマリー列はそのまま残る。
+        フォークと、フォークに祖先を参照されているチャットはアーカイブしない。
+
+        Args:
+            chat_uuid: アーカイブするチャット
+            owner_uuid: チャットの所有者（書き込むシャードを決める）
+            inactive_before: この日時以降に更新されたチャットはアーカイブしない
+
+        Returns:
+            アーカイブしたメッセージ数（既にアーカイブ済みか、判定後に更新された場合、
+            フォークに関わるチャットの場合はNone）
+        """
+        chat_uuid = UUID(str(chat_uuid))
+        async with in_transaction(_write_connection(owner_uuid)) as conn:
+            if await ChatTreeDetail.filter(forked_from=chat_uuid).using_db(conn).exists():
+                return None
+            # 一覧から選んだ後に書き込まれたチャットは移さない（QuerySet.update は updated を変えない）
+            claimed = await ChatTreeDetail.filter(
+                uuid=chat_uuid, archived_at__isnull=True, forked_from__isnull=True, updated__lt=inactive_before
+            ).using_db(conn).update(archived_at=timezone.now())
+            if not claimed:
+                return None
+
+            records = self._iter_message_records(conn, chat_uuid, EXPORT_BATCH_SIZE)
+            data = b"".join([chunk async for chunk in encode_ndjson(records, compress=True)])
+            rows = await MessageModel.filter(chat_tree_id=chat_uuid).using_db(conn).values_list(
+                "uuid", "blob_id"
+            )
+            await ChatArchive.create(chat_tree_id=chat_uuid, data=data, message_count=len(rows), using_db=conn)
+
+            await AssistantMessageDetail.filter(
+                message_id__in=Subquery(MessageModel.filter(chat_tree_id=chat_uuid).values("uuid"))
+            ).using_db(conn).delete()
+            await MessageModel.filter(chat_tree_id=chat_uuid).using_db(conn).delete()
+            await ChatTreeSnapshot.filter(chat_tree_id=chat_uuid).using_db(conn).delete()
+            await ChatEvent.filter(chat_tree_id=chat_uuid).using_db(conn).delete()
+            await release_blobs(conn, [blob_id for _, blob_id in rows])
+        return len(rows)
+
+    async def restore_archived_chat(
+            self,
+            chat_uuid: str | UUID,
+            owner_uuid: str | UUID,
+            ) -> int | None:
+        """
+        アーカイブしたチャットのメッセージを messages に戻す
+
+        所有者がアーカイブ済みのチャットを開いたときに呼ぶ（ChatSelection.open_chat）。
+        全体を1トランザクションで行い、アーカイブ行を削除できた呼び出しだけが戻すので、
+        同時に開かれても二重には戻さず、途中の状態も他から見えない。
+        メッセージの作成日時・user_context_id・アシスタント詳細は元の値に戻し、
+        seq は戻した時点の版数の後に振り直す（版数が進むのでETagも変わる）。
+
+        Returns:
+            戻したメッセージ数（他の呼び出しが既に戻していた場合はNone）
+        """
+        chat_uuid = UUID(str(chat_uuid))
+        async with in_transaction(_write_connection(owner_uuid)) as conn:
+            archive = await ChatArchive.filter(chat_tree_id=chat_uuid).using_db(conn).first()
+            if archive is None:
+                return None
+            if not await ChatArchive.filter(chat_tree_id=chat_uuid).using_db(conn).delete():
+                return None
+            chat_tree_detail = await ChatTreeDetail.get(uuid=chat_uuid).using_db(conn)
+
+            chat_tree = ChatTreeEntity()
+            chat_tree.uuid = chat_uuid
+            chat_tree.owner_uuid = str(chat_tree_detail.owner_uuid)
+            messages, metadata = [], {}
+            for record in decode_ndjson([archive.data], compressed=True):
+                messages.append((
+                    MessageEntity(uuid=record["uuid"], role=Role(record["role"]), content=record["content"]),
+                    record["parent_uuid"],
+                ))
+                metadata[record["uuid"]] = {
+                    "created_at": datetime.fromisoformat(record["created_at"]),
+                    "updated_at": datetime.fromisoformat(record["updated_at"]),
+                    "user_context_id": record["user_context_id"],
+                    "assistant_detail": record["assistant_detail"],
+                }
+            nodes = chat_tree.bulk_add_messages(messages)
+
+            owner = UserEntity(uuid=chat_tree.owner_uuid, username="", email="")
+            await self.bulk_create_messages(
+                chat_tree, nodes, owner, metadata=metadata, updated=chat_tree_detail.updated
+            )
+            await ChatTreeDetail.filter(uuid=chat_uuid).using_db(conn).update(archived_at=None)
+        return len(nodes)
+
+    async def check_chat_tree(
+            self,
+            chat_uuid: str | UUID,
+            owner_uuid: str | UUID,
+            *,
+            repair: bool = False,
+            ) -> TreeIssues | None:
+        """
+        チャット木の整合性（ルートが1つで、全てのメッセージがルートから辿れるか）を検査する
+
+        読むのは1チャット分の (UUID, 親) だけなので、大きなDBでもチャット単位で順に検査できる。
+        repair=True なら、問題のある行を復旧用のシステムメッセージの下に付け替える
+        （復旧用のノードは残すルートの子、ルートがなければ新しいルート、フォークなら分岐点の子）。
+        修復は版数を進めて変更ログに tree_repaired を記録し、スナップショットとサマリーを作り直す。
+
+        Returns:
+            見つかった問題（チャットが見つからない場合はNone）
+        """
+        chat_uuid = UUID(str(chat_uuid))
+        async with in_transaction(_write_connection(owner_uuid)) as conn:
+            scope = await _chat_scope(chat_uuid, conn)
+            if scope is None:
+                return None
+            _, path = scope
+            rows = await MessageModel.filter(chat_tree_id=chat_uuid).using_db(conn).order_by(
+                "created_at", "uuid"
+            ).values_list("uuid", "parent_id")
+            uuids = {message_uuid for message_uuid, _ in rows}
+            outside = list({p for _, p in rows if p is not None and p not in uuids and p not in path})
+            external_chats = {}
+            for start in range(0, len(outside), INTEGRITY_BATCH_SIZE):
+                external_chats.update(
+                    await MessageModel.filter(uuid__in=outside[start:start + INTEGRITY_BATCH_SIZE]).using_db(
+                        conn
+                    ).values_list("uuid", "chat_tree_id")
+                )
+            issues, root = find_tree_issues(chat_uuid, rows, inherited=path, external_chats=external_chats)
+            if issues.ok or not repair:
+                return issues
+
+            reparent = plan_repair(issues, rows)
+            await ChatTreeDetail.filter(uuid=chat_uuid).using_db(conn).update(
+                version=F("version") + 1, updated=timezone.now()
+            )
+            version = await ChatTreeDetail.filter(uuid=chat_uuid).using_db(conn).first().values_list(
+                "version", flat=True
+            )
+            recovery_parent = path[-1] if path else root
+            blob_hash = await acquire_blob(conn, RECOVERY_CONTENT)
+            recovery = await MessageModel.create(
+                uuid=uuid4(),
+                role=Role.SYSTEM,
+                content="",
+                blob_id=blob_hash,
+                parent_id=recovery_parent,
+                chat_tree_id=chat_uuid,
+                user_context_id=UUID(str(owner_uuid)),
+                seq=version,
+                using_db=conn,
+            )
+            for start in range(0, len(reparent), INTEGRITY_BATCH_SIZE):
+                await MessageModel.filter(uuid__in=reparent[start:start + INTEGRITY_BATCH_SIZE]).using_db(
+                    conn
+                ).update(parent_id=recovery.uuid)
+            await ChatEvent.create(
+                chat_tree_id=chat_uuid,
+                seq=version,
+                type=TREE_REPAIRED,
+                payload={
+                    "recovery": _message_added_payload({
+                        "uuid": recovery.uuid,
+                        "parent_id": recovery_parent,
+                        "role": Role.SYSTEM,
+                        "blob_id": blob_hash,
+                        "user_context_id": recovery.user_context_id,
+                        "created_at": recovery.created_at,
+                        "updated_at": recovery.updated_at,
+                    }),
+                    "reparented": [str(u) for u in reparent],
+                },
+                using_db=conn,
+            )
+            await ChatTreeSnapshot.filter(chat_tree_id=chat_uuid).using_db(conn).delete()
+        issues.recovery_uuid, issues.reparented = recovery.uuid, reparent
+        await self.refresh_chat_summary(chat_uuid, owner_uuid)
+        await self.refresh_chat_tree_snapshot(chat_uuid, owner_uuid)
+        notify_chat_event(chat_uuid)
+        return issues
+
     async def get_all_chat_tree_ids(
             self,
             current_user: UserEntity
@@ -127,25 +1901,140 @@ class ChatRepositoryImpl(ChatRepositoryProtcol):
         """
         指定したユーザーに紐づく全てのチャットツリーIDを取得
         """
-        # ユーザーに紐づくメッセージから一意のチャットツリーIDを取得
-        messages = await MessageModel.filter(
-            user_context_id=current_user.uuid
-        ).prefetch_related("chat_tree")
+        # owner_uuidのインデックスだけで完結させる（メッセージは読まない）
+        chat_tree_ids = await ChatTreeDetail.filter(
+            owner_uuid=current_user.uuid
+        ).using_db(_read_db(current_user.uuid)).values_list("uuid", flat=True)
+
+        return [str(chat_tree_id) for chat_tree_id in chat_tree_ids]
+
+    async def list_chat_trees(
+            self,
+            current_user: UserEntity,
+            *,
+            limit: int | None = None,
+            cursor: str | None = None,
+            ) -> tuple[list[dict], str | None]:
+        """
+        ユーザーのチャット一覧をupdatedの降順でキーセットページネーションして取得
+
+        (owner_uuid, updated, uuid) の複合インデックスを辿るので、
+        何ページ目でもチャット総数に依存しないコストで取得できる。
 
-        # 重複を除いてチャットツリーIDのリストを作成
-        chat_tree_ids = list(set([str(msg.chat_tree.uuid) for msg in messages]))
+        Args:
+            current_user: 対象ユーザー
+            limit: 1ページの最大件数（Noneなら全件）
+            cursor: 前ページの末尾を表すカーソル
 
-        return chat_tree_ids
+        Returns:
+            (チャット情報のリスト, 次ページのカーソル。最終ページならNone)
 
-    async def get_chat_tree_info(self, chat_uuid: str) -> dict | None:
-        """チャットツリーのメタ情報（owner_uuid含む）を取得"""
+        Raises:
+            ValueError: カーソルが不正な場合
+        """
+        query = ChatTreeDetail.filter(owner_uuid=current_user.uuid)
+        chat_tree_details = await self._page_query(
+            query, limit, cursor
+        ).using_db(_read_db(current_user.uuid))
+        return self._to_page(chat_tree_details, limit)
+
+    async def list_all_chat_trees(
+            self,
+            *,
+            limit: int | None = None,
+            cursor: str | None = None,
+            ) -> tuple[list[dict], str | None]:
+        """
+        全ユーザーのチャット一覧をupdatedの降順で取得（管理用）
+
+        シャーディングが有効な場合は各シャードから1ページ分ずつ取得し、
+        同じ並び順でマージする。カーソルの形式は list_chat_trees と同じ。
+
+        Raises:
+            ValueError: カーソルが不正な場合
+        """
+        chat_tree_details = []
+        for db in _all_read_dbs():
+            chat_tree_details.extend(
+                await self._page_query(ChatTreeDetail.all(), limit, cursor).using_db(db)
+            )
+        chat_tree_details.sort(key=lambda d: (d.updated, d.uuid), reverse=True)
+        return self._to_page(chat_tree_details, limit)
+
+    @staticmethod
+    def _page_query(query, limit: int | None, cursor: str | None):
+        """updated, uuid の降順でカーソル以降の1ページ（+1件）を取得するクエリ"""
+        if cursor is not None:
+            updated_str, uuid_str = decode_cursor(cursor, 2)
+            try:
+                last_updated = datetime.fromisoformat(updated_str)
+                last_uuid = UUID(uuid_str)
+            except ValueError as e:
+                raise ValueError(f"Invalid cursor: {cursor}") from e
+            query = query.filter(
+                Q(updated__lt=last_updated)
+                | Q(updated=last_updated, uuid__lt=last_uuid)
+            )
+
+        query = query.order_by("-updated", "-uuid")
+        if limit is not None:
+            # 1件多く取得して次ページの有無を判定する
+            query = query.limit(limit + 1)
+        return query
+
+    def _to_page(
+            self,
+            chat_tree_details: list[ChatTreeDetail],
+            limit: int | None,
+            ) -> tuple[list[dict], str | None]:
+        """取得結果をlimit件に切り詰め、次ページのカーソルを作る"""
+        next_cursor = None
+        if limit is not None and len(chat_tree_details) > limit:
+            chat_tree_details = chat_tree_details[:limit]
+            last = chat_tree_details[-1]
+            next_cursor = encode_cursor(last.updated.isoformat(), str(last.uuid))
+
+        return [self._chat_tree_detail_to_dict(d) for d in chat_tree_details], next_cursor
+
+    async def get_chat_tree_info(
+            self,
+            chat_uuid: str,
+            current_user: UserEntity | None = None,
+            ) -> dict | None:
+        """
+        チャットツリーのメタ情報（owner_uuid含む）を取得
+
+        current_userを渡すとそのユーザーのシャードだけを探す。
+        省略した場合は全シャードを探す。
+        読むだけで、アーカイブ済みのチャット（archived が True）もメッセージを戻さずに返す。
+        開くときは所有者の確認の後に restore_archived_chat で戻す（ChatSelection.open_chat）。
+        """
         try:
-            chat_tree_detail = await ChatTreeDetail.get(uuid=UUID(chat_uuid))
-            return {
-                "uuid": str(chat_tree_detail.uuid),
-                "owner_uuid": str(chat_tree_detail.owner_uuid),
-                "created": chat_tree_detail.created,
-                "updated": chat_tree_detail.updated,
-            }
-        except Exception:
-            return None
\ No newline at end of file
+            chat_uuid = UUID(str(chat_uuid))
+        except ValueError:
+            return None
+
+        dbs = [_read_db(current_user.uuid)] if current_user is not None else _all_read_dbs()
+        for db in dbs:
+            chat_tree_detail = await ChatTreeDetail.filter(uuid=chat_uuid).using_db(db).first()
+            if chat_tree_detail is not None:
+                return self._chat_tree_detail_to_dict(chat_tree_detail)
+        return None
+
+    @staticmethod
+    def _chat_tree_detail_to_dict(chat_tree_detail: ChatTreeDetail) -> dict:
+        """ChatTreeDetailをメタ情報の辞書に変換"""
+        return {
+            "uuid": str(chat_tree_detail.uuid),
+            "owner_uuid": str(chat_tree_detail.owner_uuid),
+            "created": chat_tree_detail.created,
+            "updated": chat_tree_detail.updated,
+            "message_count": chat_tree_detail.message_count,
+            "branch_count": chat_tree_detail.branch_count,
+            "total_tokens": chat_tree_detail.total_tokens,
+            "last_message_at": chat_tree_detail.last_message_at,
+            "last_message_preview": chat_tree_detail.last_message_preview,
+            "version": chat_tree_detail.version,
+            "forked_from": str(chat_tree_detail.forked_from) if chat_tree_detail.forked_from else None,
+            "archived": chat_tree_detail.archived_at is not None,
+        }
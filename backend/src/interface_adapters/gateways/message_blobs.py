@@ -0,0 +1,340 @@
+"""
+内容アドレス方式のメッセージ本文（message_blobs）の操作
+
+本文はSHA-256をキーに1行だけ保存し、参照するメッセージの数を ref_count で数える。
+ref_count の増減はメッセージの追加・削除と同じトランザクション内で行う。
+全文検索のインデックス（infrastructure/db/search_index.py）もblobの作成・削除と同時に更新する。
+"""
+import asyncio
+import hashlib
+from collections import Counter
+from collections.abc import Iterable
+
+from tortoise import timezone
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.expressions import F, Subquery
+from tortoise.queryset import QuerySet
+
+from src.infrastructure.config import settings
+from src.infrastructure.db.content_codec import compress_content
+from src.infrastructure.db.models import MessageBlob, MessageModel
+from src.infrastructure.db.raw_sql import placeholder, placeholders
+from src.infrastructure.db.search_index import index_blob_texts, unindex_blobs
+from src.infrastructure.storage.segment_store import SegmentLocation, get_segment_store
+
+# blobの存在確認・削除で1文に渡すハッシュの数
+RELEASE_BATCH_SIZE = 500
+# collect_message_blobs で参照数を減らすblobを集める一時テーブル
+RELEASED_BLOBS_TABLE = "released_blobs"
+_BLOB_COLUMNS = (
+    "hash", "content", "content_compressed", "segment", "segment_offset", "segment_length",
+    "length", "ref_count", "created_at",
+)
+
+
+def content_hash(content: str) -> str:
+    """本文のハッシュ（blobのキー）"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+async def acquire_blob(conn: BaseDBAsyncClient, content: str, count: int = 1) -> str:
+    """
+    本文のblobを作成するか、既存のblobの参照数を増やす
+
+    BLOB_STORE_THRESHOLD 以上の本文はセグメントファイルに書き、DBには位置だけを保存する。
+    セグメントへの追記はトランザクションに含まれないため、ロールバックすると本文のレコードだけが
+    どのblobからも参照されずに残る（scripts/blob_segments.py compact で回収する）。
+
+    Args:
+        conn: トランザクションのコネクション
+        content: 本文
+        count: 増やす参照数
+
+    Returns:
+        blobのハッシュ
+    """
+    blob_hash = content_hash(content)
+    raw = content.encode("utf-8")
+    if settings.BLOB_STORE_THRESHOLD and len(raw) >= settings.BLOB_STORE_THRESHOLD:
+        # 既にあれば参照数を足すだけにして、セグメントへの重複した追記を避ける
+        if await MessageBlob.filter(hash=blob_hash).using_db(conn).update(
+            ref_count=F("ref_count") + count
+        ):
+            return blob_hash
+        location = await asyncio.to_thread(get_segment_store().append, raw)
+        await _upsert_blob(conn, blob_hash, "", None, location, len(content), count)
+        await index_blob_texts(conn, [(blob_hash, content)])
+        return blob_hash
+
+    compressed = compress_content(content)
+    ref_count = await _upsert_blob(
+        conn,
+        blob_hash,
+        "" if compressed is not None else content,
+        compressed,
+        None,
+        len(content),
+        count,
+    )
+    if ref_count == count:
+        # 新しく作ったblobだけを検索インデックスに加える
+        await index_blob_texts(conn, [(blob_hash, content)])
+    return blob_hash
+
+
+async def acquire_blobs(conn: BaseDBAsyncClient, contents: list[str]) -> list[str]:
+    """
+    複数の本文のblobをまとめて作成・参照数を加算する（一括インポート用）
+
+    同じ本文はまとめて1行分の参照数を足し、DBに保存する本文は execute_many の1文で書き込む。
+    セグメントファイルに置く大きな本文だけは acquire_blob で1件ずつ処理する。
+
+    Returns:
+        contents と同じ順序のblobのハッシュ
+    """
+    hashes = [content_hash(content) for content in contents]
+    counts = Counter(hashes)
+    first_contents = dict(zip(hashes, contents))
+
+    rows = []
+    for blob_hash, count in counts.items():
+        content = first_contents[blob_hash]
+        if settings.BLOB_STORE_THRESHOLD and len(content.encode("utf-8")) >= settings.BLOB_STORE_THRESHOLD:
+            await acquire_blob(conn, content, count)
+            continue
+        compressed = compress_content(content)
+        rows.append(_blob_values(
+            blob_hash,
+            "" if compressed is not None else content,
+            compressed,
+            None,
+            len(content),
+            count,
+        ))
+    if rows:
+        # 検索インデックスに加えるため、まだないblobを先に調べる
+        new_hashes = {row[0] for row in rows}
+        candidates = list(new_hashes)
+        for start in range(0, len(candidates), RELEASE_BATCH_SIZE):
+            new_hashes.difference_update(
+                await MessageBlob.filter(hash__in=candidates[start:start + RELEASE_BATCH_SIZE]).using_db(
+                    conn
+                ).values_list("hash", flat=True)
+            )
+        await conn.execute_many(_upsert_sql(conn), rows)
+        await index_blob_texts(conn, [(blob_hash, first_contents[blob_hash]) for blob_hash in new_hashes])
+    return hashes
+
+
+async def copy_blob(conn: BaseDBAsyncClient, blob: MessageBlob, count: int) -> None:
+    """別のコネクションから読んだblobを、保存形式を変えずに参照数count分取り込む（セグメントは共有）"""
+    ref_count = await _upsert_blob(
+        conn, blob.hash, blob.content, blob.content_compressed, blob.location, blob.length, count
+    )
+    if ref_count == count:
+        await index_blob_texts(conn, [(blob.hash, blob.text)])
+
+
+async def _upsert_blob(
+        conn: BaseDBAsyncClient,
+        blob_hash: str,
+        content: str,
+        content_compressed: bytes | None,
+        location: SegmentLocation | None,
+        length: int,
+        count: int,
+        ) -> int:
+    """
+    blobを作成するか、既存のblobの参照数にcountを足す
+
+    同じ本文の同時書き込みでも一意制約違反にならないよう、
+    INSERT ... ON CONFLICT で作成と加算を1文で行う。
+
+    Returns:
+        加算後の参照数（count と等しければ新しく作ったblob）
+    """
+    values = _blob_values(blob_hash, content, content_compressed, location, length, count)
+    _, rows = await conn.execute_query(_upsert_sql(conn) + ' RETURNING "ref_count"', values)
+    return rows[0][0]
+
+
+def _blob_values(
+        blob_hash: str,
+        content: str,
+        content_compressed: bytes | None,
+        location: SegmentLocation | None,
+        length: int,
+        count: int,
+        ) -> list:
+    """_BLOB_COLUMNS の順に並べたblobの列の値"""
+    return [
+        blob_hash,
+        content,
+        content_compressed,
+        location.segment if location else None,
+        location.offset if location else None,
+        location.length if location else None,
+        length,
+        count,
+        MessageBlob._meta.fields_map["created_at"].to_db_value(timezone.now(), MessageBlob),
+    ]
+
+
+def _upsert_sql(conn: BaseDBAsyncClient) -> str:
+    """blobの作成か参照数の加算を1文で行うSQL"""
+    columns = ", ".join(f'"{c}"' for c in _BLOB_COLUMNS)
+    return (
+        f'INSERT INTO "message_blobs" ({columns}) VALUES ({placeholders(conn, len(_BLOB_COLUMNS))}) '
+        'ON CONFLICT ("hash") DO UPDATE SET "ref_count" = "message_blobs"."ref_count" + excluded."ref_count"'
+    )
+
+
+async def release_blobs(conn: BaseDBAsyncClient, blob_hashes: Iterable[str | None]) -> int:
+    """
+    blobの参照数を減らし、参照がなくなったblobを削除する
+
+    Args:
+        conn: トランザクションのコネクション
+        blob_hashes: 削除したメッセージが参照していたblob（Noneは無視、重複は回数分減らす）
+
+    Returns:
+        削除したblobの数
+    """
+    counts = Counter(h for h in blob_hashes if h is not None)
+    if not counts:
+        return 0
+    # チャット単位の削除では数百のblobを減らすので、1文の execute_many にまとめる
+    await conn.execute_many(
+        f'UPDATE "message_blobs" SET "ref_count" = "ref_count" - {placeholder(conn, 1)} '
+        f'WHERE "hash" = {placeholder(conn, 2)}',
+        [[count, blob_hash] for blob_hash, count in counts.items()],
+    )
+    # チャット単位の削除では数万件になることもあるので、パラメーター数の上限に収まるよう分ける
+    hashes, deleted = list(counts), 0
+    for start in range(0, len(hashes), RELEASE_BATCH_SIZE):
+        batch = hashes[start:start + RELEASE_BATCH_SIZE]
+        deleted += await _delete_blobs(conn, MessageBlob.filter(hash__in=batch, ref_count__lte=0).exclude(
+            hash__in=Subquery(MessageModel.filter(blob_id__in=batch).values("blob_id"))
+        ))
+    return deleted
+
+
+async def _delete_blobs(conn: BaseDBAsyncClient, query: QuerySet[MessageBlob]) -> int:
+    """クエリのblobを削除し、検索インデックスからも除く"""
+    hashes = await query.using_db(conn).values_list("hash", flat=True)
+    for start in range(0, len(hashes), RELEASE_BATCH_SIZE):
+        await MessageBlob.filter(hash__in=hashes[start:start + RELEASE_BATCH_SIZE]).using_db(conn).delete()
+    await unindex_blobs(conn, hashes)
+    return len(hashes)
+
+
+async def collect_message_blobs(conn: BaseDBAsyncClient, message_table: str) -> None:
+    """
+    一時テーブルのUUIDのメッセージが参照するblobと参照数を RELEASED_BLOBS_TABLE に集める
+
+    10万件単位の削除でハッシュをPythonに読み込まないよう、1文の集計で作る。
+    メッセージを削除する前に呼び、削除後に release_collected_blobs で参照数を減らす。
+
+    Args:
+        conn: トランザクションのコネクション
+        message_table: メッセージのUUIDを "uuid" 列に持つ一時テーブル
+    """
+    await conn.execute_query(f'DROP TABLE IF EXISTS "{RELEASED_BLOBS_TABLE}"')
+    await conn.execute_query(
+        f'CREATE TEMPORARY TABLE "{RELEASED_BLOBS_TABLE}" ("hash" VARCHAR(64) PRIMARY KEY, "count" INT NOT NULL)'
+    )
+    await conn.execute_query(
+        f'INSERT INTO "{RELEASED_BLOBS_TABLE}" ("hash", "count") '
+        f'SELECT "blob_id", COUNT(*) FROM "messages" WHERE "blob_id" IS NOT NULL '
+        f'AND "uuid" IN (SELECT "uuid" FROM "{message_table}") GROUP BY "blob_id"'
+    )
+
+
+async def release_collected_blobs(conn: BaseDBAsyncClient) -> int:
+    """
+    collect_message_blobs で集めた分だけblobの参照数を減らし、参照がなくなったblobを削除する
+
+    集めた一時テーブルもここで削除する。
+
+    Returns:
+        削除したblobの数
+    """
+    released = f'SELECT "hash" FROM "{RELEASED_BLOBS_TABLE}"'
+    try:
+        await conn.execute_query(
+            f'UPDATE "message_blobs" SET "ref_count" = "ref_count" - ('
+            f'SELECT r."count" FROM "{RELEASED_BLOBS_TABLE}" r WHERE r."hash" = "message_blobs"."hash"'
+            f') WHERE "hash" IN ({released})'
+        )
+        unreferenced = (
+            f'FROM "message_blobs" WHERE "ref_count" <= 0 AND "hash" IN ({released}) '
+            f'AND NOT EXISTS (SELECT 1 FROM "messages" m WHERE m."blob_id" = "message_blobs"."hash")'
+        )
+        _, rows = await conn.execute_query(f'SELECT "hash" {unreferenced}')
+        await conn.execute_query(f'DELETE {unreferenced}')
+        await unindex_blobs(conn, [row[0] for row in rows])
+    finally:
+        await conn.execute_query(f'DROP TABLE IF EXISTS "{RELEASED_BLOBS_TABLE}"')
+    return len(rows)
+
+
+async def resolve_blobs(
+        messages: QuerySet[MessageModel],
+        db: BaseDBAsyncClient | None = None,
+        ) -> dict[str, MessageBlob]:
+    """
+    メッセージのクエリが参照するblobを1クエリでまとめて取得する
+
+    本文の展開やセグメントの読み込みは MessageBlob.text に初めてアクセスしたときに行う。
+
+    Args:
+        messages: 対象メッセージのクエリ（チャット木全体など）
+        db: 読み込むコネクション
+
+    Returns:
+        blobのハッシュ -> blob
+    """
+    blobs = await MessageBlob.filter(
+        hash__in=Subquery(messages.filter(blob_id__isnull=False).values("blob_id"))
+    ).using_db(db)
+    return {blob.hash: blob for blob in blobs}
+
+
+async def resolve_blob_texts(
+        blob_hashes: list[str],
+        db: BaseDBAsyncClient | None = None,
+        *,
+        batch_size: int = 500,
+        ) -> dict[str, str]:
+    """
+    ハッシュで指定したblobの本文をまとめて取得する
+
+    メッセージの行を読まずに本文だけが欲しい場合（スナップショットからの復元など）に使う。
+    モデルを作らずに列の値だけを batch_size 件ずつ読む。
+
+    Returns:
+        blobのハッシュ -> 本文（存在しないblobは含まない）
+    """
+    texts = {}
+    for start in range(0, len(blob_hashes), batch_size):
+        rows = await MessageBlob.filter(hash__in=blob_hashes[start:start + batch_size]).using_db(db).values_list(
+            "hash", "content", "content_compressed", "segment", "segment_offset", "segment_length"
+        )
+        for blob_hash, content, compressed, segment, offset, length in rows:
+            location = SegmentLocation(segment, offset, length) if segment is not None else None
+            texts[blob_hash] = MessageBlob.decode_text(content, compressed, location)
+    return texts
+
+
+async def collect_garbage(conn: BaseDBAsyncClient) -> int:
+    """
+    どのメッセージからも参照されていないblobを削除する
+
+    ref_count がずれていても参照中のblobは消さないよう、実際の参照も確認する。
+
+    Returns:
+        削除したblobの数
+    """
+    return await _delete_blobs(conn, MessageBlob.filter(ref_count__lte=0).exclude(
+        hash__in=Subquery(MessageModel.filter(blob_id__isnull=False).values("blob_id"))
+    ))
@@ -0,0 +1,90 @@
+"""
+チャットのエクスポート形式（NDJSON）の読み書き
+
+1行に1レコードのJSONを書く。レコードは "type" で区別する:
+
+    {"type": "chat", "uuid": ..., "owner_uuid": ..., "created": ..., "updated": ...}
+    {"type": "message", "uuid": ..., "chat_uuid": ..., "parent_uuid": ..., "role": ...,
+     "content": ..., "user_context_id": ..., "created_at": ..., "updated_at": ...,
+     "assistant_detail": {...} | null}
+
+chat レコードの後に、そのチャットのメッセージが続く。
+gzip はストリームのまま圧縮・展開するので、全体をメモリに載せない。
+"""
+import json
+import zlib
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
+
+# gzip形式で圧縮するときのwbits
+GZIP_WBITS = 31
+# 書き出すバイト列をまとめる単位
+CHUNK_SIZE = 64 * 1024
+
+
+def encode_record(record: dict) -> bytes:
+    """レコードをNDJSONの1行にする"""
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+async def encode_ndjson(records: AsyncIterable[dict], *, compress: bool = False) -> AsyncIterator[bytes]:
+    """
+    レコードのストリームをNDJSONのバイト列のストリームにする
+
+    1行ずつ書き出すと送信の回数が増えるので、CHUNK_SIZE ごとにまとめて返す。
+
+    Args:
+        records: エクスポートするレコード
+        compress: Trueならgzipで圧縮したバイト列を返す
+    """
+    compressor = zlib.compressobj(wbits=GZIP_WBITS) if compress else None
+    buffer = bytearray()
+    async for record in records:
+        line = encode_record(record)
+        buffer += compressor.compress(line) if compressor is not None else line
+        if len(buffer) >= CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    if compressor is not None:
+        buffer += compressor.flush()
+    if buffer:
+        yield bytes(buffer)
+
+
+def decode_ndjson(chunks: Iterable[bytes], *, compressed: bool = False) -> Iterator[dict]:
+    """
+    NDJSONのバイト列のストリームをレコードのストリームにする
+
+    チャンクの境界で行が切れていてもよい。空行は読み飛ばす。
+
+    Args:
+        chunks: 読み込むバイト列（ファイルなら CHUNK_SIZE ずつ読んだもの）
+        compressed: Trueならgzipを展開しながら読む
+
+    Raises:
+        ValueError: JSONとして読めない行や "type" のない行がある場合（行番号付き）
+    """
+    decompressor = zlib.decompressobj(wbits=GZIP_WBITS) if compressed else None
+    pending = b""
+    line_number = 0
+    for chunk in chunks:
+        data = pending + (decompressor.decompress(chunk) if decompressor is not None else chunk)
+        *lines, pending = data.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield _decode_line(line, line_number)
+    if decompressor is not None:
+        pending += decompressor.flush()
+    if pending.strip():
+        yield _decode_line(pending, line_number + 1)
+
+
+def _decode_line(line: bytes, line_number: int) -> dict:
+    """NDJSONの1行をレコードにする"""
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        raise ValueError(f"Invalid JSON at line {line_number}: {e}") from e
+    if not isinstance(record, dict) or "type" not in record:
+        raise ValueError(f"Record without type at line {line_number}")
+    return record
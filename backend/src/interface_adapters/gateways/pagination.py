@@ -0,0 +1,37 @@
+"""
+キーセット（カーソル）ページネーション用のヘルパー
+
+カーソルは並び順のキー値を base64url でエンコードした不透明な文字列として扱う。
+"""
+import base64
+import json
+
+
+def encode_cursor(*values: str) -> str:
+    """キー値の並びを不透明なカーソル文字列に変換"""
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> tuple[str, ...]:
+    """
+    カーソル文字列をキー値のタプルに戻す
+
+    Args:
+        cursor: encode_cursorで作成したカーソル
+        size: 期待するキーの個数
+
+    Raises:
+        ValueError: カーソルの形式が不正な場合
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if not all(isinstance(v, str) for v in values):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return tuple(values)
@@ -0,0 +1,88 @@
+"""
+メッセージの意味検索のインデックス（SemanticIndexProtcol の実装）
+
+埋め込み器でメッセージの本文をベクトルにし、所有者ごとの VectorStore に追記する。
+保存先は {SEMANTIC_INDEX_DIR}/{埋め込み器の名前}/{所有者のUUID}/ で、埋め込み器を替えると
+別のディレクトリになる（scripts/semantic_index.py rebuild で新しい埋め込み器のベクトルを作る）。
+埋め込みとファイルの読み書きはイベントループを止めないようにスレッドで行う。
+"""
+import asyncio
+import threading
+from functools import lru_cache
+from pathlib import Path
+from uuid import UUID
+
+from src.application.ports.output.semantic_index import SemanticIndexProtcol
+from src.domain.entities.message_entity import MessageEntity
+from src.infrastructure.config import settings
+from src.infrastructure.embedding import Embedder, load_embedder, numpy_available
+from src.infrastructure.storage.vector_store import VectorStore
+
+# add_messages で1回に埋め込むメッセージ数（大きなインポートでもメモリを抑える）
+EMBED_BATCH_SIZE = 2000
+
+
+class SemanticIndexImpl(SemanticIndexProtcol):
+    """
+    Args:
+        root: ユーザーごとのベクトルファイルを置くディレクトリ
+        embedder: 埋め込み器
+        nprobe: IVFで調べるクラスター数（IVFのないユーザーは全行を調べる）
+    """
+
+    def __init__(self, root: Path, embedder: Embedder, nprobe: int | None = None) -> None:
+        self.root = Path(root) / embedder.name
+        self.embedder = embedder
+        self.nprobe = nprobe
+        self._stores: dict[str, VectorStore] = {}
+        self._lock = threading.Lock()
+
+    def store(self, owner_uuid: str) -> VectorStore:
+        """所有者のベクトルファイル"""
+        owner = str(UUID(str(owner_uuid)))
+        with self._lock:
+            store = self._stores.get(owner)
+            if store is None:
+                store = self._stores[owner] = VectorStore(self.root / owner, self.embedder.dim)
+            return store
+
+    def add_texts(self, owner_uuid: str, rows: list[tuple[str, str, str]]) -> None:
+        """(メッセージのUUID, チャットのUUID, 本文) をまとめて追加する（空の本文は除く）"""
+        rows = [row for row in rows if row[2].strip()]
+        if not rows:
+            return
+        vectors = self.embedder.embed([text for _, _, text in rows])
+        keys = [(UUID(str(message_uuid)), UUID(str(chat_uuid))) for message_uuid, chat_uuid, _ in rows]
+        self.store(owner_uuid).append(keys, vectors)
+
+    async def add_message(self, owner_uuid: str, chat_uuid: str, message: MessageEntity) -> None:
+        await asyncio.to_thread(
+            self.add_texts, owner_uuid, [(str(message.uuid), str(chat_uuid), message.content)]
+        )
+
+    async def add_messages(self, owner_uuid: str, chat_uuid: str, messages: list[MessageEntity]) -> None:
+        for start in range(0, len(messages), EMBED_BATCH_SIZE):
+            batch = messages[start:start + EMBED_BATCH_SIZE]
+            await asyncio.to_thread(
+                self.add_texts, owner_uuid, [(str(m.uuid), str(chat_uuid), m.content) for m in batch]
+            )
+
+    async def search(self, owner_uuid: str, query: str, limit: int) -> list[tuple[str, str, float]]:
+        return await asyncio.to_thread(self._search, owner_uuid, query, limit)
+
+    def _search(self, owner_uuid: str, query: str, limit: int) -> list[tuple[str, str, float]]:
+        vector = self.embedder.embed([query])[0]
+        if not vector.any():
+            return []
+        hits = self.store(owner_uuid).search(vector, limit, self.nprobe)
+        return [(str(hit.message_uuid), str(hit.chat_uuid), hit.score) for hit in hits]
+
+
+@lru_cache()
+def get_semantic_index() -> SemanticIndexImpl | None:
+    """設定値から作った意味検索のインデックスのシングルトン（無効、または NumPy がなければNone）"""
+    if not settings.SEMANTIC_SEARCH or not numpy_available():
+        return None
+    return SemanticIndexImpl(
+        Path(settings.SEMANTIC_INDEX_DIR), load_embedder(), nprobe=settings.SEMANTIC_IVF_NPROBE
+    )
@@ -0,0 +1,150 @@
+"""
+チャット木の整合性（ルートが1つで、全てのメッセージがルートから辿れること）の検査
+
+メッセージの親は ON DELETE SET NULL で、トランザクションの外で書かれた古いデータもあるため、
+ルートが複数あったり、親が見つからない・別のチャットにある・循環している行が残ることがある。
+そうなるとチャット全体が restore_from_message_list で読めなくなる。
+
+ここでは1チャット分の (UUID, 親のUUID) から問題を分類し、修復で付け替える行を決めるだけで、
+DBの読み書きは ChatRepositoryImpl.check_chat_tree が行う。
+"""
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from uuid import UUID
+
+# 修復で付け替えた行をまとめる復旧用のノードの本文
+RECOVERY_CONTENT = "（整合性チェックで復旧したメッセージ）"
+
+
+class TreeCycleError(ValueError):
+    """メッセージの親を辿ると同じメッセージに戻る（親が循環している）場合のエラー"""
+
+
+@dataclass
+class TreeIssues:
+    """
+    1チャットの整合性の問題
+
+    Attributes:
+        chat_uuid: チャットのUUID
+        extra_roots: 残すルート以外の、親を持たない行（フォークでは全てのルート）
+        orphans: 親がDBに見つからない行
+        cross_chat: 親が別のチャット（フォークでは引き継いだ祖先以外）にある行
+        cycles: 上のどれからも辿れない行（循環しているか、循環の下にある）
+        reparented: 修復で復旧用のノードの下に付け替えた行
+        recovery_uuid: 修復で作った復旧用のノード
+    """
+
+    chat_uuid: UUID
+    extra_roots: list[UUID] = field(default_factory=list)
+    orphans: list[UUID] = field(default_factory=list)
+    cross_chat: list[UUID] = field(default_factory=list)
+    cycles: list[UUID] = field(default_factory=list)
+    reparented: list[UUID] = field(default_factory=list)
+    recovery_uuid: UUID | None = None
+
+    @property
+    def ok(self) -> bool:
+        return not (self.extra_roots or self.orphans or self.cross_chat or self.cycles)
+
+    def summary(self) -> str:
+        """1行の報告"""
+        counts = [
+            f"{name}={len(values)}"
+            for name, values in (
+                ("extra_roots", self.extra_roots), ("orphans", self.orphans),
+                ("cross_chat", self.cross_chat), ("cycles", self.cycles),
+            )
+            if values
+        ]
+        if self.recovery_uuid is not None:
+            counts.append(f"reparented={len(self.reparented)} under {self.recovery_uuid}")
+        return f"{self.chat_uuid}: {' '.join(counts) or 'ok'}"
+
+
+def find_tree_issues(
+        chat_uuid: UUID,
+        rows: list[tuple[UUID, UUID | None]],
+        *,
+        inherited: Iterable[UUID] = (),
+        external_chats: dict[UUID, UUID] | None = None,
+        ) -> tuple[TreeIssues, UUID | None]:
+    """
+    1チャットの行を分類する
+
+    ルートは先頭のもの（呼び出し側で作成順に並べる）を残し、それ以外を extra_roots にする。
+    フォークは自分のルートを持たず、引き継いだ祖先の下に付くのが正しい形。
+
+    Args:
+        chat_uuid: チャットのUUID
+        rows: チャットの (UUID, 親のUUID)（作成順）
+        inherited: フォークで引き継いだ祖先（これらを親に持つ行は正しい）
+        external_chats: チャットの外にある親のうち、DBに見つかったもの -> そのチャット
+
+    Returns:
+        (問題, 残すルート)（フォークや、ルートがない場合の残すルートはNone）
+    """
+    inherited = set(inherited)
+    external_chats = external_chats or {}
+    issues = TreeIssues(chat_uuid)
+    uuids = {message_uuid for message_uuid, _ in rows}
+
+    root, entries = None, []
+    children: dict[UUID, list[UUID]] = {}
+    for message_uuid, parent_uuid in rows:
+        if parent_uuid is None:
+            if root is None and not inherited:
+                root = message_uuid
+                entries.append(message_uuid)
+            else:
+                issues.extra_roots.append(message_uuid)
+        elif parent_uuid in uuids:
+            children.setdefault(parent_uuid, []).append(message_uuid)
+        elif parent_uuid in inherited:
+            entries.append(message_uuid)
+        elif parent_uuid in external_chats:
+            issues.cross_chat.append(message_uuid)
+        else:
+            issues.orphans.append(message_uuid)
+
+    # 正しい入口と問題のある行から辿れなかった行は循環（かその下）にある
+    reached = _reach([*entries, *issues.extra_roots, *issues.orphans, *issues.cross_chat], children)
+    issues.cycles = [message_uuid for message_uuid, _ in rows if message_uuid not in reached]
+    return issues, root
+
+
+def plan_repair(
+        issues: TreeIssues,
+        rows: list[tuple[UUID, UUID | None]],
+        ) -> list[UUID]:
+    """
+    復旧用のノードの下に付け替える行を決める
+
+    extra_roots・orphans・cross_chat は全て付け替える。循環は作成順で最初の行を付け替えて
+    断ち切り、その行から辿れる行は付け替えない（元の親子関係をできるだけ残す）。
+    """
+    reparent = [*issues.extra_roots, *issues.orphans, *issues.cross_chat]
+    if issues.cycles:
+        in_cycles = set(issues.cycles)
+        children: dict[UUID, list[UUID]] = {}
+        for message_uuid, parent_uuid in rows:
+            if message_uuid in in_cycles and parent_uuid in in_cycles:
+                children.setdefault(parent_uuid, []).append(message_uuid)
+        reached: set[UUID] = set()
+        for message_uuid in issues.cycles:
+            if message_uuid not in reached:
+                reparent.append(message_uuid)
+                reached |= _reach([message_uuid], children)
+    return reparent
+
+
+def _reach(starts: list[UUID], children: dict[UUID, list[UUID]]) -> set[UUID]:
+    """starts から子を辿れる行（再帰しない）"""
+    reached = set(starts)
+    stack = list(starts)
+    while stack:
+        for child in children.get(stack.pop(), ()):
+            if child not in reached:
+                reached.add(child)
+                stack.append(child)
+    return reached
@@ -0,0 +1,69 @@
+"""
+チャット木のスナップショット（chat_tree_snapshots.data）の形式
+
+メッセージ1件を配列1つで表し、親はUUIDを繰り返さずに配列内の位置で持つ:
+
+    [uuid, 親の位置（ルートは-1）, role, blobのハッシュ, 本文, user_context_id, created_at, updated_at]
+
+本文はblobのハッシュで参照し、blob導入前の行（ハッシュがNone）だけ本文をそのまま持つ。
+全体を {"format": 1, "messages": [...]} のJSONにしてzlibで圧縮する。
+"""
+import json
+import zlib
+
+SNAPSHOT_FORMAT = 1
+# スナップショットの1件（メッセージの辞書）のキー
+SNAPSHOT_KEYS = (
+    "uuid", "parent_uuid", "role", "blob_id", "content", "user_context_id", "created_at", "updated_at",
+)
+
+
+def encode_snapshot(entries: list[dict]) -> bytes:
+    """
+    メッセージの一覧をスナップショットのバイト列にする
+
+    Args:
+        entries: SNAPSHOT_KEYS を持つ辞書（値は文字列かNone、順序は問わない）
+    """
+    positions = {entry["uuid"]: i for i, entry in enumerate(entries)}
+    messages = [
+        [
+            entry["uuid"],
+            positions[entry["parent_uuid"]] if entry["parent_uuid"] is not None else -1,
+            entry["role"],
+            entry["blob_id"],
+            entry["content"],
+            entry["user_context_id"],
+            entry["created_at"],
+            entry["updated_at"],
+        ]
+        for entry in entries
+    ]
+    payload = {"format": SNAPSHOT_FORMAT, "messages": messages}
+    return zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def decode_snapshot(data: bytes) -> list[dict]:
+    """
+    スナップショットのバイト列をメッセージの一覧に戻す
+
+    Raises:
+        ValueError: 未知の形式の場合
+    """
+    payload = json.loads(zlib.decompress(data))
+    if payload.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"Unknown snapshot format: {payload.get('format')}")
+    messages = payload["messages"]
+    return [
+        {
+            "uuid": message[0],
+            "parent_uuid": messages[message[1]][0] if message[1] >= 0 else None,
+            "role": message[2],
+            "blob_id": message[3],
+            "content": message[4],
+            "user_context_id": message[5],
+            "created_at": message[6],
+            "updated_at": message[7],
+        }
+        for message in messages
+    ]
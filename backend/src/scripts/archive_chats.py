@@ -0,0 +1,105 @@
+"""
+長く更新されていないチャットをアーカイブ（コールドストレージ）へ移すジョブ
+
+    # 30日以上更新されていないチャットをアーカイブ
+    uv run python -m src.scripts.archive_chats --days 30
+
+    # 対象のチャット数だけを表示
+    uv run python -m src.scripts.archive_chats --days 30 --dry-run
+
+メッセージは chat_archives にチャット単位のgzip NDJSONとして移り、messages からは消える。
+チャット一覧にはそのまま表示され、所有者が開いたとき（ChatSelection.open_chat）にメッセージが戻る。
+実行前後の messages の行数をコネクションごとに表示する。cron などで定期的に実行する想定。
+"""
+import argparse
+import asyncio
+import sys
+from datetime import timedelta
+
+from tortoise import Tortoise, connections, timezone
+
+from src.infrastructure.db.config import SHARD_CONNECTIONS, TORTOISE_ORM, WRITE_CONNECTION
+from src.infrastructure.db.models import ChatTreeDetail, MessageModel
+from src.infrastructure.db.sharding import ensure_shard_schemas
+from src.interface_adapters.gateways.chat_repository import ChatRepositoryImpl
+
+# 1回に読み込むチャット数
+BATCH_SIZE = 200
+
+
+async def init_db():
+    """DBを初期化（シャードにもテーブルを作成）"""
+    await Tortoise.init(config=TORTOISE_ORM)
+    await Tortoise.generate_schemas()
+    await ensure_shard_schemas()
+
+
+async def archive_inactive_chats(
+        days: int,
+        *,
+        dry_run: bool = False,
+        batch_size: int = BATCH_SIZE,
+        ) -> dict[str, int]:
+    """
+    days 日以上更新されていないチャットをアーカイブする
+
+    Returns:
+        アーカイブしたチャット数とメッセージ数
+    """
+    inactive_before = timezone.now() - timedelta(days=days)
+    repo = ChatRepositoryImpl()
+    stats = {"chats": 0, "messages": 0}
+    for name in [WRITE_CONNECTION, *SHARD_CONNECTIONS]:
+        db = connections.get(name)
+        hot_before = await MessageModel.all().using_db(db).count()
+        last_uuid = None
+        while True:
+            query = ChatTreeDetail.filter(
+                archived_at__isnull=True, updated__lt=inactive_before
+            ).using_db(db)
+            if last_uuid is not None:
+                query = query.filter(uuid__gt=last_uuid)
+            chats = await query.order_by("uuid").limit(batch_size).values("uuid", "owner_uuid")
+            if not chats:
+                break
+            last_uuid = chats[-1]["uuid"]
+
+            for chat in chats:
+                if dry_run:
+                    stats["chats"] += 1
+                    continue
+                archived = await repo.archive_chat(
+                    chat["uuid"], chat["owner_uuid"], inactive_before=inactive_before
+                )
+                if archived is not None:
+                    stats["chats"] += 1
+                    stats["messages"] += archived
+        hot_after = await MessageModel.all().using_db(db).count()
+        print(f"  {name:<10} messages: {hot_before:>10} -> {hot_after:>10}")
+    return stats
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=30, help="この日数以上更新されていないチャットを対象にする")
+    parser.add_argument("--dry-run", action="store_true", help="対象のチャット数だけを表示する")
+    args = parser.parse_args()
+    if args.days < 1:
+        print("❌ Error: --days must be at least 1", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        await init_db()
+        stats = await archive_inactive_chats(args.days, dry_run=args.dry_run)
+        if args.dry_run:
+            print(f"{stats['chats']} chats would be archived")
+        else:
+            print(f"✅ Archived {stats['chats']} chats / {stats['messages']} messages")
+    finally:
+        # DB接続が初期化されている場合のみクローズ
+        if Tortoise._inited:
+            await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+import asyncio
+import sys
+from tortoise import Tortoise, connections
+from src.infrastructure.db.config import TORTOISE_ORM
+from src.infrastructure.db.models import ChatTreeDetail
+from src.infrastructure.db.sharding import ensure_shard_schemas, chat_connection_names
+from src.interface_adapters.gateways.chat_repository import ChatRepositoryImpl
+
+# 1回に読み込むチャット数
+BATCH_SIZE = 500
+
+
+async def init_db():
+    """DBを初期化"""
+    await Tortoise.init(config=TORTOISE_ORM)
+    await Tortoise.generate_schemas()
+    await ensure_shard_schemas()
+
+
+async def backfill_chat_summary(batch_size: int = BATCH_SIZE) -> int:
+    """全チャットのサマリー列をメッセージから集計し直す"""
+    await init_db()
+    repo = ChatRepositoryImpl()
+
+    processed = 0
+    # シャーディング時は各シャードを順に処理する
+    for connection_name in chat_connection_names():
+        last_uuid = None
+        while True:
+            query = ChatTreeDetail.all().using_db(connections.get(connection_name))
+            if last_uuid is not None:
+                query = query.filter(uuid__gt=last_uuid)
+            chats = await query.order_by("uuid").limit(batch_size).values_list("uuid", "owner_uuid")
+            if not chats:
+                break
+
+            for chat_uuid, owner_uuid in chats:
+                await repo.refresh_chat_summary(chat_uuid, owner_uuid)
+            processed += len(chats)
+            last_uuid = chats[-1][0]
+            print(f"  {processed} chats processed...")
+
+    return processed
+
+
+async def main():
+    try:
+        batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else BATCH_SIZE
+        processed = await backfill_chat_summary(batch_size)
+        print(f"\n✅ Backfilled summary columns for {processed} chats")
+    finally:
+        # DB接続が初期化されている場合のみクローズ
+        if Tortoise._inited:
+            await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+"""
+意味検索（VectorStore）の検索速度のベンチマーク
+
+一時ディレクトリに合成したベクトル（話題ごとにまとまった、正規化済みのベクトル）を書き込み、
+全行の走査とIVFの検索時間、IVFの再現率（全行の走査の上位k件のうち見つかった割合）を比べる。
+HashingEmbedder の埋め込みの速度も測る。要 numpy（uv sync --extra semantic）。
+
+    uv run python -m src.scripts.bench_semantic_search [vectors]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+from uuid import uuid4
+
+import numpy as np
+
+from src.infrastructure.config import settings
+from src.infrastructure.embedding import HashingEmbedder
+from src.infrastructure.storage.vector_store import VectorStore
+
+QUERIES = 200
+TOP_K = 10
+# 合成データの話題の数
+TOPICS = 2000
+# 話題の中心からのばらつき
+NOISE = 0.6
+WRITE_CHUNK_ROWS = 100_000
+NPROBES = (4, 16, 64)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def fill(store: VectorStore, count: int, rng: np.random.Generator) -> np.ndarray:
+    """話題ごとにまとまったベクトルを書き込み、話題の中心を返す"""
+    centers = _normalize(rng.standard_normal((TOPICS, store.dim)))
+    for start in range(0, count, WRITE_CHUNK_ROWS):
+        rows = min(WRITE_CHUNK_ROWS, count - start)
+        topics = rng.integers(0, TOPICS, rows)
+        noise = rng.standard_normal((rows, store.dim)) * NOISE / np.sqrt(store.dim)
+        chat = uuid4()
+        store.append([(uuid4(), chat) for _ in range(rows)], _normalize(centers[topics] + noise))
+    return centers
+
+
+def measure(store: VectorStore, queries: np.ndarray, nprobe: int | None) -> tuple[list[float], list[set]]:
+    """クエリごとの検索時間（ミリ秒）と上位k件"""
+    latencies, results = [], []
+    for query in queries:
+        started = time.perf_counter()
+        hits = store.search(query, TOP_K, nprobe)
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append({hit.message_uuid for hit in hits})
+    return latencies, results
+
+
+def _percentiles(latencies: list[float]) -> str:
+    p50, p95 = np.percentile(latencies, [50, 95])
+    return f"p50 {p50:8.2f} ms  p95 {p95:8.2f} ms"
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    dim = settings.SEMANTIC_DIM
+    rng = np.random.default_rng(0)
+
+    embedder = HashingEmbedder(dim)
+    texts = [f"ブランチ {i} のデプロイ手順を確認して、release notes を更新する" * 4 for i in range(2000)]
+    started = time.perf_counter()
+    embedder.embed(texts)
+    embed_rate = len(texts) / (time.perf_counter() - started)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = VectorStore(Path(tmp_dir), dim)
+        started = time.perf_counter()
+        centers = fill(store, count, rng)
+        fill_sec = time.perf_counter() - started
+
+        topics = rng.integers(0, TOPICS, QUERIES)
+        queries = _normalize(centers[topics] + rng.standard_normal((QUERIES, dim)) * NOISE / np.sqrt(dim))
+        # 1回目はページキャッシュに載せるため計測しない
+        store.search(queries[0], TOP_K)
+        brute, exact = measure(store, queries, None)
+
+        started = time.perf_counter()
+        nlist = store.build_ivf()
+        ivf_sec = time.perf_counter() - started
+        ivf_results = {}
+        for nprobe in NPROBES:
+            latencies, found = measure(store, queries, nprobe)
+            recall = np.mean([len(a & b) / len(a) for a, b in zip(exact, found)])
+            ivf_results[nprobe] = (latencies, recall)
+        size = store.vectors_path.stat().st_size
+        store.close()
+
+    print(f"=== Semantic search benchmark ({count:,} vectors, dim {dim}, top {TOP_K}) ===")
+    print(f"  embed (hashing):  {embed_rate:>10,.0f} texts/s")
+    print(f"  write vectors:    {fill_sec:>10.2f} s ({size / 1024 ** 2:,.0f} MiB)")
+    print(f"  brute force:      {_percentiles(brute)}")
+    print(f"  build IVF:        {ivf_sec:>10.2f} s ({nlist} lists)")
+    for nprobe, (latencies, recall) in ivf_results.items():
+        print(f"  IVF nprobe={nprobe:<4}  {_percentiles(latencies)}  recall@{TOP_K} {recall:.3f}")
+
+
+if __name__ == "__main__":
+    main()
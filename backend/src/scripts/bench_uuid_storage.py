@@ -0,0 +1,132 @@
+"""
+UUIDの保存形式（text / binary）によるインデックスサイズと検索速度の比較ベンチマーク
+
+messagesテーブルと同じ形（UUID主キー + chat_tree_id / parent_id インデックス）の
+テーブルを一時SQLiteファイルに作り、両形式で同じデータを入れて比較する。
+
+    uv run python -m src.scripts.bench_uuid_storage [rows]
+"""
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from uuid import UUID, uuid4
+
+# 1チャットあたりのメッセージ数
+MESSAGES_PER_CHAT = 50
+LOOKUPS = 20_000
+
+_SCHEMA = """
+CREATE TABLE "messages" (
+    "uuid" {t} NOT NULL PRIMARY KEY,
+    "content" TEXT NOT NULL,
+    "chat_tree_id" {t} NOT NULL,
+    "parent_id" {t}
+);
+CREATE INDEX "idx_messages_chat_tree" ON "messages" ("chat_tree_id");
+CREATE INDEX "idx_messages_parent" ON "messages" ("parent_id");
+"""
+
+
+def _encode(value: UUID | None, storage: str):
+    if value is None:
+        return None
+    return value.bytes if storage == "binary" else str(value)
+
+
+def _index_pages(conn: sqlite3.Connection) -> dict[str, int]:
+    """インデックスごとのページ数（dbstatが使えない場合は空）"""
+    try:
+        rows = conn.execute(
+            "SELECT name, COUNT(*) FROM dbstat WHERE name LIKE '%messages%' GROUP BY name"
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    return dict(rows)
+
+
+def run(storage: str, rows: list[tuple[UUID, UUID, UUID | None]], db_path: Path) -> dict:
+    """1形式分のデータ投入と計測"""
+    sql_type = "BLOB" if storage == "binary" else "CHAR(36)"
+    conn = sqlite3.connect(db_path)
+    conn.executescript(_SCHEMA.format(t=sql_type))
+
+    started = time.perf_counter()
+    conn.executemany(
+        'INSERT INTO "messages" VALUES (?, ?, ?, ?)',
+        [
+            (_encode(u, storage), "x" * 40, _encode(c, storage), _encode(p, storage))
+            for u, c, p in rows
+        ],
+    )
+    conn.commit()
+    insert_sec = time.perf_counter() - started
+
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    index_pages = _index_pages(conn)
+    conn.execute("VACUUM")
+    file_size = db_path.stat().st_size
+
+    samples = random.sample(rows, min(LOOKUPS, len(rows)))
+
+    started = time.perf_counter()
+    for u, _, _ in samples:
+        conn.execute('SELECT "content" FROM "messages" WHERE "uuid"=?', (_encode(u, storage),)).fetchone()
+    pk_sec = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _, c, _ in samples[: LOOKUPS // MESSAGES_PER_CHAT]:
+        conn.execute('SELECT "uuid" FROM "messages" WHERE "chat_tree_id"=?', (_encode(c, storage),)).fetchall()
+    chat_sec = time.perf_counter() - started
+
+    conn.close()
+    return {
+        "file_size": file_size,
+        "index_bytes": {name: pages * page_size for name, pages in index_pages.items()},
+        "insert_sec": insert_sec,
+        "pk_lookup_us": pk_sec / len(samples) * 1e6,
+        "chat_lookup_us": chat_sec / max(1, len(samples[: LOOKUPS // MESSAGES_PER_CHAT])) * 1e6,
+    }
+
+
+def make_rows(count: int) -> list[tuple[UUID, UUID, UUID | None]]:
+    """チャットごとに一本道の会話を作る"""
+    rows = []
+    while len(rows) < count:
+        chat_uuid = uuid4()
+        parent = None
+        for _ in range(min(MESSAGES_PER_CHAT, count - len(rows))):
+            message_uuid = uuid4()
+            rows.append((message_uuid, chat_uuid, parent))
+            parent = message_uuid
+    return rows
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rows = make_rows(count)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results = {
+            storage: run(storage, rows, Path(tmp_dir) / f"{storage}.sqlite3")
+            for storage in ("text", "binary")
+        }
+
+    print(f"=== UUID storage benchmark ({count:,} rows) ===")
+    for storage, result in results.items():
+        print(f"\n[{storage}]")
+        print(f"  file size:        {result['file_size']:>12,} bytes")
+        for name, size in sorted(result["index_bytes"].items()):
+            print(f"  {name:<28}{size:>12,} bytes")
+        print(f"  insert:           {result['insert_sec']:>12.2f} s")
+        print(f"  pk lookup:        {result['pk_lookup_us']:>12.1f} us")
+        print(f"  chat_tree lookup: {result['chat_lookup_us']:>12.1f} us")
+
+    ratio = results["binary"]["file_size"] / results["text"]["file_size"]
+    print(f"\nbinary / text file size: {ratio:.2f}")
+
+
+if __name__ == "__main__":
+    main()
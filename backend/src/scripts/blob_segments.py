@@ -0,0 +1,192 @@
+"""
+セグメントファイルに置いた大きなメッセージ本文の管理ツール
+
+    # セグメントごとのサイズと、参照されているバイト数を表示
+    uv run python -m src.scripts.blob_segments stats
+
+    # DBに保存済みの大きな本文（BLOB_STORE_THRESHOLD 以上）をセグメントへ移す
+    uv run python -m src.scripts.blob_segments migrate
+
+    # 参照されていない領域が多いセグメントを詰め直す（アプリを止めて実行）
+    uv run python -m src.scripts.blob_segments compact [--min-dead-ratio 0.5]
+
+セグメントは追記専用のため、blobが削除されても領域はそのまま残る。本文はDBのトランザクションの
+コミット前に追記するので、ロールバックしたトランザクションの本文もどのblobからも参照されずに残る。
+compact はどのコネクションのblobからも参照されていないレコードを捨て、参照されているレコードを
+新しいセグメントへ書き直し、DBの位置を更新してから古いセグメントを削除する。
+コミット前の本文も参照されていないように見えるため、アプリを止めて実行する。
+途中で止まっても、再実行すれば続きから処理できる。
+"""
+import argparse
+import asyncio
+
+from tortoise import Tortoise, connections
+from tortoise.transactions import in_transaction
+
+from src.infrastructure.config import settings
+from src.infrastructure.db.config import TORTOISE_ORM
+from src.infrastructure.db.models import MessageBlob
+from src.infrastructure.db.sharding import chat_connection_names, ensure_shard_schemas
+from src.infrastructure.storage.segment_store import (
+    HEADER_SIZE, SegmentLocation, SegmentStore, get_segment_store,
+)
+
+# 1回に読み込むblob数
+BATCH_SIZE = 200
+
+
+async def init_db():
+    """DBを初期化"""
+    await Tortoise.init(config=TORTOISE_ORM)
+    await Tortoise.generate_schemas()
+    await ensure_shard_schemas()
+
+
+async def referenced_records() -> dict[int, dict[int, int]]:
+    """
+    全コネクションのblobが参照しているレコード（セグメント -> オフセット -> 長さ）
+
+    シャードに取り込んだblobはセグメントのレコードを共有するので、同じレコードは1つに数える。
+    """
+    referenced: dict[int, dict[int, int]] = {}
+    for connection_name in chat_connection_names():
+        rows = await MessageBlob.filter(segment__isnull=False).using_db(
+            connections.get(connection_name)
+        ).distinct().values_list("segment", "segment_offset", "segment_length")
+        for segment, offset, length in rows:
+            referenced.setdefault(segment, {})[offset] = length
+    return referenced
+
+
+def live_bytes(records: dict[int, int]) -> int:
+    """参照されているレコードがセグメント内で占めるバイト数（ヘッダーを含む）"""
+    return sum(HEADER_SIZE + length for length in records.values())
+
+
+async def print_stats(store: SegmentStore) -> None:
+    """セグメントごとのサイズと使用率、参照されていないレコードの数を表示する"""
+    referenced = await referenced_records()
+    total_size = total_live = 0
+    for segment in store.segments():
+        size = store.segment_path(segment).stat().st_size
+        records = referenced.get(segment, {})
+        used = live_bytes(records)
+        unreferenced = sum(1 for record in store.iter_records(segment) if record.location.offset not in records)
+        total_size += size
+        total_live += used
+        print(
+            f"  segment {segment:06d}: {size:>14,} bytes, {used / size if size else 0:6.1%} live, "
+            f"{unreferenced} unreferenced records"
+        )
+    print(f"\n  total: {total_size:,} bytes in {len(store.segments())} segments, {total_live:,} bytes live")
+
+
+async def migrate_to_segments(store: SegmentStore, threshold: int, batch_size: int = BATCH_SIZE) -> int:
+    """DBに保存した閾値以上の本文をセグメントに移す"""
+    migrated = 0
+    for connection_name in chat_connection_names():
+        db = connections.get(connection_name)
+        last_hash = None
+        while True:
+            # lengthは文字数なので、バイト数が閾値を超え得る行だけを候補にして後で判定する
+            query = MessageBlob.filter(segment__isnull=True, length__gte=threshold // 4).using_db(db)
+            if last_hash is not None:
+                query = query.filter(hash__gt=last_hash)
+            blobs = await query.order_by("hash").limit(batch_size)
+            if not blobs:
+                break
+            last_hash = blobs[-1].hash
+
+            async with in_transaction(connection_name) as conn:
+                for blob in blobs:
+                    raw = blob.text.encode("utf-8")
+                    if len(raw) < threshold:
+                        continue
+                    location = await asyncio.to_thread(store.append, raw)
+                    await MessageBlob.filter(hash=blob.hash).using_db(conn).update(
+                        content="",
+                        content_compressed=None,
+                        segment=location.segment,
+                        segment_offset=location.offset,
+                        segment_length=location.length,
+                    )
+                    migrated += 1
+    return migrated
+
+
+async def compact(store: SegmentStore, min_dead_ratio: float) -> list[int]:
+    """
+    参照されていない領域の割合が min_dead_ratio 以上のセグメントを詰め直す
+
+    末尾のセグメントも対象にする（先に新しいセグメントを始めて、書き直すレコードをそちらへ置く）。
+    参照されているレコードは1回だけ書き直し、それを参照する全コネクションのblobの位置を更新する。
+
+    Returns:
+        削除したセグメント番号
+    """
+    referenced = await referenced_records()
+    segments = store.segments()
+    targets = []
+    for segment in segments:
+        size = store.segment_path(segment).stat().st_size
+        if size and 1 - live_bytes(referenced.get(segment, {})) / size < min_dead_ratio:
+            continue
+        if not size and segment == segments[-1]:
+            continue
+        targets.append(segment)
+    if segments and segments[-1] in targets:
+        store.start_segment()
+
+    removed = []
+    for segment in targets:
+        moved = {}
+        for offset, length in sorted(referenced.get(segment, {}).items()):
+            old = SegmentLocation(segment, offset, length)
+            moved[offset] = await asyncio.to_thread(store.append, bytes(store.view(old)))
+
+        for connection_name in chat_connection_names():
+            db = connections.get(connection_name)
+            blobs = await MessageBlob.filter(segment=segment).using_db(db).values_list("hash", "segment_offset")
+            async with in_transaction(connection_name) as conn:
+                for blob_hash, offset in blobs:
+                    location = moved[offset]
+                    await MessageBlob.filter(hash=blob_hash).using_db(conn).update(
+                        segment=location.segment,
+                        segment_offset=location.offset,
+                        segment_length=location.length,
+                    )
+        store.remove_segment(segment)
+        removed.append(segment)
+        print(f"  segment {segment:06d}: compacted")
+    return removed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("stats", "migrate", "compact"))
+    parser.add_argument("--min-dead-ratio", type=float, default=0.5)
+    args = parser.parse_args()
+
+    store = get_segment_store()
+    try:
+        await init_db()
+        if args.command == "stats":
+            await print_stats(store)
+        elif args.command == "migrate":
+            if not settings.BLOB_STORE_THRESHOLD:
+                print("❌ Error: BLOB_STORE_THRESHOLD is 0 (segment storage is disabled)")
+                return
+            migrated = await migrate_to_segments(store, settings.BLOB_STORE_THRESHOLD)
+            print(f"✅ Moved {migrated} message bodies to segment files")
+        else:
+            removed = await compact(store, args.min_dead_ratio)
+            print(f"✅ Compacted {len(removed)} segments")
+    finally:
+        store.close()
+        # DB接続が初期化されている場合のみクローズ
+        if Tortoise._inited:
+            await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,95 @@
+"""
+チャット木の整合性を検査・修復するツール
+
+    # 全てのチャットを検査して、問題のあるチャットを報告する
+    uv run python -m src.scripts.check_trees check
+
+    # 問題のある行を復旧用のシステムメッセージの下に付け替える
+    uv run python -m src.scripts.check_trees check --repair
+
+ルートが複数ある・親が見つからない・親が別のチャットにある・循環しているメッセージを探す。
+チャットは BATCH_SIZE 件ずつ、メッセージはチャットごとに (UUID, 親) だけを読むので、
+大きなDBでも全体をメモリに載せない。アプリを止めずに実行できる（修復はチャットごとのトランザクション）。
+"""
+import argparse
+import asyncio
+
+from tortoise import Tortoise, connections
+
+from src.infrastructure.db.config import SHARD_CONNECTIONS, TORTOISE_ORM, WRITE_CONNECTION
+from src.infrastructure.db.models import ChatTreeDetail
+from src.infrastructure.db.sharding import ensure_shard_schemas
+from src.interface_adapters.gateways.chat_repository import ChatRepositoryImpl
+
+# 1回に読み込むチャット数
+BATCH_SIZE = 200
+
+
+async def init_db():
+    """DBを初期化（シャードにもテーブルを作成）"""
+    await Tortoise.init(config=TORTOISE_ORM)
+    await Tortoise.generate_schemas()
+    await ensure_shard_schemas()
+
+
+async def check_trees(repair: bool = False, batch_size: int = BATCH_SIZE) -> dict[str, int]:
+    """
+    全てのチャット（アーカイブ済みを除く）の整合性を検査し、問題のあるチャットを1行ずつ報告する
+
+    Returns:
+        検査したチャット数、問題のあったチャット数、修復したチャット数
+    """
+    repo = ChatRepositoryImpl()
+    stats = {"chats": 0, "broken": 0, "repaired": 0}
+    for name in [WRITE_CONNECTION, *SHARD_CONNECTIONS]:
+        db = connections.get(name)
+        last_uuid = None
+        while True:
+            query = ChatTreeDetail.filter(archived_at__isnull=True).using_db(db)
+            if last_uuid is not None:
+                query = query.filter(uuid__gt=last_uuid)
+            chats = await query.order_by("uuid").limit(batch_size).values("uuid", "owner_uuid")
+            if not chats:
+                break
+            last_uuid = chats[-1]["uuid"]
+
+            for chat in chats:
+                issues = await repo.check_chat_tree(chat["uuid"], chat["owner_uuid"], repair=repair)
+                if issues is None:
+                    # 検査中に削除・移動されたチャット
+                    continue
+                stats["chats"] += 1
+                if issues.ok:
+                    continue
+                stats["broken"] += 1
+                stats["repaired"] += int(issues.recovery_uuid is not None)
+                print(f"  {issues.summary()}")
+        print(f"  {name}: scanned")
+    return stats
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    check_parser = sub.add_parser("check", help="全てのチャットの整合性を検査する")
+    check_parser.add_argument(
+        "--repair", action="store_true", help="問題のある行を復旧用のノードの下に付け替える",
+    )
+    check_parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="1回に読み込むチャット数")
+    args = parser.parse_args()
+
+    try:
+        await init_db()
+        if args.command == "check":
+            stats = await check_trees(args.repair, args.batch_size)
+            print(
+                f"✅ Checked {stats['chats']} chats: {stats['broken']} broken, {stats['repaired']} repaired"
+            )
+    finally:
+        # DB接続が初期化されている場合のみクローズ
+        if Tortoise._inited:
+            await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
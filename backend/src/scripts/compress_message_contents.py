@@ -0,0 +1,146 @@
+"""
+既存メッセージの本文を圧縮するツール
+
+content_compressed が空で、閾値以上の本文を持つ行を圧縮して書き換える。
+最後に削減できたバイト数と、1行あたりの圧縮（書き込み側）・展開（読み込み側）の
+所要時間を表示する。SQLiteでは空いたページを返すために VACUUM が必要（--vacuum）。
+
+    uv run python -m src.scripts.compress_message_contents [--codec zlib|zstd] [--threshold 1024]
+    uv run python -m src.scripts.compress_message_contents --dry-run
+"""
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+from tortoise import Tortoise, connections
+from tortoise.transactions import in_transaction
+
+from src.infrastructure.config import settings
+from src.infrastructure.db.config import TORTOISE_ORM
+from src.infrastructure.db.content_codec import CODECS, compress_content, decompress_content
+from src.infrastructure.db.models import MessageModel
+from src.infrastructure.db.sharding import chat_connection_names, ensure_shard_schemas
+
+# 1回に読み込むメッセージ数
+BATCH_SIZE = 500
+
+
+@dataclass
+class CompressionReport:
+    """圧縮結果の集計"""
+
+    scanned: int = 0
+    compressed: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+    compress_sec: float = 0.0
+    decompress_sec: float = 0.0
+    samples: list[bytes] = field(default_factory=list, repr=False)
+
+    @property
+    def saved(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+
+async def init_db():
+    """DBを初期化"""
+    await Tortoise.init(config=TORTOISE_ORM)
+    await Tortoise.generate_schemas()
+    await ensure_shard_schemas()
+
+
+async def compress_connection(
+        connection_name: str,
+        report: CompressionReport,
+        *,
+        codec: str,
+        threshold: int,
+        dry_run: bool = False,
+        batch_size: int = BATCH_SIZE,
+        ) -> None:
+    """1コネクション分の未圧縮の本文を圧縮する"""
+    db = connections.get(connection_name)
+    last_uuid = None
+    while True:
+        query = MessageModel.filter(content_compressed__isnull=True).using_db(db)
+        if last_uuid is not None:
+            query = query.filter(uuid__gt=last_uuid)
+        rows = await query.order_by("uuid").limit(batch_size).values_list("uuid", "content")
+        if not rows:
+            break
+        last_uuid = rows[-1][0]
+        report.scanned += len(rows)
+
+        updates = []
+        for message_uuid, content in rows:
+            started = time.perf_counter()
+            data = compress_content(content, codec, threshold)
+            report.compress_sec += time.perf_counter() - started
+            if data is None:
+                continue
+            updates.append((message_uuid, data))
+            report.bytes_before += len(content.encode("utf-8"))
+            report.bytes_after += len(data)
+            if len(report.samples) < 1000:
+                report.samples.append(data)
+        report.compressed += len(updates)
+
+        if updates and not dry_run:
+            # updateはauto_nowを更新しないので、updated_atは変わらない
+            async with in_transaction(connection_name) as conn:
+                for message_uuid, data in updates:
+                    await MessageModel.filter(uuid=message_uuid).using_db(conn).update(
+                        content="", content_compressed=data
+                    )
+
+
+def measure_decompression(report: CompressionReport) -> None:
+    """圧縮した行のサンプルで展開の所要時間を測る"""
+    started = time.perf_counter()
+    for data in report.samples:
+        decompress_content(data)
+    report.decompress_sec = time.perf_counter() - started
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--codec", choices=CODECS[1:], default=None)
+    parser.add_argument("--threshold", type=int, default=settings.DB_CONTENT_COMPRESSION_THRESHOLD)
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--vacuum", action="store_true", help="SQLiteの空きページを解放する")
+    args = parser.parse_args()
+    codec = args.codec or (
+        settings.DB_CONTENT_COMPRESSION if settings.DB_CONTENT_COMPRESSION != "none" else "zlib"
+    )
+
+    try:
+        await init_db()
+        report = CompressionReport()
+        for connection_name in chat_connection_names():
+            await compress_connection(
+                connection_name, report, codec=codec, threshold=args.threshold, dry_run=args.dry_run
+            )
+            if args.vacuum and not args.dry_run:
+                db = connections.get(connection_name)
+                if db.capabilities.dialect == "sqlite":
+                    await db.execute_script("VACUUM")
+        measure_decompression(report)
+
+        verb = "Would compress" if args.dry_run else "Compressed"
+        print(f"✅ {verb} {report.compressed} of {report.scanned} messages ({codec}, >= {args.threshold} bytes)")
+        if report.compressed:
+            ratio = report.bytes_after / report.bytes_before
+            print(f"   Content: {report.bytes_before:,} -> {report.bytes_after:,} bytes "
+                  f"(saved {report.saved:,} bytes, {ratio:.0%} of original)")
+            print(f"   Write cost: {report.compress_sec / report.compressed * 1e6:.1f} us/message (compress)")
+            print(f"   Read cost:  {report.decompress_sec / len(report.samples) * 1e6:.1f} us/message "
+                  f"(decompress, {len(report.samples)} samples)")
+    finally:
+        # DB接続が初期化されている場合のみクローズ
+        if Tortoise._inited:
+            await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
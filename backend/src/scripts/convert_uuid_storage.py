@@ -0,0 +1,142 @@
+"""
+既存SQLiteデータベースのUUID列の保存形式を変換するツール
+
+text（36文字のCHAR）と binary（16バイトのBLOB）を相互に変換する。
+SQLiteは列の型を変更できないため、テーブルごとに新しい定義で作り直して
+データをコピーする（SQLite公式の12ステップ手順に沿う）。
+変換後は .env 等で DB_UUID_STORAGE を同じ値に設定すること。
+
+    uv run python -m src.scripts.convert_uuid_storage binary [db_path]
+    uv run python -m src.scripts.convert_uuid_storage text [db_path]
+"""
+import asyncio
+import re
+import sqlite3
+import sys
+from pathlib import Path
+from uuid import UUID
+
+from tortoise import Tortoise, fields
+
+from src.infrastructure.db.config import DB_PATH
+
+_SQL_TYPES = {"text": "CHAR(36)", "binary": "BLOB"}
+
+
+async def collect_uuid_columns() -> dict[str, list[str]]:
+    """モデル定義からテーブルごとのUUID列（外部キー列を含む）を集める"""
+    await Tortoise.init(
+        db_url="sqlite://:memory:",
+        modules={"models": ["src.infrastructure.db.models"]},
+    )
+    try:
+        columns: dict[str, list[str]] = {}
+        for model in Tortoise.apps["models"].values():
+            for field in model._meta.fields_map.values():
+                if isinstance(field, fields.UUIDField):
+                    columns.setdefault(model._meta.db_table, []).append(field.source_field or field.model_field_name)
+        return columns
+    finally:
+        await Tortoise.close_connections()
+
+
+def _to_binary(value):
+    if value is None or isinstance(value, bytes):
+        return value
+    return UUID(value).bytes
+
+
+def _to_text(value):
+    if value is None or isinstance(value, str):
+        return value
+    return str(UUID(bytes=value))
+
+
+def convert_database(db_path: Path, target: str, uuid_columns: dict[str, list[str]]) -> None:
+    """
+    UUID列をtargetの形式に変換する
+
+    Args:
+        db_path: 変換対象のSQLiteファイル
+        target: "text" または "binary"
+        uuid_columns: テーブル名 -> UUID列名のリスト
+    """
+    if target not in _SQL_TYPES:
+        raise ValueError(f"Unknown UUID storage: {target}")
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.create_function("convert_uuid", 1, _to_binary if target == "binary" else _to_text,
+                         deterministic=True)
+    try:
+        conn.execute("PRAGMA foreign_keys=OFF")
+        conn.execute("BEGIN")
+
+        for table, uuid_cols in uuid_columns.items():
+            row = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type='table' AND name=?", (table,)
+            ).fetchone()
+            if row is None:
+                continue
+            table_sql = row[0]
+            index_sqls = [
+                r[0] for r in conn.execute(
+                    "SELECT sql FROM sqlite_master WHERE type='index' AND tbl_name=? AND sql IS NOT NULL",
+                    (table,),
+                )
+            ]
+            columns = [r[1] for r in conn.execute(f'PRAGMA table_info("{table}")')]
+
+            # 新しい定義：UUID列の型だけを差し替える
+            new_table = f"{table}__uuid_new"
+            new_sql = table_sql.replace(f'"{table}"', f'"{new_table}"', 1)
+            for col in uuid_cols:
+                new_sql = re.sub(
+                    rf'"{col}" (CHAR\(36\)|BLOB)', f'"{col}" {_SQL_TYPES[target]}', new_sql
+                )
+            conn.execute(new_sql)
+
+            select_list = ", ".join(
+                f'convert_uuid("{c}")' if c in uuid_cols else f'"{c}"' for c in columns
+            )
+            column_list = ", ".join(f'"{c}"' for c in columns)
+            conn.execute(
+                f'INSERT INTO "{new_table}" ({column_list}) SELECT {select_list} FROM "{table}"'
+            )
+            conn.execute(f'DROP TABLE "{table}"')
+            conn.execute(f'ALTER TABLE "{new_table}" RENAME TO "{table}"')
+            for index_sql in index_sqls:
+                conn.execute(index_sql)
+
+        violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+        if violations:
+            conn.execute("ROLLBACK")
+            raise RuntimeError(f"Foreign key check failed after conversion: {violations[:5]}")
+        conn.execute("COMMIT")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+
+async def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in _SQL_TYPES:
+        print("Usage: uv run python -m src.scripts.convert_uuid_storage <text|binary> [db_path]")
+        sys.exit(1)
+
+    target = sys.argv[1]
+    db_path = Path(sys.argv[2]) if len(sys.argv) > 2 else DB_PATH
+    if not db_path.exists():
+        print(f"❌ Error: {db_path} does not exist")
+        sys.exit(1)
+
+    uuid_columns = await collect_uuid_columns()
+    size_before = db_path.stat().st_size
+    convert_database(db_path, target, uuid_columns)
+    size_after = db_path.stat().st_size
+
+    print(f"✅ Converted UUID columns to {target}: {db_path}")
+    print(f"   Size: {size_before:,} -> {size_after:,} bytes")
+    print(f"   Set DB_UUID_STORAGE={target} before starting the app.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
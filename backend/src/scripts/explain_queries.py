@@ -0,0 +1,112 @@
+"""
+リポジトリが発行する全クエリの実行計画を検査するツール
+
+一時的なSQLiteデータベースに対して repository_workload を実行し、
+発行されたSQLをログから収集して EXPLAIN QUERY PLAN にかける。
+テーブルのフルスキャン（インデックスを使わない SCAN）が含まれていれば失敗とする。
+
+    uv run python -m src.scripts.explain_queries
+"""
+import asyncio
+import logging
+import re
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from tortoise import Tortoise, connections
+
+from src.scripts.repository_workload import run_repository_workload
+
+# インデックスを使わないテーブル走査（"SCAN messages" や "SCAN TABLE messages"）
+# （\b がないと (?! USING) が表名の途中まで戻って一致し、"SCAN messages USING INDEX ..." も拾う）
+_FULL_SCAN = re.compile(r"^SCAN (TABLE )?(?P<table>\w+)\b(?! USING)")
+_CHECKED_STATEMENTS = ("SELECT", "UPDATE", "DELETE")
+
+
+@dataclass
+class QueryPlan:
+    """1つのクエリと、その実行計画"""
+
+    query: str
+    plan: list[str]
+    full_scans: list[str] = field(default_factory=list)
+
+
+class _QueryCollector(logging.Handler):
+    """tortoise.db_clientのデバッグログから発行されたSQLと値を集める"""
+
+    def __init__(self) -> None:
+        super().__init__(level=logging.DEBUG)
+        self.queries: dict[str, list] = {}
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if not record.args or not isinstance(record.args, tuple) or len(record.args) != 2:
+            return
+        query, values = record.args
+        if not isinstance(query, str):
+            return
+        if query.lstrip().upper().startswith(_CHECKED_STATEMENTS):
+            self.queries.setdefault(query, list(values or []))
+
+
+def is_full_scan(detail: str) -> bool:
+    """EXPLAIN QUERY PLAN の1行がインデックスを使わないテーブル走査か"""
+    return _FULL_SCAN.match(detail) is not None
+
+
+async def collect_query_plans(db_path: Path) -> list[QueryPlan]:
+    """
+    一時DBでワークロードを実行し、発行された全クエリの実行計画を返す
+
+    Args:
+        db_path: 検査に使うSQLiteファイルのパス（存在しなければ作成される）
+    """
+    collector = _QueryCollector()
+    db_logger = logging.getLogger("tortoise.db_client")
+    previous_level = db_logger.level
+    db_logger.addHandler(collector)
+    db_logger.setLevel(logging.DEBUG)
+
+    await Tortoise.init(
+        db_url=f"sqlite://{db_path}",
+        modules={"models": ["src.infrastructure.db.models"]},
+    )
+    try:
+        await Tortoise.generate_schemas()
+        await run_repository_workload()
+
+        db_logger.removeHandler(collector)
+        conn = connections.get("default")
+        plans = []
+        for query, values in collector.queries.items():
+            rows = await conn.execute_query_dict(f"EXPLAIN QUERY PLAN {query}", values)
+            details = [row["detail"] for row in rows]
+            full_scans = [d for d in details if is_full_scan(d)]
+            plans.append(QueryPlan(query=query, plan=details, full_scans=full_scans))
+        return plans
+    finally:
+        db_logger.removeHandler(collector)
+        db_logger.setLevel(previous_level)
+        await Tortoise.close_connections()
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        plans = await collect_query_plans(Path(tmp_dir) / "explain.sqlite3")
+
+    failed = [plan for plan in plans if plan.full_scans]
+    for plan in plans:
+        mark = "❌" if plan.full_scans else "✅"
+        print(f"{mark} {plan.query}")
+        for detail in plan.plan:
+            print(f"     {detail}")
+
+    print(f"\n{len(plans)} queries checked, {len(failed)} with full table scans")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
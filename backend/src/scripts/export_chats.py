@@ -0,0 +1,92 @@
+"""
+ユーザーのチャットをNDJSONでエクスポートするツール
+
+    # 全チャットを標準出力へ
+    uv run python -m src.scripts.export_chats <username>
+
+    # 1チャットだけをgzipでファイルへ（拡張子が .gz ならgzipで書く）
+    uv run python -m src.scripts.export_chats <username> --chat <chat_uuid> -o chat.ndjson.gz
+
+行はDBからキーセットで少しずつ読みながら書き出すので、アカウントが大きくても
+メモリ使用量は一定。形式は src/interface_adapters/gateways/ndjson.py を参照。
+"""
+import argparse
+import asyncio
+import sys
+
+from tortoise import Tortoise
+
+from src.domain.entities.user_entity import UserEntity
+from src.infrastructure.db.config import TORTOISE_ORM
+from src.infrastructure.db.models import UserModel
+from src.infrastructure.db.sharding import ensure_shard_schemas
+from src.interface_adapters.gateways.chat_repository import ChatRepositoryImpl
+from src.interface_adapters.gateways.ndjson import encode_ndjson
+
+
+async def init_db():
+    """DBを初期化"""
+    await Tortoise.init(config=TORTOISE_ORM)
+    await Tortoise.generate_schemas()
+    await ensure_shard_schemas()
+
+
+async def export_chats(username: str, output, *, chat_uuid: str | None = None, compress: bool = False) -> int:
+    """
+    ユーザーのチャットを output（バイナリのファイル）に書き出す
+
+    Returns:
+        書き出したメッセージ数
+
+    Raises:
+        ValueError: ユーザーが存在しない場合
+    """
+    user = await UserModel.filter(username=username).first()
+    if user is None:
+        raise ValueError(f"User '{username}' not found")
+    user_entity = UserEntity(uuid=str(user.uuid), username=user.username, email=user.email)
+
+    exported = 0
+
+    async def counted(records):
+        nonlocal exported
+        async for record in records:
+            if record["type"] == "message":
+                exported += 1
+            yield record
+
+    records = ChatRepositoryImpl().iter_export_records(user_entity, chat_uuid)
+    async for chunk in encode_ndjson(counted(records), compress=compress):
+        output.write(chunk)
+    return exported
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("username")
+    parser.add_argument("--chat", help="エクスポートするチャットのUUID（省略時は全チャット）")
+    parser.add_argument("-o", "--output", help="出力ファイル（省略時は標準出力）")
+    parser.add_argument("--gzip", action="store_true", help="gzipで圧縮する（出力が .gz なら自動）")
+    args = parser.parse_args()
+    compress = args.gzip or bool(args.output and args.output.endswith(".gz"))
+
+    try:
+        await init_db()
+        output = open(args.output, "wb") if args.output else sys.stdout.buffer
+        try:
+            exported = await export_chats(args.username, output, chat_uuid=args.chat, compress=compress)
+        finally:
+            if args.output:
+                output.close()
+        print(f"✅ Exported {exported} messages", file=sys.stderr)
+    except ValueError as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        # DB接続が初期化されている場合のみクローズ
+        if Tortoise._inited:
+            await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
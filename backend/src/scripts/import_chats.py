@@ -0,0 +1,97 @@
+"""
+NDJSONでエクスポートしたチャットを一括で取り込むツール
+
+    # export_chats で書き出したファイルを取り込む（拡張子が .gz ならgzipとして読む）
+    uv run python -m src.scripts.import_chats <username> chats.ndjson.gz
+
+    # 標準入力から読む
+    uv run python -m src.scripts.import_chats <username> - < chats.ndjson
+
+チャットの所有者とメッセージの user_context_id は取り込むユーザーになる。
+既に存在するチャット（同じUUID）は取り込まずにスキップする。
+メッセージは --chunk-size 件ごとに1トランザクションで保存し、進捗を標準エラーに出す。
+意味検索が有効なら、取り込んだメッセージのベクトルもチャットごとに追加する。
+"""
+import argparse
+import asyncio
+import sys
+import time
+from functools import partial
+
+from tortoise import Tortoise
+
+from src.application.use_cases.chat_import import ChatImport, ImportResult
+from src.domain.entities.user_entity import UserEntity
+from src.infrastructure.db.config import TORTOISE_ORM
+from src.infrastructure.db.models import UserModel
+from src.infrastructure.db.sharding import ensure_shard_schemas
+from src.interface_adapters.gateways.chat_repository import BULK_CHUNK_SIZE, ChatRepositoryImpl
+from src.interface_adapters.gateways.ndjson import CHUNK_SIZE, decode_ndjson
+from src.interface_adapters.gateways.semantic_index import get_semantic_index
+
+
+async def init_db():
+    """DBを初期化"""
+    await Tortoise.init(config=TORTOISE_ORM)
+    await Tortoise.generate_schemas()
+    await ensure_shard_schemas()
+
+
+async def import_chats(username: str, input, *, compressed: bool = False, chunk_size: int = BULK_CHUNK_SIZE) -> ImportResult:
+    """
+    input（バイナリのファイル）のNDJSONをユーザーのチャットとして取り込む
+
+    Raises:
+        ValueError: ユーザーが存在しない場合や、入力が不正な場合
+    """
+    user = await UserModel.filter(username=username).first()
+    if user is None:
+        raise ValueError(f"User '{username}' not found")
+    user_entity = UserEntity(uuid=str(user.uuid), username=user.username, email=user.email)
+
+    started = time.perf_counter()
+
+    def report(saved: int) -> None:
+        elapsed = time.perf_counter() - started
+        print(f"  {saved} messages ({saved / elapsed:,.0f} msg/s)", file=sys.stderr)
+
+    records = decode_ndjson(iter(partial(input.read, CHUNK_SIZE), b""), compressed=compressed)
+    chat_import = ChatImport(ChatRepositoryImpl(), user_entity, semantic_index=get_semantic_index())
+    return await chat_import.import_records(records, chunk_size=chunk_size, on_progress=report)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("username")
+    parser.add_argument("input", help="入力ファイル（- なら標準入力）")
+    parser.add_argument("--gzip", action="store_true", help="gzipとして読む（入力が .gz なら自動）")
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE, help="1トランザクションのメッセージ数")
+    args = parser.parse_args()
+    compressed = args.gzip or args.input.endswith(".gz")
+
+    try:
+        await init_db()
+        started = time.perf_counter()
+        input = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+        try:
+            result = await import_chats(args.username, input, compressed=compressed, chunk_size=args.chunk_size)
+        finally:
+            if args.input != "-":
+                input.close()
+        elapsed = time.perf_counter() - started
+        print(
+            f"✅ Imported {result.chats} chats / {result.messages} messages in {elapsed:.1f}s"
+            f" ({result.messages / elapsed:,.0f} msg/s), skipped {result.skipped_chats} existing chats",
+            file=sys.stderr,
+        )
+    except (ValueError, OSError) as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        # DB接続が初期化されている場合のみクローズ
+        if Tortoise._inited:
+            await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,136 @@
+"""
+重複排除したメッセージ本文（message_blobs）の管理ツール
+
+    # blob導入前に保存された本文をblobへ移す
+    uv run python -m src.scripts.message_blobs migrate
+
+    # 参照数をメッセージから数え直す（ずれの修復）
+    uv run python -m src.scripts.message_blobs recount
+
+    # どこからも参照されていないblobを削除する
+    uv run python -m src.scripts.message_blobs gc
+
+    # 重複排除の効果を表示する
+    uv run python -m src.scripts.message_blobs stats
+
+シャーディングが有効な場合は全シャードを順に処理する。
+"""
+import argparse
+import asyncio
+
+from tortoise import Tortoise, connections
+from tortoise.functions import Count, Sum
+from tortoise.transactions import in_transaction
+
+from src.infrastructure.db.config import TORTOISE_ORM
+from src.infrastructure.db.models import MessageBlob, MessageModel
+from src.infrastructure.db.sharding import chat_connection_names, ensure_shard_schemas
+from src.interface_adapters.gateways.message_blobs import acquire_blob, collect_garbage
+
+# 1回に読み込む行数
+BATCH_SIZE = 500
+
+
+async def init_db():
+    """DBを初期化"""
+    await Tortoise.init(config=TORTOISE_ORM)
+    await Tortoise.generate_schemas()
+    await ensure_shard_schemas()
+
+
+async def migrate_inline_contents(connection_name: str, batch_size: int = BATCH_SIZE) -> int:
+    """blobを参照していないメッセージの本文をblobへ移す"""
+    db = connections.get(connection_name)
+    migrated = 0
+    while True:
+        # 移したメッセージはblob_idが入り条件から外れるので、常に先頭から読めばよい
+        messages = await MessageModel.filter(blob_id__isnull=True).using_db(db).order_by(
+            "uuid"
+        ).limit(batch_size).only("uuid", "content", "content_compressed")
+        if not messages:
+            break
+
+        async with in_transaction(connection_name) as conn:
+            for message in messages:
+                blob_hash = await acquire_blob(conn, message.text)
+                # updateはauto_nowを更新しないので、updated_atは変わらない
+                await MessageModel.filter(uuid=message.uuid).using_db(conn).update(
+                    blob_id=blob_hash, content="", content_compressed=None
+                )
+        migrated += len(messages)
+        print(f"  {connection_name}: {migrated} messages migrated...")
+    return migrated
+
+
+async def recount_references(connection_name: str, batch_size: int = BATCH_SIZE) -> int:
+    """blobの参照数をメッセージから数え直し、ずれていた行数を返す"""
+    db = connections.get(connection_name)
+    fixed = 0
+    last_hash = None
+    while True:
+        query = MessageBlob.all().using_db(db)
+        if last_hash is not None:
+            query = query.filter(hash__gt=last_hash)
+        blobs = await query.order_by("hash").limit(batch_size).values_list("hash", "ref_count")
+        if not blobs:
+            break
+        last_hash = blobs[-1][0]
+
+        rows = await MessageModel.filter(blob_id__in=[h for h, _ in blobs]).using_db(db).annotate(
+            refs=Count("uuid")
+        ).group_by("blob_id").values_list("blob_id", "refs")
+        actual = dict(rows)
+
+        async with in_transaction(connection_name) as conn:
+            for blob_hash, ref_count in blobs:
+                if actual.get(blob_hash, 0) != ref_count:
+                    await MessageBlob.filter(hash=blob_hash).using_db(conn).update(
+                        ref_count=actual.get(blob_hash, 0)
+                    )
+                    fixed += 1
+    return fixed
+
+
+async def print_stats(connection_name: str) -> None:
+    """blobの数と、重複排除で省けた本文の量を表示する"""
+    db = connections.get(connection_name)
+    rows = await MessageBlob.all().using_db(db).annotate(
+        blobs=Count("hash"), refs=Sum("ref_count"), chars=Sum("length")
+    ).values("blobs", "refs", "chars")
+    stats = rows[0] if rows else {}
+    blobs, refs = stats.get("blobs") or 0, stats.get("refs") or 0
+    inline = await MessageModel.filter(blob_id__isnull=True).using_db(db).count()
+    print(f"  {connection_name}: {refs} messages share {blobs} blobs "
+          f"({stats.get('chars') or 0:,} chars stored), {inline} messages not migrated")
+    if refs:
+        print(f"    dedup ratio: {1 - blobs / refs:.1%} of message bodies were duplicates")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("migrate", "recount", "gc", "stats"))
+    args = parser.parse_args()
+
+    try:
+        await init_db()
+        for connection_name in chat_connection_names():
+            if args.command == "migrate":
+                migrated = await migrate_inline_contents(connection_name)
+                print(f"✅ {connection_name}: moved {migrated} message bodies to blobs")
+            elif args.command == "recount":
+                fixed = await recount_references(connection_name)
+                print(f"✅ {connection_name}: fixed reference counts of {fixed} blobs")
+            elif args.command == "gc":
+                async with in_transaction(connection_name) as conn:
+                    deleted = await collect_garbage(conn)
+                print(f"✅ {connection_name}: deleted {deleted} unreferenced blobs")
+            else:
+                await print_stats(connection_name)
+    finally:
+        # DB接続が初期化されている場合のみクローズ
+        if Tortoise._inited:
+            await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+"""
+削除で空いたSQLiteのページをファイルから返すツール
+
+    # 空きページを少しずつ返す（auto_vacuum=INCREMENTAL のDBのみ）
+    uv run python -m src.scripts.reclaim_space
+
+    # auto_vacuum=INCREMENTAL に切り替えてDB全体を書き直す（既存のDBで一度だけ、アプリを止めて実行）
+    uv run python -m src.scripts.reclaim_space --full
+
+部分木の削除の後はアプリが自動で少しずつ返す（infrastructure/db/vacuum.py）。
+これは auto_vacuum が NONE のまま作られたDBの切り替えと、まとめて返したいときに使う。
+PostgreSQLのコネクションは autovacuum に任せるので何もしない。
+"""
+import argparse
+import asyncio
+
+from tortoise import Tortoise, connections
+
+from src.infrastructure.db.config import SHARD_CONNECTIONS, TORTOISE_ORM, WRITE_CONNECTION
+from src.infrastructure.db.vacuum import reclaim_free_pages
+
+
+async def page_counts(db) -> tuple[int, int]:
+    """(ページ数, 空きページ数)"""
+    _, pages = await db.execute_query("PRAGMA page_count")
+    _, free = await db.execute_query("PRAGMA freelist_count")
+    return pages[0][0], free[0][0]
+
+
+async def reclaim(full: bool = False) -> None:
+    """全コネクションの空きページを返す（full なら VACUUM で書き直す）"""
+    for name in [WRITE_CONNECTION, *SHARD_CONNECTIONS]:
+        db = connections.get(name)
+        if db.capabilities.dialect != "sqlite":
+            print(f"  {name:<10} skipped (autovacuum)")
+            continue
+        pages_before, free_before = await page_counts(db)
+        if full:
+            await db.execute_script("PRAGMA auto_vacuum=INCREMENTAL")
+            await db.execute_script("VACUUM")
+        else:
+            await reclaim_free_pages(db)
+        pages_after, free_after = await page_counts(db)
+        print(f"  {name:<10} pages: {pages_before:>10} -> {pages_after:>10} (free {free_before} -> {free_after})")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--full", action="store_true", help="auto_vacuum=INCREMENTAL に切り替えて VACUUM する")
+    args = parser.parse_args()
+
+    try:
+        await Tortoise.init(config=TORTOISE_ORM)
+        await reclaim(full=args.full)
+    finally:
+        # DB接続が初期化されている場合のみクローズ
+        if Tortoise._inited:
+            await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+"""
+ChatRepositoryImplの公開メソッドを一通り実行するワークロード
+
+クエリプランの検査（explain_queries）やバックエンド比較ベンチマーク（bench_db_backends）
+から共通で使う。Tortoiseの初期化は呼び出し側で行う。
+"""
+from uuid import uuid4
+
+from src.domain.entities.chat_tree_entity import ChatTreeEntity
+from src.domain.entities.message_entity import MessageEntity
+from src.domain.entities.user_entity import UserEntity
+from src.interface_adapters.gateways.chat_repository import ChatRepositoryImpl
+
+
+def make_user() -> UserEntity:
+    """ワークロード用のユーザー（usersテーブルには保存しない）"""
+    user_uuid = str(uuid4())
+    return UserEntity(uuid=user_uuid, username=f"workload-{user_uuid[:8]}", email="w@example.com")
+
+
+async def write_chat(
+        repo: ChatRepositoryImpl,
+        user: UserEntity,
+        *,
+        turns: int = 3,
+        branches: int = 2,
+        ) -> ChatTreeEntity:
+    """
+    ルートから branches 本の分岐を持ち、各分岐が turns 往復の会話になるチャットを書き込む
+    """
+    chat_tree = ChatTreeEntity()
+    root = MessageEntity.create_system_message("system")
+    chat_tree.new_chat(root, owner_uuid=user.uuid, chat_uuid=uuid4())
+    await repo.save_message(root, chat_tree, user)
+
+    for branch in range(branches):
+        parent = root
+        for turn in range(turns):
+            user_message = MessageEntity.create_user_message(f"question {branch}-{turn}")
+            chat_tree.add_message(parent, user_message)
+            await repo.save_message(user_message, chat_tree, user)
+
+            assistant_message = MessageEntity.create_assistant_message(f"answer {branch}-{turn}")
+            chat_tree.add_message(user_message, assistant_message)
+            await repo.save_message(assistant_message, chat_tree, user)
+            await repo.save_assistant_message_detail(
+                assistant_message,
+                {"provider": "test", "model": "test-model", "usage": {"total_tokens": 10}},
+                chat_tree,
+                user,
+            )
+            parent = assistant_message
+
+    return chat_tree
+
+
+async def read_chat(repo: ChatRepositoryImpl, user: UserEntity, chat_tree: ChatTreeEntity) -> None:
+    """チャットの読み込み系メソッドを実行する"""
+    chat_uuid = str(chat_tree.uuid)
+    await repo.get_chat_tree_info(chat_uuid)
+    await repo.get_chat_tree_info(chat_uuid, user)
+    messages = await repo.get_chat_tree_messages(chat_uuid, user)
+    await repo.get_chat_tree_messages(chat_uuid, user, all_users=True)
+    ChatTreeEntity.restore_from_message_list(messages)
+    await repo.get_branch_diff(chat_uuid, messages[1]["uuid"], messages[-1]["uuid"], user)
+
+
+async def run_repository_workload(repo: ChatRepositoryImpl | None = None) -> None:
+    """全ての公開メソッドを最低1回ずつ実行する"""
+    repo = repo or ChatRepositoryImpl()
+    user = make_user()
+
+    chat_tree = await write_chat(repo, user)
+    await write_chat(repo, user, turns=1, branches=1)
+
+    await read_chat(repo, user, chat_tree)
+    await repo.get_all_chat_tree_ids(user)
+    _, cursor = await repo.list_chat_trees(user, limit=1)
+    await repo.list_chat_trees(user, limit=1, cursor=cursor)
+    await repo.refresh_chat_summary(str(chat_tree.uuid))
+    await repo.refresh_chat_summary(str(chat_tree.uuid), user.uuid)
+    _, cursor = await repo.list_all_chat_trees(limit=1)
+    await repo.list_all_chat_trees(limit=1, cursor=cursor)
@@ -0,0 +1,104 @@
+"""
+全文検索のインデックス（message_search）を作り直すツール
+
+    # 全てのblobを索引し直す（導入前のblobの索引や、索引とblobがずれた場合の修復）
+    uv run python -m src.scripts.search_index rebuild
+
+    # SQLiteのFTS5の索引のセグメントを1つにまとめる（大量のインポートの後に検索を速くする）
+    uv run python -m src.scripts.search_index optimize
+
+新しく作られたblobはアプリが書き込みと同時に索引するので、これは導入時と修復に使う
+（作り直している間は検索結果が欠ける）。
+blob導入前の本文（blob_id のないメッセージ）は索引しないため、先に scripts/message_blobs.py で移行する。
+"""
+import argparse
+import asyncio
+
+from tortoise import Tortoise, connections
+from tortoise.transactions import in_transaction
+
+from src.infrastructure.db.config import TORTOISE_ORM
+from src.infrastructure.db.models import MessageBlob
+from src.infrastructure.db.search_index import (
+    SEARCH_KEY_TABLE, SEARCH_TABLE, ensure_search_index, index_blob_texts, is_postgres,
+)
+from src.infrastructure.db.sharding import chat_connection_names, ensure_shard_schemas
+from src.interface_adapters.gateways.message_blobs import resolve_blob_texts
+
+# 1トランザクションで索引するblob数
+BATCH_SIZE = 500
+
+
+async def init_db():
+    """DBを初期化（シャードにもテーブルを作成）"""
+    await Tortoise.init(config=TORTOISE_ORM)
+    await Tortoise.generate_schemas()
+    await ensure_shard_schemas()
+
+
+async def rebuild(batch_size: int = BATCH_SIZE) -> int:
+    """
+    チャットの行を持つ全コネクションで、索引を空にしてから全てのblobを索引する
+
+    Returns:
+        索引したblob数
+    """
+    indexed = 0
+    for name in chat_connection_names():
+        db = connections.get(name)
+        await ensure_search_index(db)
+        await db.execute_script(f'DELETE FROM "{SEARCH_TABLE}"')
+        if not is_postgres(db):
+            await db.execute_script(f'DELETE FROM "{SEARCH_KEY_TABLE}"')
+        last_hash = None
+        while True:
+            query = MessageBlob.all().using_db(db)
+            if last_hash is not None:
+                query = query.filter(hash__gt=last_hash)
+            hashes = await query.order_by("hash").limit(batch_size).values_list("hash", flat=True)
+            if not hashes:
+                break
+            last_hash = hashes[-1]
+            texts = await resolve_blob_texts(hashes, db)
+            async with in_transaction(name) as conn:
+                await index_blob_texts(conn, list(texts.items()))
+            indexed += len(texts)
+            print(f"  {name}: {indexed} blobs", end="\r")
+        print(f"  {name}: {indexed} blobs")
+    return indexed
+
+
+async def optimize() -> None:
+    """FTS5の索引を1つのセグメントにまとめる（PostgreSQLのGINは autovacuum に任せる）"""
+    for name in chat_connection_names():
+        db = connections.get(name)
+        if is_postgres(db):
+            continue
+        await ensure_search_index(db)
+        await db.execute_script(f"INSERT INTO \"{SEARCH_TABLE}\" (\"{SEARCH_TABLE}\") VALUES ('optimize')")
+        print(f"  {name}: optimized")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild", help="全てのblobを索引し直す")
+    sub.add_parser("optimize", help="FTS5の索引のセグメントをまとめる")
+    args = parser.parse_args()
+
+    try:
+        await init_db()
+        if args.command == "rebuild":
+            indexed = await rebuild()
+            print(f"✅ Indexed {indexed} blobs")
+        elif args.command == "optimize":
+            await optimize()
+            print("✅ Optimized search index")
+    finally:
+        # DB接続が初期化されている場合のみクローズ
+        if Tortoise._inited:
+            await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
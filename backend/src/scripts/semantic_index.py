@@ -0,0 +1,164 @@
+"""
+意味検索のベクトルファイルを作り直す・IVFを作るツール（要 numpy。uv sync --extra semantic）
+
+    # 全てのメッセージのベクトルを作り直す（導入前のメッセージ、アーカイブ中のチャット、
+    # 埋め込み器の変更、削除したメッセージの行を詰めるときに使う）
+    uv run python -m src.scripts.semantic_index rebuild
+
+    # ベクトルの多いユーザーにIVFを作る（作った後に追加された行は全て調べるので、ときどき作り直す）
+    uv run python -m src.scripts.semantic_index build-ivf [--min-vectors 50000] [--nlist N]
+
+アプリが保存するメッセージは MessageHandler が、import_chats で取り込んだメッセージは
+ChatImport が保存と同時にベクトルを追加するので、rebuild は導入時と修復に使う（作り直している間は検索結果が欠ける）。
+アーカイブしてもベクトルは消さず、戻したメッセージは同じUUIDなので元のベクトルで引ける。
+rebuild はアーカイブ中のチャットのメッセージも含めて作る。
+"""
+import argparse
+import asyncio
+import shutil
+from collections import defaultdict
+
+from tortoise import Tortoise, connections
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from src.infrastructure.db.config import TORTOISE_ORM
+from src.infrastructure.db.content_codec import decompress_content
+from src.infrastructure.db.models import ChatArchive, MessageModel
+from src.infrastructure.db.sharding import chat_connection_names, ensure_shard_schemas
+from src.interface_adapters.gateways.message_blobs import resolve_blob_texts
+from src.interface_adapters.gateways.ndjson import decode_ndjson
+from src.interface_adapters.gateways.semantic_index import SemanticIndexImpl, get_semantic_index
+
+# 1回に読み込むメッセージ数
+BATCH_SIZE = 2000
+# IVFを作る最小のベクトル数（これより少なければ全行を調べても十分速い）
+MIN_IVF_VECTORS = 50_000
+
+
+async def init_db():
+    """DBを初期化（シャードにもテーブルを作成）"""
+    await Tortoise.init(config=TORTOISE_ORM)
+    await Tortoise.generate_schemas()
+    await ensure_shard_schemas()
+
+
+async def rebuild(index: SemanticIndexImpl, batch_size: int = BATCH_SIZE) -> int:
+    """
+    ベクトルファイルを消してから、チャットの行を持つ全コネクションの全メッセージのベクトルを作る
+
+    アーカイブ中のチャットのメッセージもアーカイブのレコードから作る（戻したときに引けるように）。
+
+    Returns:
+        追加したメッセージ数（空の本文を含む）
+    """
+    shutil.rmtree(index.root, ignore_errors=True)
+    added = 0
+    for name in chat_connection_names():
+        db = connections.get(name)
+        last_uuid = None
+        while True:
+            query = MessageModel.all().using_db(db)
+            if last_uuid is not None:
+                query = query.filter(uuid__gt=last_uuid)
+            rows = await query.order_by("uuid").limit(batch_size).values_list(
+                "uuid", "chat_tree_id", "chat_tree__owner_uuid", "blob_id", "content", "content_compressed"
+            )
+            if not rows:
+                break
+            last_uuid = rows[-1][0]
+            blob_texts = await resolve_blob_texts([row[3] for row in rows if row[3] is not None], db)
+
+            by_owner = defaultdict(list)
+            for message_uuid, chat_uuid, owner_uuid, blob_id, content, compressed in rows:
+                if blob_id is not None:
+                    text = blob_texts.get(blob_id, "")
+                else:
+                    text = decompress_content(compressed) if compressed is not None else content
+                by_owner[owner_uuid].append((message_uuid, chat_uuid, text))
+            for owner_uuid, owner_rows in by_owner.items():
+                await asyncio.to_thread(index.add_texts, owner_uuid, owner_rows)
+            added += len(rows)
+            print(f"  {name}: {added} messages", end="\r")
+        added += await _rebuild_archives(index, db, batch_size)
+        print(f"  {name}: {added} messages")
+    return added
+
+
+async def _rebuild_archives(index: SemanticIndexImpl, db: BaseDBAsyncClient, batch_size: int) -> int:
+    """コネクションのアーカイブ中のチャットのメッセージのベクトルを作る"""
+    added = 0
+    last_uuid = None
+    while True:
+        query = ChatArchive.all().using_db(db)
+        if last_uuid is not None:
+            query = query.filter(chat_tree_id__gt=last_uuid)
+        # アーカイブは1行が1チャット分で大きいので、少しずつ読む
+        archives = await query.order_by("chat_tree_id").limit(max(1, batch_size // 100)).values_list(
+            "chat_tree_id", "chat_tree__owner_uuid", "data"
+        )
+        if not archives:
+            break
+        last_uuid = archives[-1][0]
+        for chat_uuid, owner_uuid, data in archives:
+            rows = [
+                (record["uuid"], chat_uuid, record["content"])
+                for record in decode_ndjson([data], compressed=True)
+            ]
+            for start in range(0, len(rows), batch_size):
+                await asyncio.to_thread(index.add_texts, owner_uuid, rows[start:start + batch_size])
+            added += len(rows)
+    return added
+
+
+def build_ivf(index: SemanticIndexImpl, min_vectors: int = MIN_IVF_VECTORS, nlist: int | None = None) -> int:
+    """
+    ベクトルが min_vectors 件以上のユーザーにIVFを作る
+
+    Returns:
+        IVFを作ったユーザー数
+    """
+    built = 0
+    if not index.root.exists():
+        return built
+    for owner_dir in sorted(p for p in index.root.iterdir() if p.is_dir()):
+        store = index.store(owner_dir.name)
+        if len(store) < min_vectors:
+            continue
+        lists = store.build_ivf(nlist)
+        print(f"  {owner_dir.name}: {len(store)} vectors, {lists} lists")
+        built += 1
+    return built
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild", help="全てのメッセージのベクトルを作り直す")
+    ivf_parser = sub.add_parser("build-ivf", help="ベクトルの多いユーザーにIVFを作る")
+    ivf_parser.add_argument(
+        "--min-vectors", type=int, default=MIN_IVF_VECTORS, help="IVFを作る最小のベクトル数",
+    )
+    ivf_parser.add_argument("--nlist", type=int, default=None, help="クラスター数（省略時は件数の平方根）")
+    args = parser.parse_args()
+
+    index = get_semantic_index()
+    if index is None:
+        raise SystemExit("❌ Semantic search is disabled (SEMANTIC_SEARCH=0) or numpy is not installed")
+
+    if args.command == "build-ivf":
+        built = build_ivf(index, args.min_vectors, args.nlist)
+        print(f"✅ Built IVF for {built} users")
+        return
+
+    try:
+        await init_db()
+        added = await rebuild(index)
+        print(f"✅ Indexed {added} messages")
+    finally:
+        # DB接続が初期化されている場合のみクローズ
+        if Tortoise._inited:
+            await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,212 @@
+"""
+所有者UUIDによるシャーディングの管理ツール
+
+    # シャードごとのチャット数と、全ユーザー横断の最新チャットを表示
+    uv run python -m src.scripts.shards list [limit]
+
+    # 既存データを所有者のシャードへ移動（DB_SHARDS を設定した状態で実行）
+    uv run python -m src.scripts.shards rebalance [--dry-run]
+
+rebalance は default に残っているチャット（シャーディング導入前のデータ）と、
+シャード数の変更で所属が変わったチャットを移動する。
+移動はチャット単位で、移動先への書き込みをコミットしてから移動元を削除する。
+途中で止まっても再実行すれば続きから移動できる。アプリを止めた状態で実行すること。
+フォークと元のチャットは所有者が同じなので、移動し終えれば同じシャードに揃う。
+"""
+import argparse
+import asyncio
+import sys
+from collections import Counter
+
+from tortoise import Tortoise, connections
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.models import Model
+from tortoise.transactions import in_transaction
+
+from src.infrastructure.db.config import SHARD_CONNECTIONS, TORTOISE_ORM, WRITE_CONNECTION
+from src.infrastructure.db.models import (
+    AssistantMessageDetail, ChatArchive, ChatEvent, ChatFork, ChatTreeDetail, ChatTreeSnapshot, MessageBlob,
+    MessageModel,
+)
+from src.infrastructure.db.raw_sql import insert_rows
+from src.infrastructure.db.sharding import ensure_shard_schemas, shard_for
+from src.interface_adapters.gateways.chat_repository import ChatRepositoryImpl
+from src.interface_adapters.gateways.message_blobs import copy_blob, release_blobs
+
+# 1回に読み込むチャット数
+BATCH_SIZE = 200
+
+
+async def init_db():
+    """DBを初期化（シャードにもテーブルを作成）"""
+    await Tortoise.init(config=TORTOISE_ORM)
+    await Tortoise.generate_schemas()
+    await ensure_shard_schemas()
+
+
+async def _read_rows(model: type[Model], db: BaseDBAsyncClient, **filters) -> list[dict]:
+    """モデルの全DB列を取得する"""
+    return await model.filter(**filters).using_db(db).values(*model._meta.fields_db_projection)
+
+
+def _parents_first(messages: list[dict]) -> list[dict]:
+    """親メッセージが子より先に来るように並べる（外部キー制約のため）"""
+    by_uuid = {m["uuid"]: m for m in messages}
+    ordered, placed = [], set()
+
+    def place(message: dict) -> None:
+        # 深い会話でも再帰しないよう、未配置の祖先を辿ってから順に置く
+        chain = []
+        while message is not None and message["uuid"] not in placed:
+            chain.append(message)
+            message = by_uuid.get(message["parent_id"])
+        for m in reversed(chain):
+            placed.add(m["uuid"])
+            ordered.append(m)
+
+    for message in messages:
+        place(message)
+    return ordered
+
+
+async def move_chat(chat: dict, source: str, target: str, *, origin_copied: bool = False) -> None:
+    """
+    1チャット分の行を source から target へ移動する
+
+    フォークは最初のメッセージの親が元のチャットにあるため、元のチャットをコピーしてから
+    フォークを移動し、最後に元のチャットを移動元から削除する（外部キーが途中で外れないように）。
+    origin_copied は元のチャットのコピーから呼ばれた場合にTrueにする。
+    """
+    source_db = connections.get(source)
+    chat_uuid = chat["uuid"]
+
+    if chat["forked_from"] is not None and not origin_copied:
+        origin = await ChatTreeDetail.filter(uuid=chat["forked_from"]).using_db(source_db).values(
+            *ChatTreeDetail._meta.fields_db_projection
+        )
+        if origin:
+            # 元のチャットの移動に合わせてこのフォークも移動する
+            await move_chat(origin[0], source, target)
+            return
+
+    async with in_transaction(target) as conn:
+        # 前回の実行で移動先へのコピーだけ済んでいる場合はコピーしない
+        if not await ChatTreeDetail.filter(uuid=chat_uuid).using_db(conn).exists():
+            messages = await _read_rows(MessageModel, source_db, chat_tree_id=chat_uuid)
+            message_uuids = [m["uuid"] for m in messages]
+            details = await _read_rows(
+                AssistantMessageDetail, source_db, message_id__in=message_uuids
+            ) if message_uuids else []
+            # blobは移動先で重複排除し直す（移動先に同じ本文があれば参照数を足す）
+            blob_refs = Counter(m["blob_id"] for m in messages if m["blob_id"] is not None)
+            blobs = await MessageBlob.filter(hash__in=list(blob_refs)).using_db(source_db)
+
+            for blob in blobs:
+                await copy_blob(conn, blob, blob_refs[blob.hash])
+            await insert_rows(ChatTreeDetail, conn, [chat])
+            await insert_rows(MessageModel, conn, _parents_first(messages))
+            await insert_rows(AssistantMessageDetail, conn, details)
+            await insert_rows(ChatArchive, conn, await _read_rows(ChatArchive, source_db, chat_tree_id=chat_uuid))
+            await insert_rows(ChatEvent, conn, await _read_rows(ChatEvent, source_db, chat_tree_id=chat_uuid))
+            await insert_rows(ChatFork, conn, await _read_rows(ChatFork, source_db, chat_tree_id=chat_uuid))
+
+    forks = await ChatTreeDetail.filter(forked_from=chat_uuid).using_db(source_db).values(
+        *ChatTreeDetail._meta.fields_db_projection
+    )
+    for fork in forks:
+        await move_chat(fork, source, target, origin_copied=True)
+
+    async with in_transaction(source) as conn:
+        rows = await MessageModel.filter(chat_tree_id=chat_uuid).using_db(conn).values_list(
+            "uuid", "blob_id"
+        )
+        message_uuids = [message_uuid for message_uuid, _ in rows]
+        await AssistantMessageDetail.filter(message_id__in=message_uuids).using_db(conn).delete()
+        await MessageModel.filter(chat_tree_id=chat_uuid).using_db(conn).delete()
+        await ChatArchive.filter(chat_tree_id=chat_uuid).using_db(conn).delete()
+        await ChatEvent.filter(chat_tree_id=chat_uuid).using_db(conn).delete()
+        await ChatFork.filter(chat_tree_id=chat_uuid).using_db(conn).delete()
+        # スナップショットは移動せず、移動先で初めて開いたときに作り直す
+        await ChatTreeSnapshot.filter(chat_tree_id=chat_uuid).using_db(conn).delete()
+        await ChatTreeDetail.filter(uuid=chat_uuid).using_db(conn).delete()
+        await release_blobs(conn, [blob_id for _, blob_id in rows])
+
+
+async def rebalance(dry_run: bool = False, batch_size: int = BATCH_SIZE) -> dict[str, int]:
+    """
+    全チャットを所有者のシャードへ移動する
+
+    Returns:
+        移動先のシャード名 -> 移動したチャット数
+    """
+    moved = {name: 0 for name in SHARD_CONNECTIONS}
+    for source in [WRITE_CONNECTION, *SHARD_CONNECTIONS]:
+        source_db = connections.get(source)
+        last_uuid = None
+        while True:
+            query = ChatTreeDetail.all().using_db(source_db)
+            if last_uuid is not None:
+                query = query.filter(uuid__gt=last_uuid)
+            chats = await query.order_by("uuid").limit(batch_size).values(
+                *ChatTreeDetail._meta.fields_db_projection
+            )
+            if not chats:
+                break
+            last_uuid = chats[-1]["uuid"]
+
+            for chat in chats:
+                target = shard_for(chat["owner_uuid"])
+                if target == source:
+                    continue
+                if not dry_run:
+                    await move_chat(chat, source, target)
+                moved[target] += 1
+        print(f"  {source}: scanned")
+    return moved
+
+
+async def list_shards(limit: int) -> None:
+    """シャードごとのチャット数と、全ユーザー横断の最新チャットを表示"""
+    for name in [WRITE_CONNECTION, *SHARD_CONNECTIONS]:
+        count = await ChatTreeDetail.all().using_db(connections.get(name)).count()
+        print(f"  {name:<10} {count:>8} chats")
+
+    if limit < 1:
+        return
+    chats, _ = await ChatRepositoryImpl().list_all_chat_trees(limit=limit)
+    print(f"\nLatest {len(chats)} chats across shards:")
+    for chat in chats:
+        print(f"  {chat['updated'].isoformat()}  {chat['uuid']}  owner={chat['owner_uuid']}"
+              f"  shard={shard_for(chat['owner_uuid']) or WRITE_CONNECTION}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    list_parser = subparsers.add_parser("list")
+    list_parser.add_argument("limit", type=int, nargs="?", default=20)
+    rebalance_parser = subparsers.add_parser("rebalance")
+    rebalance_parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    try:
+        await init_db()
+        if args.command == "list":
+            await list_shards(args.limit)
+            return
+
+        if not SHARD_CONNECTIONS:
+            print("❌ Error: DB_SHARDS is not set")
+            sys.exit(1)
+        moved = await rebalance(dry_run=args.dry_run)
+        verb = "Would move" if args.dry_run else "Moved"
+        for name, count in moved.items():
+            print(f"✅ {verb} {count} chats to {name}")
+    finally:
+        # DB接続が初期化されている場合のみクローズ
+        if Tortoise._inited:
+            await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
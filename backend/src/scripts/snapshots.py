@@ -0,0 +1,94 @@
+"""
+チャット木のスナップショットを作り直すツール
+
+    # スナップショットがないか、版数がスナップショットより64以上進んだチャットを作り直す
+    uv run python -m src.scripts.snapshots compact
+
+    # 全てのチャットを作り直す
+    uv run python -m src.scripts.snapshots compact --min-tail 0
+
+メッセージを保存したときにも版数が SNAPSHOT_COMPACT_TAIL 以上進んでいれば作り直すので、
+これは移行直後の作成や、書き込まれないまま残ったチャットの作り直しに使う。
+"""
+import argparse
+import asyncio
+
+from tortoise import Tortoise, connections
+
+from src.infrastructure.db.config import SHARD_CONNECTIONS, TORTOISE_ORM, WRITE_CONNECTION
+from src.infrastructure.db.models import ChatTreeDetail, ChatTreeSnapshot
+from src.infrastructure.db.sharding import ensure_shard_schemas
+from src.interface_adapters.gateways.chat_repository import SNAPSHOT_COMPACT_TAIL, ChatRepositoryImpl
+
+# 1回に読み込むチャット数
+BATCH_SIZE = 200
+
+
+async def init_db():
+    """DBを初期化（シャードにもテーブルを作成）"""
+    await Tortoise.init(config=TORTOISE_ORM)
+    await Tortoise.generate_schemas()
+    await ensure_shard_schemas()
+
+
+async def compact_snapshots(min_tail: int, batch_size: int = BATCH_SIZE) -> dict[str, int]:
+    """
+    版数がスナップショットより min_tail 以上進んだチャット（スナップショットのないチャットを含む）を作り直す
+
+    アーカイブ済みのチャットはメッセージがないので対象外。
+
+    Returns:
+        作り直したチャット数とメッセージ数
+    """
+    repo = ChatRepositoryImpl()
+    stats = {"chats": 0, "messages": 0}
+    for name in [WRITE_CONNECTION, *SHARD_CONNECTIONS]:
+        db = connections.get(name)
+        last_uuid = None
+        while True:
+            query = ChatTreeDetail.filter(archived_at__isnull=True).using_db(db)
+            if last_uuid is not None:
+                query = query.filter(uuid__gt=last_uuid)
+            chats = await query.order_by("uuid").limit(batch_size).values("uuid", "owner_uuid", "version")
+            if not chats:
+                break
+            last_uuid = chats[-1]["uuid"]
+
+            snapshot_versions = dict(
+                await ChatTreeSnapshot.filter(
+                    chat_tree_id__in=[chat["uuid"] for chat in chats]
+                ).using_db(db).values_list("chat_tree_id", "version")
+            )
+            for chat in chats:
+                snapshot_version = snapshot_versions.get(chat["uuid"])
+                if snapshot_version is not None and chat["version"] - snapshot_version < min_tail:
+                    continue
+                stats["messages"] += await repo.refresh_chat_tree_snapshot(chat["uuid"], chat["owner_uuid"])
+                stats["chats"] += 1
+        print(f"  {name}: scanned")
+    return stats
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    compact_parser = sub.add_parser("compact", help="末尾が長いチャットのスナップショットを作り直す")
+    compact_parser.add_argument(
+        "--min-tail", type=int, default=SNAPSHOT_COMPACT_TAIL,
+        help="スナップショット後にこの版数以上進んだチャットを対象にする",
+    )
+    args = parser.parse_args()
+
+    try:
+        await init_db()
+        if args.command == "compact":
+            stats = await compact_snapshots(args.min_tail)
+            print(f"✅ Rebuilt {stats['chats']} snapshots ({stats['messages']} messages)")
+    finally:
+        # DB接続が初期化されている場合のみクローズ
+        if Tortoise._inited:
+            await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,24 @@
+"""DB設定の組み立てのテスト"""
+import pytest
+from src.infrastructure.db.config import sqlite_pragmas
+
+
+def test_default_profile_keeps_tortoise_defaults():
+    """defaultプロファイルはpragmaを追加しない"""
+    assert sqlite_pragmas("default") == {}
+
+
+def test_production_profile_pragmas():
+    """productionプロファイルはWALと同期・キャッシュ設定を含む"""
+    pragmas = sqlite_pragmas("production")
+
+    assert pragmas["journal_mode"] == "WAL"
+    assert pragmas["synchronous"] == "NORMAL"
+    assert pragmas["cache_size"] < 0
+    assert pragmas["busy_timeout"] > 0
+
+
+def test_unknown_profile_raises_error():
+    """未知のプロファイルはエラー"""
+    with pytest.raises(ValueError):
+        sqlite_pragmas("turbo")
@@ -0,0 +1,62 @@
+"""メッセージ本文の圧縮のテスト"""
+from uuid import uuid4
+
+import pytest
+
+from src.domain.entities.chat_tree_entity import ChatTreeEntity
+from src.domain.entities.message_entity import MessageEntity
+from src.domain.entities.user_entity import UserEntity
+from src.infrastructure.db.content_codec import MARKER_ZLIB, compress_content, decompress_content
+from src.infrastructure.db.models import MessageBlob, MessageModel
+from src.interface_adapters.gateways.chat_repository import ChatRepositoryImpl
+
+LONG_TEXT = "分岐するチャットの長い回答です。\n" * 200
+
+
+def test_zlib_roundtrip():
+    """圧縮した本文はマーカー付きで、展開すると元に戻る"""
+    data = compress_content(LONG_TEXT, "zlib", 1024)
+
+    assert data is not None
+    assert data[:1] == MARKER_ZLIB
+    assert len(data) < len(LONG_TEXT.encode("utf-8"))
+    assert decompress_content(data) == LONG_TEXT
+
+
+def test_short_content_is_not_compressed():
+    """閾値未満の本文と、圧縮しない設定では None"""
+    assert compress_content("short", "zlib", 1024) is None
+    assert compress_content(LONG_TEXT, "none", 1024) is None
+
+
+def test_unknown_codec_and_marker():
+    """未知の方式やマーカーはエラー"""
+    with pytest.raises(ValueError):
+        compress_content(LONG_TEXT, "lz4", 0)
+    with pytest.raises(ValueError):
+        decompress_content(b"\x7fdata")
+
+
+@pytest.mark.asyncio
+async def test_repository_compresses_long_content(init_db):
+    """リポジトリは長い本文を圧縮して保存し、読み込み時に展開する"""
+    user = UserEntity(uuid=str(uuid4()), username="codec", email="codec@example.com")
+    repo = ChatRepositoryImpl()
+    chat_tree = ChatTreeEntity()
+    root = MessageEntity.create_system_message("system")
+    chat_tree.new_chat(root, owner_uuid=user.uuid, chat_uuid=uuid4())
+    await repo.save_message(root, chat_tree, user)
+    answer = MessageEntity.create_assistant_message(LONG_TEXT)
+    chat_tree.add_message(root, answer)
+    await repo.save_message(answer, chat_tree, user)
+
+    stored = await MessageBlob.get(hash=(await MessageModel.get(uuid=answer.uuid)).blob_id)
+    assert stored.content == ""
+    assert stored.content_compressed is not None
+    root_blob = await MessageBlob.get(hash=(await MessageModel.get(uuid=root.uuid)).blob_id)
+    assert root_blob.content_compressed is None
+
+    messages = await repo.get_chat_tree_messages(str(chat_tree.uuid), user)
+    contents = {m["uuid"]: m["content"] for m in messages}
+    assert contents[str(answer.uuid)] == LONG_TEXT
+    assert contents[str(root.uuid)] == "system"
@@ -0,0 +1,24 @@
+"""PostgreSQL上でのリポジトリの動作確認（TEST_POSTGRES_URLが設定されている場合のみ）"""
+import os
+import pytest
+from tortoise import Tortoise
+from src.scripts.bench_db_backends import scratch_database_url
+from src.scripts.repository_workload import run_repository_workload
+
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+@pytest.mark.skipif(not TEST_POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+@pytest.mark.asyncio
+async def test_repository_workload_on_postgres():
+    """リポジトリの全メソッドがPostgreSQLでも動く"""
+    await Tortoise.init(
+        db_url=scratch_database_url(TEST_POSTGRES_URL),
+        modules={"models": ["src.infrastructure.db.models"]},
+        _create_db=True,
+    )
+    try:
+        await Tortoise.generate_schemas()
+        await run_repository_workload()
+    finally:
+        await Tortoise._drop_databases()
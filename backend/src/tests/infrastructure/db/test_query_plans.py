@@ -0,0 +1,28 @@
+"""リポジトリのクエリがフルスキャンしないことの検査"""
+import pytest
+from src.scripts.explain_queries import collect_query_plans, is_full_scan
+
+
+@pytest.mark.asyncio
+async def test_repository_queries_use_indexes(tmp_path):
+    """リポジトリが発行する全クエリがインデックスを使う"""
+    plans = await collect_query_plans(tmp_path / "explain.sqlite3")
+
+    assert plans
+    full_scans = {plan.query: plan.full_scans for plan in plans if plan.full_scans}
+    assert full_scans == {}
+
+
+@pytest.mark.parametrize(
+    "detail, expected",
+    [
+        ("SCAN messages", True),
+        ("SCAN TABLE messages", True),
+        ("SCAN messages USING INDEX idx_messages_chat_tree_id", False),
+        ("SCAN messages USING COVERING INDEX idx_messages_chat_tree_id", False),
+        ("SEARCH messages USING INDEX idx_messages_chat_tree_id (chat_tree_id=?)", False),
+    ],
+)
+def test_is_full_scan(detail, expected):
+    """インデックスを使う走査はフルスキャンとして扱わない"""
+    assert is_full_scan(detail) is expected
@@ -0,0 +1,169 @@
+"""所有者UUIDによるシャーディングのテスト"""
+from collections import Counter
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+from tortoise import Tortoise, connections
+
+from src.domain.entities.chat_tree_entity import ChatTreeEntity
+from src.domain.entities.message_entity import MessageEntity
+from src.domain.entities.user_entity import UserEntity
+from src.infrastructure.db.config import SHARD_CONNECTIONS, WRITE_CONNECTION
+from src.infrastructure.db.models import ChatTreeDetail, MessageModel
+from src.infrastructure.db.sharding import ensure_shard_schemas, jump_hash, shard_for, shard_index
+from src.interface_adapters.gateways.chat_repository import ChatRepositoryImpl
+from src.scripts.shards import rebalance
+
+
+def test_shard_index_is_stable():
+    """同じ所有者は常に同じシャードになる"""
+    owner_uuid = uuid4()
+
+    assert shard_index(owner_uuid, 8) == shard_index(str(owner_uuid), 8)
+    assert 0 <= shard_index(owner_uuid, 8) < 8
+
+
+def test_owners_spread_across_shards():
+    """所有者はシャードに概ね均等に分散する"""
+    counts = Counter(shard_index(uuid4(), 4) for _ in range(4000))
+
+    assert set(counts) == {0, 1, 2, 3}
+    assert min(counts.values()) > 800
+
+
+def test_adding_shard_only_moves_owners_to_new_shard():
+    """シャードを1つ増やしても、移動するのは新しいシャードに行く所有者だけ"""
+    keys = [uuid4().int >> 64 for _ in range(2000)]
+
+    for key in keys:
+        before, after = jump_hash(key, 4), jump_hash(key, 5)
+        assert after == before or after == 4
+    moved = sum(jump_hash(key, 4) != jump_hash(key, 5) for key in keys)
+    assert moved < len(keys) * 0.3
+
+
+@pytest_asyncio.fixture
+async def sharded_db(tmp_path):
+    """
+    2つのSQLiteシャードを持つDB
+
+    シャードの一覧は各モジュールが同じリストを参照しているので、中身を入れ替えて有効にする。
+    テストは enable() を呼ぶまでシャーディングなし（defaultだけ）で書き込める。
+    """
+    names = ["shard_0", "shard_1"]
+    await Tortoise.init(config={
+        "connections": {
+            WRITE_CONNECTION: f"sqlite://{tmp_path / 'default.sqlite3'}",
+            **{name: f"sqlite://{tmp_path / f'{name}.sqlite3'}" for name in names},
+        },
+        "apps": {"models": {"models": ["src.infrastructure.db.models"], "default_connection": WRITE_CONNECTION}},
+    })
+    await Tortoise.generate_schemas()
+
+    async def enable() -> None:
+        SHARD_CONNECTIONS[:] = names
+        await ensure_shard_schemas()
+
+    try:
+        yield enable
+    finally:
+        SHARD_CONNECTIONS.clear()
+        await Tortoise.close_connections()
+        # Tortoise は接続設定を次の init に持ち越すので、シャードの設定を残さない
+        for name in names:
+            connections.db_config.pop(name, None)
+
+
+def _owners_per_shard(shards: int) -> list[UserEntity]:
+    """シャードごとに1人ずつ、そのシャードに置かれる所有者"""
+    owners = {}
+    while len(owners) < shards:
+        owner_uuid = uuid4()
+        owners.setdefault(shard_index(owner_uuid, shards), owner_uuid)
+    return [
+        UserEntity(uuid=str(owners[i]), username=f"user{i}", email=f"user{i}@example.com")
+        for i in range(shards)
+    ]
+
+
+async def _write_chat(repo: ChatRepositoryImpl, user: UserEntity, replies: int = 1) -> ChatTreeEntity:
+    """ルートと replies 件の返信を持つチャットを書き込む"""
+    chat_tree = ChatTreeEntity()
+    root = MessageEntity.create_user_message(f"{user.username} の質問")
+    chat_tree.new_chat(root, owner_uuid=user.uuid, chat_uuid=uuid4())
+    await repo.save_message(root, chat_tree, user)
+    for i in range(replies):
+        reply = MessageEntity.create_assistant_message(f"{user.username} への回答 {i}")
+        chat_tree.add_message(root, reply)
+        await repo.save_message(reply, chat_tree, user)
+    return chat_tree
+
+
+async def _counts(model, name: str) -> int:
+    return await model.all().using_db(connections.get(name)).count()
+
+
+@pytest.mark.asyncio
+async def test_writes_land_on_owner_shard(sharded_db):
+    """チャットとメッセージは所有者のシャードにだけ書き込まれる"""
+    await sharded_db()
+    repo = ChatRepositoryImpl()
+    users = _owners_per_shard(2)
+
+    chats = [await _write_chat(repo, user) for user in users]
+
+    for i, (user, chat_tree) in enumerate(zip(users, chats)):
+        assert shard_for(user.uuid) == f"shard_{i}"
+        own, other = connections.get(f"shard_{i}"), connections.get(f"shard_{1 - i}")
+        assert await ChatTreeDetail.filter(uuid=chat_tree.uuid).using_db(own).exists()
+        assert not await ChatTreeDetail.filter(uuid=chat_tree.uuid).using_db(other).exists()
+        assert await MessageModel.filter(chat_tree_id=chat_tree.uuid).using_db(own).count() == 2
+        messages = await repo.get_chat_tree_messages(str(chat_tree.uuid), user)
+        assert len(messages) == 2
+    assert await _counts(ChatTreeDetail, WRITE_CONNECTION) == 0
+    assert await _counts(MessageModel, WRITE_CONNECTION) == 0
+
+
+@pytest.mark.asyncio
+async def test_list_all_chat_trees_merges_shards(sharded_db):
+    """全ユーザーの一覧は全シャードのチャットを updated の降順で返す"""
+    await sharded_db()
+    repo = ChatRepositoryImpl()
+    users = _owners_per_shard(2)
+    written = [await _write_chat(repo, users[i % 2], replies=0) for i in range(5)]
+
+    chats, next_cursor = await repo.list_all_chat_trees(limit=10)
+
+    assert next_cursor is None
+    assert {chat["uuid"] for chat in chats} == {str(chat_tree.uuid) for chat_tree in written}
+    assert [chat["updated"] for chat in chats] == sorted((chat["updated"] for chat in chats), reverse=True)
+
+    first_page, cursor = await repo.list_all_chat_trees(limit=3)
+    second_page, _ = await repo.list_all_chat_trees(limit=3, cursor=cursor)
+    assert [chat["uuid"] for chat in first_page + second_page] == [chat["uuid"] for chat in chats]
+
+
+@pytest.mark.asyncio
+async def test_rebalance_moves_chats_to_owner_shard(sharded_db):
+    """導入前に default へ書いたチャットを、rebalance が所有者のシャードへ移す"""
+    repo = ChatRepositoryImpl()
+    users = _owners_per_shard(2)
+    chats = [await _write_chat(repo, users[0]) for _ in range(2)] + [await _write_chat(repo, users[1])]
+    assert await _counts(ChatTreeDetail, WRITE_CONNECTION) == 3
+    await sharded_db()
+
+    moved = await rebalance()
+
+    assert moved == {"shard_0": 2, "shard_1": 1}
+    assert await _counts(ChatTreeDetail, WRITE_CONNECTION) == 0
+    assert await _counts(MessageModel, WRITE_CONNECTION) == 0
+    assert await _counts(ChatTreeDetail, "shard_0") == 2
+    assert await _counts(MessageModel, "shard_0") == 4
+    assert await _counts(ChatTreeDetail, "shard_1") == 1
+    assert await _counts(MessageModel, "shard_1") == 2
+    messages = await repo.get_chat_tree_messages(str(chats[2].uuid), users[1])
+    assert {m["content"] for m in messages} == {"user1 の質問", "user1 への回答 0"}
+
+    # 再実行しても移動するものはない
+    assert await rebalance() == {"shard_0": 0, "shard_1": 0}
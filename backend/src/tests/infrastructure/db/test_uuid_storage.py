@@ -0,0 +1,146 @@
+"""UUID列の保存形式（BinaryUUIDField と convert_uuid_storage）のテスト"""
+import sqlite3
+from uuid import UUID, uuid4
+
+import pytest
+from tortoise import Tortoise, connections, fields
+from tortoise.models import Model
+
+from src.domain.entities.chat_tree_entity import ChatTreeEntity
+from src.domain.entities.message_entity import MessageEntity
+from src.domain.entities.user_entity import UserEntity
+from src.infrastructure.config import settings
+from src.infrastructure.db.fields import BinaryUUIDField
+from src.interface_adapters.gateways.chat_repository import ChatRepositoryImpl
+from src.scripts.convert_uuid_storage import collect_uuid_columns, convert_database
+
+
+class BinaryParent(Model):
+    """BinaryUUIDField を主キーに持つテスト用モデル"""
+
+    uuid = BinaryUUIDField(pk=True)
+    name = fields.CharField(max_length=20)
+
+    class Meta(Model.Meta):
+        table = "binary_parent"
+
+
+class BinaryChild(Model):
+    """BinaryParent を外部キーで参照するテスト用モデル"""
+
+    uuid = BinaryUUIDField(pk=True)
+    parent = fields.ForeignKeyField("models.BinaryParent", related_name="children")
+
+    class Meta(Model.Meta):
+        table = "binary_child"
+
+
+@pytest.mark.asyncio
+async def test_binary_uuid_field_round_trip(tmp_path):
+    """BinaryUUIDField は16バイトで保存され、主キー・外部キー・__in の検索で元のUUIDに戻る"""
+    await Tortoise.init(db_url=f"sqlite://{tmp_path / 'binary.sqlite3'}", modules={"models": [__name__]})
+    try:
+        await Tortoise.generate_schemas()
+        parents = [await BinaryParent.create(uuid=uuid4(), name=f"p{i}") for i in range(3)]
+        children = [await BinaryChild.create(uuid=uuid4(), parent=parent) for parent in parents]
+
+        conn = connections.get("default")
+        _, rows = await conn.execute_query(
+            'SELECT typeof("uuid"), length("uuid"), typeof("parent_id"), length("parent_id") FROM "binary_child"'
+        )
+        assert {tuple(row) for row in rows} == {("blob", 16, "blob", 16)}
+
+        loaded = await BinaryParent.get(uuid=parents[0].uuid)
+        assert loaded.uuid == parents[0].uuid and isinstance(loaded.uuid, UUID)
+        assert (await BinaryParent.get(uuid=str(parents[1].uuid))).name == "p1"
+
+        found = await BinaryParent.filter(uuid__in=[parents[0].uuid, str(parents[2].uuid)]).order_by("name")
+        assert [p.name for p in found] == ["p0", "p2"]
+
+        # 外部キー列も同じ形式で保存され、_id・関連先のフィールドのどちらでも引ける
+        assert (await BinaryChild.get(parent_id=parents[1].uuid)).uuid == children[1].uuid
+        in_children = await BinaryChild.filter(parent_id__in=[parents[0].uuid, parents[1].uuid])
+        assert {c.uuid for c in in_children} == {children[0].uuid, children[1].uuid}
+        joined = await BinaryChild.filter(parent__name="p2").values_list("uuid", "parent_id")
+        assert joined == [(children[2].uuid, parents[2].uuid)]
+
+        child = await BinaryChild.get(uuid=children[0].uuid).prefetch_related("parent")
+        assert child.parent.uuid == parents[0].uuid
+        assert {c.uuid for c in await parents[2].children.all()} == {children[2].uuid}
+    finally:
+        await Tortoise.close_connections()
+
+
+def _table_rows(db_path, uuid_columns: dict[str, list[str]]) -> dict[str, list[tuple]]:
+    """テーブルごとの全行（UUID列は形式によらず文字列にそろえる）"""
+    conn = sqlite3.connect(db_path)
+    try:
+        tables = {}
+        for table, uuid_cols in uuid_columns.items():
+            cursor = conn.execute(f'SELECT * FROM "{table}"')
+            names = [d[0] for d in cursor.description]
+            tables[table] = sorted(
+                tuple(
+                    str(UUID(bytes=value)) if name in uuid_cols and isinstance(value, bytes) else value
+                    for name, value in zip(names, row)
+                )
+                for row in cursor
+            )
+        return tables
+    finally:
+        conn.close()
+
+
+def _uuid_types(db_path, table: str, column: str) -> set[str]:
+    conn = sqlite3.connect(db_path)
+    try:
+        return {row[0] for row in conn.execute(f'SELECT typeof("{column}") FROM "{table}"')}
+    finally:
+        conn.close()
+
+
+@pytest.mark.asyncio
+async def test_convert_uuid_storage(tmp_path):
+    """テキストのUUIDのDBをbinaryに変換しても同じ行のまま開け、textへ戻すと元どおりになる"""
+    db_path = tmp_path / "convert.sqlite3"
+    user = UserEntity(uuid=str(uuid4()), username="convert", email="convert@example.com")
+    await Tortoise.init(db_url=f"sqlite://{db_path}", modules={"models": ["src.infrastructure.db.models"]})
+    try:
+        await Tortoise.generate_schemas()
+        repo = ChatRepositoryImpl()
+        chat_tree = ChatTreeEntity()
+        root = MessageEntity.create_user_message("変換前の質問")
+        chat_tree.new_chat(root, owner_uuid=user.uuid, chat_uuid=uuid4())
+        await repo.save_message(root, chat_tree, user)
+        answer = MessageEntity.create_assistant_message("変換前の回答")
+        chat_tree.add_message(root, answer)
+        await repo.save_message(answer, chat_tree, user)
+        await repo.save_assistant_message_detail(
+            answer, {"model": "test-model", "usage": {"total_tokens": 7}}, chat_tree, user
+        )
+        original = await repo.get_chat_tree_messages(str(chat_tree.uuid), user)
+    finally:
+        await Tortoise.close_connections()
+
+    uuid_columns = await collect_uuid_columns()
+    # 設定が binary でも、テキストのDBから始める
+    convert_database(db_path, "text", uuid_columns)
+    assert _uuid_types(db_path, "messages", "parent_id") == {"text", "null"}
+    text_rows = _table_rows(db_path, uuid_columns)
+
+    convert_database(db_path, "binary", uuid_columns)
+    assert _uuid_types(db_path, "messages", "uuid") == {"blob"}
+    assert _uuid_types(db_path, "messages", "parent_id") == {"blob", "null"}
+    assert _table_rows(db_path, uuid_columns) == text_rows
+
+    convert_database(db_path, "text", uuid_columns)
+    assert _table_rows(db_path, uuid_columns) == text_rows
+
+    # 設定の形式にそろえてから開き直すと、同じメッセージが読める
+    convert_database(db_path, settings.DB_UUID_STORAGE, uuid_columns)
+    await Tortoise.init(db_url=f"sqlite://{db_path}", modules={"models": ["src.infrastructure.db.models"]})
+    try:
+        reopened = await ChatRepositoryImpl().get_chat_tree_messages(str(chat_tree.uuid), user)
+    finally:
+        await Tortoise.close_connections()
+    assert reopened == original
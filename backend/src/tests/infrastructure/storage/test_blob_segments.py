@@ -0,0 +1,46 @@
+"""セグメントの圧縮（scripts/blob_segments.py）のテスト"""
+import pytest
+from tortoise.transactions import in_transaction
+
+from src.infrastructure.config import settings
+from src.infrastructure.db.models import MessageBlob
+from src.infrastructure.storage.segment_store import get_segment_store
+from src.interface_adapters.gateways.message_blobs import acquire_blob
+from src.scripts.blob_segments import compact, referenced_records
+
+
+@pytest.fixture
+def segment_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "BLOB_STORE_THRESHOLD", 1024)
+    monkeypatch.setattr(settings, "BLOB_STORE_DIR", str(tmp_path / "segments"))
+    get_segment_store.cache_clear()
+    yield get_segment_store()
+    get_segment_store().close()
+    get_segment_store.cache_clear()
+
+
+@pytest.mark.asyncio
+async def test_compact_sweeps_rolled_back_records(init_db, segment_store):
+    """ロールバックで参照されずに残った本文は、末尾のセグメントでも圧縮で捨てられる"""
+    kept = "残す本文\n" * 500
+    async with in_transaction() as conn:
+        kept_hash = await acquire_blob(conn, kept)
+    with pytest.raises(RuntimeError):
+        async with in_transaction() as conn:
+            await acquire_blob(conn, "ロールバックする本文\n" * 500)
+            raise RuntimeError("rollback")
+
+    assert len(list(segment_store.iter_records(0))) == 2
+    assert list(await referenced_records()) == [0]
+    assert len((await referenced_records())[0]) == 1
+
+    assert await compact(segment_store, min_dead_ratio=0.4) == [0]
+
+    assert segment_store.segments() == [1]
+    [record] = segment_store.iter_records(1)
+    blob = await MessageBlob.get(hash=kept_hash)
+    assert (blob.segment, blob.segment_offset) == (1, record.location.offset)
+    assert blob.text == kept
+
+    # 参照されているレコードだけの末尾は詰め直さない
+    assert await compact(segment_store, min_dead_ratio=0.4) == []
@@ -0,0 +1,63 @@
+"""セグメントファイルのストアのテスト"""
+import pytest
+
+from src.infrastructure.storage.segment_store import HEADER_SIZE, SegmentStore
+
+
+def test_append_and_view(tmp_path):
+    """追記した本文を位置から読み戻せる"""
+    store = SegmentStore(tmp_path, segment_size=1024 * 1024)
+    first = store.append("最初の本文".encode("utf-8"))
+    second = store.append(b"second body")
+
+    assert first.segment == second.segment == 0
+    assert first.offset == HEADER_SIZE
+    assert bytes(store.view(second)) == b"second body"
+    assert store.read_text(first) == "最初の本文"
+    store.close()
+
+
+def test_rotates_to_next_segment(tmp_path):
+    """セグメントが上限を超える場合は次のセグメントに書く"""
+    store = SegmentStore(tmp_path, segment_size=HEADER_SIZE + 100)
+    first = store.append(b"x" * 80)
+    second = store.append(b"y" * 80)
+
+    assert (first.segment, second.segment) == (0, 1)
+    assert store.segments() == [0, 1]
+    assert bytes(store.view(second)) == b"y" * 80
+    store.close()
+
+
+def test_iter_records_and_growing_segment(tmp_path):
+    """レコードを走査でき、mmap後に追記された本文も読める"""
+    store = SegmentStore(tmp_path, segment_size=1024 * 1024)
+    first = store.append(b"a" * 10)
+    assert bytes(store.view(first)) == b"a" * 10
+    second = store.append(b"b" * 20)
+
+    assert bytes(store.view(second)) == b"b" * 20
+    assert [r.location for r in store.iter_records(0)] == [first, second]
+    store.close()
+
+
+def test_view_out_of_range(tmp_path):
+    """範囲外の位置はエラー"""
+    store = SegmentStore(tmp_path, segment_size=1024)
+    location = store.append(b"abc")
+
+    with pytest.raises(ValueError):
+        store.view(type(location)(location.segment, location.offset, 1000))
+    store.close()
+
+
+def test_start_segment(tmp_path):
+    """新しいセグメントを始めると、以降の追記はそちらに書く"""
+    store = SegmentStore(tmp_path, segment_size=1024 * 1024)
+    first = store.append(b"first")
+
+    assert store.start_segment() == 1
+    second = store.append(b"second")
+    assert (first.segment, second.segment) == (0, 1)
+    assert bytes(store.view(first)) == b"first"
+    store.close()
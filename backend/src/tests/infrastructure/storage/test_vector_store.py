@@ -0,0 +1,79 @@
+"""意味検索のベクトルファイルと埋め込み器のテスト"""
+from uuid import uuid4
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.infrastructure.embedding import HashingEmbedder  # noqa: E402
+from src.infrastructure.storage.vector_store import KEY_SIZE, VectorStore  # noqa: E402
+
+
+def _random_vectors(rng, count: int, dim: int):
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_append_and_search(tmp_path):
+    """追記したベクトルを内積の高い順に返し、追記後の行も検索できる"""
+    rng = np.random.default_rng(0)
+    store = VectorStore(tmp_path, dim=16)
+    vectors = _random_vectors(rng, 50, 16)
+    keys = [(uuid4(), uuid4()) for _ in range(50)]
+    store.append(keys[:30], vectors[:30])
+    assert store.search(vectors[40], 1) != []
+    store.append(keys[30:], vectors[30:])
+
+    hits = store.search(vectors[40], 3)
+    assert len(store) == 50
+    assert (hits[0].message_uuid, hits[0].chat_uuid) == keys[40]
+    assert hits[0].score == pytest.approx(1.0, abs=1e-5)
+    assert [hit.score for hit in hits] == sorted((hit.score for hit in hits), reverse=True)
+    store.close()
+
+
+def test_discards_rows_without_keys(tmp_path):
+    """キーを書く前に落ちた行は数えず、次の追記で上書きする"""
+    rng = np.random.default_rng(1)
+    store = VectorStore(tmp_path, dim=8)
+    vectors = _random_vectors(rng, 3, 8)
+    keys = [(uuid4(), uuid4()) for _ in range(3)]
+    store.append(keys[:1], vectors[:1])
+    with open(store.vectors_path, "ab") as f:
+        f.write(vectors[1].tobytes())
+    with open(store.keys_path, "ab") as f:
+        f.write(b"\0" * (KEY_SIZE // 2))
+
+    assert len(store) == 1
+    store.append(keys[2:], vectors[2:])
+    assert len(store) == 2
+    assert store.search(vectors[2], 1)[0].message_uuid == keys[2][0]
+    store.close()
+
+
+def test_ivf_matches_brute_force(tmp_path):
+    """全てのクラスターを調べるIVFは全行の走査と同じ結果で、IVFを作った後の行も見つかる"""
+    rng = np.random.default_rng(2)
+    store = VectorStore(tmp_path, dim=16)
+    vectors = _random_vectors(rng, 400, 16)
+    keys = [(uuid4(), uuid4()) for _ in range(400)]
+    store.append(keys[:300], vectors[:300])
+    assert store.build_ivf(nlist=8) == 8
+    store.append(keys[300:], vectors[300:])
+
+    for i in (5, 350):
+        exact = [hit.message_uuid for hit in store.search(vectors[i], 5)]
+        assert [hit.message_uuid for hit in store.search(vectors[i], 5, nprobe=8)] == exact
+        assert store.search(vectors[i], 1, nprobe=1)[0].message_uuid == keys[i][0]
+    store.close()
+
+
+def test_hashing_embedder_prefers_shared_words():
+    """語や語の一部を共有する本文ほど類似度が高く、空の本文は零ベクトル"""
+    embedder = HashingEmbedder(dim=256)
+    query, related, unrelated, empty = embedder.embed(
+        ["デプロイの手順を教えて", "本番環境へのデプロイ手順", "昼ごはんのおすすめ", ""]
+    )
+    assert float(query @ related) > float(query @ unrelated)
+    assert np.linalg.norm(query) == pytest.approx(1.0, abs=1e-5)
+    assert not empty.any()
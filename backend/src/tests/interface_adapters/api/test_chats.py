@@ -1,10 +1,29 @@
+import asyncio
+import gzip
+import json
 import pytest
 import pytest_asyncio
+from datetime import timedelta
 from fastapi.testclient import TestClient
+from tortoise import timezone
 from uuid import uuid4
-from src.infrastructure.db.models import UserModel, ChatTreeDetail, MessageModel
+from src.infrastructure.db.models import (
+    UserModel,
+    ChatTreeDetail,
+    MessageModel,
+    AssistantMessageDetail,
+    ChatArchive,
+    MessageBlob,
+)
 from src.infrastructure.security.password import PasswordHasher
-from src.domain.entities.message_entity import Role
+from src.domain.entities.chat_tree_entity import ChatTreeEntity
+from src.domain.entities.message_entity import MessageEntity, Role
+from src.domain.entities.user_entity import UserEntity
+from src.interface_adapters.gateways.chat_repository import ChatRepositoryImpl
+from src.interface_adapters.gateways.message_blobs import content_hash
+from src.interface_adapters.gateways.ndjson import decode_ndjson
+from src.application.use_cases.chat_import import ChatImport
+from src.application.use_cases.chat_selection import ChatSelection
 
 
 @pytest_asyncio.fixture
@@ -107,6 +126,93 @@ class TestChatEndpoints:
         data = response.json()
         assert isinstance(data, list)
 
+    async def test_get_all_chats_paginated(
+        self, authenticated_user, auth_headers, client: TestClient
+    ):
+        """limitとカーソルでチャット一覧を重複なくページングできる"""
+        owner_uuid = authenticated_user["user"].uuid
+        created = [
+            await ChatTreeDetail.create(uuid=uuid4(), owner_uuid=owner_uuid)
+            for _ in range(5)
+        ]
+
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/api/v1/chats", headers=auth_headers, params=params)
+
+            assert response.status_code == 200
+            page = response.json()
+            assert len(page) <= 2
+            seen.extend(chat["uuid"] for chat in page)
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+
+        assert sorted(seen) == sorted(str(chat.uuid) for chat in created)
+        updated = [chat.updated for chat in sorted(created, key=lambda c: seen.index(str(c.uuid)))]
+        assert updated == sorted(updated, reverse=True)
+
+        # クリーンアップ
+        for chat in created:
+            await chat.delete()
+
+    async def test_get_all_chats_invalid_cursor(self, auth_headers, client: TestClient):
+        """不正なカーソルは400になる"""
+        response = client.get(
+            "/api/v1/chats", headers=auth_headers, params={"cursor": "not-a-cursor"}
+        )
+
+        assert response.status_code == 400
+
+    async def test_get_all_chats_includes_summary(self, auth_headers, client: TestClient):
+        """作成したチャットのサマリー列が一覧に含まれる"""
+        chat_uuid = client.post("/api/v1/chats", headers=auth_headers).json()["uuid"]
+
+        response = client.get("/api/v1/chats", headers=auth_headers)
+
+        assert response.status_code == 200
+        chat = next(c for c in response.json() if c["uuid"] == chat_uuid)
+        assert chat["message_count"] == 1
+        assert chat["branch_count"] == 1
+        assert chat["total_tokens"] == 0
+        assert chat["last_message_at"] is not None
+
+    async def test_refresh_chat_summary(self, test_chat):
+        """サマリー列をメッセージから集計し直せる"""
+        chat = test_chat["chat"]
+        first = await MessageModel.create(
+            uuid=uuid4(),
+            role=Role.ASSISTANT,
+            content="first\nanswer",
+            parent=test_chat["root_message"],
+            chat_tree=chat,
+        )
+        second = await MessageModel.create(
+            uuid=uuid4(),
+            role=Role.ASSISTANT,
+            content="second answer",
+            parent=test_chat["root_message"],
+            chat_tree=chat,
+        )
+        await AssistantMessageDetail.create(message=first, total_tokens=120)
+        await AssistantMessageDetail.create(message=second, total_tokens=30)
+        # 別のチャットのトークン数は含めない
+        other_chat = await ChatTreeDetail.create(uuid=uuid4(), owner_uuid=chat.owner_uuid)
+        other = await MessageModel.create(uuid=uuid4(), role=Role.ASSISTANT, content="other", chat_tree=other_chat)
+        await AssistantMessageDetail.create(message=other, total_tokens=1000)
+
+        await ChatRepositoryImpl().refresh_chat_summary(chat.uuid)
+
+        refreshed = await ChatTreeDetail.get(uuid=chat.uuid)
+        assert refreshed.message_count == 3
+        assert refreshed.branch_count == 2
+        assert refreshed.total_tokens == 150
+        assert refreshed.last_message_preview == "second answer"
+
     async def test_get_all_chats_without_auth(self, client: TestClient):
         """認証なしではチャット一覧を取得できない"""
         response = client.get("/api/v1/chats")
@@ -128,6 +234,536 @@ class TestChatEndpoints:
         assert isinstance(data["messages"], list)
         assert len(data["messages"]) >= 1
 
+    async def test_get_chat_tree_conditional_and_since(
+        self, authenticated_user, auth_headers, client: TestClient
+    ):
+        """版数のETagで304を返し、?since= で追加分だけを返す"""
+        user = authenticated_user["user"]
+        user_entity = UserEntity(uuid=str(user.uuid), username=user.username, email=user.email)
+        repo = ChatRepositoryImpl()
+        chat_tree = ChatTreeEntity()
+        root = MessageEntity.create_user_message("質問")
+        chat_tree.new_chat(root, owner_uuid=user_entity.uuid, chat_uuid=uuid4())
+        await repo.save_message(root, chat_tree, user_entity)
+
+        url = f"/api/v1/chats/{chat_tree.uuid}"
+        response = client.get(url, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["version"] == 1
+        etag = response.headers["ETag"]
+
+        response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+        assert response.status_code == 304
+
+        answer = MessageEntity.create_assistant_message("回答")
+        chat_tree.add_message(root, answer)
+        await repo.save_message(answer, chat_tree, user_entity)
+
+        response = client.get(url, params={"since": 1}, headers={**auth_headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        data = response.json()
+        assert data["version"] == 2
+        assert [m["uuid"] for m in data["messages"]] == [str(answer.uuid)]
+
+        response = client.get(url, params={"since": 2}, headers=auth_headers)
+        assert response.json()["messages"] == []
+
+    async def test_chat_events_log_and_subscribe(
+        self, authenticated_user, auth_headers, client: TestClient
+    ):
+        """書き込みごとに版数の連番でイベントが残り、since 以降だけを読める・購読できる"""
+        user = authenticated_user["user"]
+        user_entity = UserEntity(uuid=str(user.uuid), username=user.username, email=user.email)
+        repo = ChatRepositoryImpl()
+        chat_tree = ChatTreeEntity()
+        root = MessageEntity.create_user_message("質問")
+        chat_tree.new_chat(root, owner_uuid=user_entity.uuid, chat_uuid=uuid4())
+        await repo.save_message(root, chat_tree, user_entity)
+        answer = MessageEntity.create_assistant_message("回答")
+        chat_tree.add_message(root, answer)
+        await repo.save_message(answer, chat_tree, user_entity)
+        await repo.save_assistant_message_detail(
+            answer, {"model": "test-model", "usage": {"total_tokens": 9}}, chat_tree, user_entity
+        )
+
+        url = f"/api/v1/chats/{chat_tree.uuid}/events"
+        data = client.get(url, headers=auth_headers).json()
+        assert data["version"] == 3
+        assert [(e["seq"], e["type"]) for e in data["events"]] == [
+            (1, "message_added"), (2, "message_added"), (3, "detail_attached"),
+        ]
+        added = data["events"][1]["payload"]
+        assert (added["uuid"], added["parent_uuid"]) == (str(answer.uuid), str(root.uuid))
+        assert added["blob_id"] == content_hash("回答")
+        detail = data["events"][2]["payload"]
+        assert detail["message_uuid"] == str(answer.uuid)
+        assert detail["detail"]["model_name"] == "test-model"
+
+        data = client.get(url, params={"since": 2}, headers=auth_headers).json()
+        assert [e["seq"] for e in data["events"]] == [3]
+
+        # 購読は since より後から返し、新しい書き込みの通知で次のイベントを返す
+        events = repo.subscribe_chat_events(str(chat_tree.uuid), user_entity, since=2, poll_interval=60)
+        assert (await asyncio.wait_for(anext(events), 5))["seq"] == 3
+        pending = asyncio.ensure_future(anext(events))
+        follow_up = MessageEntity.create_user_message("続き")
+        chat_tree.add_message(answer, follow_up)
+        await repo.save_message(follow_up, chat_tree, user_entity)
+        event = await asyncio.wait_for(pending, 5)
+        assert (event["seq"], event["payload"]["uuid"]) == (4, str(follow_up.uuid))
+        await events.aclose()
+
+        other = client.get(f"/api/v1/chats/{uuid4()}/events", headers=auth_headers)
+        assert other.status_code == 404
+
+    async def test_fork_chat_references_ancestors(
+        self, authenticated_user, auth_headers, client: TestClient
+    ):
+        """フォークは分岐点までの祖先をコピーせずに参照し、追加分だけを保存する"""
+        user = authenticated_user["user"]
+        user_entity = UserEntity(uuid=str(user.uuid), username=user.username, email=user.email)
+        repo = ChatRepositoryImpl()
+        chat_tree = ChatTreeEntity()
+        root = MessageEntity.create_system_message("system")
+        chat_tree.new_chat(root, owner_uuid=user_entity.uuid, chat_uuid=uuid4())
+        await repo.save_message(root, chat_tree, user_entity)
+        question = MessageEntity.create_user_message("質問")
+        chat_tree.add_message(root, question)
+        await repo.save_message(question, chat_tree, user_entity)
+        answer = MessageEntity.create_assistant_message("回答")
+        chat_tree.add_message(question, answer)
+        await repo.save_message(answer, chat_tree, user_entity)
+
+        response = client.post(
+            f"/api/v1/chats/{chat_tree.uuid}/fork", json={"message_uuid": str(question.uuid)}, headers=auth_headers
+        )
+        assert response.status_code == 201
+        fork = response.json()
+        assert fork["forked_from"] == str(chat_tree.uuid)
+        assert (fork["message_count"], fork["branch_count"], fork["last_message_preview"]) == (2, 1, "質問")
+        fork_uuid = fork["uuid"]
+        assert await MessageModel.filter(chat_tree_id=fork_uuid).count() == 0
+
+        # 分岐点の兄弟として追加しても、元のチャットには現れない
+        fork_tree = await ChatSelection(repo, user_entity).get_chat_tree(fork_uuid)
+        other = MessageEntity.create_assistant_message("別の回答")
+        fork_tree.add_message(fork_tree.get_message_by_uuid(question.uuid), other)
+        await repo.save_message(other, fork_tree, user_entity)
+        assert [m.content for m in fork_tree.get_conversation_path(other)] == ["system", "質問", "別の回答"]
+
+        data = client.get(f"/api/v1/chats/{fork_uuid}", headers=auth_headers).json()
+        assert {m["uuid"] for m in data["messages"]} == {str(root.uuid), str(question.uuid), str(other.uuid)}
+        data = client.get(f"/api/v1/chats/{fork_uuid}", params={"since": 1}, headers=auth_headers).json()
+        assert [m["uuid"] for m in data["messages"]] == [str(other.uuid)]
+        loaded = await repo.load_chat_tree_messages(fork_uuid, user_entity)
+        assert {m["uuid"] for m in loaded} == {str(root.uuid), str(question.uuid), str(other.uuid)}
+        subtree = client.get(
+            f"/api/v1/chats/{fork_uuid}/subtree", params={"depth": 5}, headers=auth_headers
+        ).json()
+        assert {n["uuid"]: n["child_count"] for n in subtree["nodes"]} == {
+            str(root.uuid): 1, str(question.uuid): 1, str(other.uuid): 0,
+        }
+        source = await repo.get_chat_tree_messages(str(chat_tree.uuid), user_entity)
+        assert {m["uuid"] for m in source} == {str(root.uuid), str(question.uuid), str(answer.uuid)}
+
+        # フォークのフォークは元のフォークの祖先を引き継ぐ
+        nested_uuid = await repo.fork_chat(fork_uuid, other.uuid, user_entity)
+        nested = await repo.get_chat_tree_skeleton(nested_uuid, user_entity)
+        assert [n["uuid"] for n in nested] == [str(root.uuid), str(question.uuid), str(other.uuid)]
+        assert await repo.fork_chat(fork_uuid, answer.uuid, user_entity) is None
+
+        # 祖先を参照されているチャットはアーカイブしない
+        assert await repo.archive_chat(
+            chat_tree.uuid, user.uuid, inactive_before=timezone.now() + timedelta(days=1)
+        ) is None
+
+    async def test_get_chat_subtree_window(
+        self, authenticated_user, auth_headers, client: TestClient
+    ):
+        """深さと子の件数で絞った部分木を取得し、打ち切った兄弟はカーソルで続きを取れる"""
+        user = authenticated_user["user"]
+        user_entity = UserEntity(uuid=str(user.uuid), username=user.username, email=user.email)
+        repo = ChatRepositoryImpl()
+        chat_tree = ChatTreeEntity()
+        root = MessageEntity.create_user_message("root")
+        chat_tree.new_chat(root, owner_uuid=user_entity.uuid, chat_uuid=uuid4())
+        await repo.save_message(root, chat_tree, user_entity)
+
+        async def add(parent, content):
+            message = MessageEntity.create_assistant_message(content)
+            chat_tree.add_message(parent, message)
+            await repo.save_message(message, chat_tree, user_entity)
+            return message
+
+        children = [await add(root, f"child {i}") for i in range(5)]
+        grandchildren = [await add(children[0], f"grandchild {i}") for i in range(3)]
+        for grandchild in grandchildren:
+            await add(grandchild, "leaf")
+
+        url = f"/api/v1/chats/{chat_tree.uuid}/subtree"
+        response = client.get(url, params={"depth": 2, "breadth": 2}, headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        nodes = {n["uuid"]: n for n in data["nodes"]}
+        assert nodes[str(root.uuid)]["child_count"] == 5
+        assert nodes[str(root.uuid)]["length"] == len("root")
+        shown_children = [u for u, n in nodes.items() if n["parent_uuid"] == str(root.uuid)]
+        assert len(shown_children) == 2
+        assert all(n["parent_uuid"] in nodes for n in nodes.values() if n["uuid"] != str(root.uuid))
+        # 最下段のノードは子を返さず、子の数だけを返す
+        for n in nodes.values():
+            if n["parent_uuid"] == str(children[0].uuid):
+                assert n["child_count"] == 1
+        more = {m["parent_uuid"]: m["cursor"] for m in data["more"]}
+        assert str(root.uuid) in more
+
+        # カーソルで残りの兄弟を取得する
+        seen = set(shown_children)
+        cursor = more[str(root.uuid)]
+        while cursor:
+            response = client.get(
+                url, params={"depth": 0, "breadth": 2, "cursor": cursor}, headers=auth_headers
+            )
+            assert response.status_code == 200
+            page = response.json()
+            page_uuids = {n["uuid"] for n in page["nodes"]}
+            assert not page_uuids & seen
+            seen |= page_uuids
+            cursor = next((m["cursor"] for m in page["more"]), None)
+        assert seen == {str(c.uuid) for c in children}
+
+        # 起点を指定すると、そのメッセージから下を返す
+        response = client.get(
+            url, params={"root": str(children[0].uuid), "depth": 1, "breadth": 10}, headers=auth_headers
+        )
+        nodes = {n["uuid"]: n for n in response.json()["nodes"]}
+        assert set(nodes) == {str(children[0].uuid)} | {str(g.uuid) for g in grandchildren}
+        assert response.json()["more"] == []
+
+        response = client.get(url, params={"cursor": "broken"}, headers=auth_headers)
+        assert response.status_code == 400
+        response = client.get(url, params={"root": str(uuid4())}, headers=auth_headers)
+        assert response.status_code == 404
+
+    async def test_diff_branches(
+        self, authenticated_user, auth_headers, client: TestClient
+    ):
+        """2つの回答の枝が分かれた位置と、そこから先のそれぞれの枝を返す"""
+        user = authenticated_user["user"]
+        user_entity = UserEntity(uuid=str(user.uuid), username=user.username, email=user.email)
+        repo = ChatRepositoryImpl()
+        chat_tree = ChatTreeEntity()
+        root = MessageEntity.create_system_message("system")
+        chat_tree.new_chat(root, owner_uuid=user_entity.uuid, chat_uuid=uuid4())
+        question = MessageEntity.create_user_message("質問")
+        chat_tree.add_message(root, question)
+        first = MessageEntity.create_assistant_message("回答1")
+        chat_tree.add_message(question, first)
+        second = MessageEntity.create_assistant_message("回答2")
+        chat_tree.add_message(question, second)
+        follow_up = MessageEntity.create_user_message("続き")
+        chat_tree.add_message(second, follow_up)
+        for message in (root, question, first, second, follow_up):
+            await repo.save_message(message, chat_tree, user_entity)
+
+        url = f"/api/v1/chats/{chat_tree.uuid}/diff"
+        response = client.get(url, params={"left": str(first.uuid), "right": str(follow_up.uuid)}, headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["ancestor_uuid"] == str(question.uuid)
+        assert data["common_length"] == 2
+        assert [m["content"] for m in data["left"]] == ["回答1"]
+        assert [(m["uuid"], m["role"]) for m in data["right"]] == [
+            (str(second.uuid), "assistant"), (str(follow_up.uuid), "user"),
+        ]
+
+        response = client.get(url, params={"left": str(second.uuid), "right": str(uuid4())}, headers=auth_headers)
+        assert response.status_code == 404
+        response = client.get(
+            f"/api/v1/chats/{uuid4()}/diff",
+            params={"left": str(first.uuid), "right": str(second.uuid)},
+            headers=auth_headers,
+        )
+        assert response.status_code == 404
+
+        # 親が循環した木では経路を辿れないので、止まらずに409を返す
+        await MessageModel.filter(uuid=question.uuid).update(parent_id=second.uuid)
+        response = client.get(url, params={"left": str(first.uuid), "right": str(follow_up.uuid)}, headers=auth_headers)
+        assert response.status_code == 409
+
+    async def test_export_chats_ndjson(
+        self, authenticated_user, auth_headers, client: TestClient
+    ):
+        """チャットをNDJSON（gzipも可）でエクスポートできる"""
+        user = authenticated_user["user"]
+        user_entity = UserEntity(uuid=str(user.uuid), username=user.username, email=user.email)
+        repo = ChatRepositoryImpl()
+        chat_tree = ChatTreeEntity()
+        root = MessageEntity.create_user_message("質問")
+        chat_tree.new_chat(root, owner_uuid=user_entity.uuid, chat_uuid=uuid4())
+        await repo.save_message(root, chat_tree, user_entity)
+        answer = MessageEntity.create_assistant_message("回答")
+        chat_tree.add_message(root, answer)
+        await repo.save_message(answer, chat_tree, user_entity)
+        await repo.save_assistant_message_detail(
+            answer, {"model": "test-model", "usage": {"total_tokens": 42}}, chat_tree, user_entity
+        )
+
+        response = client.get(f"/api/v1/chats/{chat_tree.uuid}/export", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert [r["type"] for r in records] == ["chat", "message", "message"]
+        assert records[0]["uuid"] == str(chat_tree.uuid)
+        messages = {r["uuid"]: r for r in records[1:]}
+        assert messages[str(root.uuid)]["content"] == "質問"
+        assert messages[str(root.uuid)]["assistant_detail"] is None
+        assert messages[str(answer.uuid)]["parent_uuid"] == str(root.uuid)
+        assert messages[str(answer.uuid)]["assistant_detail"]["model_name"] == "test-model"
+        assert messages[str(answer.uuid)]["assistant_detail"]["total_tokens"] == 42
+
+        response = client.get("/api/v1/chats/export", params={"gzip": True}, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/gzip"
+        lines = gzip.decompress(response.content).decode("utf-8").splitlines()
+        assert [json.loads(line)["type"] for line in lines] == ["chat", "message", "message"]
+
+        response = client.get(f"/api/v1/chats/{uuid4()}/export", headers=auth_headers)
+        assert response.status_code == 404
+
+    async def test_import_chats_from_export(
+        self, authenticated_user, auth_headers, client: TestClient
+    ):
+        """エクスポートしたNDJSONを一括インポートでき、既存のチャットはスキップする"""
+        user = authenticated_user["user"]
+        user_entity = UserEntity(uuid=str(user.uuid), username=user.username, email=user.email)
+        repo = ChatRepositoryImpl()
+        chat_tree = ChatTreeEntity()
+        root = MessageEntity.create_user_message("質問")
+        chat_tree.new_chat(root, owner_uuid=user_entity.uuid, chat_uuid=uuid4())
+        await repo.save_message(root, chat_tree, user_entity)
+        answer = MessageEntity.create_assistant_message("回答")
+        chat_tree.add_message(root, answer)
+        await repo.save_message(answer, chat_tree, user_entity)
+        await repo.save_assistant_message_detail(
+            answer, {"model": "test-model", "usage": {"total_tokens": 42}}, chat_tree, user_entity
+        )
+
+        response = client.get(f"/api/v1/chats/{chat_tree.uuid}/export", params={"gzip": True}, headers=auth_headers)
+        exported = response.content
+        records = list(decode_ndjson([exported[:10], exported[10:]], compressed=True))
+
+        # 同じUUIDのチャットは取り込まない
+        chat_import = ChatImport(repo, user_entity)
+        result = await chat_import.import_records(records)
+        assert (result.chats, result.messages, result.skipped_chats) == (0, 0, 1)
+
+        # UUIDを振り直して別のチャットとして取り込む
+        text = gzip.decompress(exported).decode("utf-8")
+        for old in [str(chat_tree.uuid), str(root.uuid), str(answer.uuid)]:
+            text = text.replace(old, str(uuid4()))
+        records = list(decode_ndjson([text.encode("utf-8")]))
+        progress = []
+        result = await chat_import.import_records(records, chunk_size=1, on_progress=progress.append)
+        assert (result.chats, result.messages, result.skipped_chats) == (1, 2, 0)
+        assert progress == [1, 2]
+
+        response = client.get(f"/api/v1/chats/{records[0]['uuid']}", headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["version"] == 2
+        assert data["created"] == records[0]["created"]
+        messages = {m["uuid"]: m for m in data["messages"]}
+        assert messages[records[1]["uuid"]]["content"] == "質問"
+        assert messages[records[2]["uuid"]]["parent_uuid"] == records[1]["uuid"]
+        detail = await AssistantMessageDetail.get(message_id=records[2]["uuid"])
+        assert detail.total_tokens == 42
+
+        # 親が欠けた木はDBに書く前に拒否する
+        records[2]["parent_uuid"] = str(uuid4())
+        records[0]["uuid"] = records[1]["chat_uuid"] = records[2]["chat_uuid"] = str(uuid4())
+        with pytest.raises(ValueError, match="not found"):
+            await chat_import.import_records(records)
+
+    async def test_imported_and_restored_messages_are_related(
+        self, authenticated_user, auth_headers, client: TestClient, tmp_path
+    ):
+        """インポートしたメッセージを意味検索でき、アーカイブ中に作り直しても戻したメッセージを引ける"""
+        pytest.importorskip("numpy")
+        from main import app
+        from src.infrastructure.embedding import HashingEmbedder
+        from src.interface_adapters.gateways.semantic_index import SemanticIndexImpl, get_semantic_index
+        from src.scripts.semantic_index import rebuild
+
+        user = authenticated_user["user"]
+        user_entity = UserEntity(uuid=str(user.uuid), username=user.username, email=user.email)
+        repo = ChatRepositoryImpl()
+        index = SemanticIndexImpl(tmp_path, HashingEmbedder(dim=256))
+        chat_uuid, deploy_uuid, lunch_uuid = str(uuid4()), str(uuid4()), str(uuid4())
+        records = [
+            {"type": "chat", "uuid": chat_uuid, "created": timezone.now().isoformat()},
+            {"type": "message", "chat_uuid": chat_uuid, "uuid": deploy_uuid, "parent_uuid": None,
+             "role": "user", "content": "本番環境へのデプロイ手順を整理したい"},
+            {"type": "message", "chat_uuid": chat_uuid, "uuid": lunch_uuid, "parent_uuid": deploy_uuid,
+             "role": "assistant", "content": "昼ごはんのおすすめを教えて"},
+        ]
+        result = await ChatImport(repo, user_entity, semantic_index=index).import_records(records)
+        assert result.messages == 2
+
+        app.dependency_overrides[get_semantic_index] = lambda: index
+        try:
+            url = "/api/v1/messages/related"
+            response = client.get(url, params={"q": "デプロイのやり方", "limit": 1}, headers=auth_headers)
+            assert response.status_code == 200
+            assert [h["uuid"] for h in response.json()] == [deploy_uuid]
+
+            # アーカイブ中に作り直しても、アーカイブのレコードからベクトルを作る
+            assert await repo.archive_chat(chat_uuid, user_entity.uuid, inactive_before=timezone.now()) == 2
+            assert await rebuild(index) == 2
+            response = client.get(f"/api/v1/chats/{chat_uuid}", headers=auth_headers)
+            assert response.status_code == 200
+            response = client.get(url, params={"q": "デプロイのやり方", "limit": 1}, headers=auth_headers)
+            assert [h["uuid"] for h in response.json()] == [deploy_uuid]
+        finally:
+            app.dependency_overrides.pop(get_semantic_index, None)
+
+    async def test_archive_and_restore_chat(
+        self, authenticated_user, auth_headers, client: TestClient
+    ):
+        """アーカイブしたチャットは一覧に残り、開くとメッセージが元の値で戻る"""
+        user = authenticated_user["user"]
+        user_entity = UserEntity(uuid=str(user.uuid), username=user.username, email=user.email)
+        repo = ChatRepositoryImpl()
+        chat_tree = ChatTreeEntity()
+        root = MessageEntity.create_user_message("アーカイブされる質問")
+        chat_tree.new_chat(root, owner_uuid=user_entity.uuid, chat_uuid=uuid4())
+        await repo.save_message(root, chat_tree, user_entity)
+        answer = MessageEntity.create_assistant_message("アーカイブされる回答")
+        chat_tree.add_message(root, answer)
+        await repo.save_message(answer, chat_tree, user_entity)
+        await repo.save_assistant_message_detail(
+            answer, {"model": "test-model", "usage": {"total_tokens": 42}}, chat_tree, user_entity
+        )
+        original = await repo.get_chat_tree_messages(str(chat_tree.uuid), user_entity)
+        updated = timezone.now() - timedelta(days=60)
+        await ChatTreeDetail.filter(uuid=chat_tree.uuid).update(updated=updated)
+
+        # 判定日時より後に更新されたチャットは移さない
+        assert await repo.archive_chat(
+            chat_tree.uuid, user_entity.uuid, inactive_before=updated - timedelta(days=1)
+        ) is None
+        assert await repo.archive_chat(
+            chat_tree.uuid, user_entity.uuid, inactive_before=timezone.now()
+        ) == 2
+        assert not await MessageModel.filter(chat_tree_id=chat_tree.uuid).exists()
+        assert not await AssistantMessageDetail.filter(message_id=answer.uuid).exists()
+        assert not await MessageBlob.filter(hash=content_hash("アーカイブされる回答")).exists()
+
+        # 一覧と全チャットのエクスポートはメッセージを戻さずに使える
+        response = client.get("/api/v1/chats", headers=auth_headers)
+        assert [c["uuid"] for c in response.json()] == [str(chat_tree.uuid)]
+        response = client.get("/api/v1/chats/export", headers=auth_headers)
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert [r["content"] for r in records[1:]] == ["アーカイブされる質問", "アーカイブされる回答"]
+        assert (await ChatTreeDetail.get(uuid=chat_tree.uuid)).archived_at is not None
+
+        # 開くとメッセージが戻る
+        response = client.get(f"/api/v1/chats/{chat_tree.uuid}", headers=auth_headers)
+        assert response.status_code == 200
+        messages = {m["uuid"]: m for m in response.json()["messages"]}
+        for message in original:
+            restored = messages[str(message["uuid"])]
+            assert restored["content"] == message["content"]
+            assert restored["parent_uuid"] == (str(message["parent_uuid"]) if message["parent_uuid"] else None)
+            assert restored["created_at"] == message["created_at"]
+        detail = await ChatTreeDetail.get(uuid=chat_tree.uuid)
+        assert detail.archived_at is None
+        assert detail.updated == updated
+        assert detail.message_count == 2
+        assert not await ChatArchive.filter(chat_tree_id=chat_tree.uuid).exists()
+        assert (await AssistantMessageDetail.get(message_id=answer.uuid)).total_tokens == 42
+
+    async def test_archived_chat_not_restored_by_other_user(
+        self, authenticated_user, client: TestClient
+    ):
+        """他のユーザーが開いても、メタ情報を読むだけでも、アーカイブ済みのチャットのメッセージは戻らない"""
+        user = authenticated_user["user"]
+        user_entity = UserEntity(uuid=str(user.uuid), username=user.username, email=user.email)
+        repo = ChatRepositoryImpl()
+        chat_tree = ChatTreeEntity()
+        root = MessageEntity.create_user_message("他人には戻させない質問")
+        chat_tree.new_chat(root, owner_uuid=user_entity.uuid, chat_uuid=uuid4())
+        await repo.save_message(root, chat_tree, user_entity)
+        assert await repo.archive_chat(chat_tree.uuid, user_entity.uuid, inactive_before=timezone.now()) == 1
+
+        other_user = await UserModel.create(
+            uuid=uuid4(),
+            username="otheruser",
+            email="other@example.com",
+            password_hash=PasswordHasher.hash_password("password"),
+            is_active=True,
+        )
+        login_response = client.post(
+            "/api/v1/auth/login",
+            json={"username": "otheruser", "password": "password"},
+        )
+        other_headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+        response = client.get(f"/api/v1/chats/{chat_tree.uuid}", headers=other_headers)
+        assert response.status_code in (403, 404)
+        # メタ情報を読むだけ（ユーザーを指定しない集計なども）ではメッセージを戻さない
+        for reader in (None, user_entity):
+            chat = await repo.get_chat_tree_info(str(chat_tree.uuid), reader)
+            assert chat["archived"] is True
+        assert (await ChatTreeDetail.get(uuid=chat_tree.uuid)).archived_at is not None
+        assert await ChatArchive.filter(chat_tree_id=chat_tree.uuid).exists()
+        assert not await MessageModel.filter(chat_tree_id=chat_tree.uuid).exists()
+
+        await other_user.delete()
+
+    async def test_get_chat_skeleton(
+        self, auth_headers, test_chat, client: TestClient, monkeypatch
+    ):
+        """構造だけを本文なしで取得でき、ETagが一致すればノードを読まずに304になる"""
+        chat_uuid = str(test_chat["chat"].uuid)
+        response = client.get(f"/api/v1/chats/{chat_uuid}/skeleton", headers=auth_headers)
+
+        assert response.status_code == 200
+        nodes = response.json()["nodes"]
+        assert nodes == [{
+            "uuid": str(test_chat["root_message"].uuid),
+            "parent_uuid": None,
+            "role": "user",
+            "length": len("Hello"),
+            "created_at": nodes[0]["created_at"],
+        }]
+        etag = response.headers["ETag"]
+
+        async def unexpected(*args, **kwargs):
+            raise AssertionError("304 must not load the nodes")
+
+        with monkeypatch.context() as patch:
+            patch.setattr(ChatRepositoryImpl, "get_chat_tree_skeleton", unexpected)
+            response = client.get(
+                f"/api/v1/chats/{chat_uuid}/skeleton", headers={**auth_headers, "If-None-Match": etag}
+            )
+        assert response.status_code == 304
+        assert response.content == b""
+
+        # メッセージが増える（版数が進む）とETagが変わる
+        await MessageModel.create(
+            uuid=uuid4(), role=Role.ASSISTANT, content="Hi!",
+            parent=test_chat["root_message"], chat_tree=test_chat["chat"],
+        )
+        await ChatTreeDetail.filter(uuid=chat_uuid).update(version=test_chat["chat"].version + 1)
+        response = client.get(
+            f"/api/v1/chats/{chat_uuid}/skeleton", headers={**auth_headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert [n["length"] for n in response.json()["nodes"]] == [5, 3]
+
     async def test_get_chat_tree_nonexistent(self, auth_headers, client: TestClient):
         """存在しないチャットは取得できない"""
         nonexistent_uuid = str(uuid4())
@@ -1,11 +1,18 @@
+import hashlib
 import pytest
 import pytest_asyncio
 from fastapi.testclient import TestClient
 from uuid import uuid4
-from src.infrastructure.db.models import UserModel, ChatTreeDetail, MessageModel
+from src.infrastructure.db.models import (
+    UserModel, AssistantMessageDetail, ChatTreeDetail, MessageBlob, MessageModel,
+)
 from src.infrastructure.security.password import PasswordHasher
-from src.domain.entities.message_entity import Role
+from src.domain.entities.chat_tree_entity import ChatTreeEntity
+from src.domain.entities.message_entity import MessageEntity, Role
+from src.domain.entities.user_entity import UserEntity
 from src.infrastructure.config import settings
+from src.infrastructure.storage.segment_store import get_segment_store
+from src.interface_adapters.gateways.chat_repository import ChatRepositoryImpl
 
 
 @pytest_asyncio.fixture
@@ -176,3 +183,306 @@ class TestMessageEndpoints:
 
         # 親メッセージが存在しない場合は404が返る
         assert response.status_code == 404
+
+    async def test_large_content_is_streamed_from_segment(
+        self, authenticated_user, auth_headers, client: TestClient, tmp_path, monkeypatch
+    ):
+        """大きな本文はツリーでは省略され、content エンドポイントで全文を取得できる"""
+        monkeypatch.setattr(settings, "BLOB_STORE_THRESHOLD", 1024)
+        monkeypatch.setattr(settings, "BLOB_STORE_DIR", str(tmp_path))
+        get_segment_store.cache_clear()
+
+        user = authenticated_user["user"]
+        user_entity = UserEntity(uuid=str(user.uuid), username=user.username, email=user.email)
+        repo = ChatRepositoryImpl()
+        chat_tree = ChatTreeEntity()
+        root = MessageEntity.create_user_message("ログを見てください")
+        chat_tree.new_chat(root, owner_uuid=user_entity.uuid, chat_uuid=uuid4())
+        await repo.save_message(root, chat_tree, user_entity)
+        large_body = "ERROR 長いログ行です\n" * 2000
+        answer = MessageEntity.create_assistant_message(large_body)
+        chat_tree.add_message(root, answer)
+        await repo.save_message(answer, chat_tree, user_entity)
+
+        response = client.get(f"/api/v1/chats/{chat_tree.uuid}", headers=auth_headers)
+        assert response.status_code == 200
+        messages = {m["uuid"]: m for m in response.json()["messages"]}
+        assert messages[str(answer.uuid)]["content_external"] is True
+        assert messages[str(answer.uuid)]["content"] == ""
+        assert messages[str(root.uuid)]["content"] == "ログを見てください"
+
+        response = client.get(
+            f"/api/v1/chats/{chat_tree.uuid}/messages/{answer.uuid}/content", headers=auth_headers
+        )
+        assert response.status_code == 200
+        assert response.text == large_body
+
+        # LLMへの入力に使う読み込みでは全文を返す
+        restored = await repo.get_chat_tree_messages(str(chat_tree.uuid), user_entity)
+        assert {m["content"] for m in restored} == {"ログを見てください", large_body}
+        get_segment_store().close()
+        get_segment_store.cache_clear()
+
+    async def test_get_message_contents_batch(
+        self, auth_headers, test_chat, client: TestClient
+    ):
+        """指定したメッセージの本文だけをまとめて取得できる"""
+        chat_uuid = str(test_chat["chat"].uuid)
+        root_uuid = str(test_chat["root_message"].uuid)
+        response = client.post(
+            f"/api/v1/chats/{chat_uuid}/messages/contents",
+            json={"uuids": [root_uuid, str(uuid4())]},
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 200
+        assert response.json() == [{"uuid": root_uuid, "content": "Hello", "content_external": False}]
+
+        response = client.post(
+            f"/api/v1/chats/{chat_uuid}/messages/contents",
+            json={"uuids": [root_uuid]},
+            headers={**auth_headers, "If-None-Match": response.headers["ETag"]},
+        )
+        assert response.status_code == 304
+
+        response = client.post(
+            f"/api/v1/chats/{chat_uuid}/messages/contents",
+            json={"uuids": ["not-a-uuid"]},
+            headers=auth_headers,
+        )
+        assert response.status_code == 400
+
+    async def test_get_message_resource_revalidates(
+        self, auth_headers, test_chat, client: TestClient
+    ):
+        """メッセージを単体で取得でき、ETagが一致すれば304になり、親が付け替わればETagが変わる"""
+        root_uuid = str(test_chat["root_message"].uuid)
+        response = client.get(f"/api/v1/messages/{root_uuid}", headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["content"] == "Hello"
+        assert data["chat_uuid"] == str(test_chat["chat"].uuid)
+        assert response.headers["Cache-Control"] == "private, no-cache"
+        etag = response.headers["ETag"]
+
+        response = client.get(
+            f"/api/v1/messages/{root_uuid}", headers={**auth_headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+
+        # 木の修復で親が付け替わったメッセージは、古いETagでは304にならない
+        reply = await MessageModel.create(
+            uuid=uuid4(), role=Role.ASSISTANT, content="Hi", parent=test_chat["root_message"],
+            chat_tree=test_chat["chat"], user_context_id=test_chat["user"].uuid,
+        )
+        response = client.get(f"/api/v1/messages/{reply.uuid}", headers=auth_headers)
+        assert response.json()["parent_uuid"] == root_uuid
+        etag = response.headers["ETag"]
+        await MessageModel.filter(uuid=reply.uuid).update(parent_id=None)
+        response = client.get(
+            f"/api/v1/messages/{reply.uuid}", headers={**auth_headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert (response.json()["parent_uuid"], response.json()["content"]) == (None, "Hi")
+
+        response = client.get(f"/api/v1/messages/{uuid4()}", headers=auth_headers)
+        assert response.status_code == 404
+
+        response = client.get(
+            "/api/v1/messages", params={"uuids": [root_uuid, str(uuid4())]}, headers=auth_headers
+        )
+        assert response.status_code == 200
+        assert [m["uuid"] for m in response.json()] == [root_uuid]
+        response = client.get(
+            "/api/v1/messages",
+            params={"uuids": [root_uuid]},
+            headers={**auth_headers, "If-None-Match": response.headers["ETag"]},
+        )
+        assert response.status_code == 304
+
+    async def test_get_message_resource_of_other_user(
+        self, test_chat, client: TestClient
+    ):
+        """他のユーザーのメッセージは取得できない"""
+        await UserModel.create(
+            uuid=uuid4(),
+            username="otheruser",
+            email="other@example.com",
+            password_hash=PasswordHasher.hash_password("password"),
+            is_active=True,
+        )
+        login_response = client.post(
+            "/api/v1/auth/login", json={"username": "otheruser", "password": "password"}
+        )
+        other_headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+        response = client.get(
+            f"/api/v1/messages/{test_chat['root_message'].uuid}", headers=other_headers
+        )
+        assert response.status_code == 404
+
+    async def test_delete_subtree(
+        self, authenticated_user, auth_headers, client: TestClient
+    ):
+        """枝を子孫・アシスタント詳細・本文ごと削除でき、フォークの分岐点を含む枝は削除できない"""
+        user = authenticated_user["user"]
+        user_entity = UserEntity(uuid=str(user.uuid), username=user.username, email=user.email)
+        repo = ChatRepositoryImpl()
+        chat_tree = ChatTreeEntity()
+        root = MessageEntity.create_user_message("質問")
+        chat_tree.new_chat(root, owner_uuid=user_entity.uuid, chat_uuid=uuid4())
+        await repo.save_message(root, chat_tree, user_entity)
+        # root -> branch -> (answer, other) / root -> kept -> forked_at
+        branch = MessageEntity.create_user_message("消す枝")
+        chat_tree.add_message(root, branch)
+        await repo.save_message(branch, chat_tree, user_entity)
+        answer = MessageEntity.create_assistant_message("消える回答")
+        chat_tree.add_message(branch, answer)
+        await repo.save_message(answer, chat_tree, user_entity)
+        await repo.save_assistant_message_detail(
+            answer, {"model": "test-model", "usage": {"total_tokens": 42}}, chat_tree, user_entity
+        )
+        other = MessageEntity.create_user_message("消える別の質問")
+        chat_tree.add_message(branch, other)
+        await repo.save_message(other, chat_tree, user_entity)
+        kept = MessageEntity.create_user_message("残す枝")
+        chat_tree.add_message(root, kept)
+        await repo.save_message(kept, chat_tree, user_entity)
+        forked_at = MessageEntity.create_assistant_message("フォークの分岐点")
+        chat_tree.add_message(kept, forked_at)
+        await repo.save_message(forked_at, chat_tree, user_entity)
+        assert await repo.fork_chat(str(chat_tree.uuid), str(forked_at.uuid), user_entity)
+
+        url = f"/api/v1/chats/{chat_tree.uuid}/messages"
+        response = client.delete(f"{url}/{kept.uuid}", headers=auth_headers)
+        assert response.status_code == 409
+
+        response = client.delete(f"{url}/{branch.uuid}", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json() == {"deleted": 3}
+        remaining = await repo.load_chat_tree_messages(str(chat_tree.uuid), user_entity)
+        assert {m["uuid"] for m in remaining} == {str(root.uuid), str(kept.uuid), str(forked_at.uuid)}
+        assert not await AssistantMessageDetail.filter(message_id=answer.uuid).exists()
+        assert not await MessageBlob.filter(hash=hashlib.sha256("消える回答".encode()).hexdigest()).exists()
+        chat = await repo.get_chat_tree_info(str(chat_tree.uuid), user_entity)
+        assert (chat["message_count"], chat["branch_count"]) == (3, 1)
+        events = await repo.get_chat_events(str(chat_tree.uuid), user_entity, since=chat["version"] - 1)
+        assert events[0]["type"] == "subtree_deleted"
+        assert events[0]["payload"] == {"message_uuid": str(branch.uuid), "count": 3}
+
+        response = client.delete(f"{url}/{branch.uuid}", headers=auth_headers)
+        assert response.status_code == 404
+
+    async def test_search_messages(
+        self, authenticated_user, auth_headers, client: TestClient
+    ):
+        """自分のメッセージを全文検索でき、ロール・モデル・日時で絞り込め、削除したメッセージは出ない"""
+        user = authenticated_user["user"]
+        user_entity = UserEntity(uuid=str(user.uuid), username=user.username, email=user.email)
+        repo = ChatRepositoryImpl()
+        chat_tree = ChatTreeEntity()
+        root = MessageEntity.create_user_message("分岐の設計について相談したい")
+        chat_tree.new_chat(root, owner_uuid=user_entity.uuid, chat_uuid=uuid4())
+        await repo.save_message(root, chat_tree, user_entity)
+        answer = MessageEntity.create_assistant_message("ツリー構造で枝ごとに履歴を持つ設計にします。\nBranch diff も可能です")
+        chat_tree.add_message(root, answer)
+        await repo.save_message(answer, chat_tree, user_entity)
+        await repo.save_assistant_message_detail(answer, {"model": "test-model"}, chat_tree, user_entity)
+        follow_up = MessageEntity.create_user_message("枝の設計をもう少し詳しく")
+        chat_tree.add_message(answer, follow_up)
+        await repo.save_message(follow_up, chat_tree, user_entity)
+
+        # 他のユーザーの同じ本文は出ない
+        other = UserEntity(uuid=str(uuid4()), username="other", email="other@example.com")
+        other_tree = ChatTreeEntity()
+        other_root = MessageEntity.create_user_message("分岐の設計について相談したい")
+        other_tree.new_chat(other_root, owner_uuid=other.uuid, chat_uuid=uuid4())
+        await repo.save_message(other_root, other_tree, other)
+
+        url = "/api/v1/messages/search"
+        response = client.get(url, params={"q": "設計"}, headers=auth_headers)
+        assert response.status_code == 200
+        hits = response.json()
+        assert {h["message_uuid"] for h in hits} == {str(root.uuid), str(answer.uuid), str(follow_up.uuid)}
+        assert {h["chat_uuid"] for h in hits} == {str(chat_tree.uuid)}
+
+        response = client.get(url, params={"q": "枝ごとに BRANCH"}, headers=auth_headers)
+        [hit] = response.json()
+        assert hit["message_uuid"] == str(answer.uuid)
+        assert hit["model_name"] == "test-model"
+        assert "枝ごとに" in hit["snippet"] and "\n" not in hit["snippet"]
+        assert [c["uuid"] for c in hit["context"]] == [str(root.uuid)]
+
+        response = client.get(url, params={"q": "枝の設計"}, headers=auth_headers)
+        [hit] = response.json()
+        assert [c["uuid"] for c in hit["context"]] == [str(root.uuid), str(answer.uuid)]
+
+        response = client.get(url, params={"q": "設計", "role": "assistant"}, headers=auth_headers)
+        assert [h["message_uuid"] for h in response.json()] == [str(answer.uuid)]
+        response = client.get(url, params={"q": "設計", "model": "other-model"}, headers=auth_headers)
+        assert response.json() == []
+        response = client.get(url, params={"q": "設計", "since": "2999-01-01T00:00:00"}, headers=auth_headers)
+        assert response.json() == []
+        response = client.get(url, params={"q": "設計", "role": "unknown"}, headers=auth_headers)
+        assert response.status_code == 422
+
+        await repo.delete_subtree(
+            str(chat_tree.uuid), str(answer.uuid), user_entity, owner_uuid=user_entity.uuid
+        )
+        response = client.get(url, params={"q": "設計"}, headers=auth_headers)
+        assert [h["message_uuid"] for h in response.json()] == [str(root.uuid)]
+
+    async def test_related_messages(
+        self, authenticated_user, auth_headers, client: TestClient, tmp_path
+    ):
+        """MessageHandlerが保存したメッセージを意味検索でき、削除したメッセージは出ない"""
+        pytest.importorskip("numpy")
+        from main import app
+        from src.application.use_cases.services.message_handler import MessageHandler
+        from src.infrastructure.embedding import HashingEmbedder
+        from src.interface_adapters.gateways.semantic_index import SemanticIndexImpl, get_semantic_index
+
+        user = authenticated_user["user"]
+        user_entity = UserEntity(uuid=str(user.uuid), username=user.username, email=user.email)
+        repo = ChatRepositoryImpl()
+        index = SemanticIndexImpl(tmp_path, HashingEmbedder(dim=256))
+        handler = MessageHandler(repo=repo, llm_client=None, current_user=user_entity, semantic_index=index)
+        chat_tree = ChatTreeEntity()
+        root = MessageEntity.create_system_message("")
+        chat_tree.new_chat(root, owner_uuid=user_entity.uuid, chat_uuid=uuid4())
+        await repo.save_message(root, chat_tree, user_entity)
+        deploy = await handler.add_user_message(chat_tree, "本番環境へのデプロイ手順を整理したい", root)
+        lunch = await handler.add_user_message(chat_tree, "昼ごはんのおすすめを教えて", root)
+        rollout = await handler.add_assistant_message(chat_tree, "デプロイの手順: ビルドして本番へ反映", deploy)
+
+        app.dependency_overrides[get_semantic_index] = lambda: index
+        try:
+            url = "/api/v1/messages/related"
+            response = client.get(url, params={"q": "デプロイのやり方", "limit": 2}, headers=auth_headers)
+            assert response.status_code == 200
+            hits = response.json()
+            assert {h["uuid"] for h in hits} == {str(deploy.uuid), str(rollout.uuid)}
+            assert hits[0]["score"] >= hits[1]["score"]
+            assert hits[0]["chat_uuid"] == str(chat_tree.uuid)
+
+            response = client.get(url, params={"message": str(deploy.uuid)}, headers=auth_headers)
+            hits = response.json()
+            assert hits[0]["uuid"] == str(rollout.uuid)
+            assert str(deploy.uuid) not in {h["uuid"] for h in hits}
+            assert str(lunch.uuid) in {h["uuid"] for h in hits}
+
+            assert client.get(url, headers=auth_headers).status_code == 400
+            response = client.get(url, params={"message": str(uuid4())}, headers=auth_headers)
+            assert response.status_code == 404
+
+            await repo.delete_subtree(
+                str(chat_tree.uuid), str(rollout.uuid), user_entity, owner_uuid=user_entity.uuid
+            )
+            response = client.get(url, params={"q": "デプロイのやり方"}, headers=auth_headers)
+            assert str(rollout.uuid) not in {h["uuid"] for h in response.json()}
+
+            app.dependency_overrides[get_semantic_index] = lambda: None
+            assert client.get(url, params={"q": "デプロイ"}, headers=auth_headers).status_code == 503
+        finally:
+            app.dependency_overrides.pop(get_semantic_index, None)
@@ -0,0 +1,79 @@
+"""チャットの枝の比較（get_branch_diff）のテスト"""
+from uuid import uuid4
+
+import pytest
+
+from src.application.use_cases.chat_selection import ChatSelection
+from src.domain.entities.chat_tree_entity import ChatTreeEntity
+from src.domain.entities.message_entity import MessageEntity
+from src.domain.entities.user_entity import UserEntity
+from src.interface_adapters.gateways.chat_repository import ChatRepositoryImpl
+
+
+def _user() -> UserEntity:
+    return UserEntity(uuid=str(uuid4()), username="diff", email="diff@example.com")
+
+
+@pytest.mark.asyncio
+async def test_branch_diff_on_deep_chain(init_db):
+    """深い会話でも、分かれた後のメッセージだけを返す"""
+    user = _user()
+    repo = ChatRepositoryImpl()
+    chat_tree = ChatTreeEntity()
+    root = MessageEntity.create_system_message("system")
+    chat_tree.new_chat(root, owner_uuid=user.uuid, chat_uuid=uuid4())
+    await repo.save_message(root, chat_tree, user)
+    chain, parent = [], root
+    for i in range(1500):
+        message = MessageEntity.create_user_message(f"message {i}")
+        chain.append((message, str(parent.uuid)))
+        parent = message
+    left = MessageEntity.create_assistant_message("左の回答")
+    right = MessageEntity.create_assistant_message("右の回答")
+    follow_up = MessageEntity.create_user_message("右の続き")
+    nodes = chat_tree.bulk_add_messages(
+        chain + [(left, str(parent.uuid)), (right, str(parent.uuid)), (follow_up, str(right.uuid))]
+    )
+    await repo.bulk_create_messages(chat_tree, nodes, user)
+
+    diff = await repo.get_branch_diff(str(chat_tree.uuid), str(left.uuid), str(follow_up.uuid), user)
+
+    assert diff["ancestor"] == {"uuid": str(parent.uuid), "role": "user", "content": "message 1499"}
+    assert diff["common_length"] == 1501
+    assert [m["content"] for m in diff["left"]] == ["左の回答"]
+    assert [m["content"] for m in diff["right"]] == ["右の回答", "右の続き"]
+
+    # 片方がもう片方の祖先なら、その側は空
+    diff = await repo.get_branch_diff(str(chat_tree.uuid), str(right.uuid), str(follow_up.uuid), user)
+    assert diff["ancestor"]["uuid"] == str(right.uuid)
+    assert (diff["left"], [m["uuid"] for m in diff["right"]]) == ([], [str(follow_up.uuid)])
+
+
+@pytest.mark.asyncio
+async def test_branch_diff_in_fork(init_db):
+    """フォークでは引き継いだ祖先も比べられ、元のチャットだけにあるメッセージは見つからない"""
+    user = _user()
+    repo = ChatRepositoryImpl()
+    chat_tree = ChatTreeEntity()
+    root = MessageEntity.create_system_message("system")
+    chat_tree.new_chat(root, owner_uuid=user.uuid, chat_uuid=uuid4())
+    question = MessageEntity.create_user_message("質問")
+    chat_tree.add_message(root, question)
+    answer = MessageEntity.create_assistant_message("回答")
+    chat_tree.add_message(question, answer)
+    for message in (root, question, answer):
+        await repo.save_message(message, chat_tree, user)
+
+    fork_uuid = await repo.fork_chat(str(chat_tree.uuid), str(question.uuid), user)
+    fork_tree = await ChatSelection(repo, user).get_chat_tree(fork_uuid)
+    other = MessageEntity.create_assistant_message("別の回答")
+    fork_tree.add_message(fork_tree.get_message_by_uuid(question.uuid), other)
+    await repo.save_message(other, fork_tree, user)
+
+    diff = await ChatSelection(repo, user).diff_branches(fork_uuid, str(root.uuid), str(other.uuid))
+    assert (diff.ancestor.uuid, diff.common_length) == (str(root.uuid), 1)
+    assert [m.content for m in diff.right] == ["質問", "別の回答"]
+
+    assert await repo.get_branch_diff(fork_uuid, str(answer.uuid), str(other.uuid), user) is None
+    diff = await repo.get_branch_diff(str(chat_tree.uuid), str(answer.uuid), str(question.uuid), user)
+    assert [m["content"] for m in diff["left"]] == ["回答"]
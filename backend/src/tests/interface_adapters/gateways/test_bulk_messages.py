@@ -0,0 +1,50 @@
+"""メッセージの一括保存（bulk_create_messages）のテスト"""
+from uuid import uuid4
+
+import pytest
+
+from src.domain.entities.chat_tree_entity import ChatTreeEntity
+from src.domain.entities.message_entity import MessageEntity
+from src.domain.entities.user_entity import UserEntity
+from src.infrastructure.db.models import ChatEvent, ChatTreeDetail
+from src.interface_adapters.gateways.chat_repository import ChatRepositoryImpl
+
+
+class _Interrupted(Exception):
+    pass
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_reserves_versions_before_writing(init_db):
+    """途中のチャンクで止まっても、書き込んだseqは版数を超えず、続く save_message のseqと重ならない"""
+    user = UserEntity(uuid=str(uuid4()), username="bulk", email="bulk@example.com")
+    repo = ChatRepositoryImpl()
+    chat_tree = ChatTreeEntity()
+    root = MessageEntity.create_system_message("system")
+    chat_tree.new_chat(root, owner_uuid=user.uuid, chat_uuid=uuid4())
+    await repo.save_message(root, chat_tree, user)
+    chain, parent = [], root
+    for i in range(6):
+        message = MessageEntity.create_user_message(f"message {i}")
+        chain.append((message, str(parent.uuid)))
+        parent = message
+
+    def interrupt(saved: int) -> None:
+        raise _Interrupted(saved)
+
+    # 最初のチャンク（2件）を保存した後に止める
+    with pytest.raises(_Interrupted):
+        await repo.bulk_create_messages(
+            chat_tree, chat_tree.bulk_add_messages(chain), user, chunk_size=2, on_progress=interrupt
+        )
+    version = await ChatTreeDetail.filter(uuid=chat_tree.uuid).first().values_list("version", flat=True)
+    seqs = await ChatEvent.filter(chat_tree_id=chat_tree.uuid).values_list("seq", flat=True)
+    assert version == 1 + len(chain)
+    assert sorted(seqs) == [1, 2, 3]
+
+    reply = MessageEntity.create_assistant_message("返信")
+    chat_tree.add_message(chat_tree.get_message_node_by_uuid(chain[1][0].uuid).message, reply)
+    await repo.save_message(reply, chat_tree, user)
+    event = await ChatEvent.filter(chat_tree_id=chat_tree.uuid).order_by("-seq").first()
+    assert event.seq == version + 1
+    assert event.payload["uuid"] == str(reply.uuid)
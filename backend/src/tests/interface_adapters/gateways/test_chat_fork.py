@@ -0,0 +1,61 @@
+"""チャットのフォーク（fork_chat と、フォークの範囲の絞り込み）のテスト"""
+import sqlite3
+from uuid import uuid4
+
+import pytest
+from tortoise import connections
+
+from src.domain.entities.chat_tree_entity import ChatTreeEntity
+from src.domain.entities.message_entity import MessageEntity
+from src.domain.entities.user_entity import UserEntity
+from src.infrastructure.db.models import ChatFork
+from src.interface_adapters.gateways.chat_repository import ChatRepositoryImpl
+
+# 古いSQLiteのバインド変数の上限（3.32より前の既定値）
+OLD_VARIABLE_LIMIT = 999
+
+
+async def _limit_variables(limit: int) -> None:
+    """defaultコネクションのバインド変数の上限を下げる（接続を持つスレッドで設定する）"""
+    client = connections.get("default")
+    if client.capabilities.dialect != "sqlite":
+        pytest.skip("SQLiteのバインド変数の上限を下げて確かめる")
+    connection = client._connection
+    await connection._execute(connection._conn.setlimit, sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, limit)
+
+
+@pytest.mark.asyncio
+async def test_fork_deeper_than_variable_limit(init_db):
+    """引き継ぐ祖先がバインド変数の上限より多くても、フォークとフォークのフォークを作って読める"""
+    user = UserEntity(uuid=str(uuid4()), username="fork", email="fork@example.com")
+    repo = ChatRepositoryImpl()
+    chat_tree = ChatTreeEntity()
+    root = MessageEntity.create_system_message("system")
+    chat_tree.new_chat(root, owner_uuid=user.uuid, chat_uuid=uuid4())
+    await repo.save_message(root, chat_tree, user)
+    chain, parent = [], root
+    for i in range(OLD_VARIABLE_LIMIT + 500):
+        message = MessageEntity.create_user_message(f"message {i}")
+        chain.append((message, str(parent.uuid)))
+        parent = message
+    await repo.bulk_create_messages(chat_tree, chat_tree.bulk_add_messages(chain), user)
+    await _limit_variables(OLD_VARIABLE_LIMIT)
+
+    fork_uuid = await repo.fork_chat(str(chat_tree.uuid), str(parent.uuid), user)
+    assert fork_uuid is not None
+    fork = await ChatFork.get(chat_tree_id=fork_uuid)
+    assert (len(fork.path), fork.path[0], fork.path[-1]) == (len(chain) + 1, str(root.uuid), str(parent.uuid))
+
+    info = await repo.get_chat_tree_info(fork_uuid, user)
+    assert info["message_count"] == len(chain) + 1
+    loaded = await repo.load_chat_tree_messages(fork_uuid, user)
+    assert [m["uuid"] for m in loaded] == fork.path
+    since_start = await repo.get_chat_tree_messages(fork_uuid, user, since=0)
+    assert {m["uuid"] for m in since_start} == set(fork.path)
+
+    # フォークのフォークは、引き継いだ祖先の途中からでも作れる
+    branch_point = chain[OLD_VARIABLE_LIMIT][0]
+    nested_uuid = await repo.fork_chat(fork_uuid, str(branch_point.uuid), user)
+    nested = await ChatFork.get(chat_tree_id=nested_uuid)
+    assert nested.path == fork.path[:OLD_VARIABLE_LIMIT + 2]
+    assert len(await repo.get_chat_tree_messages(nested_uuid, user)) == OLD_VARIABLE_LIMIT + 2
@@ -0,0 +1,66 @@
+"""メッセージ本文の重複排除のテスト"""
+from uuid import uuid4
+
+import pytest
+from tortoise.transactions import in_transaction
+
+from src.domain.entities.chat_tree_entity import ChatTreeEntity
+from src.domain.entities.message_entity import MessageEntity
+from src.domain.entities.user_entity import UserEntity
+from src.infrastructure.db.models import MessageBlob, MessageModel
+from src.interface_adapters.gateways.chat_repository import ChatRepositoryImpl
+from src.interface_adapters.gateways.message_blobs import collect_garbage, content_hash, release_blobs
+
+SYSTEM_PROMPT = "You are a helpful assistant."
+
+
+async def _start_chat(repo: ChatRepositoryImpl, user: UserEntity) -> ChatTreeEntity:
+    chat_tree = ChatTreeEntity()
+    root = MessageEntity.create_system_message(SYSTEM_PROMPT)
+    chat_tree.new_chat(root, owner_uuid=user.uuid, chat_uuid=uuid4())
+    await repo.save_message(root, chat_tree, user)
+    return chat_tree
+
+
+@pytest.mark.asyncio
+async def test_same_content_shares_one_blob(init_db):
+    """同じ本文は1つのblobを共有し、参照数が数えられる"""
+    user = UserEntity(uuid=str(uuid4()), username="blob", email="blob@example.com")
+    repo = ChatRepositoryImpl()
+    first = await _start_chat(repo, user)
+    second = await _start_chat(repo, user)
+
+    blob = await MessageBlob.get(hash=content_hash(SYSTEM_PROMPT))
+    assert blob.ref_count == 2
+    assert await MessageBlob.all().count() == 1
+
+    for chat_tree in (first, second):
+        messages = await repo.get_chat_tree_messages(str(chat_tree.uuid), user)
+        assert [m["content"] for m in messages] == [SYSTEM_PROMPT]
+
+
+@pytest.mark.asyncio
+async def test_unreferenced_blob_is_deleted(init_db):
+    """参照がなくなったblobは削除される"""
+    user = UserEntity(uuid=str(uuid4()), username="blob", email="blob@example.com")
+    repo = ChatRepositoryImpl()
+    await _start_chat(repo, user)
+    await _start_chat(repo, user)
+    blob_hash = content_hash(SYSTEM_PROMPT)
+
+    async with in_transaction() as conn:
+        message = await MessageModel.filter(blob_id=blob_hash).using_db(conn).first()
+        await message.delete(using_db=conn)
+        assert await release_blobs(conn, [blob_hash]) == 0
+    assert (await MessageBlob.get(hash=blob_hash)).ref_count == 1
+
+    async with in_transaction() as conn:
+        await MessageModel.filter(blob_id=blob_hash).using_db(conn).delete()
+        assert await release_blobs(conn, [blob_hash]) == 1
+    assert not await MessageBlob.exists(hash=blob_hash)
+
+    # 参照数がずれていても、参照中のblobはGCで消さない
+    await _start_chat(repo, user)
+    await MessageBlob.filter(hash=blob_hash).update(ref_count=0)
+    async with in_transaction() as conn:
+        assert await collect_garbage(conn) == 0
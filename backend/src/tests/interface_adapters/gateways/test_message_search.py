@@ -0,0 +1,100 @@
+"""メッセージの全文検索（search_messages）のテスト"""
+from uuid import uuid4
+
+import pytest
+from tortoise import connections
+
+from src.domain.entities.chat_tree_entity import ChatTreeEntity
+from src.domain.entities.message_entity import MessageEntity
+from src.domain.entities.user_entity import UserEntity
+from src.infrastructure.db import search_index
+from src.infrastructure.db.search_index import SEARCH_KEY_TABLE, _ready, is_postgres, search_rowid
+from src.interface_adapters.gateways.chat_repository import ChatRepositoryImpl
+from src.interface_adapters.gateways.message_blobs import content_hash
+
+
+async def _write_chat(
+        repo: ChatRepositoryImpl,
+        user: UserEntity,
+        contents: list[str],
+        ) -> tuple[ChatTreeEntity, list[MessageEntity]]:
+    """contents を1本の会話として保存する"""
+    chat_tree = ChatTreeEntity()
+    messages = [MessageEntity.create_user_message(content) for content in contents]
+    chat_tree.new_chat(messages[0], owner_uuid=user.uuid, chat_uuid=uuid4())
+    await repo.save_message(messages[0], chat_tree, user)
+    for parent, message in zip(messages, messages[1:]):
+        chat_tree.add_message(parent, message)
+        await repo.save_message(message, chat_tree, user)
+    return chat_tree, messages
+
+
+@pytest.mark.asyncio
+async def test_search_is_scoped_to_owner(init_db):
+    """同じ語を含むメッセージがあっても自分のものだけが返り、順位は他のユーザーの本文に左右されない"""
+    repo = ChatRepositoryImpl()
+    alice = UserEntity(uuid=str(uuid4()), username="alice", email="alice@example.com")
+    bob = UserEntity(uuid=str(uuid4()), username="bob", email="bob@example.com")
+    _, alice_messages = await _write_chat(repo, alice, ["デプロイの手順", "デプロイ前にデプロイ先を確認"])
+    _, bob_messages = await _write_chat(repo, bob, ["デプロイが失敗した", "ログを見る"])
+
+    hits = await repo.search_messages(alice, "デプロイ")
+    # 語を多く含むメッセージが先に来る
+    assert [h["message_uuid"] for h in hits] == [alice_messages[1].uuid, alice_messages[0].uuid]
+    scores = [h["score"] for h in hits]
+    assert [h["message_uuid"] for h in await repo.search_messages(bob, "デプロイ")] == [bob_messages[0].uuid]
+
+    # 他のユーザーが同じ語を含むメッセージを増やしても、結果も順位の値も変わらない
+    await _write_chat(repo, bob, [f"デプロイ {i} 回目" for i in range(20)])
+    hits = await repo.search_messages(alice, "デプロイ")
+    assert [h["message_uuid"] for h in hits] == [alice_messages[1].uuid, alice_messages[0].uuid]
+    assert [h["score"] for h in hits] == scores
+
+
+@pytest.mark.asyncio
+async def test_search_keys_follow_index(init_db):
+    """SQLiteでは、ハッシュから rowid を引く表をblobの作成・削除と一緒に更新し、表がなければ索引から作る"""
+    db = connections.get("default")
+    if is_postgres(db):
+        pytest.skip("SQLiteだけの表")
+    repo = ChatRepositoryImpl()
+    user = UserEntity(uuid=str(uuid4()), username="keys", email="keys@example.com")
+    chat_tree, messages = await _write_chat(repo, user, ["索引の表を確かめる", "消す返信"])
+
+    async def keys() -> set[str]:
+        _, rows = await db.execute_query(f'SELECT "hash", "search_rowid" FROM "{SEARCH_KEY_TABLE}"')
+        assert all(search_rowid(row[0]) == row[1] for row in rows)
+        return {row[0] for row in rows}
+
+    assert await keys() == {content_hash("索引の表を確かめる"), content_hash("消す返信")}
+    await repo.delete_subtree(str(chat_tree.uuid), str(messages[1].uuid), user, owner_uuid=user.uuid)
+    assert await keys() == {content_hash("索引の表を確かめる")}
+
+    # 表を追加する前に作った索引でも、最初に使うときに埋めて検索できる
+    await db.execute_script(f'DROP TABLE "{SEARCH_KEY_TABLE}"')
+    _ready.discard(db)
+    hits = await repo.search_messages(user, "索引の表")
+    assert [h["message_uuid"] for h in hits] == [messages[0].uuid]
+    assert await keys() == {content_hash("索引の表を確かめる")}
+
+
+@pytest.mark.asyncio
+async def test_search_rowid_collision_keeps_both_blobs(init_db, monkeypatch):
+    """ハッシュの先頭60ビットが重なっても、別のblobの索引を置き換えず、どちらも検索と削除ができる"""
+    db = connections.get("default")
+    if is_postgres(db):
+        pytest.skip("SQLiteだけの rowid")
+    # 全てのハッシュが同じ rowid の候補になるようにする
+    monkeypatch.setattr(search_index, "search_rowid", lambda blob_hash: 1)
+    repo = ChatRepositoryImpl()
+    user = UserEntity(uuid=str(uuid4()), username="collide", email="collide@example.com")
+    chat_tree, messages = await _write_chat(repo, user, ["衝突する最初の本文", "衝突する二番目の本文"])
+
+    _, rows = await db.execute_query(f'SELECT "search_rowid" FROM "{SEARCH_KEY_TABLE}"')
+    assert sorted(row[0] for row in rows) == [1, 2]
+    hits = await repo.search_messages(user, "衝突する")
+    assert {h["message_uuid"] for h in hits} == {messages[0].uuid, messages[1].uuid}
+
+    await repo.delete_subtree(str(chat_tree.uuid), str(messages[1].uuid), user, owner_uuid=user.uuid)
+    hits = await repo.search_messages(user, "衝突する")
+    assert [h["message_uuid"] for h in hits] == [messages[0].uuid]
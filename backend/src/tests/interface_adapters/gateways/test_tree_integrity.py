@@ -0,0 +1,124 @@
+"""チャット木の整合性の検査と修復のテスト"""
+import asyncio
+from uuid import UUID, uuid4
+
+import pytest
+from tortoise import connections
+
+from src.domain.entities.chat_tree_entity import ChatTreeEntity
+from src.domain.entities.message_entity import MessageEntity
+from src.domain.entities.user_entity import UserEntity
+from src.infrastructure.db.config import WRITE_CONNECTION
+from src.infrastructure.db.models import ChatEvent, MessageModel
+from src.interface_adapters.gateways.chat_repository import ChatRepositoryImpl
+from src.interface_adapters.gateways.tree_integrity import TreeCycleError, find_tree_issues, plan_repair
+
+
+async def _write_chat(repo: ChatRepositoryImpl, user: UserEntity, shape: dict[str, str | None]) -> tuple:
+    """{名前: 親の名前} の形のチャットを書き込む"""
+    chat_tree = ChatTreeEntity()
+    messages = {}
+    for name, parent in shape.items():
+        message = MessageEntity.create_user_message(name)
+        if parent is None:
+            chat_tree.new_chat(message, owner_uuid=user.uuid, chat_uuid=uuid4())
+        else:
+            chat_tree.add_message(messages[parent], message)
+        await repo.save_message(message, chat_tree, user)
+        messages[name] = message
+    return chat_tree, {name: UUID(str(message.uuid)) for name, message in messages.items()}
+
+
+def test_find_tree_issues_breaks_each_cycle_once():
+    """辿れない行は循環として報告し、修復では循環ごとに1行だけ付け替える"""
+    chat, root, a, b, c, d = (uuid4() for _ in range(6))
+    rows = [(root, None), (a, b), (b, a), (c, d), (d, c)]
+    issues, kept = find_tree_issues(chat, rows)
+    assert kept == root
+    assert issues.cycles == [a, b, c, d]
+    assert plan_repair(issues, rows) == [a, c]
+
+
+@pytest.mark.asyncio
+async def test_check_and_repair_chat_tree(init_db):
+    """複数のルート・親の欠落・別チャットの親・循環を見つけ、復旧用のノードの下に付け替えて読めるようにする"""
+    user = UserEntity(uuid=str(uuid4()), username="integrity", email="integrity@example.com")
+    repo = ChatRepositoryImpl()
+    chat_tree, ids = await _write_chat(repo, user, {
+        "root": None, "a": "root", "extra": "a", "orphan": "root", "cross": "root", "c1": "root", "c2": "c1",
+    })
+    _, other_ids = await _write_chat(repo, user, {"other": None})
+    chat_uuid = str(chat_tree.uuid)
+    assert (await repo.check_chat_tree(chat_uuid, user.uuid)).ok
+
+    # 壊れた状態を作る（親の欠落は外部キーの検査を止めて書き込む）
+    await MessageModel.filter(uuid=ids["extra"]).update(parent_id=None)
+    await MessageModel.filter(uuid=ids["cross"]).update(parent_id=other_ids["other"])
+    await MessageModel.filter(uuid=ids["c1"]).update(parent_id=ids["c2"])
+    db = connections.get(WRITE_CONNECTION)
+    await db.execute_script("PRAGMA foreign_keys = OFF")
+    try:
+        await MessageModel.filter(uuid=ids["orphan"]).update(parent_id=uuid4())
+    finally:
+        await db.execute_script("PRAGMA foreign_keys = ON")
+    with pytest.raises(ValueError):
+        ChatTreeEntity.restore_from_message_list(await repo.get_chat_tree_messages(chat_uuid, user))
+
+    issues = await repo.check_chat_tree(chat_uuid, user.uuid)
+    assert issues.extra_roots == [ids["extra"]]
+    assert issues.orphans == [ids["orphan"]]
+    assert issues.cross_chat == [ids["cross"]]
+    assert issues.cycles == [ids["c1"], ids["c2"]]
+    assert issues.recovery_uuid is None
+
+    issues = await repo.check_chat_tree(chat_uuid, user.uuid, repair=True)
+    assert set(issues.reparented) == {ids["extra"], ids["orphan"], ids["cross"], ids["c1"]}
+    messages = await repo.load_chat_tree_messages(chat_uuid, user)
+    restored = ChatTreeEntity.restore_from_message_list(messages)
+    assert restored.root_node.message.uuid == str(ids["root"])
+    recovery = restored.get_message_node_by_uuid(str(issues.recovery_uuid))
+    assert recovery.parent.message.uuid == str(ids["root"])
+    assert {node.message.uuid for node in recovery.children} == {str(u) for u in issues.reparented}
+    assert restored.get_message_node_by_uuid(str(ids["c2"])).parent.message.uuid == str(ids["c1"])
+
+    assert (await repo.check_chat_tree(chat_uuid, user.uuid)).ok
+    chat = await repo.get_chat_tree_info(chat_uuid, user)
+    assert chat["message_count"] == 8
+    event = await ChatEvent.get(chat_tree_id=chat_tree.uuid, seq=chat["version"])
+    assert event.type == "tree_repaired"
+    assert event.payload["recovery"]["uuid"] == str(issues.recovery_uuid)
+
+
+@pytest.mark.asyncio
+async def test_ancestor_walk_stops_on_parent_cycle(init_db):
+    """親が循環していても、祖先を辿る処理は止まる"""
+    user = UserEntity(uuid=str(uuid4()), username="cycle", email="cycle@example.com")
+    repo = ChatRepositoryImpl()
+    chat_tree, ids = await _write_chat(repo, user, {"root": None, "a": "root", "b": "a", "c": "b"})
+    chat_uuid = str(chat_tree.uuid)
+    fork_uuid = await repo.fork_chat(chat_uuid, str(ids["c"]), user)
+    # a と b が互いを親にする2行の循環を作る
+    await MessageModel.filter(uuid=ids["a"]).update(parent_id=ids["b"])
+
+    with pytest.raises(TreeCycleError):
+        await asyncio.wait_for(repo.fork_chat(chat_uuid, str(ids["c"]), user), timeout=5)
+    messages = await asyncio.wait_for(repo.get_chat_tree_messages(fork_uuid, user), timeout=5)
+    assert {m["uuid"] for m in messages} == {str(ids["a"]), str(ids["b"]), str(ids["c"])}
+
+
+
+@pytest.mark.asyncio
+async def test_delete_subtree_stops_on_parent_cycle(init_db):
+    """親が循環していても、部分木の削除は子孫を集め終えて循環ごと消す"""
+    user = UserEntity(uuid=str(uuid4()), username="cycle-delete", email="cycle-delete@example.com")
+    repo = ChatRepositoryImpl()
+    chat_tree, ids = await _write_chat(repo, user, {"root": None, "a": "root", "b": "a", "c": "b"})
+    # b と c が互いを親にする2行の循環を作る（a の子は無くなる）
+    await MessageModel.filter(uuid=ids["b"]).update(parent_id=ids["c"])
+
+    deleted = await asyncio.wait_for(
+        repo.delete_subtree(str(chat_tree.uuid), str(ids["c"]), user, owner_uuid=user.uuid), timeout=5
+    )
+    assert deleted == 2
+    remaining = await MessageModel.filter(chat_tree_id=chat_tree.uuid).values_list("uuid", flat=True)
+    assert {str(u) for u in remaining} == {str(ids["root"]), str(ids["a"])}
@@ -0,0 +1,110 @@
+"""チャット木のスナップショットのテスト"""
+from uuid import uuid4
+
+import pytest
+
+from src.domain.entities.chat_tree_entity import ChatTreeEntity
+from src.domain.entities.message_entity import MessageEntity
+from src.domain.entities.user_entity import UserEntity
+from src.infrastructure.db.models import ChatTreeDetail, ChatTreeSnapshot, MessageModel
+from src.interface_adapters.gateways.chat_repository import SNAPSHOT_COMPACT_TAIL, ChatRepositoryImpl
+from src.interface_adapters.gateways.tree_snapshot import decode_snapshot, encode_snapshot
+
+
+def _by_uuid(messages: list[dict]) -> dict[str, dict]:
+    return {m["uuid"]: m for m in messages}
+
+
+async def _write_chat(repo: ChatRepositoryImpl, user: UserEntity, turns: int) -> tuple[ChatTreeEntity, MessageEntity]:
+    chat_tree = ChatTreeEntity()
+    parent = MessageEntity.create_system_message("system")
+    chat_tree.new_chat(parent, owner_uuid=user.uuid, chat_uuid=uuid4())
+    await repo.save_message(parent, chat_tree, user)
+    parent = await _append(repo, user, chat_tree, parent, turns)
+    return chat_tree, parent
+
+
+async def _append(
+        repo: ChatRepositoryImpl,
+        user: UserEntity,
+        chat_tree: ChatTreeEntity,
+        parent: MessageEntity,
+        count: int,
+        ) -> MessageEntity:
+    for i in range(count):
+        message = MessageEntity.create_user_message(f"message {i}")
+        chat_tree.add_message(parent, message)
+        await repo.save_message(message, chat_tree, user)
+        parent = message
+    return parent
+
+
+def test_snapshot_roundtrip():
+    """親は位置で持ち、元の辞書に戻せる"""
+    entries = [
+        {"uuid": "b", "parent_uuid": "a", "role": "user", "blob_id": "h2", "content": None,
+         "user_context_id": "u", "created_at": "t2", "updated_at": "t2"},
+        {"uuid": "a", "parent_uuid": None, "role": "system", "blob_id": None, "content": "古い本文",
+         "user_context_id": "u", "created_at": "t1", "updated_at": "t1"},
+    ]
+    assert decode_snapshot(encode_snapshot(entries)) == entries
+
+
+@pytest.mark.asyncio
+async def test_load_uses_snapshot_and_tail(init_db):
+    """書き込みで作ったスナップショットに末尾の追加分を足して返し、末尾が伸びたら書き込みで書き直す"""
+    user = UserEntity(uuid=str(uuid4()), username="snap", email="snap@example.com")
+    repo = ChatRepositoryImpl()
+    chat_tree, last = await _write_chat(repo, user, turns=3)
+    chat_uuid = str(chat_tree.uuid)
+    snapshot = await ChatTreeSnapshot.get(chat_tree_id=chat_tree.uuid)
+    assert (snapshot.version, snapshot.message_count) == (1, 1)
+
+    loaded = await repo.load_chat_tree_messages(chat_uuid, user)
+    assert _by_uuid(loaded) == _by_uuid(await repo.get_chat_tree_messages(chat_uuid, user))
+
+    # 末尾が短いうちはスナップショットを書き直さない
+    last = await _append(repo, user, chat_tree, last, SNAPSHOT_COMPACT_TAIL - 4)
+    assert (await ChatTreeSnapshot.get(chat_tree_id=chat_tree.uuid)).version == 1
+
+    await _append(repo, user, chat_tree, last, 1)
+    snapshot = await ChatTreeSnapshot.get(chat_tree_id=chat_tree.uuid)
+    assert snapshot.version == 1 + SNAPSHOT_COMPACT_TAIL
+    assert snapshot.message_count == 1 + SNAPSHOT_COMPACT_TAIL
+    loaded = await repo.load_chat_tree_messages(chat_uuid, user)
+    assert _by_uuid(loaded) == _by_uuid(await repo.get_chat_tree_messages(chat_uuid, user))
+
+
+@pytest.mark.asyncio
+async def test_load_does_not_write_snapshot(init_db):
+    """読み込みはスナップショットがなくても作らず、行から組み立てる"""
+    user = UserEntity(uuid=str(uuid4()), username="snap", email="snap@example.com")
+    repo = ChatRepositoryImpl()
+    chat_tree, _ = await _write_chat(repo, user, turns=2)
+    chat_uuid = str(chat_tree.uuid)
+    await ChatTreeSnapshot.filter(chat_tree_id=chat_tree.uuid).delete()
+
+    loaded = await repo.load_chat_tree_messages(chat_uuid, user)
+
+    assert _by_uuid(loaded) == _by_uuid(await repo.get_chat_tree_messages(chat_uuid, user))
+    assert not await ChatTreeSnapshot.exists(chat_tree_id=chat_tree.uuid)
+
+
+@pytest.mark.asyncio
+async def test_load_rebuilds_stale_snapshot(init_db):
+    """seq が振り直されて末尾とスナップショットが重なった場合は行から読み、次の書き込みで作り直す"""
+    user = UserEntity(uuid=str(uuid4()), username="snap", email="snap@example.com")
+    repo = ChatRepositoryImpl()
+    chat_tree, last = await _write_chat(repo, user, turns=2)
+    chat_uuid = str(chat_tree.uuid)
+
+    # 変更ログに記録されない書き換えなので、末尾はメッセージの行から読まれる
+    await MessageModel.filter(chat_tree_id=chat_tree.uuid).update(seq=100)
+    await ChatTreeDetail.filter(uuid=chat_tree.uuid).update(version=100)
+    loaded = await repo.load_chat_tree_messages(chat_uuid, user)
+    assert _by_uuid(loaded) == _by_uuid(await repo.get_chat_tree_messages(chat_uuid, user))
+    assert (await ChatTreeSnapshot.get(chat_tree_id=chat_tree.uuid)).version == 1
+
+    await _append(repo, user, chat_tree, last, 1)
+    snapshot = await ChatTreeSnapshot.get(chat_tree_id=chat_tree.uuid)
+    assert (snapshot.version, snapshot.message_count) == (101, 4)
@@ -88,3 +88,109 @@ class TestChatTreeEntityOwnership:
         # Act & Assert
         assert tree.is_owned_by(owner_uuid) is True
         assert tree.is_owned_by("other-user") is False
+
+
+class TestChatTreeEntityBulkAdd:
+    """ChatTreeEntityの一括追加のテスト"""
+
+    @staticmethod
+    def _message(content: str) -> MessageEntity:
+        return MessageEntity(uuid=str(uuid.uuid4()), role=Role.USER, content=content)
+
+    def test_bulk_add_in_any_order(self):
+        """順序がばらばらでも、親が子より先に来る順序で追加できる"""
+        tree = ChatTreeEntity()
+        root, child, grandchild = self._message("root"), self._message("child"), self._message("grandchild")
+
+        nodes = tree.bulk_add_messages([(grandchild, child.uuid), (child, root.uuid), (root, None)])
+
+        assert [node.message for node in nodes] == [root, child, grandchild]
+        assert tree.root_node.message == root
+        assert tree.get_conversation_path(grandchild) == [root, child, grandchild]
+
+    def test_bulk_add_to_existing_tree(self):
+        """既存のツリーのノードを親にして追加できる"""
+        tree = ChatTreeEntity()
+        root = self._message("root")
+        tree.new_chat(root, owner_uuid="user-123", chat_uuid=uuid.uuid4())
+        child = self._message("child")
+
+        tree.bulk_add_messages([(child, root.uuid)])
+
+        assert tree.get_message_node_by_uuid(child.uuid).parent.message == root
+
+    @pytest.mark.parametrize("case", ["missing_parent", "cycle", "duplicate", "two_roots"])
+    def test_bulk_add_rejects_invalid_topology(self, case):
+        """親の欠落・循環・重複・複数ルートはエラーになり、ツリーは変更されない"""
+        tree = ChatTreeEntity()
+        root, a, b = self._message("root"), self._message("a"), self._message("b")
+        messages = {
+            "missing_parent": [(root, None), (a, str(uuid.uuid4()))],
+            "cycle": [(root, None), (a, b.uuid), (b, a.uuid)],
+            "duplicate": [(root, None), (a, root.uuid), (a, root.uuid)],
+            "two_roots": [(root, None), (a, None)],
+        }[case]
+
+        with pytest.raises(ValueError):
+            tree.bulk_add_messages(messages)
+        assert tree.root_node is None
+
+
+class TestChatTreeEntityBranchDiff:
+    """ChatTreeEntityの枝の比較のテスト"""
+
+    @staticmethod
+    def _message(content: str) -> MessageEntity:
+        return MessageEntity(uuid=str(uuid.uuid4()), role=Role.USER, content=content)
+
+    def _tree(self, shape: dict[str, str | None]) -> tuple[ChatTreeEntity, dict[str, MessageEntity]]:
+        """{名前: 親の名前} の形のツリー"""
+        tree = ChatTreeEntity()
+        messages = {name: self._message(name) for name in shape}
+        tree.bulk_add_messages([
+            (messages[name], messages[parent].uuid if parent else None) for name, parent in shape.items()
+        ])
+        return tree, messages
+
+    def test_diff_branches(self):
+        """分かれた位置までの共通部分の長さと、それぞれの続きを返す"""
+        tree, m = self._tree({"root": None, "q": "root", "a1": "q", "a1b": "a1", "a2": "q", "a2b": "a2", "a2c": "a2b"})
+
+        diff = tree.diff_branches(m["a1b"].uuid, m["a2c"].uuid)
+
+        assert diff.ancestor == m["q"]
+        assert diff.common_length == 2
+        assert diff.left == [m["a1"], m["a1b"]]
+        assert diff.right == [m["a2"], m["a2b"], m["a2c"]]
+        assert tree.find_common_ancestor(m["a2c"].uuid, m["a1"].uuid) == m["q"]
+
+    def test_diff_with_ancestor_and_itself(self):
+        """片方がもう片方の祖先なら、その枝の続きだけを返す"""
+        tree, m = self._tree({"root": None, "a": "root", "b": "a"})
+
+        diff = tree.diff_branches(m["root"].uuid, m["b"].uuid)
+        assert (diff.ancestor, diff.common_length, diff.left, diff.right) == (m["root"], 1, [], [m["a"], m["b"]])
+        diff = tree.diff_branches(m["b"].uuid, m["b"].uuid)
+        assert (diff.ancestor, diff.common_length, diff.left, diff.right) == (m["b"], 3, [], [])
+        with pytest.raises(ValueError):
+            tree.diff_branches(m["b"].uuid, str(uuid.uuid4()))
+
+    def test_index_follows_added_messages(self):
+        """比較の後に追加したメッセージも比較でき、深い会話でも祖先を正しく求める"""
+        tree, m = self._tree({"root": None})
+        tree.find_common_ancestor(m["root"].uuid, m["root"].uuid)
+
+        chain = [m["root"]]
+        for i in range(1000):
+            message = self._message(f"deep {i}")
+            tree.add_message(chain[-1], message)
+            chain.append(message)
+        side = self._message("side")
+        tree.bulk_add_messages([(side, chain[700].uuid)])
+
+        diff = tree.diff_branches(chain[-1].uuid, side.uuid)
+        assert diff.ancestor == chain[700]
+        assert diff.common_length == 701
+        assert diff.left == chain[701:]
+        assert diff.right == [side]
+        assert tree.find_common_ancestor(chain[513].uuid, chain[1000].uuid) == chain[513]